@@ -352,6 +352,27 @@ async function runMigrations() {
       "ADD COLUMN time_limit INT NULL AFTER difficulty"
     );
 
+    // Key chuẩn hóa của đáp án (utils/answer-keys.js), dòng cũ: chạy scripts/answer_keys.py để backfill
+    await ensureColumnExists('questions', 'answer_key', "ADD COLUMN answer_key TEXT NULL AFTER answer");
+    await ensureColumnExists('questions', 'answer_key_folded', "ADD COLUMN answer_key_folded TEXT NULL AFTER answer_key");
+
+    // Import lại ngân hàng câu hỏi (scripts/question_sync.py): câu hỏi bị bỏ khỏi file chỉ bị xóa mềm,
+    // question_bank_rows giữ hash từng dòng của lần import trước theo bank_id
+    await ensureColumnExists('questions', 'deleted_at', "ADD COLUMN deleted_at TIMESTAMP NULL DEFAULT NULL");
+    await pool.query(`
+      CREATE TABLE IF NOT EXISTS question_bank_rows (
+        bank_id VARCHAR(100) NOT NULL,
+        row_key CHAR(64) NOT NULL,
+        question_id INT NOT NULL,
+        content_hash CHAR(64) NOT NULL,
+        deleted_at TIMESTAMP NULL DEFAULT NULL,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        PRIMARY KEY (bank_id, row_key),
+        INDEX idx_question_bank_rows_question_id (question_id),
+        FOREIGN KEY (question_id) REFERENCES questions(id) ON DELETE CASCADE
+      )
+    `);
+
     // ===== MIGRATION CHO GAME_MODE =====
     // Đảm bảo cột game_mode tồn tại trong game_sessions
     await ensureColumnExists(
@@ -437,6 +458,10 @@ async function runMigrations() {
         FOREIGN KEY (question_id) REFERENCES questions(id) ON DELETE CASCADE
       )
     `);
+    for (const table of ['answers', 'tangtoc_answers']) {
+      await ensureColumnExists(table, 'answer_key', "ADD COLUMN answer_key TEXT NULL AFTER answer");
+      await ensureColumnExists(table, 'answer_key_folded', "ADD COLUMN answer_key_folded TEXT NULL AFTER answer_key");
+    }
     // Indexes cho tangtoc_answers
     try {
       await pool.query('CREATE INDEX idx_tangtoc_answers_question_id ON tangtoc_answers(question_id)');
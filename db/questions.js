@@ -1,9 +1,10 @@
 import { pool } from './index.js';
 import fs from 'fs';
 import { parse } from 'csv-parse/sync';
+import { answerKey, foldedAnswerKey, isAcceptedAnswer } from '../utils/answer-keys.js';
 
-// Thêm câu hỏi mới
-async function createQuestion(questionData) {
+// Thêm câu hỏi mới (db: pool hoặc connection đang mở transaction)
+async function createQuestion(questionData, db = pool) {
     try {
         const { text, answer, category = 'khoidong', difficulty = 'medium', createdBy = null } = questionData;
         
@@ -12,11 +13,14 @@ async function createQuestion(questionData) {
         }
 
         const query = `
-            INSERT INTO questions (text, answer, category, difficulty, created_by, created_at) 
-            VALUES (?, ?, ?, ?, ?, NOW())
+            INSERT INTO questions (text, answer, answer_key, answer_key_folded, category, difficulty, created_by, created_at) 
+            VALUES (?, ?, ?, ?, ?, ?, ?, NOW())
         `;
         
-        const [result] = await pool.query(query, [text, answer, category, difficulty, createdBy]);
+        const [result] = await db.query(query, [
+            text, answer, questionData.answerKey || answerKey(answer), questionData.answerKeyFolded || foldedAnswerKey(answer),
+            category, difficulty, createdBy
+        ]);
         
         console.log('Đã tạo câu hỏi mới với ID:', result.insertId);
         
@@ -35,6 +39,11 @@ async function createQuestion(questionData) {
     }
 }
 
+// Đáp án bổ sung kèm key đã tính sẵn (xem utils/answer-keys.js)
+function toAcceptedAnswer(row) {
+  return { id: row.id, answer: row.answer, answerKey: row.answer_key, answerKeyFolded: row.answer_key_folded };
+}
+
 // Lấy câu hỏi theo ID
 async function getQuestionById(id) {
   try {
@@ -43,13 +52,15 @@ async function getQuestionById(id) {
     
     const question = rows[0];
     // Lấy các đáp án bổ sung
-    const [answerRows] = await pool.query('SELECT id, answer FROM answers WHERE question_id = ?', [id]);
-    const acceptedAnswers = answerRows.map(r => ({ id: r.id, answer: r.answer }));
+    const [answerRows] = await pool.query('SELECT id, answer, answer_key, answer_key_folded FROM answers WHERE question_id = ?', [id]);
+    const acceptedAnswers = answerRows.map(toAcceptedAnswer);
 
     return {
       id: question.id,
       text: question.text,
       answer: question.answer,
+      answerKey: question.answer_key,
+      answerKeyFolded: question.answer_key_folded,
       acceptedAnswers,
       category: question.category,
       difficulty: question.difficulty,
@@ -65,20 +76,22 @@ async function getQuestionById(id) {
 // Lấy danh sách câu hỏi
 async function getAllQuestions() {
   try {
-    const [rows] = await pool.query('SELECT * FROM questions');
+    const [rows] = await pool.query('SELECT * FROM questions WHERE deleted_at IS NULL');
     const ids = rows.map(q => q.id);
     let answersMap = new Map();
     if (ids.length > 0) {
-      const [ans] = await pool.query(`SELECT id, question_id, answer FROM answers WHERE question_id IN (${ids.map(() => '?').join(',')})`, ids);
+      const [ans] = await pool.query(`SELECT id, question_id, answer, answer_key, answer_key_folded FROM answers WHERE question_id IN (${ids.map(() => '?').join(',')})`, ids);
       for (const r of ans) {
         if (!answersMap.has(r.question_id)) answersMap.set(r.question_id, []);
-        answersMap.get(r.question_id).push({ id: r.id, answer: r.answer });
+        answersMap.get(r.question_id).push(toAcceptedAnswer(r));
       }
     }
     return rows.map(question => ({
       id: question.id,
       text: question.text,
       answer: question.answer,
+      answerKey: question.answer_key,
+      answerKeyFolded: question.answer_key_folded,
       acceptedAnswers: answersMap.get(question.id) || [],
       category: question.category,
       difficulty: question.difficulty,
@@ -94,16 +107,17 @@ async function getAllQuestions() {
 // Lấy câu hỏi ngẫu nhiên - mặc định chỉ lấy "khoidong" cho game  
 async function getRandomQuestions(count = 12, category = 'khoidong') {
   try {
-    let query = 'SELECT * FROM questions';
+    // Câu hỏi đã bị xóa mềm khi import lại ngân hàng câu hỏi (scripts/question_sync.py) không được chọn
+    let query = 'SELECT * FROM questions WHERE deleted_at IS NULL';
     const params = [];
     
     // Lọc theo category (hỗ trợ legacy khi Khoi Dong lưu trống hoặc NULL)
     if (category) {
       if (category === 'khoidong') {
-        query += ' WHERE (category = ? OR category IS NULL OR category = "")';
+        query += ' AND (category = ? OR category IS NULL OR category = "")';
         params.push('khoidong');
       } else {
-        query += ' WHERE category = ?';
+        query += ' AND category = ?';
         params.push(category);
       }
     }
@@ -117,10 +131,10 @@ async function getRandomQuestions(count = 12, category = 'khoidong') {
     const ids = rows.map(q => q.id);
     let answersMap = new Map();
     if (ids.length > 0) {
-      const [ans] = await pool.query(`SELECT id, question_id, answer FROM answers WHERE question_id IN (${ids.map(() => '?').join(',')})`, ids);
+      const [ans] = await pool.query(`SELECT id, question_id, answer, answer_key, answer_key_folded FROM answers WHERE question_id IN (${ids.map(() => '?').join(',')})`, ids);
       for (const r of ans) {
         if (!answersMap.has(r.question_id)) answersMap.set(r.question_id, []);
-        answersMap.get(r.question_id).push({ id: r.id, answer: r.answer });
+        answersMap.get(r.question_id).push(toAcceptedAnswer(r));
       }
     }
     
@@ -128,6 +142,8 @@ async function getRandomQuestions(count = 12, category = 'khoidong') {
       id: question.id,
       text: question.text,
       answer: question.answer,
+      answerKey: question.answer_key,
+      answerKeyFolded: question.answer_key_folded,
       acceptedAnswers: answersMap.get(question.id) || [],
       category: question.category,
       difficulty: question.difficulty
@@ -139,28 +155,14 @@ async function getRandomQuestions(count = 12, category = 'khoidong') {
 }
 
 // Kiểm tra câu trả lời
-function normalize(text) {
-  return (text || '').toString().trim().toLowerCase();
-}
-
-// Hỗ trợ kiểm tra với nhiều đáp án chấp nhận
+// Hỗ trợ kiểm tra với nhiều đáp án chấp nhận.
+// Truyền cả câu hỏi (kết quả của getRandomQuestions/getQuestionById) thay cho correctAnswer để dùng
+// key đã tính sẵn và Set được cache theo câu hỏi; truyền đáp án rời thì Set được dựng cho lần gọi này
 function checkAnswer(userAnswer, correctAnswer, acceptedAnswers = []) {
-  const normalizedUserAnswer = normalize(userAnswer);
-  const normalizedCorrectAnswer = normalize(correctAnswer);
-  
-  // Kiểm tra với đáp án chính
-  if (normalizedUserAnswer === normalizedCorrectAnswer) return true;
-  
-  // Kiểm tra với các đáp án bổ sung
-  if (Array.isArray(acceptedAnswers)) {
-    for (const a of acceptedAnswers) {
-      // Xử lý cả trường hợp a là string và a là object {id, answer}
-      const answerText = typeof a === 'string' ? a : (a && a.answer ? a.answer : '');
-      if (normalize(answerText) === normalizedUserAnswer) return true;
-    }
+  if (correctAnswer && typeof correctAnswer === 'object') {
+    return isAcceptedAnswer(userAnswer, correctAnswer);
   }
-  
-  return false;
+  return isAcceptedAnswer(userAnswer, { answer: correctAnswer, acceptedAnswers });
 }
 
 // Nhập câu hỏi từ file CSV hoặc TXT (tab-separated)
@@ -460,8 +462,8 @@ async function updateQuestion(id, question) {
     const { text, answer, category, difficulty, acceptedAnswers } = question;
     
     const [result] = await pool.query(
-      'UPDATE questions SET text = ?, answer = ?, category = ?, difficulty = ? WHERE id = ?',
-      [text, answer, category, difficulty, id]
+      'UPDATE questions SET text = ?, answer = ?, answer_key = ?, answer_key_folded = ?, category = ?, difficulty = ? WHERE id = ?',
+      [text, answer, answerKey(answer), foldedAnswerKey(answer), category, difficulty, id]
     );
     // Cập nhật accepted answers nếu truyền vào
     if (Array.isArray(acceptedAnswers)) {
@@ -471,10 +473,10 @@ async function updateQuestion(id, question) {
         const values = acceptedAnswers
           .map(a => (typeof a === 'string' ? a : a?.answer))
           .filter(a => a && a.toString().trim() !== '')
-          .map(a => [id, a.toString().trim()]);
+          .map(a => [id, a.toString().trim(), answerKey(a), foldedAnswerKey(a)]);
         if (values.length > 0) {
-          const placeholders = values.map(() => '(?, ?)').join(',');
-          await pool.query(`INSERT INTO answers (question_id, answer) VALUES ${placeholders}`, values.flat());
+          const placeholders = values.map(() => '(?, ?, ?, ?)').join(',');
+          await pool.query(`INSERT INTO answers (question_id, answer, answer_key, answer_key_folded) VALUES ${placeholders}`, values.flat());
         }
       }
     }
@@ -490,7 +492,10 @@ async function updateQuestion(id, question) {
 async function addAcceptedAnswer(questionId, answer) {
   const a = (answer || '').toString().trim();
   if (!a) return null;
-  const [res] = await pool.query('INSERT INTO answers (question_id, answer) VALUES (?, ?)', [questionId, a]);
+  const [res] = await pool.query(
+    'INSERT INTO answers (question_id, answer, answer_key, answer_key_folded) VALUES (?, ?, ?, ?)',
+    [questionId, a, answerKey(a), foldedAnswerKey(a)]
+  );
   return { id: res.insertId, questionId, answer: a };
 }
 
@@ -1,4 +1,5 @@
 import { pool } from './index.js';
+import { answerKey, foldedAnswerKey } from '../utils/answer-keys.js';
 
 export async function createQuestionReport({ userId, sessionId = null, roomId = null, mode, questionId = null, questionText, correctAnswer, userAnswer = null, reportText, acceptedAnswers = null }) {
   const [result] = await pool.query(
@@ -94,7 +95,11 @@ export async function approveAnswerSuggestions({ suggestionIds, adminId = null,
   let inserted = 0;
   for (const s of rows) {
     if (!s || !s.question_id || !s.suggested_answer) continue;
-    await pool.query(`INSERT INTO answers (question_id, answer) VALUES (?, ?)`, [s.question_id, s.suggested_answer.toString().trim()]);
+    const answer = s.suggested_answer.toString().trim();
+    await pool.query(
+      `INSERT INTO answers (question_id, answer, answer_key, answer_key_folded) VALUES (?, ?, ?, ?)`,
+      [s.question_id, answer, answerKey(answer), foldedAnswerKey(answer)]
+    );
     await pool.query(`UPDATE answer_suggestions SET status = 'approved' WHERE id = ?`, [s.id]);
     await pool.query(
       `INSERT INTO answer_suggestion_logs (suggestion_id, admin_id, action, old_value, new_value, note) VALUES (?, ?, 'approve', NULL, ?, ?)`,
@@ -2,10 +2,26 @@ import express from 'express';
 import path from 'path';
 import fs from 'fs';
 import multer from 'multer';
-import { exec } from 'child_process';
-import { promisify } from 'util';
+import { spawn } from 'child_process';
 import { fileURLToPath } from 'url';
+import { pool } from '../db/index.js';
 import { isUserAdmin } from '../db/users.js';
+import { isParserDaemonEnabled, callParserDaemon } from '../utils/parser-daemon.js';
+import {
+    PARSER_PROGRESS_ARGS,
+    PARSER_PROGRESS_STDIO,
+    PARSER_STREAM_THRESHOLD,
+    logParserStages,
+    streamPythonParser,
+    watchParserProgress,
+    writeParserInput
+} from '../utils/parser-stream.js';
+import {
+    parserUploadStorage,
+    parserUploadInput,
+    parserDaemonInput,
+    removeParserUpload
+} from '../utils/parser-upload.js';
 import { 
     createQuestion, 
     getAllQuestions, 
@@ -18,8 +34,6 @@ import {
     getRandomQuestions
 } from '../db/questions.js';
 
-const execAsync = promisify(exec);
-
 const router = express.Router();
 const __filename = fileURLToPath(import.meta.url);
 const __dirname = path.dirname(__filename);
@@ -27,45 +41,107 @@ const __dirname = path.dirname(__filename);
 // Middleware để parse JSON body
 router.use(express.json());
 
-// Cấu hình multer cho file upload
-const storage = multer.diskStorage({
-  destination: function (req, file, cb) {
-    cb(null, 'uploads/');
-  },
-  filename: function (req, file, cb) {
-    const uniqueSuffix = Date.now() + '-' + Math.round(Math.random() * 1E9);
-    cb(null, file.fieldname + '-' + uniqueSuffix + path.extname(file.originalname));
-  }
-});
+// Extension của file upload -> --input-format của parser (input '-' = stdin)
+const PARSER_INPUT_FORMATS = { '.csv': 'csv', '.txt': 'csv', '.xlsx': 'xlsx', '.xls': 'xls' };
 
-const upload = multer({ 
-  storage: storage,
-  fileFilter: function (req, file, cb) {
-    // Cho phép CSV, TXT và Excel files
-    if (file.mimetype === 'text/csv' || 
-        file.mimetype === 'text/plain' || 
-        file.mimetype === 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet' ||
-        file.mimetype === 'application/vnd.ms-excel' ||
-        file.originalname.endsWith('.csv') || 
-        file.originalname.endsWith('.txt') ||
-        file.originalname.endsWith('.xlsx') ||
-        file.originalname.endsWith('.xls')) {
-      cb(null, true);
+function parserInputFormat(originalName) {
+    return PARSER_INPUT_FORMATS[path.extname(originalName).toLowerCase()] || null;
+}
+
+// Cho phép CSV, TXT và Excel files (format của parser theo extension)
+function uploadFileFilter(req, file, cb) {
+    if (parserInputFormat(file.originalname)) {
+        cb(null, true);
     } else {
-      cb(new Error('Chỉ cho phép file CSV, TXT hoặc Excel'), false);
+        cb(new Error('Chỉ cho phép file CSV, TXT hoặc Excel'), false);
     }
-  }
+}
+
+// Cấu hình multer cho file upload: file nhỏ giữ trong RAM, file lớn được ghi dần ra file tạm
+// (utils/parser-upload.js), cả hai được đưa vào stdin của parser
+const upload = multer({
+  storage: parserUploadStorage(),
+  fileFilter: uploadFileFilter
+});
+
+// Route test import (importQuestionsFromCSV đọc file theo đường dẫn) vẫn lưu file upload ra đĩa
+const diskUpload = multer({
+  storage: multer.diskStorage({
+    destination: function (req, file, cb) {
+      cb(null, 'uploads/');
+    },
+    filename: function (req, file, cb) {
+      const uniqueSuffix = Date.now() + '-' + Math.round(Math.random() * 1E9);
+      cb(null, file.fieldname + '-' + uniqueSuffix + path.extname(file.originalname));
+    }
+  }),
+  fileFilter: uploadFileFilter
 });
 
-// Parse file using Python tool
-async function parseWithPython(filePath) {
+// File Excel được parse toàn bộ các sheet, mỗi sheet ứng với một category theo tên sheet
+function isExcelFormat(inputFormat) {
+    return ['xlsx', 'xls'].includes(inputFormat);
+}
+
+// PARSER_DIRECT_LOAD=1: parser ghi thẳng vào database (--load, INSERT theo batch) thay vì trả về từng câu hỏi
+const PARSER_DIRECT_LOAD = process.env.PARSER_DIRECT_LOAD === '1';
+
+// PARSER_DEDUP=flag|skip: parser đánh dấu/bỏ câu hỏi trùng trong file, PARSER_DEDUP_DB=1: so cả với database
+const PARSER_DEDUP = ['flag', 'skip'].includes(process.env.PARSER_DEDUP) ? process.env.PARSER_DEDUP : null;
+const PARSER_DEDUP_DB = process.env.PARSER_DEDUP_DB === '1';
+const PARSER_DEDUP_ARGS = PARSER_DEDUP ? ['--dedup', PARSER_DEDUP, ...(PARSER_DEDUP_DB ? ['--dedup-db'] : [])] : [];
+
+// bankId (trường bankId của form upload): import lại ngân hàng câu hỏi, parser chỉ ghi các dòng thay đổi (--sync).
+// Chỉ nhận chữ, số, '.', '_', '-' vì bankId được đưa vào command line
+const BANK_ID_PATTERN = /^[\w.-]{1,100}$/;
+
+// Parse file using Python tool (options.load: ghi thẳng vào database, options.sync: bankId cho --sync,
+// options.createdBy: ID người tạo)
+// file: file upload của parserUploadStorage, nội dung được đưa vào stdin của parser (input '-')
+async function parseWithPython(file, options = {}) {
+    const inputFormat = parserInputFormat(file.originalname);
+    const allSheets = isExcelFormat(inputFormat);
+
+    if (isParserDaemonEnabled()) {
+        try {
+            const params = parserDaemonInput(file, inputFormat);
+            if (allSheets) {
+                params.sheets = 'all';
+            }
+            if (options.load) {
+                Object.assign(params, { load: true, created_by: options.createdBy });
+            }
+            if (options.sync) {
+                Object.assign(params, { sync: options.sync, created_by: options.createdBy });
+            }
+            if (PARSER_DEDUP) {
+                Object.assign(params, { dedup: PARSER_DEDUP, dedup_db: PARSER_DEDUP_DB });
+            }
+            const result = await callParserDaemon('parse_file', params);
+            console.log('Python parsing result (daemon):', { success: result.success, total: result.total, skipped: result.skipped });
+            return result;
+        } catch (error) {
+            if (!error.daemonUnavailable) {
+                console.error('Python parsing failed:', error);
+                return {
+                    success: false,
+                    error: `Python parsing failed: ${error.message}`
+                };
+            }
+            console.error('Parser daemon không khả dụng, chuyển sang chạy python3 trực tiếp:', error.message);
+        }
+    }
+
     try {
         const scriptPath = path.join(__dirname, '../scripts/csv_parser.py');
-        const command = `python3 "${scriptPath}" "${filePath}"`;
+        const createdByArgs = options.createdBy ? ['--created-by', String(parseInt(options.createdBy, 10))] : [];
+        const loadArgs = options.load ? ['--load', ...createdByArgs] : options.sync ? ['--sync', String(options.sync), ...createdByArgs] : [];
+        const args = [scriptPath, '-', '--input-format', inputFormat, ...(allSheets ? ['--sheets', 'all'] : []),
+            ...loadArgs, ...PARSER_DEDUP_ARGS];
         
-        console.log('Executing Python parser:', command);
+        console.log('Executing Python parser:', ['python3', ...args].join(' '), `(${file.size} bytes qua stdin)`);
         
-        const { stdout, stderr } = await execAsync(command);
+        const { stdout, stderr } = await runPythonParser(args, parserUploadInput(file));
         
         if (stderr) {
             console.log('Python stderr:', stderr);
@@ -84,6 +160,91 @@ async function parseWithPython(filePath) {
     }
 }
 
+// Chạy csv_parser.py (không stream) với input (Buffer / Readable) ghi vào stdin, trả về { stdout, stderr } khi parser
+// thoát với code 0. Parser không có tiến độ quá PARSER_STALL_TIMEOUT_MS thì bị dừng
+function runPythonParser(args, input) {
+    return new Promise((resolve, reject) => {
+        const python = spawn('python3', [...args, ...PARSER_PROGRESS_ARGS], { stdio: PARSER_PROGRESS_STDIO });
+        const watch = watchParserProgress(python, { onProgress: logParserStages('Parser CSV') });
+        writeParserInput(python, input);
+        
+        let stdout = '';
+        let stderr = '';
+        python.stdout.on('data', (data) => {
+            stdout += data.toString();
+        });
+        python.stderr.on('data', (data) => {
+            stderr += data.toString();
+        });
+        
+        python.on('error', reject);
+        python.on('close', (code) => {
+            if (watch.stalled) {
+                reject(new Error(watch.error()));
+            } else if (code !== 0) {
+                reject(new Error(`Parser thoát với code ${code}: ${stderr}`));
+            } else {
+                resolve({ stdout, stderr });
+            }
+        });
+    });
+}
+
+// Parse file lớn ở chế độ --stream: onQuestion được gọi cho từng câu hỏi ngay khi parse xong
+// file: file upload của parserUploadStorage, nội dung được đưa vào stdin của parser
+async function parseWithPythonStream(file, onQuestion) {
+    try {
+        const scriptPath = path.join(__dirname, '../scripts/csv_parser.py');
+        console.log('Executing Python parser (stream):', scriptPath, file.originalname, `(${file.size} bytes qua stdin)`);
+        
+        const { code, stats, error, stderr } = await streamPythonParser(scriptPath, '-', onQuestion, {
+            args: ['--input-format', parserInputFormat(file.originalname), ...PARSER_DEDUP_ARGS],
+            input: parserUploadInput(file),
+            onProgress: logParserStages('Parser CSV (stream)')
+        });
+        
+        if (stderr) {
+            console.log('Python stderr:', stderr);
+        }
+        
+        if (error || !stats || code !== 0) {
+            return {
+                success: false,
+                error: error ? error.error : stats ? `Python parser thoát với code ${code}` : 'Python parser không trả về thống kê'
+            };
+        }
+        
+        return stats;
+    } catch (error) {
+        console.error('Python parsing failed:', error);
+        return {
+            success: false,
+            error: `Python parsing failed: ${error.message}`
+        };
+    }
+}
+
+// Import theo stream trong một transaction: saveQuestion(questionData, connection) INSERT ngay khi parse xong
+// từng câu, parser lỗi giữa chừng (record error, exit code khác 0) thì rollback, không để lại import dở dang
+async function importWithPythonStream(file, saveQuestion) {
+    const connection = await pool.getConnection();
+    try {
+        await connection.beginTransaction();
+        const parseResult = await parseWithPythonStream(file, (questionData) => saveQuestion(questionData, connection));
+        if (parseResult.success) {
+            await connection.commit();
+        } else {
+            await connection.rollback();
+        }
+        return parseResult;
+    } catch (error) {
+        await connection.rollback();
+        throw error;
+    } finally {
+        connection.release();
+    }
+}
+
 // Middleware để kiểm tra quyền admin
 async function checkAdmin(req, res, next) {
     if (!req.session.user) {
@@ -297,86 +458,97 @@ router.delete('/api/questions', checkAdmin, async (req, res) => {
 router.post('/api/questions/import', checkAdmin, upload.single('csvFile'), async (req, res) => {
     try {
         console.log('Upload request received');
-        console.log('Request file:', req.file);
         console.log('Request body:', req.body);
 
         if (!req.file) {
             return res.status(400).json({ success: false, error: 'Vui lòng chọn một file để nhập' });
         }
 
-        console.log('File uploaded successfully:', req.file.filename);
-        const filePath = req.file.path;
-
-        // Sử dụng Python tool để parse file
-        const parseResult = await parseWithPython(filePath);
-        
-        if (!parseResult.success) {
-            // Xóa file nếu parse lỗi
-            fs.unlink(filePath, (unlinkError) => {
-                if (unlinkError) {
-                    console.error('Lỗi khi xóa file sau khi lỗi:', unlinkError);
-                }
-            });
-            
-            return res.status(400).json({
-                success: false,
-                error: parseResult.error
-            });
-        }
+        console.log('File uploaded successfully:', req.file.originalname, `(${req.file.size} bytes)`);
 
         // Lưu các câu hỏi vào database
         const savedQuestions = [];
         let errorCount = 0;
         
-        for (const questionData of parseResult.questions) {
+        const saveQuestion = async (questionData, db = pool) => {
             try {
                 const question = await createQuestion({
                     text: questionData.text,
                     answer: questionData.answer,
+                    category: questionData.category || undefined,
                     createdBy: req.session.user.id
-                });
+                }, db);
                 savedQuestions.push(question);
             } catch (saveError) {
                 console.error('Lỗi khi lưu câu hỏi:', saveError);
                 errorCount++;
             }
+        };
+        
+        // Sử dụng Python tool để parse file (file CSV/TXT lớn: stream và lưu từng câu ngay khi parse xong trong một transaction,
+        // file Excel: parse mọi sheet bằng reader read-only, PARSER_DIRECT_LOAD: parser tự ghi vào database)
+        const bankId = typeof req.body.bankId === 'string' && req.body.bankId.trim() ? req.body.bankId.trim() : null;
+        if (bankId && !BANK_ID_PATTERN.test(bankId)) {
+            return res.status(400).json({ success: false, error: 'bankId chỉ gồm chữ, số, ".", "_", "-" (tối đa 100 ký tự)' });
+        }
+        const directLoad = PARSER_DIRECT_LOAD && !bankId;
+        const streamed = !directLoad && !bankId && req.file.size >= PARSER_STREAM_THRESHOLD
+            && !isExcelFormat(parserInputFormat(req.file.originalname));
+        const parseResult = streamed
+            ? await importWithPythonStream(req.file, saveQuestion)
+            : await parseWithPython(req.file, { load: directLoad, sync: bankId, createdBy: req.session.user.id });
+        
+        if (!parseResult.success) {
+            return res.status(400).json({
+                success: false,
+                error: parseResult.error
+            });
         }
 
-        // Xóa file sau khi import
-        fs.unlink(filePath, (unlinkError) => {
-            if (unlinkError) {
-                console.error('Lỗi khi xóa file sau khi import:', unlinkError);
+        if (!streamed && !directLoad && !bankId) {
+            for (const questionData of parseResult.questions) {
+                await saveQuestion(questionData);
             }
-        });
+        }
+        let savedCount = savedQuestions.length;
+        if (directLoad) {
+            savedCount = parseResult.load.questions.inserted;
+        } else if (bankId) {
+            savedCount = parseResult.sync.inserted + parseResult.sync.updated;
+        }
+        if (parseResult.file_info) {
+            // Parser đọc từ stdin nên không biết tên file
+            parseResult.file_info.name = req.file.originalname;
+        }
 
         res.json({
             success: true,
-            count: savedQuestions.length,
+            count: savedCount,
             total: parseResult.total,
             skipped: parseResult.skipped,
             errors: errorCount,
-            message: `Đã nhập thành công ${savedQuestions.length}/${parseResult.total} câu hỏi.${parseResult.skipped > 0 ? ` Bỏ qua ${parseResult.skipped} dòng.` : ''}`,
+            message: `Đã nhập thành công ${savedCount}/${parseResult.total} câu hỏi.${parseResult.skipped > 0 ? ` Bỏ qua ${parseResult.skipped} dòng.` : ''}`,
             questions: savedQuestions,
             parseInfo: parseResult.file_info,
+            sheets: parseResult.sheets,
+            load: parseResult.load,
+            sync: parseResult.sync,
+            duplicates: parseResult.duplicates,
             skippedDetails: parseResult.skipped_details
         });
 
     } catch (error) {
         console.error('Lỗi khi xử lý upload:', error);
         
-        // Xóa file nếu có lỗi
-        if (req.file) {
-            fs.unlink(req.file.path, (unlinkError) => {
-                if (unlinkError) {
-                    console.error('Lỗi khi xóa file sau khi lỗi:', unlinkError);
-                }
-            });
-        }
-        
         res.status(500).json({
             success: false,
             error: 'Lỗi khi xử lý file: ' + error.message
         });
+    } finally {
+        // File upload lớn được ghi ra file tạm, xóa sau khi parse xong
+        removeParserUpload(req.file).catch((unlinkError) => {
+            console.error('Lỗi khi xóa file tạm của upload:', unlinkError);
+        });
     }
 });
 
@@ -445,7 +617,7 @@ router.get('/login-logs', async (req, res) => {
 });
 
 // Route test tạm thời để test file import (không cần admin)
-router.post('/test/import', upload.single('csvFile'), async (req, res) => {
+router.post('/test/import', diskUpload.single('csvFile'), async (req, res) => {
     try {
         console.log('Test upload request received');
         console.log('Request file:', req.file);
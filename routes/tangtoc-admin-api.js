@@ -1,6 +1,7 @@
 import express from 'express';
 import { pool } from '../db/index.js';
 import { isUserAdmin } from '../db/users.js';
+import { answerKey, foldedAnswerKey } from '../utils/answer-keys.js';
 
 console.log('🚀 Loading tangtoc-admin-api.js routes...');
 
@@ -406,8 +407,8 @@ router.post('/tangtoc/questions/:id/answers', checkAdmin, async (req, res) => {
     
       // Add answer
       await pool.execute(
-        'INSERT INTO tangtoc_answers (question_id, answer) VALUES (?, ?)',
-        [id, answer.trim()]
+        'INSERT INTO tangtoc_answers (question_id, answer, answer_key, answer_key_folded) VALUES (?, ?, ?, ?)',
+        [id, answer.trim(), answerKey(answer), foldedAnswerKey(answer)]
       );
     
     res.json({ success: true, message: 'Đã thêm đáp án phụ thành công' });
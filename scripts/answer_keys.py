@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Key chuẩn hóa của đáp án, tính sẵn lúc import để lúc chấm chỉ cần tra trong set
+(checkAnswer trong db/questions.js, isAnswerCorrect trong socket/kdtangtoc.js, xem utils/answer-keys.js)
+
+    answer_key         NFC, viết thường, gộp khoảng trắng        "Hà  Nội " -> "hà nội"
+    answer_key_folded  answer_key bỏ dấu thanh/dấu chữ, đ -> d   "Hà  Nội " -> "ha noi"
+
+Chạy trực tiếp để backfill key cho các dòng đã có trong database (theo chunk, mỗi chunk một transaction):
+    python3 answer_keys.py [--tables questions answers tangtoc_answers] [--chunk-size 1000] [--all]
+"""
+
+import re
+import sys
+import json
+import time
+import argparse
+import unicodedata
+
+DEFAULT_CHUNK_SIZE = 1000
+BACKFILL_TABLES = ['questions', 'answers', 'tangtoc_answers']
+
+# Khoảng trắng được gộp trong answer_key: cùng tập ký tự với ANSWER_WHITESPACE của utils/answer-keys.js
+# (str.split() và /\s+/ của JS tách theo hai tập khác nhau, vd. \x1c-\x1f, \x85, \ufeff)
+WHITESPACE = re.compile(r'[ \t\n\r\f\v\u00a0\u1680\u2000-\u200b\u2028\u2029\u202f\u205f\u3000]+')
+
+
+def _fold_table():
+    """Bảng translate bỏ dấu cho các chữ Latin (gồm toàn bộ chữ tiếng Việt dựng sẵn) và dấu rời"""
+    table = {ord('đ'): 'd', ord('Đ'): 'D'}
+    for start, end in [(0x00C0, 0x0250), (0x1E00, 0x1F00)]:
+        for code in range(start, end):
+            base = ''.join(c for c in unicodedata.normalize('NFD', chr(code)) if not unicodedata.combining(c))
+            if base != chr(code):
+                table[code] = base
+    for code in range(0x0300, 0x0370):
+        table[code] = None
+    return table
+
+
+FOLD_TABLE = _fold_table()
+
+
+def answer_key(text):
+    """Key so đáp án: NFC, viết thường, gộp khoảng trắng"""
+    if text is None:
+        return ''
+    text = str(text)
+    if not text.isascii():
+        text = unicodedata.normalize('NFC', text)
+    return WHITESPACE.sub(' ', text.lower()).strip(' ')
+
+
+def fold_key(key):
+    """Bỏ dấu một answer_key (text ASCII không có dấu nên giữ nguyên, không phải translate)"""
+    return key if key.isascii() else key.translate(FOLD_TABLE)
+
+
+def answer_key_folded(text):
+    """answer_key đã bỏ dấu (chấm không phân biệt dấu)"""
+    return fold_key(answer_key(text))
+
+
+def add_answer_keys(question):
+    """Thêm answer_key / answer_key_folded (và key của accepted_answers nếu có) vào một câu hỏi"""
+    key = answer_key(question['answer'])
+    question['answer_key'] = key
+    question['answer_key_folded'] = fold_key(key)
+    accepted = question.get('accepted_answers')
+    if accepted:
+        keys = [answer_key(answer) for answer in accepted]
+        question['accepted_answer_keys'] = keys
+        question['accepted_answer_keys_folded'] = [fold_key(key) for key in keys]
+    return question
+
+
+def backfill_table(connection, table, chunk_size=DEFAULT_CHUNK_SIZE, recompute=False):
+    """
+    Tính answer_key cho các dòng của table theo chunk (duyệt theo id nên không phải OFFSET).
+    recompute: tính lại cả các dòng đã có key. Trả về số dòng đã cập nhật
+    """
+    where = "" if recompute else " AND answer_key IS NULL"
+    cursor = connection.cursor()
+    last_id = 0
+    updated = 0
+    try:
+        while True:
+            cursor.execute(f"SELECT id, answer FROM {table} WHERE id > %s{where} ORDER BY id LIMIT %s",
+                           (last_id, chunk_size))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            values = []
+            for row_id, answer in rows:
+                key = answer_key(answer)
+                values.append((key, fold_key(key), row_id))
+            cursor.executemany(f"UPDATE {table} SET answer_key = %s, answer_key_folded = %s WHERE id = %s", values)
+            connection.commit()
+            updated += len(rows)
+            last_id = rows[-1][0]
+    finally:
+        cursor.close()
+    return updated
+
+
+def backfill(tables=None, chunk_size=DEFAULT_CHUNK_SIZE, recompute=False):
+    from question_loader import connect
+
+    started = time.perf_counter()
+    result = {'success': True, 'tables': {}}
+    connection = connect()
+    try:
+        for table in tables or BACKFILL_TABLES:
+            table_started = time.perf_counter()
+            updated = backfill_table(connection, table, chunk_size, recompute)
+            result['tables'][table] = {
+                'updated': updated,
+                'elapsed_ms': round((time.perf_counter() - table_started) * 1000, 3)
+            }
+    finally:
+        connection.close()
+    result['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 3)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Backfill answer_key / answer_key_folded cho đáp án đã có trong database')
+    parser.add_argument('--tables', nargs='+', choices=BACKFILL_TABLES, default=BACKFILL_TABLES,
+                       help='Các bảng cần backfill (default: tất cả)')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                       help=f'Số dòng mỗi chunk / transaction (default: {DEFAULT_CHUNK_SIZE})')
+    parser.add_argument('--all', action='store_true',
+                       help='Tính lại cả các dòng đã có key (vd. sau khi đổi cách chuẩn hóa)')
+
+    args = parser.parse_args()
+
+    try:
+        result = backfill(args.tables, max(1, args.chunk_size), args.all)
+    except Exception as e:
+        result = {'success': False, 'error': f"Lỗi khi backfill answer_key: {str(e)}"}
+
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if not result['success']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
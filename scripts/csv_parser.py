@@ -4,102 +4,259 @@ CSV/Excel Parser Tool
 Nhận diện chính xác cột A = Câu hỏi, cột B = Câu trả lời
 """
 
-import sys
 import json
-import pandas as pd
 import os
+import time
+import argparse
+import functools
 from pathlib import Path
 
-def parse_file(file_path):
-    """Parse CSV hoặc Excel file và trả về JSON"""
+# pandas/numpy chỉ được import khi cần (Excel, file lớn, --stream), CSV/TXT nhỏ dùng fast path
+import answer_keys
+import parser_io
+import parser_limits
+import parser_profile
+import parser_progress
+import parser_skipped
+from answer_keys import answer_key, fold_key
+from parser_cache import cached_parse, source_version
+from parser_output import DEFAULT_OUTPUT_FORMAT, OUTPUT_FORMATS, RECORD_FORMATS, RecordWriter, write_result
+from parser_io import (COMPRESSIONS, DEFAULT_BATCH_WORKERS, DEFAULT_CHUNKSIZE, FastPathUnsupported, INPUT_FORMATS,
+                       as_input, can_parse_parallel, can_use_fast_path, cli_input, expand_inputs, is_batch,
+                       iter_file_chunks, list_excel_sheets, parse_sheets, scan_csv_ranges,
+                       input_size, read_csv_frame, read_csv_rows, read_excel_frame, run_batch, sheet_category,
+                       SHEET_CATEGORIES)
+from parser_limits import LimitExceeded
+
+QUESTION_KEYWORDS = ['question', 'qus', 'câu hỏi', 'cau hoi']
+ANSWER_KEYWORDS = ['answer', 'ans', 'câu trả lời', 'cau tra loi']
+
+# Số dòng bị skip giữ trong kết quả để xem trước, cột của --skipped-report dạng CSV (xem parser_skipped.py)
+SKIPPED_PREVIEW = 5
+SKIPPED_COLUMNS = ["row", "reason", "question", "answer", "sheet", "file"]
+
+def cell_text(value):
+    """str() + strip cho một ô của fast path (None là ô trống)"""
+    return "" if value is None else str(value).strip()
+
+def is_header(col_a, col_b):
+    """col_a, col_b: text dòng đầu đã lower + strip"""
+    return any(keyword in col_a for keyword in QUESTION_KEYWORDS) or \
+        any(keyword in col_b for keyword in ANSWER_KEYWORDS)
+
+def clean_column(series):
+    """fillna + str() + strip cho cả cột, tương đương str(x).strip() từng ô"""
+    return series.where(series.notna(), "").astype(str).str.strip()
+
+def detect_header(df):
+    """Kiểm tra xem dòng đầu có phải header không"""
+    import pandas as pd
+    
+    if df.shape[0] == 0:
+        return False
+    
+    first_row = df.iloc[0]
+    col_a = str(first_row.iloc[0]).lower().strip() if pd.notna(first_row.iloc[0]) else ""
+    col_b = str(first_row.iloc[1]).lower().strip() if pd.notna(first_row.iloc[1]) else ""
+    
+    return is_header(col_a, col_b)
+
+def validate_rows(rows, first_row, max_details=SKIPPED_PREVIEW):
+    """
+    Bản thuần Python của validate_frame cho fast path (rows: list các dòng từ read_csv_rows)
+    Trả về (questions, skipped_count, skipped_details[:max_details]), ghi báo cáo như validate_frame
+    """
+    questions = []
+    skipped_count = 0
+    skipped_details = []
+    report = parser_skipped.writer()
+    
+    for offset, row in enumerate(rows):
+        question = cell_text(row[0])
+        answer = cell_text(row[1])
+        
+        if question == "" or answer == "" or question == "nan" or answer == "nan":
+            reason = "Thiếu câu hỏi hoặc câu trả lời"
+        elif question == answer:
+            reason = "Câu hỏi và đáp án giống nhau"
+        else:
+            key = answer_key(answer)
+            questions.append({"text": question, "answer": answer, "answer_key": key,
+                              "answer_key_folded": fold_key(key)})
+            continue
+        
+        skipped_count += 1
+        if report is not None or len(skipped_details) < max_details:
+            detail = {
+                "row": first_row + offset,
+                "question": question,
+                "answer": answer,
+                "reason": reason
+            }
+            if len(skipped_details) < max_details:
+                skipped_details.append(detail)
+            if report is not None:
+                report(detail)
+    
+    return questions, skipped_count, skipped_details
+
+def validate_frame(body, first_row, max_details=SKIPPED_PREVIEW):
+    """
+    Validate theo cả cột thay vì từng dòng.
+    body: 2 cột (A: Câu hỏi, B: Câu trả lời); first_row: số dòng (tính từ 1) của dòng đầu trong body
+    Trả về (questions, skipped_count, skipped_details[:max_details]);
+    mọi dòng bị skip được ghi thẳng vào --skipped-report nếu có (parser_skipped)
+    """
+    import numpy as np
+    import pandas as pd
+    
+    question_col = clean_column(body.iloc[:, 0])
+    answer_col = clean_column(body.iloc[:, 1])
+    
+    missing_mask = (question_col == "") | (answer_col == "") | (question_col == "nan") | (answer_col == "nan")
+    same_mask = ~missing_mask & (question_col == answer_col)
+    skipped_mask = missing_mask | same_mask
+    valid_mask = ~skipped_mask
+    
+    valid_answers = answer_col[valid_mask]
+    keys = valid_answers.map(answer_key)
+    questions = pd.DataFrame({
+        "text": question_col[valid_mask],
+        "answer": valid_answers,
+        "answer_key": keys,
+        "answer_key_folded": keys.map(fold_key)
+    }).to_dict("records")
+    
+    def detail(pos):
+        return {
+            "row": first_row + int(pos),
+            "question": question_col.iat[pos],
+            "answer": answer_col.iat[pos],
+            "reason": "Thiếu câu hỏi hoặc câu trả lời" if missing_mask.iat[pos] else "Câu hỏi và đáp án giống nhau"
+        }
+    
+    # Chỉ dựng chi tiết cho các dòng đầu bị skip (và từng dòng khi ghi báo cáo, không giữ lại)
+    skipped_positions = np.flatnonzero(skipped_mask.to_numpy())
+    skipped_details = [detail(pos) for pos in skipped_positions[:max_details]]
+    report = parser_skipped.writer()
+    if report is not None:
+        for pos in skipped_positions:
+            report(detail(pos))
+    
+    return questions, len(skipped_positions), skipped_details
+
+def parse_rows(file_path, rows, ncols):
+    """Fast path của parse_file: dữ liệu đã đọc bằng read_csv_rows"""
+    if ncols < 2:
+        return {"success": False, "error": "File phải có ít nhất 2 cột (A: Câu hỏi, B: Câu trả lời)"}
+    
+    first = rows[0]
+    with parser_profile.stage("header"):
+        start_row = 1 if is_header(cell_text(first[0]).lower(), cell_text(first[1]).lower()) else 0
+    with parser_profile.stage("validate", len(rows) - start_row):
+        questions, skipped_count, skipped_details = validate_rows(rows[start_row:], start_row + 1)
+    parser_progress.add_rows(len(questions), skipped_count)
+    
+    return {
+        "success": True,
+        "questions": questions,
+        "total": len(questions),
+        "skipped": skipped_count,
+        "skipped_details": skipped_details,  # Chỉ show 5 dòng đầu bị skip
+        "file_info": {
+            "name": file_path.name,
+            "size": file_path.stat().st_size,
+            "rows": len(rows),
+            "cols": ncols
+        }
+    }
+
+def parse_range(rows, plan):
+    """Một khoảng của file khi parse song song (parser_io.CsvRanges.parse), trả về như validate_rows"""
+    start_row = 0
+    if plan.first_row == 1:
+        first = rows[0]
+        start_row = 1 if is_header(cell_text(first[0]).lower(), cell_text(first[1]).lower()) else 0
+    return validate_rows(rows[start_row:], plan.first_row + start_row)
+
+def parse_parallel(file_path, workers):
+    """parse_file cho CSV/TXT lớn: các khoảng byte của file được parse song song, kết quả giống parse_file"""
+    with parser_profile.stage("read"):
+        ranges = scan_csv_ranges(file_path, workers)
+    with ranges:
+        rows = sum(plan.records for plan in ranges.plans)
+        parser_profile.add_rows("read", rows)
+        if ranges.ncols < 2:
+            return {"success": False, "error": "File phải có ít nhất 2 cột (A: Câu hỏi, B: Câu trả lời)"}
+        
+        with parser_profile.stage("validate", rows):
+            results = ranges.parse(parse_range)
+    questions = [question for range_questions, _, _ in results for question in range_questions]
+    skipped_count = sum(range_skipped for _, range_skipped, _ in results)
+    parser_progress.add_rows(len(questions), skipped_count)
+    
+    return {
+        "success": True,
+        "questions": questions,
+        "total": len(questions),
+        "skipped": skipped_count,
+        "skipped_details": [detail for _, _, details in results for detail in details][:SKIPPED_PREVIEW],
+        "file_info": {
+            "name": file_path.name,
+            "size": file_path.stat().st_size,
+            "rows": rows,
+            "cols": ranges.ncols
+        }
+    }
+
+def parse_file(file_path, sheets=None, workers=1):
+    """
+    Parse CSV hoặc Excel file và trả về JSON
+    sheets: None = chỉ sheet đầu (như cũ), "all" hoặc list tên sheet = parse nhiều sheet (xem parse_workbook)
+    workers > 1: parse các sheet song song, hoặc các khoảng byte của một file CSV/TXT lớn (parse_parallel)
+    """
     try:
-        file_path = Path(file_path)
+        file_path = as_input(file_path)
         
         if not file_path.exists():
             return {"success": False, "error": f"File không tồn tại: {file_path}"}
+        parser_limits.check("bytes", file_path.stat().st_size)
+        
+        if sheets is not None and file_path.suffix.lower() in ['.xlsx', '.xls']:
+            return parse_workbook(file_path, None if sheets == "all" else sheets, workers)
+        
+        # CSV/TXT lớn với nhiều process: parse song song, không được thì đọc tuần tự như cũ
+        if can_parse_parallel(file_path, workers):
+            try:
+                return parse_parallel(file_path, workers)
+            except FastPathUnsupported:
+                pass
+        
+        # CSV/TXT nhỏ: đọc bằng module csv, không phải import pandas
+        if can_use_fast_path(file_path):
+            try:
+                with parser_profile.stage("read"):
+                    rows, ncols = read_csv_rows(file_path)
+                parser_profile.add_rows("read", len(rows))
+                return parse_rows(file_path, rows, ncols)
+            except FastPathUnsupported:
+                pass
+        
+        with parser_profile.stage("import"):
+            import pandas as pd
         
         # Đọc file dựa trên extension
         if file_path.suffix.lower() in ['.xlsx', '.xls']:
             # Đọc Excel file
-            df = pd.read_excel(file_path, header=None)
+            with parser_profile.stage("read"):
+                df = read_excel_frame(file_path, columns=2)
+            parser_profile.add_rows("read", df.shape[0])
         elif file_path.suffix.lower() in ['.csv', '.txt']:
-            # Thử các delimiter và encoding khác nhau
-            df = None
-            
-            # Đọc content trước để detect delimiter
-            with open(file_path, 'r', encoding='utf-8-sig', errors='ignore') as f:
-                first_line = f.readline().strip()
-                
-            # Detect delimiter
-            if '\t' in first_line:
-                delimiter = '\t'
-            elif ';' in first_line:
-                delimiter = ';'
-            else:
-                delimiter = ','
-            
-            # print(f"Detected delimiter: '{delimiter}'")
-            
-            # Thử parse với delimiter detected
-            encodings = ['utf-8-sig', 'utf-8', 'latin-1', 'cp1252']
-            
-            for encoding in encodings:
-                try:
-                    df = pd.read_csv(
-                        file_path, 
-                        header=None, 
-                        encoding=encoding,
-                        delimiter=delimiter,
-                        quotechar='"',
-                        skipinitialspace=True,
-                        on_bad_lines='skip'  # Skip bad lines instead of failing
-                    )
-                    # print(f"Successfully parsed with encoding: {encoding}")
-                    break
-                except Exception as e:
-                    # print(f"Failed with encoding {encoding}: {e}")
-                    continue
-            
-            if df is None:
-                # Last resort: manual parsing line by line
-                # print("Pandas failed, trying manual parsing...")
-                try:
-                    questions_data = []
-                    with open(file_path, 'r', encoding='utf-8-sig', errors='ignore') as f:
-                        lines = f.readlines()
-                    
-                    for i, line in enumerate(lines):
-                        line = line.strip()
-                        if not line:
-                            continue
-                            
-                        # Split by detected delimiter
-                        if delimiter == '\t':
-                            parts = line.split('\t')
-                        elif delimiter == ';':
-                            parts = line.split(';')
-                        else:
-                            # For comma, need to handle quotes
-                            import csv
-                            import io
-                            try:
-                                reader = csv.reader(io.StringIO(line))
-                                parts = next(reader)
-                            except:
-                                parts = line.split(',')
-                        
-                        if len(parts) >= 2:
-                            questions_data.append(parts)
-                    
-                    if not questions_data:
-                        return {"success": False, "error": "Không tìm thấy dữ liệu hợp lệ trong file"}
-                    
-                    # Convert to DataFrame
-                    df = pd.DataFrame(questions_data)
-                    # print(f"Manual parsing successful, found {len(questions_data)} rows")
-                    
-                except Exception as e:
-                    return {"success": False, "error": f"Không thể đọc file: {str(e)}"}
+            # Đoán encoding + delimiter một lần trên phần đầu file rồi parse đúng một lần
+            try:
+                df = read_csv_frame(file_path, min_parts=2)
+            except ValueError as e:
+                return {"success": False, "error": str(e)}
         else:
             return {"success": False, "error": f"Định dạng file không hỗ trợ: {file_path.suffix}"}
         
@@ -107,54 +264,23 @@ def parse_file(file_path):
         if df.shape[1] < 2:
             return {"success": False, "error": "File phải có ít nhất 2 cột (A: Câu hỏi, B: Câu trả lời)"}
         
-        questions = []
-        skipped_rows = []
-        
         # Bỏ qua dòng header nếu có
-        start_row = 0
-        if df.shape[0] > 0:
-            first_row = df.iloc[0]
-            # Kiểm tra xem dòng đầu có phải header không
-            col_a = str(first_row.iloc[0]).lower().strip() if pd.notna(first_row.iloc[0]) else ""
-            col_b = str(first_row.iloc[1]).lower().strip() if pd.notna(first_row.iloc[1]) else ""
-            
-            if any(keyword in col_a for keyword in ['question', 'qus', 'câu hỏi', 'cau hoi']) or \
-               any(keyword in col_b for keyword in ['answer', 'ans', 'câu trả lời', 'cau tra loi']):
-                start_row = 1
-                # print(f"Detected header row, skipping first row")
-        
-        # Parse từng dòng
-        for idx in range(start_row, df.shape[0]):
-            row = df.iloc[idx]
-            
-            # Lấy cột A và B
-            col_a = row.iloc[0] if pd.notna(row.iloc[0]) else ""
-            col_b = row.iloc[1] if pd.notna(row.iloc[1]) else ""
-            
-            # Convert to string và trim
-            question = str(col_a).strip()
-            answer = str(col_b).strip()
-            
-            # Validate
-            if not question or not answer or question == "nan" or answer == "nan":
-                skipped_rows.append({"row": idx + 1, "question": question, "answer": answer, "reason": "Thiếu câu hỏi hoặc câu trả lời"})
-                continue
-            
-            if question == answer:
-                skipped_rows.append({"row": idx + 1, "question": question, "answer": answer, "reason": "Câu hỏi và đáp án giống nhau"})
-                continue
-            
-            questions.append({
-                "text": question,
-                "answer": answer
-            })
+        with parser_profile.stage("header"):
+            start_row = 1 if detect_header(df) else 0
+        
+        # Ép kiểu theo dtype chung của một dòng (giống df.iloc[idx]) để str() cho kết quả như cũ
+        with parser_profile.stage("validate", df.shape[0] - start_row):
+            row_dtype = df.iloc[0].dtype if df.shape[0] > 0 else object
+            body = df.iloc[start_row:, :2].astype(row_dtype)
+            questions, skipped_count, skipped_details = validate_frame(body, start_row + 1)
+        parser_progress.add_rows(len(questions), skipped_count)
         
         return {
             "success": True,
             "questions": questions,
             "total": len(questions),
-            "skipped": len(skipped_rows),
-            "skipped_details": skipped_rows[:5],  # Chỉ show 5 dòng đầu bị skip
+            "skipped": skipped_count,
+            "skipped_details": skipped_details,  # Chỉ show 5 dòng đầu bị skip
             "file_info": {
                 "name": file_path.name,
                 "size": file_path.stat().st_size,
@@ -163,17 +289,477 @@ def parse_file(file_path):
             }
         }
         
+    except LimitExceeded as e:
+        return {"success": False, "error": str(e), "limit": e.to_dict()}
     except Exception as e:
         return {"success": False, "error": f"Lỗi khi đọc file: {str(e)}"}
 
+def parse_file_cached(file_path, sheets=None, workers=1, use_cache=True):
+    """
+    parse_file qua cache trên đĩa (parser_cache): file đã parse (cùng nội dung, cùng options) trả kết quả ngay.
+    Thêm "cache": {"hit", "hits", "misses"} vào kết quả khi cache được dùng
+    Với --skipped-report file luôn được parse lại (cache chỉ giữ các dòng bị skip để xem trước)
+    """
+    result, cache_info = cached_parse(
+        lambda: parse_file(file_path, sheets, workers),
+        file_path,
+        "csv_parser",
+        source_version(__file__, parser_io.__file__, answer_keys.__file__),
+        {"sheets": sheets, "limits": parser_limits.current()},
+        use_cache and not parser_skipped.active(),
+        cacheable=lambda parsed: parsed["success"]
+    )
+    if cache_info:
+        if cache_info["hit"]:
+            # Key theo nội dung file nên tên file có thể khác lần parse trước
+            result["file_info"]["name"] = Path(file_path).name
+        result["cache"] = cache_info
+    return result
+
+def parse_sheet(file_path, sheet):
+    """Parse một sheet Excel bằng reader read-only (không giữ cả workbook trong RAM)"""
+    questions = []
+    for record in iter_parse_file(file_path, sheet=sheet):
+        record_type = record.pop("type")
+        if record_type == "question":
+            questions.append(record)
+        else:
+            record["questions"] = questions
+            return record
+
+def parse_workbook(file_path, sheets=None, workers=1):
+    """
+    Parse nhiều sheet trong một lần gọi, mỗi sheet ứng với một category theo tên sheet
+    (khoidong / tangtoc / vcnv ...; sheet không khớp category nào có category = None).
+    Sheet Tăng Tốc có format khác (4 cột) nên được bỏ qua, dùng parser-tangtoc.py cho các sheet này.
+    workers > 1: parse các sheet song song trong nhiều process
+    """
+    file_path = as_input(file_path)
+    names = [name for name in (sheets or list_excel_sheets(file_path)) if sheet_category(name) != "tangtoc"]
+    if not names:
+        return {"success": False, "error": "Không có sheet nào để parse"}
+    
+    questions = []
+    skipped_count = 0
+    skipped_details = []
+    sheet_info = []
+    rows = 0
+    cols = 0
+    
+    for name, category, result in parse_sheets(file_path, parse_sheet, names, workers):
+        if not result["success"]:
+            sheet_info.append({"name": name, "category": category, "error": result["error"]})
+            continue
+        
+        for question in result["questions"]:
+            question["category"] = category
+            question["sheet"] = name
+        questions.extend(result["questions"])
+        
+        skipped_count += result["skipped"]
+        for detail in result["skipped_details"][:SKIPPED_PREVIEW - len(skipped_details)]:
+            skipped_details.append({"sheet": name, **detail})
+        rows += result["file_info"]["rows"]
+        cols = max(cols, result["file_info"]["cols"])
+        sheet_info.append({
+            "name": name,
+            "category": category,
+            "total": result["total"],
+            "skipped": result["skipped"],
+            "rows": result["file_info"]["rows"],
+            "cols": result["file_info"]["cols"]
+        })
+    
+    if all("error" in info for info in sheet_info):
+        return {"success": False, "error": "; ".join(f"{info['name']}: {info['error']}" for info in sheet_info)}
+    
+    return {
+        "success": True,
+        "questions": questions,
+        "total": len(questions),
+        "skipped": skipped_count,
+        "skipped_details": skipped_details,  # Chỉ show 5 dòng đầu bị skip
+        "sheets": sheet_info,
+        "file_info": {
+            "name": file_path.name,
+            "size": file_path.stat().st_size,
+            "rows": rows,
+            "cols": cols
+        }
+    }
+
+def iter_parse_file(file_path, chunksize=DEFAULT_CHUNKSIZE, sheet=0):
+    """
+    Parse file theo từng chunk (chế độ --stream), sheet: tên/vị trí sheet nếu là file Excel.
+    Yield một record {"type": "question", ...} cho mỗi câu hỏi hợp lệ, cuối cùng là
+    record {"type": "stats", ...} (hoặc {"type": "error", ...} nếu lỗi).
+    Mọi ô được đọc dưới dạng text nên số được giữ nguyên như trong file (vd. "1" thay vì "1.0")
+    """
+    try:
+        file_path = as_input(file_path)
+        
+        if not file_path.exists():
+            yield {"type": "error", "success": False, "error": f"File không tồn tại: {file_path}"}
+            return
+        parser_limits.check("bytes", file_path.stat().st_size)
+        
+        total = 0
+        skipped_count = 0
+        skipped_details = []
+        rows = 0
+        cols = 0
+        
+        for chunk in iter_file_chunks(file_path, chunksize, sheet, columns=2):
+            if rows == 0:
+                # Kiểm tra có ít nhất 2 cột
+                if chunk.shape[1] < 2:
+                    yield {"type": "error", "success": False, "error": "File phải có ít nhất 2 cột (A: Câu hỏi, B: Câu trả lời)"}
+                    return
+                cols = chunk.shape[1]
+                start_row = 1 if detect_header(chunk) else 0
+            else:
+                start_row = 0
+            
+            with parser_profile.stage("validate", chunk.shape[0] - start_row):
+                body = chunk.iloc[start_row:, :2].astype(object)
+                questions, chunk_skipped, chunk_details = validate_frame(body, rows + start_row + 1,
+                                                                         SKIPPED_PREVIEW - len(skipped_details))
+            parser_progress.add_rows(len(questions), chunk_skipped)
+            rows += chunk.shape[0]
+            
+            for question in questions:
+                yield {"type": "question", **question}
+            
+            total += len(questions)
+            skipped_count += chunk_skipped
+            skipped_details.extend(chunk_details)
+        
+        if rows == 0:
+            yield {"type": "error", "success": False, "error": "Không tìm thấy dữ liệu hợp lệ trong file"}
+            return
+        
+        yield {
+            "type": "stats",
+            "success": True,
+            "total": total,
+            "skipped": skipped_count,
+            "skipped_details": skipped_details,  # Chỉ show 5 dòng đầu bị skip
+            "file_info": {
+                "name": file_path.name,
+                "size": file_path.stat().st_size,
+                "rows": rows,
+                "cols": cols
+            }
+        }
+        
+    except LimitExceeded as e:
+        yield {"type": "error", "success": False, "error": str(e), "limit": e.to_dict()}
+    except Exception as e:
+        yield {"type": "error", "success": False, "error": f"Lỗi khi đọc file: {str(e)}"}
+
+def parse_batch(file_paths, sheets=None, workers=DEFAULT_BATCH_WORKERS, use_cache=True):
+    """
+    Parse nhiều file song song (mỗi file một process) và gộp thành một report:
+    questions của mọi file (kèm "file"), thống kê, lỗi và thời gian parse của từng file
+    """
+    started = time.perf_counter()
+    questions = []
+    skipped_count = 0
+    skipped_details = []
+    files = []
+    
+    parse_one = functools.partial(parse_file_cached, sheets=sheets, use_cache=use_cache)
+    cache = {"hits": 0, "misses": 0}
+    for file_path, result, elapsed_ms in run_batch(file_paths, parse_one, workers):
+        # File trong .zip (CompressedInput): "<file .zip>/<tên file>"
+        file_path = str(file_path)
+        if "cache" in result:
+            cache["hits" if result["cache"]["hit"] else "misses"] += 1
+
+        if not result["success"]:
+            info = {"path": file_path, "success": False, "error": result["error"], "elapsed_ms": elapsed_ms}
+            if "limit" in result:
+                info["limit"] = result["limit"]
+            files.append(info)
+            continue
+        
+        for question in result["questions"]:
+            question["file"] = file_path
+        questions.extend(result["questions"])
+        
+        skipped_count += result["skipped"]
+        for detail in result["skipped_details"][:SKIPPED_PREVIEW - len(skipped_details)]:
+            skipped_details.append({"file": file_path, **detail})
+        
+        info = {
+            "path": file_path,
+            "success": True,
+            "total": result["total"],
+            "skipped": result["skipped"],
+            "rows": result["file_info"]["rows"],
+            "cols": result["file_info"]["cols"],
+            "size": result["file_info"]["size"],
+            "elapsed_ms": elapsed_ms
+        }
+        if "sheets" in result:
+            info["sheets"] = result["sheets"]
+        if "cache" in result:
+            info["cache_hit"] = result["cache"]["hit"]
+        files.append(info)
+    
+    failed = [info for info in files if not info["success"]]
+    if not files or len(failed) == len(files):
+        error = "; ".join(f"{info['path']}: {info['error']}" for info in failed) or "Không tìm thấy file nào để parse"
+        return {"success": False, "error": error, "files": files}
+    
+    return {
+        "success": True,
+        "questions": questions,
+        "total": len(questions),
+        "skipped": skipped_count,
+        "skipped_details": skipped_details,  # Chỉ show 5 dòng đầu bị skip
+        "files": files,
+        "failed": len(failed),
+        "workers": min(workers, len(files)),
+        "cache": cache,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 3)
+    }
+
+def report_skipped(result, report):
+    """
+    Chế độ --skipped-report: các dòng bị skip đã được ghi vào report (parser_skipped.SkippedReport) khi validate,
+    thêm "skipped_report": đường dẫn file + số dòng theo loại lỗi
+    """
+    if result["success"]:
+        result["skipped_report"] = report.summary()
+    return result
+
+def dedup_parsed(result, mode, index, category="khoidong"):
+    """
+    Chế độ --dedup: đánh dấu ("flag") hoặc bỏ ("skip") các câu hỏi trùng trong file/batch
+    hoặc trùng với database (index: question_dedup.DuplicateIndex), số câu trùng ở "duplicates"
+    """
+    from question_dedup import filter_duplicates
+    
+    if not result["success"]:
+        return result
+    
+    result["questions"], _ = filter_duplicates(result["questions"], index, mode, category)
+    result["total"] = len(result["questions"])
+    result["duplicates"] = index.summary(mode)
+    return result
+
+def dedup_categories(category, sheets):
+    """Các category cần tải index từ database cho --dedup-db"""
+    if sheets is None:
+        return [category]
+    return sorted(set(SHEET_CATEGORIES.values()) - {"tangtoc"} | {category})
+
+def load_parsed(result, category="khoidong", created_by=None, batch_size=None):
+    """
+    Chế độ --load: ghi câu hỏi đã parse thẳng vào database (question_loader),
+    kết quả trả về bỏ danh sách questions, thêm "load": số dòng đã ghi + các khoảng ID
+    """
+    from question_loader import DEFAULT_BATCH_SIZE, LoadError, load_questions
+    
+    if not result["success"]:
+        return result
+    
+    questions = result.pop("questions")
+    try:
+        result["load"] = load_questions(questions, "answers", category, created_by, batch_size or DEFAULT_BATCH_SIZE)
+    except LoadError as e:
+        return {"success": False, "error": str(e), "load": e.partial}
+    except Exception as e:
+        return {"success": False, "error": f"Lỗi khi ghi database: {str(e)}"}
+    return result
+
+def sync_parsed(result, bank_id, category="khoidong", created_by=None, batch_size=None, dry_run=False):
+    """
+    Chế độ --sync: chỉ ghi các câu hỏi thay đổi so với lần import trước của bank_id (question_sync),
+    kết quả trả về bỏ danh sách questions, thêm "sync": số dòng insert / update / xóa mềm / giữ nguyên
+    """
+    from question_loader import DEFAULT_BATCH_SIZE
+    from question_sync import sync_questions
+    
+    if not result["success"]:
+        return result
+    
+    questions = result.pop("questions")
+    try:
+        result["sync"] = sync_questions(questions, bank_id, "answers", category, created_by,
+                                        batch_size or DEFAULT_BATCH_SIZE, dry_run)
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+    return result
+
 def main():
-    if len(sys.argv) != 2:
-        print(json.dumps({"success": False, "error": "Usage: python csv_parser.py <file_path>"}))
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description='CSV/Excel Parser Tool')
+    parser.add_argument('file_path', nargs='+',
+                       help='Đường dẫn file cần parse (nhiều file, thư mục, glob hoặc file .zip: parse song song và '
+                            'gộp report; file .gz / .bz2 / .xz được giải nén khi đọc), "-" = đọc từ stdin '
+                            '(cần --input-format)')
+    parser.add_argument('--input-format', choices=list(INPUT_FORMATS),
+                       help='Format của input "-" (stdin): csv, tsv (delimiter tab), xlsx, xls, zip (nhiều file)')
+    parser.add_argument('--encoding',
+                       help='Encoding của input "-" dạng csv/tsv (vd. utf-8, cp1252), không có thì đoán như với file')
+    parser.add_argument('--compression', choices=list(COMPRESSIONS.values()),
+                       help='Input "-" là file nén (file .gz / .bz2 / .xz được nhận theo extension)')
+    parser.add_argument('--stream', action='store_true',
+                       help='Đọc file theo chunk và in NDJSON (mỗi dòng một câu hỏi, dòng cuối là thống kê)')
+    parser.add_argument('--output-format', choices=OUTPUT_FORMATS, default=DEFAULT_OUTPUT_FORMAT,
+                       help='json = JSON một dòng (default), pretty = JSON indent 2, ndjson = mỗi dòng một record, '
+                            'msgpack = frame MessagePack có tiền tố độ dài (xem parser_output.py)')
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE,
+                       help=f'Số dòng mỗi chunk ở chế độ --stream (default: {DEFAULT_CHUNKSIZE})')
+    parser.add_argument('--sheets',
+                       help='File Excel: "all" để parse mọi sheet, hoặc danh sách tên sheet cách nhau bởi dấu phẩy')
+    parser.add_argument('--workers', type=int,
+                       help=f'Số process: parse các file song song khi có nhiều file (default: {DEFAULT_BATCH_WORKERS}), '
+                            'hoặc các sheet khi dùng --sheets / các phần của một file CSV/TXT lớn với một file '
+                            '(default: 1)')
+    parser.add_argument('--no-cache', action='store_true',
+                       help='Không dùng cache kết quả parse (xem parser_cache.py)')
+    parser.add_argument('--load', action='store_true',
+                       help='Ghi câu hỏi thẳng vào database (DB_HOST, DB_USER, ...) thay vì in ra, output chỉ còn thống kê')
+    parser.add_argument('--category', default='khoidong',
+                       help='Category khi --load cho các câu không có category theo tên sheet (default: khoidong)')
+    parser.add_argument('--created-by', type=int, help='ID người tạo khi --load')
+    parser.add_argument('--dedup', choices=['off', 'flag', 'skip'], default='off',
+                       help='Câu hỏi trùng (so theo text đã bỏ dấu, viết thường): flag = đánh dấu, skip = bỏ (default: off)')
+    parser.add_argument('--dedup-db', action='store_true',
+                       help='Với --dedup: so cả với câu hỏi đã có trong database (tải index một lần)')
+    parser.add_argument('--batch-size', type=int, help='Số câu hỏi mỗi batch INSERT khi --load / --sync (default: 1000)')
+    parser.add_argument('--sync', metavar='BANK_ID',
+                       help='Import lại ngân hàng câu hỏi BANK_ID: chỉ insert / update / xóa mềm các dòng thay đổi '
+                            'so với lần import trước (xem question_sync.py)')
+    parser.add_argument('--dry-run', action='store_true',
+                       help='Với --sync: chỉ tính số dòng sẽ thay đổi, không ghi database')
+    parser.add_argument('--profile', action='store_true',
+                       help='Đo thời gian, số dòng và peak bộ nhớ từng bước, thêm "profile" vào kết quả '
+                            '(xem parser_profile.py, hoặc PARSER_PROFILE=1)')
+    parser.add_argument('--profile-dump', action='store_true',
+                       help='Như --profile, ghi thêm file cProfile <file>.csv_parser.prof cạnh file input '
+                            '(hoặc PARSER_PROFILE=dump)')
+    parser.add_argument('--progress', action='store_true',
+                       help='Ghi sự kiện tiến độ NDJSON ra stderr (xem parser_progress.py, hoặc PARSER_PROGRESS=1)')
+    parser.add_argument('--progress-fd', metavar='FD',
+                       help='Ghi sự kiện tiến độ ra file descriptor FD (>= 3) thay vì stderr')
+    parser.add_argument('--skipped-report', metavar='PATH',
+                       help='Ghi mọi dòng bị bỏ qua vào PATH (NDJSON, hoặc CSV nếu PATH có đuôi .csv), kết quả chỉ '
+                            'giữ 5 dòng đầu cùng số dòng theo loại lỗi (xem parser_skipped.py)')
+    parser.add_argument('--limit', action='append', metavar='NAME=VALUE',
+                       help='Giới hạn input, lặp lại được: bytes, rows, columns, cell_chars, seconds (0 = không '
+                            'giới hạn, mặc định theo PARSER_MAX_*, xem parser_limits.py)')
+    
+    args = parser.parse_args()
+    sheets = args.sheets if args.sheets in (None, "all") else [name.strip() for name in args.sheets.split(",")]
+    use_cache = not args.no_cache
+    try:
+        stdin = cli_input(args.file_path, args.input_format, args.encoding, args.compression)
+        limits = parser_limits.parse_limit_args(args.limit)
+        # PARSER_MAX_* sai cũng báo lỗi như tham số CLI
+        parser_limits.from_env()
+        progress_target = (parser_progress.parse_target(args.progress_fd, fd=True) if args.progress_fd is not None
+                           else "stderr" if args.progress else parser_progress.env_target())
+        parser_progress.env_interval()
+    except ValueError as e:
+        parser.error(str(e))
+    inputs = [stdin] if stdin else args.file_path
+    batch = is_batch(inputs)
+    
+    if args.stream and (args.load or args.sync or batch):
+        parser.error("--stream chỉ hỗ trợ một file và không dùng cùng --load / --sync")
+    if args.load and args.sync:
+        parser.error("--load và --sync không dùng cùng nhau")
+    
+    profile_mode = "dump" if args.profile_dump else "profile" if args.profile else parser_profile.env_mode()
+    if profile_mode and batch:
+        if args.profile or args.profile_dump:
+            parser.error("--profile chỉ hỗ trợ một file")
+        profile_mode = None
+    profile_name = "stdin" if stdin else args.file_path[0]
+    profiler = parser_profile.start(profile_name, "csv_parser", profile_mode == "dump") if profile_mode else None
+    try:
+        progress = parser_progress.start(progress_target, input_size(inputs))
+    except OSError as e:
+        parser.error(f"Không ghi được tiến độ ra fd {args.progress_fd}: {str(e)}")
+    try:
+        report = parser_skipped.start(args.skipped_report, SKIPPED_COLUMNS) if args.skipped_report else None
+    except OSError as e:
+        parser.error(f"Không tạo được file --skipped-report {args.skipped_report}: {str(e)}")
+    
+    index = None
+    if args.dedup != "off":
+        from question_dedup import build_index
+        try:
+            with parser_profile.stage("dedup"):
+                index = build_index(dedup_categories(args.category, sheets) if args.dedup_db else None)
+        except Exception as e:
+            write_result({"success": False, "error": f"Lỗi khi tải câu hỏi từ database: {str(e)}"},
+                         args.output_format)
+            return
+    
+    parser_limits.start(limits)
+    stop_watchdog = parser_limits.start_watchdog(parser_limits.report_stderr)
+    if batch:
+        result = parse_batch(expand_inputs(inputs), sheets, max(1, args.workers or DEFAULT_BATCH_WORKERS),
+                             use_cache)
+    else:
+        file_path = stdin or args.file_path[0]
+        
+        if args.stream:
+            # --stream luôn in theo record: msgpack nếu được chọn, còn lại là NDJSON
+            writer = RecordWriter(args.output_format if args.output_format in RECORD_FORMATS else "ndjson")
+            for record in iter_parse_file(file_path, max(1, args.chunksize)):
+                if report is not None and record["type"] == "stats":
+                    record["skipped_report"] = report.summary()
+                if index is not None:
+                    if record["type"] == "question":
+                        duplicate = index.check(record["text"], args.category)
+                        if duplicate and args.dedup == "skip":
+                            continue
+                        if duplicate:
+                            record["duplicate"] = duplicate
+                    elif record["type"] == "stats":
+                        if args.dedup == "skip":
+                            record["total"] -= index.counts["file"] + index.counts["database"]
+                        record["duplicates"] = index.summary(args.dedup)
+                if profiler is not None and record["type"] in ("stats", "error"):
+                    record["profile"] = profiler.summary()
+                writer.write(record)
+            writer.flush()
+            stop_watchdog()
+            parser_skipped.finish(report)
+            parser_profile.finish(profiler)
+            parser_progress.finish(progress)
+            return
+        
+        result = parse_file_cached(file_path, sheets, max(1, args.workers or 1), use_cache)
+    stop_watchdog()
+    
+    if report is not None:
+        result = report_skipped(result, report)
+        parser_skipped.finish(report)
+    
+    if index is not None:
+        with parser_profile.stage("dedup"):
+            result = dedup_parsed(result, args.dedup, index, args.category)
+    
+    if args.load:
+        with parser_profile.stage("load"):
+            result = load_parsed(result, args.category, args.created_by, args.batch_size)
+    
+    if args.sync:
+        with parser_profile.stage("load"):
+            result = sync_parsed(result, args.sync, args.category, args.created_by, args.batch_size, args.dry_run)
     
-    file_path = sys.argv[1]
-    result = parse_file(file_path)
-    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if profiler is not None:
+        result["profile"] = profiler.summary()
+    with parser_profile.stage("serialize"):
+        write_result(result, args.output_format)
+    parser_profile.finish(profiler)
+    parser_progress.finish(progress)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -4,12 +4,40 @@ Tool Parser cho câu hỏi Tăng Tốc
 Hỗ trợ đọc file CSV, TXT và XLSX
 """
 
-import pandas as pd
 import sys
 import json
 import re
+import time
 import argparse
-from pathlib import Path
+import functools
+import itertools
+from collections import Counter
+
+# pandas/numpy chỉ được import khi cần (Excel, file lớn, --stream), CSV/TXT nhỏ dùng fast path
+import answer_keys
+import parser_io
+import parser_limits
+import parser_profile
+import parser_progress
+import parser_skipped
+from answer_keys import answer_key, fold_key
+from parser_cache import cached_parse, source_version
+from parser_output import DEFAULT_OUTPUT_FORMAT, OUTPUT_FORMATS, RECORD_FORMATS, RecordWriter, write_result
+from parser_io import (COMPRESSIONS, DEFAULT_BATCH_WORKERS, DEFAULT_CHUNKSIZE, FastPathUnsupported, INPUT_FORMATS,
+                       NoDataError, as_input, can_parse_parallel, can_use_fast_path, cli_input, expand_inputs,
+                       is_batch, iter_file_chunks, list_excel_sheets, parse_sheets, scan_csv_ranges,
+                       input_size, read_csv_frame, read_csv_rows, read_excel_frame, run_batch, sheet_category)
+from parser_limits import LimitExceeded
+
+# Format: @https://... data:image/gif;base64,...
+IMAGE_PATTERN = r'@(https://[^\s]+)\s+data:image/gif;base64,[^\s]*'
+
+QUESTION_KEYWORDS = ['question', 'qus', 'câu hỏi', 'cau hoi', 'số câu', 'so cau']
+ANSWER_KEYWORDS = ['answer', 'ans', 'câu trả lời', 'cau tra loi']
+
+# Số dòng bị skip giữ trong kết quả để xem trước, cột của --skipped-report dạng CSV (xem parser_skipped.py)
+SKIPPED_PREVIEW = 10
+SKIPPED_COLUMNS = ['row', 'reason', 'question_number', 'text', 'answer', 'sheet', 'file']
 
 def extract_image_url(text):
     """
@@ -20,7 +48,7 @@ def extract_image_url(text):
         return None, text
     
     # Tìm pattern @https://... data:image/gif;base64,...
-    pattern = r'@(https://[^\s]+)\s+data:image/gif;base64,[^\s]*'
+    pattern = IMAGE_PATTERN
     match = re.search(pattern, text)
     
     if match:
@@ -31,92 +59,343 @@ def extract_image_url(text):
     
     return None, text
 
-def parse_tangtoc_file(file_path):
+def iter_records(columns):
+    """
+    Ghép các cột (Series/ndarray cùng độ dài, hoặc str hằng số) thành các dict, từng dòng một.
+    Nhanh hơn DataFrame.to_dict('records') vì tolist() trả về kiểu Python sẵn
+    """
+    length = max((len(column) for column in columns.values() if not isinstance(column, str)), default=0)
+    values = [itertools.repeat(column, length) if isinstance(column, str) else column.tolist()
+              for column in columns.values()]
+    keys = list(columns.keys())
+    return (dict(zip(keys, row)) for row in zip(*values))
+
+def to_records(columns):
+    """list dict của iter_records"""
+    return list(iter_records(columns))
+
+def detect_header(df):
+    """
+    Kiểm tra xem dòng đầu có phải header không
+    """
+    import pandas as pd
+    
+    if df.shape[0] == 0:
+        return False
+    
+    first_row = df.iloc[0]
+    col_1 = str(first_row.iloc[0]).lower().strip() if pd.notna(first_row.iloc[0]) else ""
+    col_2 = str(first_row.iloc[1]).lower().strip() if pd.notna(first_row.iloc[1]) else ""
+    
+    return is_header(col_1, col_2)
+
+def is_header(col_1, col_2):
+    """
+    col_1, col_2: text dòng đầu đã lower + strip
+    """
+    # Chỉ detect header nếu cột 1 là text và không phải số
+    try:
+        # Nếu cột 1 có thể convert thành số, không phải header
+        int(float(col_1))
+    except (ValueError, TypeError):
+        # Nếu cột 1 không phải số, kiểm tra xem có phải header không
+        if any(keyword in col_1 for keyword in QUESTION_KEYWORDS) or \
+           any(keyword in col_2 for keyword in ANSWER_KEYWORDS):
+            return True
+    
+    return False
+
+def validate_frame(body, first_row, max_details=SKIPPED_PREVIEW):
+    """
+    Validate theo cả cột thay vì từng dòng.
+    body: các cột question_number, text, answer, category;
+    first_row: số dòng (tính từ 1) của dòng đầu trong body.
+    Trả về (questions, skipped_count, skipped_rows[:max_details], counts);
+    mọi dòng bị skip được ghi thẳng vào --skipped-report nếu có (parser_skipped)
+    """
+    import numpy as np
+    import pandas as pd
+    
+    raw = {name: body[name].where(body[name].notna(), "").astype(str)
+           for name in ['question_number', 'text', 'answer']}
+    question_number_str = raw['question_number'].str.strip()
+    text = raw['text'].str.strip()
+    answer = raw['answer'].str.strip()
+    
+    reasons = np.full(len(body), None, dtype=object)
+    
+    missing_mask = ((question_number_str == "") | (text == "") | (answer == "")).to_numpy()
+    reasons[missing_mask] = "Thiếu dữ liệu bắt buộc"
+    
+    nan_mask = ((question_number_str == "nan") | (text == "nan") | (answer == "nan")).to_numpy() & ~missing_mask
+    reasons[nan_mask] = "Dữ liệu không hợp lệ (nan)"
+    
+    # Chuyển đổi question_number thành số
+    candidates = ~(missing_mask | nan_mask)
+    numbers = pd.to_numeric(question_number_str.where(candidates), errors='coerce').to_numpy(dtype='float64', copy=True)
+    
+    # to_numeric không parse được -> dùng float() để giữ đúng thông báo lỗi như trước
+    question_number_values = question_number_str.to_numpy(dtype=object)
+    for pos in np.flatnonzero(candidates & np.isnan(numbers)):
+        try:
+            numbers[pos] = float(question_number_values[pos])
+        except (ValueError, TypeError) as e:
+            reasons[pos] = f"Số câu không hợp lệ: {str(e)}"
+    
+    pending = candidates & (reasons == None)  # noqa: E711
+    nan_number_mask = pending & np.isnan(numbers)
+    reasons[nan_number_mask] = "Số câu không hợp lệ: cannot convert float NaN to integer"
+    
+    # int(float('inf')) trước đây rơi vào nhánh "Lỗi xử lý" và giữ giá trị gốc chưa strip
+    overflow_mask = pending & np.isinf(numbers)
+    reasons[overflow_mask] = "Lỗi xử lý: cannot convert float infinity to integer"
+    
+    pending &= ~(nan_number_mask | overflow_mask)
+    truncated = np.trunc(np.where(pending, numbers, 0))
+    
+    # Kiểm tra question_number hợp lệ
+    out_of_range_mask = pending & ~np.isin(truncated, [1, 2, 3, 4])
+    for pos in np.flatnonzero(out_of_range_mask):
+        reasons[pos] = f"Số câu phải là 1, 2, 3, hoặc 4 (tìm thấy: {int(truncated[pos])})"
+    
+    valid_mask = pending & ~out_of_range_mask
+    skipped_mask = ~valid_mask
+    
+    question_number = pd.Series(truncated[valid_mask].astype('int64'), index=text.index[valid_mask])
+    valid_text = text[valid_mask]
+    
+    # Trích xuất image_url và clean text (chỉ chạy regex trên các dòng có "@https://")
+    image_url = pd.Series(np.full(len(valid_text), None, dtype=object), index=valid_text.index)
+    final_text = valid_text.astype(object)
+    maybe_image = valid_text.str.contains('@https://', regex=False)
+    if maybe_image.any():
+        image_text = valid_text[maybe_image]
+        found_url = image_text.str.extract(IMAGE_PATTERN, expand=False)
+        clean_text = image_text.str.replace(IMAGE_PATTERN, '', regex=True).str.strip()
+        has_found = found_url.notna()
+        image_url[found_url.index[has_found]] = found_url[has_found].astype(object)
+        replace_text = has_found & (clean_text != "")
+        final_text[clean_text.index[replace_text]] = clean_text[replace_text].astype(object)
+    has_image = image_url.notna()
+    keys = answer[valid_mask].map(answer_key)
+    
+    questions = to_records({
+        'question_number': question_number,
+        'text': final_text,
+        'answer': answer[valid_mask],
+        'answer_key': keys,
+        'answer_key_folded': keys.map(fold_key),
+        'category': 'tangtoc',
+        'image_url': image_url,
+        'time_limit': question_number * 10  # 10s, 20s, 30s, 40s
+    })
+    
+    # Chỉ dựng dict cho các dòng đầu bị skip (và từng dòng khi ghi báo cáo, không giữ lại)
+    skipped = iter_records({
+        'row': np.arange(first_row, first_row + len(body))[skipped_mask],
+        'question_number': question_number_str.where(~overflow_mask, raw['question_number'])[skipped_mask],
+        'text': text.where(~overflow_mask, raw['text'])[skipped_mask],
+        'answer': answer.where(~overflow_mask, raw['answer'])[skipped_mask],
+        'reason': reasons[skipped_mask]
+    })
+    skipped_rows = list(itertools.islice(skipped, max_details))
+    report = parser_skipped.writer()
+    if report is not None:
+        for row in itertools.chain(skipped_rows, skipped):
+            report(row)
+    
+    # Thống kê trong một lần value_counts
+    number_counts = question_number.value_counts()
+    counts = {f'question_{n}': int(number_counts.get(n, 0)) for n in [1, 2, 3, 4]}
+    counts['with_images'] = int(has_image.sum())
+    
+    return questions, int(skipped_mask.sum()), skipped_rows, counts
+
+def validate_rows(rows, first_row, max_details=SKIPPED_PREVIEW):
+    """
+    Bản thuần Python của validate_frame cho fast path (rows: list các dòng từ read_csv_rows).
+    Trả về (questions, skipped_count, skipped_rows[:max_details], counts), ghi báo cáo như validate_frame
+    """
+    questions = []
+    skipped_count = 0
+    skipped_rows = []
+    report = parser_skipped.writer()
+    counts = {'question_1': 0, 'question_2': 0, 'question_3': 0, 'question_4': 0, 'with_images': 0}
+    
+    for offset, row in enumerate(rows):
+        raw = ["" if value is None else str(value) for value in row[:3]]
+        question_number_str, text, answer = [value.strip() for value in raw]
+        
+        reason = None
+        if question_number_str == "" or text == "" or answer == "":
+            reason = "Thiếu dữ liệu bắt buộc"
+        elif question_number_str == "nan" or text == "nan" or answer == "nan":
+            reason = "Dữ liệu không hợp lệ (nan)"
+        else:
+            try:
+                number = float(question_number_str)
+            except ValueError as e:
+                reason = f"Số câu không hợp lệ: {str(e)}"
+            else:
+                if number != number:
+                    reason = "Số câu không hợp lệ: cannot convert float NaN to integer"
+                elif number in (float('inf'), float('-inf')):
+                    # int(float('inf')) trước đây rơi vào nhánh "Lỗi xử lý" và giữ giá trị gốc chưa strip
+                    reason = "Lỗi xử lý: cannot convert float infinity to integer"
+                    question_number_str, text, answer = raw
+                elif int(number) not in [1, 2, 3, 4]:
+                    reason = f"Số câu phải là 1, 2, 3, hoặc 4 (tìm thấy: {int(number)})"
+        
+        if reason:
+            skipped_count += 1
+            if report is not None or len(skipped_rows) < max_details:
+                skipped_row = {
+                    'row': first_row + offset,
+                    'question_number': question_number_str,
+                    'text': text,
+                    'answer': answer,
+                    'reason': reason
+                }
+                if len(skipped_rows) < max_details:
+                    skipped_rows.append(skipped_row)
+                if report is not None:
+                    report(skipped_row)
+            continue
+        
+        question_number = int(number)
+        image_url = None
+        if '@https://' in text:
+            match = re.search(IMAGE_PATTERN, text)
+            if match:
+                image_url = match.group(1)
+                clean_text = re.sub(IMAGE_PATTERN, '', text).strip()
+                if clean_text:
+                    text = clean_text
+                counts['with_images'] += 1
+        
+        counts[f'question_{question_number}'] += 1
+        key = answer_key(answer)
+        questions.append({
+            'question_number': question_number,
+            'text': text,
+            'answer': answer,
+            'answer_key': key,
+            'answer_key_folded': fold_key(key),
+            'category': 'tangtoc',
+            'image_url': image_url,
+            'time_limit': question_number * 10  # 10s, 20s, 30s, 40s
+        })
+    
+    return questions, skipped_count, skipped_rows, counts
+
+def parse_tangtoc_rows(rows, ncols):
+    """
+    Fast path của parse_tangtoc_file: dữ liệu đã đọc bằng read_csv_rows
+    """
+    # Kiểm tra có ít nhất 4 cột
+    if ncols < 4:
+        raise ValueError(f"File phải có ít nhất 4 cột. Tìm thấy {ncols} cột")
+    
+    # Bỏ qua dòng header nếu có
+    with parser_profile.stage('header'):
+        first = ["" if value is None else str(value).lower().strip() for value in rows[0][:2]]
+        start_row = 1 if is_header(*first) else 0
+    with parser_profile.stage('validate', len(rows) - start_row):
+        questions, skipped_count, skipped_rows, counts = validate_rows(rows[start_row:], start_row + 1)
+    parser_progress.add_rows(len(questions), skipped_count)
+    
+    return {
+        'questions': questions,
+        'skipped_rows': skipped_rows,
+        'total_processed': len(questions) + skipped_count,
+        'success_count': len(questions),
+        'skipped_count': skipped_count,
+        'counts': counts
+    }
+
+def parse_range(rows, plan):
+    """Một khoảng của file khi parse song song (parser_io.CsvRanges.parse), trả về như validate_rows"""
+    start_row = 0
+    if plan.first_row == 1:
+        first = ["" if value is None else str(value).lower().strip() for value in rows[0][:2]]
+        start_row = 1 if is_header(*first) else 0
+    return validate_rows(rows[start_row:], plan.first_row + start_row)
+
+def parse_parallel(file_path, workers):
+    """parse_tangtoc_file cho CSV/TXT lớn: các khoảng byte của file được parse song song, kết quả như parse_tangtoc_file"""
+    with parser_profile.stage('read'):
+        ranges = scan_csv_ranges(file_path, workers, row_columns=4)
+    with ranges:
+        rows = sum(plan.records for plan in ranges.plans)
+        parser_profile.add_rows('read', rows)
+        if ranges.ncols < 4:
+            raise ValueError(f"File phải có ít nhất 4 cột. Tìm thấy {ranges.ncols} cột")
+        
+        with parser_profile.stage('validate', rows):
+            results = ranges.parse(parse_range)
+    questions = [question for range_questions, _, _, _ in results for question in range_questions]
+    skipped_count = sum(range_skipped for _, range_skipped, _, _ in results)
+    skipped_rows = [row for _, _, range_rows, _ in results for row in range_rows][:SKIPPED_PREVIEW]
+    counts = {key: sum(range_counts[key] for _, _, _, range_counts in results) for key in results[0][3]}
+    parser_progress.add_rows(len(questions), skipped_count)
+    
+    return {
+        'questions': questions,
+        'skipped_rows': skipped_rows,
+        'total_processed': len(questions) + skipped_count,
+        'success_count': len(questions),
+        'skipped_count': skipped_count,
+        'counts': counts
+    }
+
+def parse_tangtoc_file(file_path, sheets=None, workers=1):
     """
     Parse file câu hỏi Tăng Tốc
+    sheets: None = chỉ sheet đầu (như cũ), "all" hoặc list tên sheet = parse nhiều sheet (xem parse_workbook)
+    workers > 1: parse các sheet song song, hoặc các khoảng byte của một file CSV/TXT lớn (parse_parallel)
     """
     try:
-        file_path = Path(file_path)
+        file_path = as_input(file_path)
         
         if not file_path.exists():
             raise ValueError(f"File không tồn tại: {file_path}")
+        parser_limits.check('bytes', file_path.stat().st_size)
+        
+        if sheets is not None and file_path.suffix.lower() in ['.xlsx', '.xls']:
+            return parse_workbook(file_path, None if sheets == 'all' else sheets, workers)
+        
+        # CSV/TXT lớn với nhiều process: parse song song, không được thì đọc tuần tự như cũ
+        if can_parse_parallel(file_path, workers):
+            try:
+                return parse_parallel(file_path, workers)
+            except FastPathUnsupported:
+                pass
+        
+        # CSV/TXT nhỏ: đọc bằng module csv, không phải import pandas
+        if can_use_fast_path(file_path):
+            try:
+                with parser_profile.stage('read'):
+                    rows, ncols = read_csv_rows(file_path, row_columns=4)
+                parser_profile.add_rows('read', len(rows))
+                return parse_tangtoc_rows(rows, ncols)
+            except FastPathUnsupported:
+                pass
+        
+        with parser_profile.stage('import'):
+            import pandas as pd
         
         # Đọc file dựa trên extension
         if file_path.suffix.lower() in ['.xlsx', '.xls']:
             # Đọc Excel file
-            df = pd.read_excel(file_path, header=None)
+            with parser_profile.stage('read'):
+                df = read_excel_frame(file_path, columns=4)
+            parser_profile.add_rows('read', df.shape[0])
         elif file_path.suffix.lower() in ['.csv', '.txt']:
-            # Thử các delimiter và encoding khác nhau
-            df = None
-            
-            # Đọc content trước để detect delimiter
-            with open(file_path, 'r', encoding='utf-8-sig', errors='ignore') as f:
-                first_line = f.readline().strip()
-                
-            # Detect delimiter
-            if '\t' in first_line:
-                delimiter = '\t'
-            elif ';' in first_line:
-                delimiter = ';'
-            else:
-                delimiter = ','
-            
-            # Thử parse với delimiter detected
-            encodings = ['utf-8-sig', 'utf-8', 'latin-1', 'cp1252']
-            
-            for encoding in encodings:
-                try:
-                    df = pd.read_csv(
-                        file_path, 
-                        header=None, 
-                        encoding=encoding,
-                        delimiter=delimiter,
-                        quotechar='"',
-                        skipinitialspace=True,
-                        on_bad_lines='skip'
-                    )
-                    break
-                except Exception as e:
-                    continue
-            
-            if df is None:
-                # Last resort: manual parsing line by line
-                try:
-                    questions_data = []
-                    with open(file_path, 'r', encoding='utf-8-sig', errors='ignore') as f:
-                        lines = f.readlines()
-                    
-                    for i, line in enumerate(lines):
-                        line = line.strip()
-                        if not line:
-                            continue
-                            
-                        # Split by detected delimiter
-                        if delimiter == '\t':
-                            parts = line.split('\t')
-                        elif delimiter == ';':
-                            parts = line.split(';')
-                        else:
-                            # For comma, need to handle quotes
-                            import csv
-                            import io
-                            try:
-                                reader = csv.reader(io.StringIO(line))
-                                parts = next(reader)
-                            except:
-                                parts = line.split(',')
-                        
-                        if len(parts) >= 4:
-                            questions_data.append(parts)
-                    
-                    if not questions_data:
-                        raise ValueError("Không tìm thấy dữ liệu hợp lệ trong file")
-                    
-                    # Convert to DataFrame
-                    df = pd.DataFrame(questions_data)
-                    
-                except Exception as e:
-                    raise ValueError(f"Không thể đọc file: {str(e)}")
+            # Đoán encoding + delimiter một lần trên phần đầu file rồi parse đúng một lần
+            try:
+                df = read_csv_frame(file_path, min_parts=4)
+            except NoDataError as e:
+                raise ValueError(f"Không thể đọc file: {str(e)}")
         else:
             raise ValueError(f"Định dạng file không hỗ trợ: {file_path.suffix}")
         
@@ -129,184 +408,563 @@ def parse_tangtoc_file(file_path):
         df.columns = ['question_number', 'text', 'answer', 'category']
         
         # Bỏ qua dòng header nếu có
-        start_row = 0
-        if df.shape[0] > 0:
-            first_row = df.iloc[0]
-            # Kiểm tra xem dòng đầu có phải header không
-            col_1 = str(first_row.iloc[0]).lower().strip() if pd.notna(first_row.iloc[0]) else ""
-            col_2 = str(first_row.iloc[1]).lower().strip() if pd.notna(first_row.iloc[1]) else ""
-            
-            # Chỉ detect header nếu cột 1 là text và không phải số
-            is_header = False
-            try:
-                # Nếu cột 1 có thể convert thành số, không phải header
-                int(float(col_1))
-            except (ValueError, TypeError):
-                # Nếu cột 1 không phải số, kiểm tra xem có phải header không
-                if any(keyword in col_1 for keyword in ['question', 'qus', 'câu hỏi', 'cau hoi', 'số câu', 'so cau']) or \
-                   any(keyword in col_2 for keyword in ['answer', 'ans', 'câu trả lời', 'cau tra loi']):
-                    is_header = True
-            
-            if is_header:
-                start_row = 1
-        
-        questions = []
-        skipped_rows = []
+        with parser_profile.stage('header'):
+            start_row = 1 if detect_header(df) else 0
         
-        # Parse từng dòng
-        for idx in range(start_row, df.shape[0]):
-            row = df.iloc[idx]
-            
-            try:
-                # Lấy dữ liệu từ các cột
-                col_1 = row.iloc[0] if pd.notna(row.iloc[0]) else ""
-                col_2 = row.iloc[1] if pd.notna(row.iloc[1]) else ""
-                col_3 = row.iloc[2] if pd.notna(row.iloc[2]) else ""
-                col_4 = row.iloc[3] if pd.notna(row.iloc[3]) else ""
-                
-                # Convert to string và trim
-                question_number_str = str(col_1).strip()
-                text = str(col_2).strip()
-                answer = str(col_3).strip()
-                category = str(col_4).strip()
-                
-                # Validate dữ liệu
-                if not question_number_str or not text or not answer:
-                    skipped_rows.append({
-                        "row": idx + 1, 
-                        "question_number": question_number_str,
-                        "text": text,
-                        "answer": answer,
-                        "reason": "Thiếu dữ liệu bắt buộc"
-                    })
-                    continue
-                
-                if question_number_str == "nan" or text == "nan" or answer == "nan":
-                    skipped_rows.append({
-                        "row": idx + 1, 
-                        "question_number": question_number_str,
-                        "text": text,
-                        "answer": answer,
-                        "reason": "Dữ liệu không hợp lệ (nan)"
-                    })
-                    continue
-                
-                # Chuyển đổi question_number thành int
-                try:
-                    question_number = int(float(question_number_str))
-                except (ValueError, TypeError) as e:
-                    skipped_rows.append({
-                        "row": idx + 1, 
-                        "question_number": question_number_str,
-                        "text": text,
-                        "answer": answer,
-                        "reason": f"Số câu không hợp lệ: {str(e)}"
-                    })
-                    continue
-                
-                # Kiểm tra question_number hợp lệ
-                if question_number not in [1, 2, 3, 4]:
-                    skipped_rows.append({
-                        "row": idx + 1, 
-                        "question_number": question_number_str,
-                        "text": text,
-                        "answer": answer,
-                        "reason": f"Số câu phải là 1, 2, 3, hoặc 4 (tìm thấy: {question_number})"
-                    })
-                    continue
-                
-                # Trích xuất image_url và clean text
-                image_url, clean_text = extract_image_url(text)
-                
-                # Tạo câu hỏi
-                question = {
-                    'question_number': question_number,
-                    'text': clean_text if clean_text else text,
-                    'answer': answer,
-                    'category': 'tangtoc',
-                    'image_url': image_url,
-                    'time_limit': question_number * 10  # 10s, 20s, 30s, 40s
-                }
-                
-                questions.append(question)
-                
-            except Exception as e:
-                skipped_rows.append({
-                    "row": idx + 1, 
-                    "question_number": str(row.iloc[0]) if pd.notna(row.iloc[0]) else "",
-                    "text": str(row.iloc[1]) if pd.notna(row.iloc[1]) else "",
-                    "answer": str(row.iloc[2]) if pd.notna(row.iloc[2]) else "",
-                    "reason": f"Lỗi xử lý: {str(e)}"
-                })
-                continue
+        # Ép kiểu theo dtype chung của một dòng (giống df.iloc[idx]) để str() cho kết quả như cũ
+        with parser_profile.stage('validate', df.shape[0] - start_row):
+            row_dtype = df.iloc[0].dtype if df.shape[0] > 0 else object
+            body = df.iloc[start_row:].astype(row_dtype)
+            questions, skipped_count, skipped_rows, counts = validate_frame(body, start_row + 1)
+        parser_progress.add_rows(len(questions), skipped_count)
         
         return {
             'questions': questions,
             'skipped_rows': skipped_rows,
-            'total_processed': len(questions) + len(skipped_rows),
+            'total_processed': len(questions) + skipped_count,
             'success_count': len(questions),
-            'skipped_count': len(skipped_rows)
+            'skipped_count': skipped_count,
+            'counts': counts
+        }
+        
+    except LimitExceeded:
+        raise
+    except Exception as e:
+        raise Exception(f"Lỗi khi parse file: {str(e)}")
+
+def parse_tangtoc_file_cached(file_path, sheets=None, workers=1, use_cache=True):
+    """
+    parse_tangtoc_file qua cache trên đĩa (parser_cache): file đã parse (cùng nội dung, cùng options)
+    trả kết quả ngay. Thêm 'cache': {'hit', 'hits', 'misses'} vào kết quả khi cache được dùng.
+    Với --skipped-report file luôn được parse lại (cache chỉ giữ các dòng bị skip để xem trước)
+    """
+    result, cache_info = cached_parse(
+        lambda: parse_tangtoc_file(file_path, sheets, workers),
+        file_path,
+        'parser-tangtoc',
+        source_version(__file__, parser_io.__file__, answer_keys.__file__),
+        {'sheets': sheets, 'limits': parser_limits.current()},
+        use_cache and not parser_skipped.active()
+    )
+    if cache_info:
+        result['cache'] = cache_info
+    return result
+
+def build_stats(counts, success_count, skipped_count):
+    """
+    Thống kê từ counts (value_counts theo số câu + số câu có ảnh)
+    """
+    return {
+        'total_questions': success_count,
+        'question_1': counts['question_1'],
+        'question_2': counts['question_2'],
+        'question_3': counts['question_3'],
+        'question_4': counts['question_4'],
+        'with_images': counts['with_images'],
+        'skipped_count': skipped_count,
+        'success_count': success_count,
+        'total_processed': success_count + skipped_count
+    }
+
+def dedup_result(result, mode, index):
+    """
+    Chế độ --dedup: đánh dấu ("flag") hoặc bỏ ("skip") các câu hỏi trùng trong file/batch
+    hoặc trùng với database (index: question_dedup.DuplicateIndex), cập nhật lại thống kê
+    """
+    from question_dedup import filter_duplicates
+    
+    result['questions'], dropped = filter_duplicates(result['questions'], index, mode, 'tangtoc')
+    for question in dropped:
+        result['counts'][f"question_{question['question_number']}"] -= 1
+        if question['image_url']:
+            result['counts']['with_images'] -= 1
+    result['success_count'] -= len(dropped)
+    result['duplicates'] = index.summary(mode)
+    return result
+
+def report_skipped(result, report):
+    """
+    Chế độ --skipped-report: các dòng bị skip đã được ghi vào report (parser_skipped.SkippedReport) khi validate,
+    thêm 'skipped_report': đường dẫn file + số dòng theo loại lỗi
+    """
+    result['skipped_report'] = report.summary()
+    return result
+
+def build_output(result):
+    """
+    Tạo output (questions + stats + skipped_rows) từ kết quả parse_tangtoc_file
+    """
+    output = {
+        'questions': result['questions'],
+        'stats': build_stats(result['counts'], result['success_count'], result['skipped_count']),
+        'skipped_rows': result['skipped_rows'][:SKIPPED_PREVIEW]  # Only include first 10 skipped rows
+    }
+    if 'cache' in result:
+        output['stats']['cache'] = result['cache']
+    if 'duplicates' in result:
+        output['stats']['duplicates'] = result['duplicates']
+    for key in ['sheets', 'files', 'elapsed_ms', 'skipped_report']:
+        if key in result:
+            output[key] = result[key]
+    return output
+
+def iter_validated_chunks(file_path, chunksize=DEFAULT_CHUNKSIZE, sheet=0):
+    """
+    Đọc và validate file theo từng chunk, yield (questions, skipped_count, skipped_rows, counts) cho mỗi chunk
+    """
+    rows = 0
+    for chunk in iter_file_chunks(file_path, chunksize, sheet, columns=4):
+        if rows == 0:
+            # Kiểm tra có ít nhất 4 cột
+            if chunk.shape[1] < 4:
+                raise ValueError(f"File phải có ít nhất 4 cột. Tìm thấy {chunk.shape[1]} cột")
+        
+        # Lấy 4 cột đầu và đặt tên cột
+        chunk = chunk.iloc[:, :4]
+        chunk.columns = ['question_number', 'text', 'answer', 'category']
+        
+        start_row = 1 if rows == 0 and detect_header(chunk) else 0
+        with parser_profile.stage('validate', chunk.shape[0] - start_row):
+            body = chunk.iloc[start_row:].astype(object)
+            validated = validate_frame(body, rows + start_row + 1)
+        parser_progress.add_rows(len(validated[0]), validated[1])
+        yield validated
+        rows += chunk.shape[0]
+    
+    if rows == 0:
+        raise ValueError("Không tìm thấy dữ liệu hợp lệ trong file")
+
+def iter_parse_tangtoc_file(file_path, chunksize=DEFAULT_CHUNKSIZE, sheet=0):
+    """
+    Parse file Tăng Tốc theo từng chunk (chế độ --stream), sheet: tên/vị trí sheet nếu là file Excel.
+    Yield một record {"type": "question", ...} cho mỗi câu hỏi hợp lệ, cuối cùng là
+    record {"type": "stats", "stats": ..., "skipped_rows": ...}.
+    Lỗi được raise như parse_tangtoc_file
+    """
+    try:
+        file_path = as_input(file_path)
+        
+        if not file_path.exists():
+            raise ValueError(f"File không tồn tại: {file_path}")
+        parser_limits.check('bytes', file_path.stat().st_size)
+        
+        counts = {'question_1': 0, 'question_2': 0, 'question_3': 0, 'question_4': 0, 'with_images': 0}
+        success_count = 0
+        skipped_count = 0
+        skipped_preview = []
+        
+        for questions, chunk_skipped, skipped_rows, chunk_counts in iter_validated_chunks(file_path, chunksize, sheet):
+            for question in questions:
+                yield {'type': 'question', **question}
+            
+            for key, value in chunk_counts.items():
+                counts[key] += value
+            success_count += len(questions)
+            skipped_count += chunk_skipped
+            skipped_preview.extend(skipped_rows[:SKIPPED_PREVIEW - len(skipped_preview)])
+        
+        yield {
+            'type': 'stats',
+            'stats': build_stats(counts, success_count, skipped_count),
+            'skipped_rows': skipped_preview  # Only include first 10 skipped rows
         }
         
+    except LimitExceeded:
+        raise
     except Exception as e:
         raise Exception(f"Lỗi khi parse file: {str(e)}")
 
+def parse_sheet(file_path, sheet):
+    """
+    Parse một sheet Excel bằng reader read-only (không giữ cả workbook trong RAM).
+    Trả về {'error': ...} thay vì raise để các sheet khác vẫn được parse
+    """
+    questions = []
+    skipped_rows = []
+    skipped_count = 0
+    counts = {'question_1': 0, 'question_2': 0, 'question_3': 0, 'question_4': 0, 'with_images': 0}
+    try:
+        for chunk_questions, chunk_skipped, chunk_rows, chunk_counts in iter_validated_chunks(file_path, sheet=sheet):
+            questions.extend(chunk_questions)
+            skipped_rows.extend(chunk_rows[:SKIPPED_PREVIEW - len(skipped_rows)])
+            skipped_count += chunk_skipped
+            for key, value in chunk_counts.items():
+                counts[key] += value
+    except Exception as e:
+        return {'error': str(e)}
+    
+    return {'questions': questions, 'skipped_rows': skipped_rows, 'skipped_count': skipped_count, 'counts': counts}
+
+def parse_workbook(file_path, sheets=None, workers=1):
+    """
+    Parse nhiều sheet Tăng Tốc trong một lần gọi. Chỉ parse các sheet có tên ứng với category tangtoc
+    hoặc không khớp category nào (sheet Khởi động, VCNV ... có format khác nên được bỏ qua).
+    workers > 1: parse các sheet song song trong nhiều process
+    """
+    names = [name for name in (sheets or list_excel_sheets(file_path)) if sheet_category(name) in (None, 'tangtoc')]
+    if not names:
+        raise ValueError("Không có sheet Tăng Tốc nào để parse")
+    
+    questions = []
+    skipped_rows = []
+    skipped_count = 0
+    counts = {'question_1': 0, 'question_2': 0, 'question_3': 0, 'question_4': 0, 'with_images': 0}
+    sheet_info = []
+    
+    for name, category, result in parse_sheets(file_path, parse_sheet, names, workers):
+        if 'error' in result:
+            sheet_info.append({'name': name, 'category': category, 'error': result['error']})
+            continue
+        
+        for row in result['questions']:
+            row['sheet'] = name
+        questions.extend(result['questions'])
+        for row in result['skipped_rows'][:SKIPPED_PREVIEW - len(skipped_rows)]:
+            row['sheet'] = name
+            skipped_rows.append(row)
+        skipped_count += result['skipped_count']
+        for key, value in result['counts'].items():
+            counts[key] += value
+        sheet_info.append({
+            'name': name,
+            'category': category,
+            'success_count': len(result['questions']),
+            'skipped_count': result['skipped_count']
+        })
+    
+    if all('error' in info for info in sheet_info):
+        raise ValueError('; '.join(f"{info['name']}: {info['error']}" for info in sheet_info))
+    
+    return {
+        'questions': questions,
+        'skipped_rows': skipped_rows,
+        'total_processed': len(questions) + skipped_count,
+        'success_count': len(questions),
+        'skipped_count': skipped_count,
+        'counts': counts,
+        'sheets': sheet_info
+    }
+
+def parse_batch_file(file_path, sheets=None, use_cache=True):
+    """
+    Parse một file trong batch, trả về {'error': ...} thay vì raise để các file khác vẫn được parse
+    """
+    try:
+        return parse_tangtoc_file_cached(file_path, sheets, use_cache=use_cache)
+    except LimitExceeded as e:
+        return {'error': str(e), 'limit': e.to_dict()}
+    except Exception as e:
+        return {'error': str(e)}
+
+def parse_batch(file_paths, sheets=None, workers=DEFAULT_BATCH_WORKERS, use_cache=True):
+    """
+    Parse nhiều file song song (mỗi file một process) và gộp thành một kết quả như parse_tangtoc_file,
+    kèm 'files': thống kê, lỗi và thời gian parse của từng file
+    """
+    started = time.perf_counter()
+    questions = []
+    skipped_rows = []
+    skipped_count = 0
+    counts = {'question_1': 0, 'question_2': 0, 'question_3': 0, 'question_4': 0, 'with_images': 0}
+    files = []
+    
+    parse_one = functools.partial(parse_batch_file, sheets=sheets, use_cache=use_cache)
+    cache = {'hits': 0, 'misses': 0}
+    for file_path, result, elapsed_ms in run_batch(file_paths, parse_one, workers):
+        # File trong .zip (CompressedInput): "<file .zip>/<tên file>"
+        file_path = str(file_path)
+        if 'cache' in result:
+            cache['hits' if result['cache']['hit'] else 'misses'] += 1
+        if 'error' in result:
+            info = {'path': file_path, 'success': False, 'error': result['error'], 'elapsed_ms': elapsed_ms}
+            if 'limit' in result:
+                info['limit'] = result['limit']
+            files.append(info)
+            continue
+        
+        for row in result['questions']:
+            row['file'] = file_path
+        questions.extend(result['questions'])
+        for row in result['skipped_rows'][:SKIPPED_PREVIEW - len(skipped_rows)]:
+            row['file'] = file_path
+            skipped_rows.append(row)
+        skipped_count += result['skipped_count']
+        for key, value in result['counts'].items():
+            counts[key] += value
+        
+        info = {
+            'path': file_path,
+            'success': True,
+            'success_count': result['success_count'],
+            'skipped_count': result['skipped_count'],
+            **result['counts'],
+            'elapsed_ms': elapsed_ms
+        }
+        if 'sheets' in result:
+            info['sheets'] = result['sheets']
+        if 'cache' in result:
+            info['cache_hit'] = result['cache']['hit']
+        files.append(info)
+    
+    if not files:
+        raise ValueError("Không tìm thấy file nào để parse")
+    if all(not info['success'] for info in files):
+        raise ValueError('; '.join(f"{info['path']}: {info['error']}" for info in files))
+    
+    return {
+        'questions': questions,
+        'skipped_rows': skipped_rows,
+        'total_processed': len(questions) + skipped_count,
+        'success_count': len(questions),
+        'skipped_count': skipped_count,
+        'counts': counts,
+        'cache': cache,
+        'files': files,
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 3)
+    }
+
+def stream_main(args, index=None, profiler=None, progress=None, report=None):
+    """
+    Chế độ --stream: in NDJSON ra stdout, mỗi dòng một câu hỏi, dòng cuối là thống kê
+    (hoặc các frame MessagePack với --output-format msgpack). profiler: parser_profile.Profiler của --profile,
+    progress: parser_progress.Progress của --progress / --progress-fd,
+    report: parser_skipped.SkippedReport của --skipped-report
+    """
+    stats = None
+    # Câu hỏi trùng bị bỏ (--dedup skip): chỉ đếm để trừ khỏi thống kê, không giữ lại record
+    dropped = Counter()
+    writer = RecordWriter(args.output_format if args.output_format in RECORD_FORMATS else 'ndjson')
+    try:
+        for record in iter_parse_tangtoc_file(args.file_path[0], max(1, args.chunksize)):
+            if report is not None and record['type'] == 'stats':
+                record['skipped_report'] = report.summary()
+            if index is not None:
+                if record['type'] == 'question':
+                    duplicate = index.check(record['text'], 'tangtoc')
+                    if duplicate and args.dedup == 'skip':
+                        dropped['total'] += 1
+                        dropped[f"question_{record['question_number']}"] += 1
+                        if record['image_url']:
+                            dropped['with_images'] += 1
+                        continue
+                    if duplicate:
+                        record['duplicate'] = duplicate
+                else:
+                    for key, count in dropped.items():
+                        if key != 'total':
+                            record['stats'][key] -= count
+                    for key in ['total_questions', 'success_count', 'total_processed']:
+                        record['stats'][key] -= dropped['total']
+                    record['stats']['duplicates'] = index.summary(args.dedup)
+            if profiler is not None and record['type'] == 'stats':
+                record['stats']['profile'] = profiler.summary()
+            writer.write(record)
+            if record['type'] == 'stats':
+                stats = record['stats']
+        writer.flush()
+        parser_skipped.finish(report)
+        parser_profile.finish(profiler)
+        parser_progress.finish(progress)
+    except Exception as e:
+        error = {'type': 'error', 'error': str(e)}
+        if isinstance(e, LimitExceeded):
+            error['limit'] = e.to_dict()
+        writer.write(error)
+        writer.flush()
+        print(f"Lỗi: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+    
+    if not stats['success_count']:
+        print("Không tìm thấy câu hỏi hợp lệ nào trong file", file=sys.stderr)
+        sys.exit(1)
+
 def main():
     parser = argparse.ArgumentParser(description='Parser câu hỏi Tăng Tốc')
-    parser.add_argument('file_path', help='Đường dẫn file cần parse')
+    parser.add_argument('file_path', nargs='+',
+                       help='Đường dẫn file cần parse (nhiều file, thư mục, glob hoặc file .zip: parse song song và '
+                            'gộp kết quả; file .gz / .bz2 / .xz được giải nén khi đọc), "-" = đọc từ stdin '
+                            '(cần --input-format)')
+    parser.add_argument('--input-format', choices=list(INPUT_FORMATS),
+                       help='Format của input "-" (stdin): csv, tsv (delimiter tab), xlsx, xls, zip (nhiều file) '
+                            '(--format là format của output)')
+    parser.add_argument('--encoding',
+                       help='Encoding của input "-" dạng csv/tsv (vd. utf-8, cp1252), không có thì đoán như với file')
+    parser.add_argument('--compression', choices=list(COMPRESSIONS.values()),
+                       help='Input "-" là file nén (file .gz / .bz2 / .xz được nhận theo extension)')
     parser.add_argument('--output', '-o', help='File output JSON (optional)')
     parser.add_argument('--format', '-f', choices=['json', 'csv'], default='json', 
                        help='Format output (default: json)')
+    parser.add_argument('--stream', action='store_true',
+                       help='Đọc file theo chunk và in NDJSON ra stdout (mỗi dòng một câu hỏi, dòng cuối là thống kê)')
+    parser.add_argument('--output-format', choices=OUTPUT_FORMATS, default=DEFAULT_OUTPUT_FORMAT,
+                       help='Output ra stdout: json = JSON một dòng (default), pretty = JSON indent 2, '
+                            'ndjson = mỗi dòng một record, msgpack = frame MessagePack có tiền tố độ dài')
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE,
+                       help=f'Số dòng mỗi chunk ở chế độ --stream (default: {DEFAULT_CHUNKSIZE})')
+    parser.add_argument('--sheets',
+                       help='File Excel: "all" để parse mọi sheet, hoặc danh sách tên sheet cách nhau bởi dấu phẩy')
+    parser.add_argument('--workers', type=int,
+                       help=f'Số process: parse các file song song khi có nhiều file (default: {DEFAULT_BATCH_WORKERS}), '
+                            'hoặc các sheet khi dùng --sheets / các phần của một file CSV/TXT lớn với một file '
+                            '(default: 1)')
+    parser.add_argument('--no-cache', action='store_true',
+                       help='Không dùng cache kết quả parse (xem parser_cache.py)')
+    parser.add_argument('--load', action='store_true',
+                       help='Ghi câu hỏi thẳng vào database (DB_HOST, DB_USER, ...) thay vì in ra, output chỉ còn thống kê')
+    parser.add_argument('--created-by', type=int, help='ID người tạo khi --load')
+    parser.add_argument('--dedup', choices=['off', 'flag', 'skip'], default='off',
+                       help='Câu hỏi trùng (so theo text đã bỏ dấu, viết thường): flag = đánh dấu, skip = bỏ (default: off)')
+    parser.add_argument('--dedup-db', action='store_true',
+                       help='Với --dedup: so cả với câu hỏi Tăng Tốc đã có trong database (tải index một lần)')
+    parser.add_argument('--batch-size', type=int, help='Số câu hỏi mỗi batch INSERT khi --load / --sync (default: 1000)')
+    parser.add_argument('--sync', metavar='BANK_ID',
+                       help='Import lại ngân hàng câu hỏi BANK_ID: chỉ insert / update / xóa mềm các dòng thay đổi '
+                            'so với lần import trước (xem question_sync.py)')
+    parser.add_argument('--dry-run', action='store_true',
+                       help='Với --sync: chỉ tính số dòng sẽ thay đổi, không ghi database')
+    parser.add_argument('--profile', action='store_true',
+                       help='Đo thời gian, số dòng và peak bộ nhớ từng bước, thêm "profile" vào stats '
+                            '(xem parser_profile.py, hoặc PARSER_PROFILE=1)')
+    parser.add_argument('--profile-dump', action='store_true',
+                       help='Như --profile, ghi thêm file cProfile <file>.parser-tangtoc.prof cạnh file input '
+                            '(hoặc PARSER_PROFILE=dump)')
+    parser.add_argument('--progress', action='store_true',
+                       help='Ghi sự kiện tiến độ NDJSON ra stderr (xem parser_progress.py, hoặc PARSER_PROGRESS=1)')
+    parser.add_argument('--progress-fd', metavar='FD',
+                       help='Ghi sự kiện tiến độ ra file descriptor FD (>= 3) thay vì stderr')
+    parser.add_argument('--skipped-report', metavar='PATH',
+                       help='Ghi mọi dòng bị bỏ qua vào PATH (NDJSON, hoặc CSV nếu PATH có đuôi .csv), kết quả chỉ '
+                            'giữ 10 dòng đầu cùng số dòng theo loại lỗi (xem parser_skipped.py)')
+    parser.add_argument('--limit', action='append', metavar='NAME=VALUE',
+                       help='Giới hạn input, lặp lại được: bytes, rows, columns, cell_chars, seconds (0 = không '
+                            'giới hạn, mặc định theo PARSER_MAX_*, xem parser_limits.py)')
     
     args = parser.parse_args()
+    use_cache = not args.no_cache
+    sheets = args.sheets if args.sheets in (None, 'all') else [name.strip() for name in args.sheets.split(',')]
+    try:
+        stdin = cli_input(args.file_path, args.input_format, args.encoding, args.compression)
+        limits = parser_limits.parse_limit_args(args.limit)
+        # PARSER_MAX_* sai cũng báo lỗi như tham số CLI
+        parser_limits.from_env()
+        progress_target = (parser_progress.parse_target(args.progress_fd, fd=True) if args.progress_fd is not None
+                           else 'stderr' if args.progress else parser_progress.env_target())
+        parser_progress.env_interval()
+    except ValueError as e:
+        parser.error(str(e))
+    if stdin:
+        args.file_path = [stdin]
+    batch = is_batch(args.file_path)
+    
+    if args.stream and (batch or args.load or args.sync):
+        parser.error("--stream chỉ hỗ trợ một file và không dùng cùng --load / --sync")
+    if args.load and args.sync:
+        parser.error("--load và --sync không dùng cùng nhau")
+    
+    profile_mode = 'dump' if args.profile_dump else 'profile' if args.profile else parser_profile.env_mode()
+    if profile_mode and batch:
+        if args.profile or args.profile_dump:
+            parser.error("--profile chỉ hỗ trợ một file")
+        profile_mode = None
+    profile_name = 'stdin' if stdin else args.file_path[0]
+    profiler = parser_profile.start(profile_name, 'parser-tangtoc', profile_mode == 'dump') if profile_mode else None
+    try:
+        progress = parser_progress.start(progress_target, input_size(args.file_path))
+    except OSError as e:
+        parser.error(f"Không ghi được tiến độ ra fd {args.progress_fd}: {str(e)}")
+    try:
+        report = parser_skipped.start(args.skipped_report, SKIPPED_COLUMNS) if args.skipped_report else None
+    except OSError as e:
+        parser.error(f"Không tạo được file --skipped-report {args.skipped_report}: {str(e)}")
+    
+    index = None
+    if args.dedup != 'off':
+        from question_dedup import build_index
+        try:
+            with parser_profile.stage('dedup'):
+                index = build_index(['tangtoc'] if args.dedup_db else None)
+        except Exception as e:
+            print(f"Lỗi: Lỗi khi tải câu hỏi từ database: {str(e)}", file=sys.stderr)
+            sys.exit(1)
+    
+    parser_limits.start(limits)
+    stop_watchdog = parser_limits.start_watchdog(parser_limits.report_stderr)
+    if args.stream:
+        try:
+            stream_main(args, index, profiler, progress, report)
+        finally:
+            stop_watchdog()
+        return
     
     try:
         # Parse file
-        result = parse_tangtoc_file(args.file_path)
+        if batch:
+            result = parse_batch(expand_inputs(args.file_path), sheets, max(1, args.workers or DEFAULT_BATCH_WORKERS),
+                                 use_cache)
+        else:
+            result = parse_tangtoc_file_cached(args.file_path[0], sheets, max(1, args.workers or 1), use_cache)
+        stop_watchdog()
+        if report is not None:
+            result = report_skipped(result, report)
+            parser_skipped.finish(report)
+        if index is not None:
+            with parser_profile.stage('dedup'):
+                result = dedup_result(result, args.dedup, index)
         questions = result['questions']
         skipped_rows = result['skipped_rows']
         
         if not questions:
             print("Không tìm thấy câu hỏi hợp lệ nào trong file")
             if skipped_rows:
-                print(f"Có {len(skipped_rows)} dòng bị bỏ qua:")
+                print(f"Có {result['skipped_count']} dòng bị bỏ qua:")
                 for row in skipped_rows[:5]:  # Show first 5
                     print(f"  - Dòng {row['row']}: {row['reason']}")
             sys.exit(1)
         
-        # Thống kê
-        stats = {
-            'total_questions': len(questions),
-            'question_1': len([q for q in questions if q['question_number'] == 1]),
-            'question_2': len([q for q in questions if q['question_number'] == 2]),
-            'question_3': len([q for q in questions if q['question_number'] == 3]),
-            'question_4': len([q for q in questions if q['question_number'] == 4]),
-            'with_images': len([q for q in questions if q['image_url']]),
-            'skipped_count': len(skipped_rows),
-            'success_count': len(questions),
-            'total_processed': result['total_processed']
-        }
+        output = build_output(result)
+        stats = output['stats']
+        
+        if args.load:
+            from question_loader import DEFAULT_BATCH_SIZE, LoadError, load_questions
+            
+            del output['questions']
+            try:
+                with parser_profile.stage('load'):
+                    output['load'] = load_questions(questions, 'tangtoc_answers', 'tangtoc', args.created_by,
+                                                    args.batch_size or DEFAULT_BATCH_SIZE)
+            except LoadError as e:
+                # Một kết quả lỗi duy nhất kèm số dòng đã ghi (như load_parsed của csv_parser)
+                write_result({'success': False, 'error': str(e), 'load': e.partial}, args.output_format)
+                sys.exit(1)
+        
+        if args.sync:
+            from question_loader import DEFAULT_BATCH_SIZE
+            from question_sync import sync_questions
+            
+            del output['questions']
+            with parser_profile.stage('load'):
+                output['sync'] = sync_questions(questions, args.sync, 'tangtoc_answers', 'tangtoc', args.created_by,
+                                                args.batch_size or DEFAULT_BATCH_SIZE, args.dry_run)
+        
+        if profiler is not None:
+            stats['profile'] = profiler.summary()
         
         # Output
-        if args.output:
-            if args.format == 'json':
-                with open(args.output, 'w', encoding='utf-8') as f:
-                    json.dump({
-                        'questions': questions,
-                        'stats': stats,
-                        'skipped_rows': skipped_rows[:10]  # Only include first 10 skipped rows
-                    }, f, ensure_ascii=False, indent=2)
-            else:  # csv
-                df = pd.DataFrame(questions)
-                df.to_csv(args.output, index=False, encoding='utf-8')
-            print(f"Đã lưu kết quả vào {args.output}")
-        else:
-            # In ra console
-            print(json.dumps({
-                'questions': questions,
-                'stats': stats,
-                'skipped_rows': skipped_rows[:10]  # Only include first 10 skipped rows
-            }, ensure_ascii=False, indent=2))
+        with parser_profile.stage('serialize'):
+            if args.output:
+                if args.format == 'json':
+                    with open(args.output, 'w', encoding='utf-8') as f:
+                        json.dump(output, f, ensure_ascii=False, indent=2)
+                else:  # csv
+                    import pandas as pd
+                    df = pd.DataFrame(questions)
+                    df.to_csv(args.output, index=False, encoding='utf-8')
+                print(f"Đã lưu kết quả vào {args.output}")
+            else:
+                # In ra console
+                write_result(output, args.output_format)
+        parser_profile.finish(profiler)
+        parser_progress.finish(progress)
         
         # In thống kê
         print(f"\nThống kê:", file=sys.stderr)
@@ -319,11 +977,24 @@ def main():
         print(f"- Dòng bị bỏ qua: {stats['skipped_count']}", file=sys.stderr)
         print(f"- Tổng dòng xử lý: {stats['total_processed']}", file=sys.stderr)
         
+        if batch:
+            print(f"\nCác file ({len(result['files'])}, {result['elapsed_ms']} ms):", file=sys.stderr)
+            for info in result['files']:
+                if info['success']:
+                    print(f"  - {info['path']}: {info['success_count']} câu, bỏ qua {info['skipped_count']} dòng "
+                          f"({info['elapsed_ms']} ms)", file=sys.stderr)
+                else:
+                    print(f"  - {info['path']}: {info['error']}", file=sys.stderr)
+        
         if skipped_rows:
             print(f"\nCác dòng bị bỏ qua (hiển thị 5 dòng đầu):", file=sys.stderr)
             for row in skipped_rows[:5]:
                 print(f"  - Dòng {row['row']}: {row['reason']}", file=sys.stderr)
         
+    except LimitExceeded as e:
+        print(json.dumps({'success': False, 'error': str(e), 'limit': e.to_dict()}, ensure_ascii=False),
+              file=sys.stderr)
+        sys.exit(1)
     except Exception as e:
         print(f"Lỗi: {str(e)}", file=sys.stderr)
         sys.exit(1)
@@ -0,0 +1,14 @@
+"""
+Benchmark cho csv_parser.py, parser-tangtoc.py và parser_daemon.py
+
+    corpus.py   sinh ngân hàng câu hỏi giả lập (cố định theo seed) cho mọi định dạng file upload
+    runner.py   chạy từng entry point trong process riêng, đo wall time, rows/s, peak RSS, startup
+    __main__.py CLI, so với file baseline để regression làm benchmark fail
+    fuzz.py     sinh input xấu (dấu nháy lạc, ô rất lớn, NUL, lẫn encoding ...), kiểm tra budget thời gian / RSS
+
+Chạy từ thư mục scripts/:
+    python3 -m parser_bench --sizes 1k 10k --save-baseline parser_bench/baseline.json
+    python3 -m parser_bench --sizes 1k 10k --baseline parser_bench/baseline.json
+    python3 -m parser_bench --sizes 1m --entries cli --workers 1 4
+    python3 -m parser_bench.fuzz --cases 30 --save-fixtures /tmp/parser-fuzz-fixtures
+"""
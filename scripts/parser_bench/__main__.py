@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Benchmark parser: sinh corpus (nếu chưa có), đo mọi entry point, in bảng kết quả.
+Exit 1 khi có case lỗi hoặc có regression so với --baseline.
+
+    python3 -m parser_bench [--kinds ...] [--variants ...] [--sizes 1k 10k 100k 1m] [--entries ...]
+                            [--workers 1 4] [--repeat 3] [--json out.json] [--baseline base.json]
+                            [--save-baseline base.json]
+
+--workers N (N > 1) thêm case cli-wN: CLI với --workers N, để so parse song song với đường pandas tuần tự (cli).
+"""
+
+import os
+import sys
+import time
+import argparse
+import platform
+
+from parser_bench.baseline import DEFAULT_TOLERANCE, METRICS, compare, load_baseline, save_baseline
+from parser_bench.corpus import DEFAULT_CORPUS_DIR, DEFAULT_SEED, KINDS, VARIANTS, generate, parse_size, size_label
+from parser_bench.runner import ENTRY_POINTS, BenchError, run_case
+
+HEADER = (f"{'case':<46} {'wall ms':>10} {'rows/s':>11} {'peak RSS MB':>12} {'startup ms':>11} {'output MB':>10}")
+
+
+def format_row(case_id, result):
+    if result.get('error'):
+        return f"{case_id:<46} ❌ {result['error'][:200]}"
+    return (f"{case_id:<46} {result['wall_ms']:>10.1f} {result['rows_per_s']:>11,} "
+            f"{result['peak_rss_kb'] / 1024:>12.1f} {result['startup_ms']:>11.1f} "
+            f"{result['output_bytes'] / 1024 / 1024:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark csv_parser.py / parser-tangtoc.py / parser_daemon.py')
+    parser.add_argument('--kinds', nargs='+', choices=KINDS, default=KINDS)
+    parser.add_argument('--variants', nargs='+', choices=list(VARIANTS), default=list(VARIANTS))
+    parser.add_argument('--sizes', nargs='+', default=['1k', '10k'],
+                       help='Số dòng: 1k, 10k, 100k, 1m hoặc một số bất kỳ (default: 1k 10k)')
+    parser.add_argument('--entries', nargs='+', choices=ENTRY_POINTS, default=ENTRY_POINTS)
+    parser.add_argument('--workers', nargs='+', type=int, default=[1],
+                       help='Số worker của entry point cli, N > 1 thành case cli-wN (default: 1)')
+    parser.add_argument('--repeat', type=int, default=3, help='Số lần đo mỗi case, lấy median (default: 3)')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--corpus-dir', default=os.environ.get('PARSER_BENCH_DIR') or str(DEFAULT_CORPUS_DIR),
+                       help=f'Thư mục chứa corpus sinh ra, dùng lại giữa các lần chạy (default: {DEFAULT_CORPUS_DIR})')
+    parser.add_argument('--json', help='Ghi kết quả ra file JSON (dùng làm baseline được)')
+    parser.add_argument('--baseline', help='So với file baseline, exit 1 nếu có regression')
+    parser.add_argument('--save-baseline', help='Ghi kết quả lần chạy này làm baseline mới')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                       help=f'Tỉ lệ chậm hơn / tốn RAM hơn cho phép so với baseline (default: {DEFAULT_TOLERANCE})')
+    parser.add_argument('--min-delta-ms', type=float, default=METRICS['wall_ms'],
+                       help=f"Chênh lệch wall time tối thiểu (ms) mới tính là regression (default: {METRICS['wall_ms']:g})")
+
+    args = parser.parse_args()
+
+    baseline = load_baseline(args.baseline) if args.baseline else None
+    repeat = max(1, args.repeat)
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'seed': args.seed,
+            'repeat': repeat,
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z')
+        },
+        'cases': {}
+    }
+
+    print("===== BENCHMARK PARSER =====")
+    print(HEADER)
+    startup_cache = {}
+    failed = False
+    for size in args.sizes:
+        rows = parse_size(size)
+        for kind in args.kinds:
+            for variant in args.variants:
+                file_path = generate(args.corpus_dir, kind, variant, rows, args.seed)
+                cases = [(entry, workers) for entry in args.entries
+                         for workers in (sorted(set(args.workers)) if entry == 'cli' else [1])]
+                for entry, workers in cases:
+                    suffix = f"-w{workers}" if workers > 1 else ''
+                    case_id = f"{kind}/{variant}/{size_label(rows)}/{entry}{suffix}"
+                    try:
+                        result = run_case(kind, entry, file_path, rows, repeat, startup_cache, workers)
+                    except (BenchError, OSError, ValueError) as e:
+                        result = {'rows': rows, 'error': str(e)}
+                        failed = True
+                    report['cases'][case_id] = result
+                    print(format_row(case_id, result), flush=True)
+
+    if args.json:
+        save_baseline(args.json, report)
+    if args.save_baseline:
+        save_baseline(args.save_baseline, report)
+        print(f"\n💾 Đã lưu baseline: {args.save_baseline}")
+
+    if baseline:
+        regressions, missing = compare(report['cases'], baseline, args.tolerance,
+                                       {'wall_ms': args.min_delta_ms})
+        if missing:
+            print(f"\n⚠️ {len(missing)} case chưa có trong baseline: {', '.join(missing[:5])}"
+                  + (" ..." if len(missing) > 5 else ""))
+        if regressions:
+            print(f"\n❌ REGRESSION so với {args.baseline} (tolerance {args.tolerance:.0%}):")
+            for item in regressions:
+                print(f"❌ {item['case']} {item['metric']}: {item['baseline']} -> {item['current']} "
+                      f"(+{item['change']:.0%})")
+            failed = True
+        else:
+            print(f"\n✅ Không có regression so với {args.baseline}")
+
+    if failed:
+        print("\n⚠️ Benchmark parser thất bại!")
+        sys.exit(1)
+    print("\n🎉 Benchmark parser hoàn tất!")
+
+
+if __name__ == '__main__':
+    main()
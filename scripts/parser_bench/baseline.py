@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+File baseline của benchmark: chính là file kết quả (--json / --save-baseline) của một lần chạy trước.
+Một case bị tính là regression khi chỉ số tệ hơn baseline quá tolerance (tỉ lệ)
+và cũng quá ngưỡng tuyệt đối (để file 1k dòng chạy vài chục ms không fail vì nhiễu).
+"""
+
+import json
+from pathlib import Path
+
+DEFAULT_TOLERANCE = 0.25
+
+# chỉ số -> ngưỡng tuyệt đối mặc định (càng lớn càng tệ với cả ba chỉ số)
+METRICS = {
+    'wall_ms': 50.0,
+    'startup_ms': 30.0,
+    'peak_rss_kb': 10 * 1024,
+}
+
+
+def load_baseline(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if not isinstance(data, dict) or not isinstance(data.get('cases'), dict):
+        raise ValueError(f"File baseline không hợp lệ (thiếu 'cases'): {path}")
+    return data
+
+
+def save_baseline(path, report):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, ensure_ascii=False, indent=2) + '\n', encoding='utf-8')
+
+
+def compare(cases, baseline, tolerance=DEFAULT_TOLERANCE, min_delta=None):
+    """
+    So các case với baseline. Trả về (regressions, missing):
+    regressions là list {'case', 'metric', 'baseline', 'current', 'change'}, missing là các case baseline chưa có
+    """
+    min_delta = {**METRICS, **(min_delta or {})}
+    regressions = []
+    missing = []
+    for case_id, current in cases.items():
+        base = baseline['cases'].get(case_id)
+        if not base:
+            missing.append(case_id)
+            continue
+        if current.get('error'):
+            continue
+        for metric, threshold in min_delta.items():
+            before = base.get(metric)
+            after = current.get(metric)
+            if not before or after is None:
+                continue
+            if after > before * (1 + tolerance) and after - before > threshold:
+                regressions.append({
+                    'case': case_id,
+                    'metric': metric,
+                    'baseline': before,
+                    'current': after,
+                    'change': round(after / before - 1, 3)
+                })
+    return regressions, missing
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Sinh ngân hàng câu hỏi giả lập cho benchmark, cố định theo seed: cùng tham số thì ra cùng nội dung file,
+nên số đo của các lần chạy (và của baseline) so được với nhau.
+
+    kind     khoidong (Câu hỏi, Đáp án) | tangtoc (Số câu, Câu hỏi, Đáp án, Loại, có dòng kèm ảnh)
+    variant  csv-comma | csv-comma-bom | csv-semicolon | csv-tab | csv-cp1252 | txt | xlsx
+    size     1k | 10k | 100k | 1m (hoặc một số dòng bất kỳ)
+
+Khoảng 1% dòng cố ý không hợp lệ (thiếu đáp án / số câu ngoài 1-4) để đo cả nhánh skipped_rows,
+một phần câu hỏi có dấu phẩy, chấm phẩy và dấu ngoặc kép để CSV phải quote.
+
+Chạy trực tiếp để sinh file ra một thư mục:
+    python3 -m parser_bench.corpus --out /tmp/corpus --kinds tangtoc --variants csv-comma xlsx --sizes 1k 1m
+"""
+
+import os
+import csv
+import random
+import argparse
+import tempfile
+from pathlib import Path
+
+DEFAULT_SEED = 2024
+DEFAULT_CORPUS_DIR = Path(tempfile.gettempdir()) / 'parser-bench-corpus'
+
+KINDS = ['khoidong', 'tangtoc']
+
+# variant -> (đuôi file, delimiter, encoding); xlsx không có delimiter/encoding
+VARIANTS = {
+    'csv-comma': ('.csv', ',', 'utf-8'),
+    'csv-comma-bom': ('.csv', ',', 'utf-8-sig'),
+    'csv-semicolon': ('.csv', ';', 'utf-8'),
+    'csv-tab': ('.csv', '\t', 'utf-8'),
+    'csv-cp1252': ('.csv', ',', 'cp1252'),
+    'txt': ('.txt', '\t', 'utf-8'),
+    'xlsx': ('.xlsx', None, None),
+}
+
+SIZES = {'1k': 1000, '10k': 10000, '100k': 100000, '1m': 1000000}
+
+WORDS = ["thủ", "đô", "của", "nước", "nào", "là", "sông", "dài", "nhất", "thế", "giới", "người", "đầu", "tiên",
+         "năm", "bao", "nhiêu", "ai", "viết", "truyện", "Kiều", "Việt", "Nam", "Hà", "Nội", "Đà", "Nẵng", "Huế"]
+
+# File cp1252 (Excel tiếng Pháp/Anh xuất ra) không chứa được chữ tiếng Việt
+WORDS_CP1252 = ["quelle", "est", "la", "capitale", "de", "France", "où", "se", "trouve", "fleuve", "le", "plus",
+                "long", "année", "élève", "garçon", "façade", "théâtre", "Noël", "naïve", "côte", "über", "señor"]
+
+HEADERS = {
+    'khoidong': (["Câu hỏi", "Đáp án"], ["Question", "Answer"]),
+    'tangtoc': (["Số câu", "Câu hỏi", "Đáp án", "Loại"], ["Question number", "Question", "Answer", "Type"]),
+}
+
+IMAGE_SUFFIX = "data:image/gif;base64,R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7"
+
+# Tỉ lệ dòng đặc biệt (trên 1000 dòng)
+INVALID_PER_MILLE = 10
+QUOTED_PER_MILLE = 50
+IMAGE_PER_MILLE = 100
+
+
+def parse_size(size):
+    """'10k' -> 10000, '1m' -> 1000000, '2500' -> 2500"""
+    size = str(size).lower()
+    if size in SIZES:
+        return SIZES[size]
+    rows = int(size)
+    if rows < 1:
+        raise ValueError(f"Số dòng phải lớn hơn 0: {size}")
+    return rows
+
+
+def size_label(rows):
+    for label, value in SIZES.items():
+        if value == rows:
+            return label
+    return str(rows)
+
+
+def iter_rows(kind, rows, seed=DEFAULT_SEED, cp1252=False):
+    """Các dòng dữ liệu (không gồm header) của ngân hàng câu hỏi giả lập"""
+    rng = random.Random(f"{seed}:{kind}:{'cp1252' if cp1252 else 'utf-8'}")
+    words = WORDS_CP1252 if cp1252 else WORDS
+    for i in range(rows):
+        question = " ".join(rng.choice(words) for _ in range(rng.randint(6, 16)))
+        roll = rng.randrange(1000)
+        if roll < QUOTED_PER_MILLE:
+            question = f'{question}, "{rng.choice(words)}"; {rng.choice(words)}'
+        question = f"{question} ({i})?"
+        answer = " ".join(rng.choice(words) for _ in range(rng.randint(1, 3)))
+        invalid = rng.randrange(1000) < INVALID_PER_MILLE
+
+        if kind == 'khoidong':
+            yield [question, "" if invalid else answer]
+            continue
+
+        number = 5 if invalid else rng.randint(1, 4)
+        if rng.randrange(1000) < IMAGE_PER_MILLE:
+            question = f"{question} @https://cdn.example.com/tangtoc/{seed}/{i}.gif {IMAGE_SUFFIX}"
+        yield [number, question, answer, "tangtoc"]
+
+
+def corpus_path(directory, kind, variant, rows, seed=DEFAULT_SEED):
+    extension = VARIANTS[variant][0]
+    return Path(directory) / f"{kind}-{variant}-{size_label(rows)}-s{seed}{extension}"
+
+
+def write_csv(path, kind, variant, rows, seed):
+    _, delimiter, encoding = VARIANTS[variant]
+    cp1252 = encoding == 'cp1252'
+    with open(path, 'w', encoding=encoding, newline='') as f:
+        writer = csv.writer(f, delimiter=delimiter, lineterminator='\n')
+        writer.writerow(HEADERS[kind][cp1252])
+        writer.writerows(iter_rows(kind, rows, seed, cp1252))
+
+
+def write_xlsx(path, kind, rows, seed):
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Tăng tốc" if kind == 'tangtoc' else "Khởi động")
+    sheet.append(HEADERS[kind][0])
+    for row in iter_rows(kind, rows, seed):
+        sheet.append(row)
+    workbook.save(path)
+
+
+def generate(directory, kind, variant, rows, seed=DEFAULT_SEED, force=False):
+    """
+    Sinh file (nếu chưa có) và trả về đường dẫn. File đã sinh được dùng lại giữa các lần chạy
+    vì nội dung chỉ phụ thuộc vào tham số
+    """
+    if kind not in KINDS:
+        raise ValueError(f"Loại ngân hàng câu hỏi không hợp lệ: {kind}")
+    if variant not in VARIANTS:
+        raise ValueError(f"Định dạng không hợp lệ: {variant}")
+
+    path = corpus_path(directory, kind, variant, rows, seed)
+    if path.exists() and not force:
+        return path
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Ghi ra file tạm rồi rename: bị ngắt giữa chừng cũng không để lại file dở dang
+    tmp_path = path.with_name(f".{path.stem}.{os.getpid()}.tmp{path.suffix}")
+    try:
+        if variant == 'xlsx':
+            write_xlsx(tmp_path, kind, rows, seed)
+        else:
+            write_csv(tmp_path, kind, variant, rows, seed)
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sinh ngân hàng câu hỏi giả lập cho benchmark parser')
+    parser.add_argument('--out', default=str(DEFAULT_CORPUS_DIR),
+                       help=f'Thư mục chứa file sinh ra (default: {DEFAULT_CORPUS_DIR})')
+    parser.add_argument('--kinds', nargs='+', choices=KINDS, default=KINDS)
+    parser.add_argument('--variants', nargs='+', choices=list(VARIANTS), default=list(VARIANTS))
+    parser.add_argument('--sizes', nargs='+', default=['1k', '10k'],
+                       help=f'Số dòng: {", ".join(SIZES)} hoặc một số bất kỳ (default: 1k 10k)')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--force', action='store_true', help='Sinh lại kể cả khi file đã có')
+
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        rows = parse_size(size)
+        for kind in args.kinds:
+            for variant in args.variants:
+                path = generate(args.out, kind, variant, rows, args.seed, args.force)
+                print(f"{path} ({path.stat().st_size:,} bytes)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""
+Fuzz parser với input cố ý xấu: sinh file CSV/TXT hỏng theo seed (cùng seed ra cùng file), chạy
+csv_parser.py / parser-tangtoc.py trên từng file trong process riêng và kiểm tra mỗi lần chạy:
+
+    - xong trong --time-budget-ms và không vượt --memory-budget-mb peak RSS (quá 3 lần budget thì bị kill)
+    - không crash: không có traceback, output là kết quả / lỗi có cấu trúc như với file bình thường
+
+Mỗi file là dữ liệu hợp lệ (parser_bench.corpus) bị áp 1-4 kiểu phá (MUTATORS): delimiter lẫn lộn, dấu nháy
+lạc / không đóng, ô rất lớn, byte NUL, nhiều encoding trong một file, xuống dòng lẫn lộn, dòng rất nhiều cột,
+ô nhiều dòng, dòng trống. Các case chậm nhất được in ra và ghi lại làm fixture (--save-fixtures DIR);
+--replay DIR chạy lại các fixture đó và so với số đo đã ghi như baseline của benchmark.
+
+    python3 -m parser_bench.fuzz [--cases 30] [--seed 2024] [--entries cli stream]
+                                 [--time-budget-ms 10000] [--memory-budget-mb 512]
+                                 [--top 5] [--save-fixtures DIR] [--replay DIR] [--json out.json]
+"""
+
+import os
+import io
+import sys
+import csv
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+from pathlib import Path
+
+from parser_bench.baseline import DEFAULT_TOLERANCE, compare, load_baseline, save_baseline
+from parser_bench.corpus import DEFAULT_SEED, HEADERS, KINDS, iter_rows
+from parser_bench.runner import PARSERS, SCRIPTS_DIR, _tail, cli_env, run_measured
+
+ENTRIES = ['cli', 'stream']
+
+DEFAULT_CASES = 30
+DEFAULT_TIME_BUDGET_MS = 10000
+DEFAULT_MEMORY_BUDGET_MB = 512
+DEFAULT_TOP = 5
+
+# Số dòng dữ liệu hợp lệ trước khi phá
+ROW_COUNTS = [20, 2000, 50000]
+# Tỉ lệ dòng bị phá của các mutator theo dòng
+RATES = [0.001, 0.05, 0.3]
+# Ô rất lớn (ký tự), vượt cả field_size_limit mặc định của module csv (131072)
+HUGE_CELL_CHARS = [200_000, 1_500_000, 4_000_000]
+WIDE_ROW_COLUMNS = [50, 2000, 20000]
+OTHER_DELIMITERS = [',', ';', '\t', '|', ' ']
+# Quá 3 lần budget thời gian thì coi như treo và kill
+TIMEOUT_FACTOR = 3
+
+MANIFEST = 'manifest.json'
+
+
+def _picks(rng, lines):
+    """Các dòng (trừ header) bị phá"""
+    if len(lines) < 2:
+        return []
+    count = max(1, int((len(lines) - 1) * rng.choice(RATES)))
+    return rng.sample(range(1, len(lines)), min(count, len(lines) - 1))
+
+
+def mixed_delimiters(rng, lines, delimiter):
+    for i in _picks(rng, lines):
+        lines[i] = lines[i].replace(delimiter, rng.choice(OTHER_DELIMITERS))
+
+
+def stray_quotes(rng, lines, delimiter):
+    for i in _picks(rng, lines):
+        line = lines[i]
+        position = rng.randrange(len(line) + 1)
+        # Dấu nháy ở đầu ô mở một ô không bao giờ đóng, ở giữa ô chỉ là ký tự lạ
+        lines[i] = line[:position] + rng.choice(['"', '"', '""', '"""', f'{delimiter}"']) + line[position:]
+
+
+def huge_cell(rng, lines, delimiter):
+    size = rng.choice(HUGE_CELL_CHARS)
+    cell = ('Câu hỏi rất dài ' * (size // 16 + 1))[:size]
+    if rng.random() < 0.5:
+        # Ô trong dấu nháy có xuống dòng
+        cell = '"' + cell.replace(' dài ', '\n', 50) + '"'
+    lines[rng.randrange(1, len(lines)) if len(lines) > 1 else 0] = delimiter.join([cell, 'đáp án', '1', 'tangtoc'])
+
+
+def nul_bytes(rng, lines, delimiter):
+    for i in _picks(rng, lines):
+        position = rng.randrange(len(lines[i]) + 1)
+        lines[i] = lines[i][:position] + '\x00' * rng.randint(1, 8) + lines[i][position:]
+
+
+def wide_rows(rng, lines, delimiter):
+    columns = rng.choice(WIDE_ROW_COLUMNS)
+    for i in _picks(rng, lines)[:20]:
+        lines[i] = delimiter.join(['ô'] * columns)
+    if rng.random() < 0.3:
+        # Header rất rộng: pandas lấy số cột của dòng đầu cho cả file
+        lines[0] = delimiter.join(f'c{column}' for column in range(columns))
+
+
+def quoted_newlines(rng, lines, delimiter):
+    for i in _picks(rng, lines)[:50]:
+        text = '\n'.join(f'dòng {n}, "trích dẫn"' for n in range(rng.choice([2, 90, 500])))
+        lines[i] = delimiter.join(['"' + text.replace('"', '""') + '"', 'đáp án', '2', 'tangtoc'])
+
+
+def blank_lines(rng, lines, delimiter):
+    for i in sorted(_picks(rng, lines), reverse=True):
+        lines.insert(i, rng.choice(['', ' ', '\t', '""', delimiter * 3, '" "']))
+
+
+def quote_runs(rng, lines, delimiter):
+    for i in _picks(rng, lines):
+        lines[i] = '"' * rng.choice([2, 7, 64]) + lines[i] + '"' * rng.choice([1, 4, 33])
+
+
+# Mutator theo text (list dòng) và theo byte (khi ghi file)
+LINE_MUTATORS = {
+    'mixed_delimiters': mixed_delimiters,
+    'stray_quotes': stray_quotes,
+    'huge_cell': huge_cell,
+    'nul_bytes': nul_bytes,
+    'wide_rows': wide_rows,
+    'quoted_newlines': quoted_newlines,
+    'blank_lines': blank_lines,
+    'quote_runs': quote_runs,
+}
+BYTE_MUTATORS = ['mixed_encodings', 'mixed_line_endings']
+MUTATORS = list(LINE_MUTATORS) + BYTE_MUTATORS
+
+ROW_ENCODINGS = ['utf-8', 'utf-8', 'cp1252', 'latin-1', 'utf-16-le']
+INVALID_BYTES = [b'\xff', b'\xfe\xff', b'\x80\x81', b'\xc3', b'\xef\xbb\xbf', b'\xe2\x82']
+
+
+def encode_lines(rng, lines, mutators):
+    """Ghi các dòng thành byte, áp các mutator theo byte (mỗi dòng một encoding, xuống dòng lẫn lộn ...)"""
+    mixed_encodings = 'mixed_encodings' in mutators
+    mixed_endings = 'mixed_line_endings' in mutators
+    out = io.BytesIO()
+    if mixed_encodings and rng.random() < 0.5:
+        out.write(rng.choice([b'\xef\xbb\xbf', b'\xff\xfe', b'\xfe\xff']))
+    for line in lines:
+        encoding = rng.choice(ROW_ENCODINGS) if mixed_encodings and rng.random() < 0.2 else 'utf-8'
+        data = line.encode(encoding, errors='replace')
+        if mixed_encodings and rng.random() < 0.02:
+            position = rng.randrange(len(data) + 1)
+            data = data[:position] + rng.choice(INVALID_BYTES) + data[position:]
+        out.write(data)
+        out.write(rng.choice([b'\n', b'\r\n', b'\r', b'\n\r', b'\r\r\n']) if mixed_endings else b'\n')
+    return out.getvalue()
+
+
+def generate_case(index, seed=DEFAULT_SEED):
+    """
+    Sinh một input xấu, cố định theo (seed, index). Trả về (kind, suffix, content bytes, danh sách mutator).
+    Mutator đầu tiên xoay vòng theo index để mọi kiểu phá đều được chạy
+    """
+    rng = random.Random(f"{seed}:fuzz:{index}")
+    kind = KINDS[index % len(KINDS)]
+    suffix = rng.choice(['.csv', '.csv', '.txt'])
+    delimiter = rng.choice([',', ',', ';', '\t'])
+    rows = rng.choice(ROW_COUNTS)
+
+    text = io.StringIO()
+    writer = csv.writer(text, delimiter=delimiter, lineterminator='\n')
+    writer.writerow(HEADERS[kind][0])
+    writer.writerows(iter_rows(kind, rows, seed))
+    lines = text.getvalue().split('\n')[:-1]
+
+    first = MUTATORS[index % len(MUTATORS)]
+    others = [name for name in MUTATORS if name != first]
+    mutators = [first] + rng.sample(others, rng.randint(0, 3))
+    for name in mutators:
+        if name in LINE_MUTATORS:
+            LINE_MUTATORS[name](rng, lines, delimiter)
+    return kind, suffix, encode_lines(rng, lines, mutators), mutators
+
+
+def last_line(path, block=64 * 1024):
+    """Dòng cuối của file (có thể dài hơn nhiều block, vd. stats kèm skipped_details chứa ô rất lớn)"""
+    with open(path, 'rb') as f:
+        end = f.seek(0, os.SEEK_END)
+        data = b''
+        while end > 0:
+            start = max(0, end - block)
+            f.seek(start)
+            data = f.read(end - start) + data
+            end = start
+            newline = data.rstrip(b'\n').rfind(b'\n')
+            if newline >= 0:
+                return data[newline + 1:].rstrip(b'\n')
+        return data.rstrip(b'\n')
+
+
+def parser_command(kind, file_path, entry):
+    command = [sys.executable, str(SCRIPTS_DIR / PARSERS[kind][0]), str(file_path)]
+    if entry == 'stream':
+        command += ['--stream', '--output-format', 'ndjson']
+    return command
+
+
+def check_output(kind, entry, returncode, stdout_path, stderr_text):
+    """
+    Lỗi "crash" của một lần chạy (None nếu parser kết thúc bình thường): input xấu được phép parse ra ít câu hỏi
+    hoặc báo lỗi, nhưng phải là output / thông báo lỗi có cấu trúc như với file bình thường
+    """
+    if 'Traceback (most recent call last)' in stderr_text:
+        return f"traceback: {stderr_text.strip().splitlines()[-1][:200]}"
+    if returncode not in (0, 1):
+        return f"exit {returncode}"
+    # parser-tangtoc.py exit 1 khi file không có câu hỏi hợp lệ hoặc lỗi (đã in thông báo ra stderr)
+    if returncode == 1 and kind == 'khoidong':
+        return "exit 1"
+    if os.path.getsize(stdout_path) == 0:
+        return None if returncode == 1 and stderr_text.strip() else "không có output"
+    if entry == 'stream':
+        last = last_line(stdout_path)
+        try:
+            record_type = json.loads(last).get('type')
+        except ValueError:
+            return f"record cuối không phải JSON: {last[:200].decode('utf-8', 'replace')}"
+        return None if record_type in ('stats', 'error') else f"record cuối có type {record_type}"
+    if returncode == 0:
+        # Không json.load cả output vào process này (peak RSS của các lần chạy sau sẽ bị tính cả phần đó)
+        with open(stdout_path, 'rb') as f:
+            head = f.read(64)
+        if not head.lstrip().startswith(b'{') or not _tail(stdout_path, 64).rstrip().endswith(b'}'):
+            return f"output không phải JSON: {head[:60].decode('utf-8', 'replace')}"
+    return None
+
+
+def run_input(kind, file_path, entry, time_budget_ms, memory_budget_mb):
+    """Chạy parser trên một file, trả về dict số đo + 'problems' (list các budget / kiểm tra bị vi phạm)"""
+    wall_ms, rss_kb, returncode, stdout_path, stderr_text = run_measured(
+        parser_command(kind, file_path, entry), cli_env(), time_budget_ms * TIMEOUT_FACTOR / 1000)
+    try:
+        problems = []
+        if returncode == -9 and wall_ms >= time_budget_ms * TIMEOUT_FACTOR:
+            problems.append(f"treo: bị kill sau {wall_ms:.0f} ms")
+        else:
+            crash = check_output(kind, entry, returncode, stdout_path, stderr_text)
+            if crash:
+                problems.append(crash)
+        if wall_ms > time_budget_ms:
+            problems.append(f"chậm: {wall_ms:.0f} ms > {time_budget_ms} ms")
+        if rss_kb > memory_budget_mb * 1024:
+            problems.append(f"tốn RAM: {rss_kb / 1024:.0f} MB > {memory_budget_mb} MB")
+        return {
+            'wall_ms': round(wall_ms, 1),
+            'peak_rss_kb': rss_kb,
+            'exit': returncode,
+            'output_bytes': os.path.getsize(stdout_path),
+            'problems': problems
+        }
+    finally:
+        os.unlink(stdout_path)
+
+
+def format_row(case_id, result):
+    status = '❌ ' + '; '.join(result['problems']) if result['problems'] else '✅'
+    return (f"{case_id:<34} {result['wall_ms']:>10.1f} {result['peak_rss_kb'] / 1024:>12.1f} "
+            f"{result['input_bytes'] / 1024:>10.0f}  {status}")
+
+
+def save_fixtures(directory, cases, inputs, report_meta):
+    """Ghi file input của các case chậm nhất + manifest.json (định dạng baseline, dùng được với --replay)"""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    manifest = {'meta': report_meta, 'cases': {}}
+    for case_id, result in cases:
+        source = inputs[result['input']]
+        target = directory / source.name
+        if not target.exists():
+            shutil.copyfile(source, target)
+        manifest['cases'][case_id] = {**result, 'input': target.name}
+    save_baseline(directory / MANIFEST, manifest)
+    return directory / MANIFEST
+
+
+def write_case(work_dir, seed, index):
+    kind, suffix, content, mutators = generate_case(index, seed)
+    path = Path(work_dir) / f"fuzz-s{seed}-{index:03d}-{kind}{suffix}"
+    path.write_bytes(content)
+    return f"{index:03d}-{kind}", kind, path, mutators
+
+
+def generated_inputs(work_dir, cases, seed):
+    """
+    case -> (kind, đường dẫn file, mutators) của các input sinh ra. Sinh trong process riêng: peak RSS
+    của process con được tính cả phần bộ nhớ của process cha lúc fork, cha phải nhỏ thì số đo mới đúng
+    """
+    import functools
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+        return list(executor.map(functools.partial(write_case, work_dir, seed), range(cases)))
+
+
+def replay_inputs(directory):
+    manifest = load_baseline(Path(directory) / MANIFEST)
+    seen = set()
+    for case_id, case in manifest['cases'].items():
+        name = case_id.split('/')[0]
+        if name in seen:
+            continue
+        seen.add(name)
+        yield name, case['kind'], Path(directory) / case['input'], case['mutators']
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fuzz csv_parser.py / parser-tangtoc.py với input xấu, '
+                                                 'kiểm tra budget thời gian / bộ nhớ')
+    parser.add_argument('--cases', type=int, default=DEFAULT_CASES, help=f'Số input sinh ra (default: {DEFAULT_CASES})')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--entries', nargs='+', choices=ENTRIES, default=ENTRIES)
+    parser.add_argument('--time-budget-ms', type=int, default=DEFAULT_TIME_BUDGET_MS,
+                       help=f'Thời gian tối đa mỗi lần chạy, tính cả khởi động (default: {DEFAULT_TIME_BUDGET_MS})')
+    parser.add_argument('--memory-budget-mb', type=int, default=DEFAULT_MEMORY_BUDGET_MB,
+                       help=f'Peak RSS tối đa mỗi lần chạy (default: {DEFAULT_MEMORY_BUDGET_MB})')
+    parser.add_argument('--top', type=int, default=DEFAULT_TOP, help=f'Số case chậm nhất in ra / ghi fixture '
+                                                                    f'(default: {DEFAULT_TOP})')
+    parser.add_argument('--save-fixtures', metavar='DIR',
+                       help='Ghi input của các case chậm nhất (và case lỗi) + manifest.json vào DIR')
+    parser.add_argument('--replay', metavar='DIR',
+                       help='Chạy lại các fixture trong DIR thay vì sinh input, so với số đo trong manifest.json')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                       help=f'Với --replay: tỉ lệ chậm hơn / tốn RAM hơn cho phép (default: {DEFAULT_TOLERANCE})')
+    parser.add_argument('--json', help='Ghi kết quả mọi case ra file JSON')
+
+    args = parser.parse_args()
+
+    meta = {
+        'seed': args.seed,
+        'time_budget_ms': args.time_budget_ms,
+        'memory_budget_mb': args.memory_budget_mb,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z')
+    }
+    work_dir = tempfile.mkdtemp(prefix='parser-fuzz-')
+    cases = {}
+    inputs = {}
+    try:
+        if args.replay:
+            source = replay_inputs(args.replay)
+        else:
+            source = generated_inputs(work_dir, max(1, args.cases), args.seed)
+
+        print("===== FUZZ PARSER =====")
+        print(f"{'case':<34} {'wall ms':>10} {'peak RSS MB':>12} {'input KB':>10}  kết quả")
+        for name, kind, path, mutators in source:
+            inputs[path.name] = path
+            for entry in args.entries:
+                case_id = f"{name}/{entry}"
+                result = run_input(kind, path, entry, args.time_budget_ms, args.memory_budget_mb)
+                result.update(kind=kind, entry=entry, input=path.name, input_bytes=path.stat().st_size,
+                              mutators=mutators)
+                cases[case_id] = result
+                print(format_row(case_id, result), flush=True)
+
+        failed = [(case_id, result) for case_id, result in cases.items() if result['problems']]
+        slowest = sorted(cases.items(), key=lambda item: item[1]['wall_ms'], reverse=True)[:max(0, args.top)]
+
+        print(f"\n🐢 {len(slowest)} case chậm nhất:")
+        for case_id, result in slowest:
+            print(f"  - {case_id}: {result['wall_ms']:.0f} ms, {result['peak_rss_kb'] / 1024:.0f} MB "
+                  f"({', '.join(result['mutators'])})")
+
+        report = {'meta': meta, 'cases': cases}
+        if args.json:
+            save_baseline(args.json, report)
+        if args.save_fixtures:
+            keep = dict(slowest + failed)
+            manifest = save_fixtures(args.save_fixtures, sorted(keep.items()), inputs, meta)
+            print(f"\n💾 Đã ghi {len(keep)} fixture: {manifest}")
+
+        if args.replay:
+            regressions, _ = compare(cases, load_baseline(Path(args.replay) / MANIFEST), args.tolerance)
+            for item in regressions:
+                print(f"❌ {item['case']} {item['metric']}: {item['baseline']} -> {item['current']} "
+                      f"(+{item['change']:.0%})")
+            if regressions:
+                failed.extend((item['case'], None) for item in regressions)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if failed:
+        print(f"\n⚠️ Fuzz parser thất bại: {len(failed)} case vượt budget, crash hoặc chậm hơn fixture!")
+        sys.exit(1)
+    print(f"\n🎉 Fuzz parser hoàn tất: {len(cases)} case trong budget!")
+
+
+if __name__ == '__main__':
+    main()
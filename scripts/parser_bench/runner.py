@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Chạy từng entry point của parser trong một process riêng (như Node spawn) và đo:
+
+    wall_ms      thời gian từ lúc spawn đến lúc có đủ kết quả (median của các lần lặp)
+    rows_per_s   số dòng của file / wall time
+    peak_rss_kb  RSS lớn nhất của process (kể cả worker con), lấy từ rusage của os.wait4
+    startup_ms   thời gian khởi động: `script --help` với CLI, đến lúc trả lời health với daemon
+    output_bytes dung lượng output
+
+Entry point:
+    cli     python3 csv_parser.py FILE / parser-tangtoc.py FILE (PARSER_CACHE=0); workers > 1 thêm --workers N
+            (parse song song các khoảng byte của file, so với đường pandas tuần tự của workers = 1)
+    stream  như cli với --stream --output-format ndjson
+    cached  như cli nhưng cache đã có sẵn kết quả (đo đường cache hit)
+    daemon  parser_daemon.py qua stdin/stdout, một worker, đo riêng request parse
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import threading
+import statistics
+import tempfile
+import subprocess
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+
+ENTRY_POINTS = ['cli', 'stream', 'cached', 'daemon']
+
+# kind -> (script, method của daemon)
+PARSERS = {
+    'khoidong': ('csv_parser.py', 'parse_file'),
+    'tangtoc': ('parser-tangtoc.py', 'parse_tangtoc_file'),
+}
+
+TAIL_BYTES = 64 * 1024
+
+
+class BenchError(RuntimeError):
+    """Entry point chạy lỗi (exit code khác 0 hoặc output báo lỗi)"""
+
+
+def _rss_kb(rusage):
+    # Linux trả về KB, macOS trả về byte
+    return rusage.ru_maxrss // 1024 if sys.platform == 'darwin' else rusage.ru_maxrss
+
+
+def _tail(path, size=TAIL_BYTES):
+    with open(path, 'rb') as f:
+        f.seek(max(0, os.path.getsize(path) - size))
+        return f.read()
+
+
+def run_measured(command, env=None, timeout=None):
+    """
+    Chạy command, stdout/stderr ghi ra file tạm (không giữ output lớn trong RAM của benchmark).
+    timeout (giây): quá thời gian thì kill process (returncode -9).
+    Trả về (wall_ms, peak_rss_kb, returncode, stdout_path, stderr_text)
+    """
+    stdout = tempfile.NamedTemporaryFile(prefix='parser-bench-', suffix='.out', delete=False)
+    stderr = tempfile.TemporaryFile()
+    timer = None
+    try:
+        started = time.perf_counter()
+        process = subprocess.Popen(command, cwd=SCRIPTS_DIR, env=env, stdin=subprocess.DEVNULL,
+                                   stdout=stdout, stderr=stderr)
+        if timeout:
+            timer = threading.Timer(timeout, process.kill)
+            timer.start()
+        _, status, rusage = os.wait4(process.pid, 0)
+        wall_ms = (time.perf_counter() - started) * 1000
+        process.returncode = os.waitstatus_to_exitcode(status)
+        stderr.seek(0)
+        stderr_text = stderr.read()[-2000:].decode('utf-8', 'replace')
+    except BaseException:
+        os.unlink(stdout.name)
+        raise
+    finally:
+        if timer is not None:
+            timer.cancel()
+        stdout.close()
+        stderr.close()
+    return wall_ms, _rss_kb(rusage), process.returncode, stdout.name, stderr_text
+
+
+def check_output(stdout_path, record_format):
+    """Kiểm tra nhanh output có báo thành công không (không parse toàn bộ output hàng trăm MB)"""
+    if os.path.getsize(stdout_path) == 0:
+        raise BenchError("Parser không in ra gì")
+    if record_format:
+        last = _tail(stdout_path).rstrip(b'\n').rsplit(b'\n', 1)[-1]
+        record = json.loads(last)
+        if record.get('type') != 'stats':
+            raise BenchError(f"Record cuối không phải stats: {last[:300].decode('utf-8', 'replace')}")
+    else:
+        with open(stdout_path, 'rb') as f:
+            head = f.read(4096)
+        if b'"success":false' in head.replace(b' ', b''):
+            raise BenchError(head[:300].decode('utf-8', 'replace'))
+
+
+def cli_env(cache_dir=None):
+    env = dict(os.environ, PYTHONUNBUFFERED='1')
+    if cache_dir:
+        env.update(PARSER_CACHE='1', PARSER_CACHE_DIR=str(cache_dir))
+    else:
+        env['PARSER_CACHE'] = '0'
+    return env
+
+
+def measure_cli(kind, file_path, entry, repeat, workers=1):
+    """Đo csv_parser.py / parser-tangtoc.py, trả về list (wall_ms, peak_rss_kb, output_bytes)"""
+    script = PARSERS[kind][0]
+    command = [sys.executable, str(SCRIPTS_DIR / script), str(file_path)]
+    if workers > 1:
+        command += ['--workers', str(workers)]
+    if entry == 'stream':
+        command += ['--stream', '--output-format', 'ndjson']
+
+    cache_dir = tempfile.mkdtemp(prefix='parser-bench-cache-') if entry == 'cached' else None
+    try:
+        env = cli_env(cache_dir)
+        # Lần chạy đầu của cached chỉ để ghi cache, không tính
+        runs = repeat + 1 if entry == 'cached' else repeat
+        samples = []
+        for _ in range(runs):
+            wall_ms, rss_kb, returncode, stdout_path, stderr_text = run_measured(command, env)
+            try:
+                if returncode != 0:
+                    raise BenchError(f"{script} exit {returncode}: {stderr_text[-500:]}")
+                check_output(stdout_path, entry == 'stream')
+                samples.append((wall_ms, rss_kb, os.path.getsize(stdout_path)))
+            finally:
+                os.unlink(stdout_path)
+        return samples[-repeat:]
+    finally:
+        if cache_dir:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+def measure_cli_startup(kind, repeat):
+    """Thời gian `script --help`: khởi động python3 + import module của parser"""
+    command = [sys.executable, str(SCRIPTS_DIR / PARSERS[kind][0]), '--help']
+    samples = []
+    for _ in range(repeat):
+        wall_ms, _, returncode, stdout_path, stderr_text = run_measured(command, cli_env())
+        os.unlink(stdout_path)
+        if returncode != 0:
+            raise BenchError(f"--help exit {returncode}: {stderr_text[-500:]}")
+        samples.append(wall_ms)
+    return statistics.median(samples)
+
+
+def _request(process, request):
+    process.stdin.write(json.dumps(request) + '\n')
+    process.stdin.flush()
+    # Bỏ qua dòng {"accepted": true} gửi trước response cuối của job parse
+    while True:
+        line = process.stdout.readline()
+        if not line:
+            raise BenchError("Daemon đóng stdout trước khi trả lời")
+        response = json.loads(line)
+        if not response.get('accepted'):
+            break
+    if 'error' in response:
+        raise BenchError(f"Daemon trả về lỗi: {response['error']}")
+    return response, len(line.encode('utf-8'))
+
+
+def measure_daemon(kind, file_path, repeat):
+    """
+    Đo parser_daemon.py (1 worker): startup = spawn đến lúc trả lời health (worker đã import pandas),
+    wall = từ lúc gửi request parse đến lúc đọc xong response. Trả về (startup_ms, samples)
+    """
+    method = PARSERS[kind][1]
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, str(SCRIPTS_DIR / 'parser_daemon.py'), '--workers', '1'],
+                               cwd=SCRIPTS_DIR, env=cli_env(), stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                               stderr=subprocess.DEVNULL, text=True, encoding='utf-8')
+    waited = False
+    try:
+        _request(process, {'id': 0, 'method': 'health'})
+        startup_ms = (time.perf_counter() - started) * 1000
+
+        timings = []
+        for request_id in range(1, repeat + 1):
+            request_started = time.perf_counter()
+            response, size = _request(process, {'id': request_id, 'method': method,
+                                                'params': {'file_path': str(file_path)}})
+            timings.append(((time.perf_counter() - request_started) * 1000, size))
+            if response['result'].get('success') is False:
+                raise BenchError(f"Daemon parse lỗi: {response['result'].get('error')}")
+
+        process.stdin.close()
+        _, status, rusage = os.wait4(process.pid, 0)
+        waited = True
+        process.returncode = os.waitstatus_to_exitcode(status)
+        rss_kb = _rss_kb(rusage)
+    finally:
+        if not waited:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+    # RSS chỉ đo được một lần cho cả daemon (sau mọi request)
+    return startup_ms, [(wall_ms, rss_kb, size) for wall_ms, size in timings]
+
+
+def summarize(rows, samples, startup_ms):
+    wall_ms = statistics.median(sample[0] for sample in samples)
+    return {
+        'rows': rows,
+        'wall_ms': round(wall_ms, 1),
+        'rows_per_s': round(rows / (wall_ms / 1000)) if wall_ms > 0 else None,
+        'peak_rss_kb': max(sample[1] for sample in samples),
+        'startup_ms': round(startup_ms, 1),
+        'output_bytes': samples[-1][2],
+        'runs': len(samples)
+    }
+
+
+def run_case(kind, entry, file_path, rows, repeat=1, startup_cache=None, workers=1):
+    """Đo một entry point trên một file, trả về dict số đo (xem summarize). workers: chỉ dùng với cli"""
+    if entry not in ENTRY_POINTS:
+        raise ValueError(f"Entry point không hợp lệ: {entry}")
+    if workers > 1 and entry != 'cli':
+        raise ValueError(f"--workers chỉ dùng với entry point cli: {entry}")
+
+    if entry == 'daemon':
+        startup_ms, samples = measure_daemon(kind, file_path, repeat)
+    else:
+        # Startup của CLI không phụ thuộc file nên chỉ đo một lần cho mỗi parser
+        startup_cache = {} if startup_cache is None else startup_cache
+        if kind not in startup_cache:
+            startup_cache[kind] = measure_cli_startup(kind, max(3, repeat))
+        startup_ms = startup_cache[kind]
+        samples = measure_cli(kind, file_path, entry, repeat, workers)
+    return summarize(rows, samples, startup_ms)
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Cache kết quả parse trên đĩa, dùng chung cho csv_parser.py và parser-tangtoc.py
+Key = SHA-256 của (nội dung file + tên parser + version parser + options), nên upload lại
+cùng một file (kể cả khác tên) trả kết quả ngay, còn sửa một ô hay đổi parser thì parse lại.
+
+Mỗi entry là JSON nén zlib. Khi tổng dung lượng vượt giới hạn, các entry lâu không dùng nhất
+(theo mtime, được cập nhật mỗi lần hit) bị xóa trước.
+
+Biến môi trường:
+    PARSER_CACHE=0            tắt cache
+    PARSER_CACHE_DIR          thư mục cache (mặc định ~/.cache/nqd_kd/parser)
+    PARSER_CACHE_MAX_BYTES    dung lượng tối đa (mặc định 256MB)
+"""
+
+import os
+import json
+import zlib
+import fcntl
+import hashlib
+import tempfile
+from pathlib import Path
+
+DEFAULT_CACHE_DIR = Path.home() / '.cache' / 'nqd_kd' / 'parser'
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+ENTRY_SUFFIX = '.json.z'
+STATS_FILE = 'stats.json'
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def cache_enabled():
+    return os.environ.get('PARSER_CACHE', '1') != '0'
+
+
+def source_version(*module_files):
+    """Version tự động từ nội dung source của parser, đổi code là cache cũ không còn được dùng"""
+    digest = hashlib.sha256()
+    for module_file in module_files:
+        with open(module_file, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def file_digest(file_path):
+    """SHA-256 nội dung file, đọc theo block để không phải giữ cả file trong RAM"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ParseCache:
+    """Cache LRU trên đĩa, an toàn khi nhiều process (daemon worker, batch) dùng chung thư mục"""
+
+    def __init__(self, cache_dir=None, max_bytes=None):
+        self.cache_dir = Path(cache_dir or os.environ.get('PARSER_CACHE_DIR') or DEFAULT_CACHE_DIR)
+        self.max_bytes = int(max_bytes or os.environ.get('PARSER_CACHE_MAX_BYTES') or DEFAULT_MAX_BYTES)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def make_key(self, file_path, parser, version, options=None):
+        material = json.dumps({
+            'file': file_digest(file_path),
+            'parser': parser,
+            'version': version,
+            'options': options or {}
+        }, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key):
+        return self.cache_dir / (key + ENTRY_SUFFIX)
+
+    def get(self, key):
+        """Kết quả đã cache, None nếu chưa có (hoặc entry hỏng)"""
+        path = self._entry_path(key)
+        try:
+            with open(path, 'rb') as f:
+                result = json.loads(zlib.decompress(f.read()).decode('utf-8'))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, zlib.error):
+            # Entry hỏng (vd. ghi dở), xóa để lần sau parse lại
+            self._remove(path)
+            return None
+        # Cập nhật mtime để entry vừa dùng được giữ lại lâu nhất khi evict
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return result
+
+    def put(self, key, result):
+        data = zlib.compress(json.dumps(result, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+        if len(data) > self.max_bytes:
+            return
+        # Ghi ra file tạm rồi rename để process khác không bao giờ đọc phải entry ghi dở
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, self._entry_path(key))
+        except OSError:
+            self._remove(Path(tmp_path))
+            return
+        self.evict()
+
+    def evict(self):
+        """Xóa các entry lâu không dùng nhất cho tới khi tổng dung lượng <= max_bytes"""
+        entries = []
+        total = 0
+        for entry in os.scandir(self.cache_dir):
+            if not entry.name.endswith(ENTRY_SUFFIX):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(Path(path))
+            total -= size
+
+    def record(self, hit):
+        """Tăng bộ đếm hit/miss (lưu trên đĩa, dùng chung giữa các process), trả về bộ đếm mới"""
+        with open(self.cache_dir / STATS_FILE, 'a+') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            f.seek(0)
+            try:
+                stats = json.loads(f.read() or '{}')
+            except ValueError:
+                stats = {}
+            stats = {'hits': int(stats.get('hits', 0)), 'misses': int(stats.get('misses', 0))}
+            stats['hits' if hit else 'misses'] += 1
+            f.seek(0)
+            f.truncate()
+            f.write(json.dumps(stats))
+        return stats
+
+    @staticmethod
+    def _remove(path):
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+
+def cached_parse(parse, file_path, parser, version, options=None, use_cache=True, cacheable=None):
+    """
+    Gọi parse() qua cache. Trả về (result, cache_info); cache_info là None nếu không dùng cache.
+    cacheable(result): chỉ lưu các kết quả thỏa điều kiện (vd. parse thành công)
+    """
+    # Input không phải file (stdin, nội dung gửi kèm request daemon) thì không cache
+    if not use_cache or not cache_enabled() or not isinstance(file_path, (str, os.PathLike)) \
+            or not os.path.isfile(file_path):
+        return parse(), None
+
+    try:
+        cache = ParseCache()
+        key = cache.make_key(file_path, parser, version, options)
+        result = cache.get(key)
+    except OSError:
+        # Không tạo/đọc được thư mục cache: vẫn parse bình thường
+        return parse(), None
+
+    if result is not None:
+        return result, {'hit': True, **cache.record(True)}
+
+    result = parse()
+    if cacheable is None or cacheable(result):
+        cache.put(key, result)
+    return result, {'hit': False, **cache.record(False)}
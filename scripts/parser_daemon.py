@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+"""
+Parser Daemon
+Giữ csv_parser.parse_file và parse_tangtoc_file luôn "nóng" (đã import pandas)
+và phục vụ nhiều job parse qua JSON-RPC (stdin/stdout hoặc Unix socket)
+
+Mỗi request là một dòng JSON:
+    {"id": 1, "method": "parse_file", "params": {"file_path": "..."}}
+hoặc gửi kèm nội dung file thay cho file_path (không cần ghi file tạm), như input '-' của CLI:
+    {"id": 1, "method": "parse_file", "params": {"content": "<base64>", "input_format": "csv", "encoding": "utf-8"}}
+    (input_format: csv | tsv | xlsx | xls | zip, encoding tuỳ chọn cho csv / tsv,
+     "compression": "gzip" | "bz2" | "xz" khi content là file nén)
+hoặc file_path kèm input_format (và encoding / compression): file không có extension đúng,
+vd. file tạm của upload lớn, được đọc như content thay vì đoán format theo tên file
+File .gz / .bz2 / .xz được giải nén khi đọc; file .zip (file_path hoặc input_format zip) được parse
+như nhiều file, kết quả giống output batch của CLI.
+Mỗi response là một dòng JSON:
+    {"id": 1, "result": {...}}  hoặc  {"id": 1, "error": "..."}
+Job parse đã được đưa vào worker pool thì daemon gửi trước một dòng {"id": 1, "accepted": true}
+(không phải response cuối): sau dòng này job sẽ chạy dù client có chờ tiếp hay không
+
+Methods:
+    parse_file          -> giống output của csv_parser.py
+    parse_tangtoc_file  -> giống output của parser-tangtoc.py
+    (params tuỳ chọn: "sheets" = "all" hoặc list tên sheet, "workers" = số process parse các sheet
+     hoặc các phần của một file CSV/TXT lớn, "cache" = false để bỏ qua cache kết quả parse,
+     "load" = true để ghi thẳng vào database như --load, kèm "category", "created_by", "batch_size",
+     "dedup" = "flag" | "skip" và "dedup_db" = true như --dedup / --dedup-db,
+     "profile" = true | "dump" như --profile / --profile-dump, mặc định theo PARSER_PROFILE,
+     "sync" = bank_id (kèm "dry_run" = true) như --sync / --dry-run,
+     "limits" = {"rows": 100000, "seconds": 30, ...} như --limit, mặc định theo PARSER_MAX_*,
+     "skipped_report" = đường dẫn file (.csv hoặc NDJSON) như --skipped-report)
+    Job vượt giới hạn (parser_limits.py) trả về {"id": 1, "error": "...", "limit": {"name", "limit", "actual"}}
+    Worker bị dừng đột ngột giữa job (vd. bị OOM killer) trả về {"id": 1, "error": "...", "code": "worker_crashed"}
+    cho các job đang chờ trong worker pool đó, pool được tạo lại cho các request sau
+    health              -> bộ đếm trạng thái (queue depth, số job, ...)
+"""
+
+import sys
+import os
+import json
+import base64
+import time
+import threading
+import argparse
+import importlib.util
+import socketserver
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
+
+import csv_parser
+import parser_limits
+import parser_profile
+import parser_skipped
+from parser_io import INPUT_FORMATS, MemoryInput, expand_inputs, input_compression, input_encoding, is_archive
+
+# parser-tangtoc.py có dấu gạch ngang nên phải load bằng importlib
+_spec = importlib.util.spec_from_file_location('parser_tangtoc', SCRIPTS_DIR / 'parser-tangtoc.py')
+parser_tangtoc = importlib.util.module_from_spec(_spec)
+sys.modules['parser_tangtoc'] = parser_tangtoc
+_spec.loader.exec_module(parser_tangtoc)
+
+DEFAULT_WORKERS = max(1, min(4, os.cpu_count() or 1))
+
+# Mã lỗi khi worker pool bị hỏng giữa job: client coi như daemon không khả dụng và tự chạy parser
+WORKER_CRASHED = 'worker_crashed'
+
+
+def _warm_up():
+    """Initializer cho worker: import sẵn pandas/openpyxl để job đầu tiên không phải chờ"""
+    import pandas  # noqa: F401
+    try:
+        import openpyxl  # noqa: F401
+    except ImportError:
+        pass
+
+
+# method -> tên parser trong tên file cProfile
+PROFILE_NAMES = {'parse_file': 'csv_parser', 'parse_tangtoc_file': 'parser-tangtoc'}
+
+
+def run_job(method, params):
+    """Chạy một job parse trong worker process"""
+    started = time.perf_counter()
+    # Mỗi worker chỉ chạy một job một lúc: giới hạn và thời gian tính riêng cho từng job
+    parser_limits.start(parser_limits.parse_limit_args(params.get('limits')))
+    profile = params.get('profile') or parser_profile.env_mode()
+    profiler = None
+    if profile and (params.get('file_path') or params.get('content') is not None):
+        # Nội dung gửi kèm request không có file cạnh đó để ghi cProfile
+        profiler = parser_profile.start(params.get('file_path'), PROFILE_NAMES.get(method, method), profile == 'dump')
+    report = None
+    try:
+        if params.get('skipped_report'):
+            columns = (parser_tangtoc if method == 'parse_tangtoc_file' else csv_parser).SKIPPED_COLUMNS
+            report = parser_skipped.start(params['skipped_report'], columns)
+        result = parse_job(method, params, report)
+        if profiler is not None:
+            # Như CLI: parser-tangtoc để profile trong stats, csv_parser để ở cấp ngoài cùng
+            (result['stats'] if method == 'parse_tangtoc_file' else result)['profile'] = profiler.summary()
+    finally:
+        parser_skipped.finish(report)
+        parser_profile.finish(profiler, report=False)
+    return result, (time.perf_counter() - started) * 1000
+
+
+def job_input(params):
+    """
+    file_path của job, hoặc MemoryInput khi request gửi kèm content (base64) và input_format,
+    hoặc file_path kèm input_format
+    """
+    input_format = params.get('input_format')
+    if params.get('content') is None:
+        if not params.get('file_path'):
+            raise ValueError("Thiếu tham số file_path hoặc content")
+        if input_format is None:
+            return params['file_path']
+
+    if input_format not in INPUT_FORMATS:
+        raise ValueError(f"input_format không hợp lệ: {input_format} (hỗ trợ: {', '.join(INPUT_FORMATS)})")
+    if params.get('content') is None:
+        data = Path(params['file_path']).read_bytes()
+    else:
+        try:
+            data = base64.b64decode(params['content'], validate=True)
+        except (TypeError, ValueError):
+            raise ValueError("content phải là base64")
+    return MemoryInput(input_format, data=data, encoding=input_encoding(input_format, params.get('encoding')),
+                       compression=input_compression(input_format, params.get('compression')))
+
+
+def parse_job(method, params, report=None):
+    """
+    Phần parse của run_job (đọc params, dedup, load),
+    report: parser_skipped.SkippedReport của "skipped_report" (None nếu không có)
+    """
+    file_path = job_input(params)
+
+    sheets = params.get('sheets')
+    workers = max(1, int(params.get('workers') or 1))
+    use_cache = params.get('cache', True) is not False
+    load = params.get('load') is True
+    created_by = params.get('created_by')
+    batch_size = params.get('batch_size')
+    category = params.get('category') or 'khoidong'
+    dedup = params.get('dedup') or 'off'
+    if dedup not in ('off', 'flag', 'skip'):
+        raise ValueError(f"dedup không hợp lệ: {dedup}")
+    sync = params.get('sync')
+    dry_run = params.get('dry_run') is True
+    if load and sync:
+        raise ValueError("load và sync không dùng cùng nhau")
+
+    index = None
+    if dedup != 'off':
+        from question_dedup import build_index
+        if method == 'parse_file':
+            db_categories = csv_parser.dedup_categories(category, sheets)
+        else:
+            db_categories = ['tangtoc']
+        index = build_index(db_categories if params.get('dedup_db') is True else None)
+
+    # File .zip: các file bên trong được parse như batch của CLI
+    batch = expand_inputs([file_path]) if is_archive(file_path) else None
+    if method == 'parse_file':
+        if batch is not None:
+            result = csv_parser.parse_batch(batch, sheets, workers, use_cache)
+        else:
+            result = csv_parser.parse_file_cached(file_path, sheets, workers, use_cache)
+        if report is not None:
+            result = csv_parser.report_skipped(result, report)
+        if index is not None:
+            result = csv_parser.dedup_parsed(result, dedup, index, category)
+        if load:
+            result = csv_parser.load_parsed(result, category, created_by, batch_size)
+        if sync:
+            result = csv_parser.sync_parsed(result, sync, category, created_by, batch_size, dry_run)
+    elif method == 'parse_tangtoc_file':
+        if batch is not None:
+            parsed = parser_tangtoc.parse_batch(batch, sheets, workers, use_cache)
+        else:
+            parsed = parser_tangtoc.parse_tangtoc_file_cached(file_path, sheets, workers, use_cache)
+        if report is not None:
+            parsed = parser_tangtoc.report_skipped(parsed, report)
+        if index is not None:
+            parsed = parser_tangtoc.dedup_result(parsed, dedup, index)
+        if not parsed['questions']:
+            raise ValueError(f"Không tìm thấy câu hỏi hợp lệ nào trong file (bỏ qua {parsed['skipped_count']} dòng)")
+        result = parser_tangtoc.build_output(parsed)
+        if load:
+            from question_loader import DEFAULT_BATCH_SIZE, load_questions
+            questions = result.pop('questions')
+            result['load'] = load_questions(questions, 'tangtoc_answers', 'tangtoc', created_by,
+                                            batch_size or DEFAULT_BATCH_SIZE)
+        if sync:
+            from question_loader import DEFAULT_BATCH_SIZE
+            from question_sync import sync_questions
+            questions = result.pop('questions')
+            result['sync'] = sync_questions(questions, sync, 'tangtoc_answers', 'tangtoc', created_by,
+                                            batch_size or DEFAULT_BATCH_SIZE, dry_run)
+    else:
+        raise ValueError(f"Method không hỗ trợ: {method}")
+
+    return result
+
+
+class ParserService:
+    """Quản lý worker pool và các bộ đếm health"""
+
+    METHODS = ('parse_file', 'parse_tangtoc_file')
+
+    def __init__(self, workers=DEFAULT_WORKERS):
+        self.workers = workers
+        self.executor = ProcessPoolExecutor(max_workers=workers, initializer=_warm_up)
+        self.started_at = time.time()
+        self.lock = threading.Lock()
+        self.counters = {
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'in_flight': 0,
+            'pool_restarts': 0,
+            'parse_ms_total': 0.0
+        }
+        # Khởi động trước các worker để request đầu không phải trả giá import pandas
+        for future in [self.executor.submit(_warm_up) for _ in range(workers)]:
+            future.result()
+
+    def health(self):
+        with self.lock:
+            counters = dict(self.counters)
+        finished = counters['completed'] + counters['failed']
+        return {
+            'status': 'ok',
+            'pid': os.getpid(),
+            'workers': self.workers,
+            'uptime_s': round(time.time() - self.started_at, 3),
+            'queue_depth': max(0, counters['in_flight'] - self.workers),
+            'in_flight': counters['in_flight'],
+            'submitted': counters['submitted'],
+            'completed': counters['completed'],
+            'failed': counters['failed'],
+            'pool_restarts': counters['pool_restarts'],
+            'avg_parse_ms': round(counters['parse_ms_total'] / finished, 3) if finished else 0.0
+        }
+
+    def submit(self, request, respond, acknowledge=None):
+        """Nhận một request đã decode, gọi acknowledge({"id", "accepted"}) khi job đã vào worker pool
+        và respond(response_dict) khi xong"""
+        request_id = request.get('id')
+        method = request.get('method')
+        params = request.get('params') or {}
+
+        if method == 'health':
+            respond({'id': request_id, 'result': self.health()})
+            return
+
+        if method not in self.METHODS:
+            respond({'id': request_id, 'error': f"Method không hỗ trợ: {method}"})
+            return
+
+        with self.lock:
+            self.counters['submitted'] += 1
+            self.counters['in_flight'] += 1
+
+        def _done(future, executor):
+            with self.lock:
+                self.counters['in_flight'] -= 1
+            try:
+                result, elapsed_ms = future.result()
+            except Exception as e:
+                with self.lock:
+                    self.counters['failed'] += 1
+                response = {'id': request_id, 'error': str(e)}
+                if isinstance(e, parser_limits.LimitExceeded):
+                    response['limit'] = e.to_dict()
+                elif isinstance(e, BrokenProcessPool):
+                    self._restart_pool(executor)
+                    response['error'] = f"Worker parser bị dừng đột ngột: {str(e)}"
+                    response['code'] = WORKER_CRASHED
+                respond(response)
+                return
+            with self.lock:
+                self.counters['completed'] += 1
+                self.counters['parse_ms_total'] += elapsed_ms
+            respond({'id': request_id, 'result': result, 'elapsed_ms': round(elapsed_ms, 3)})
+
+        executor = self.executor
+        try:
+            try:
+                future = executor.submit(run_job, method, params)
+            except BrokenProcessPool:
+                # Pool hỏng vì một job trước đó, job này chưa chạy nên gửi sang pool mới
+                executor = self._restart_pool(executor)
+                future = executor.submit(run_job, method, params)
+        except Exception as e:
+            with self.lock:
+                self.counters['in_flight'] -= 1
+                self.counters['failed'] += 1
+            respond({'id': request_id, 'error': f"Không thể tạo job: {str(e)}"})
+            return
+        # Ack trước khi gắn callback để luôn đến trước response cuối
+        if acknowledge:
+            acknowledge({'id': request_id, 'accepted': True})
+        future.add_done_callback(lambda future: _done(future, executor))
+
+    def _restart_pool(self, broken):
+        """Thay worker pool bị hỏng (một worker chết giữa job) bằng pool mới, mỗi pool hỏng chỉ thay một lần"""
+        with self.lock:
+            if self.executor is not broken:
+                return self.executor
+            self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_up)
+            self.counters['pool_restarts'] += 1
+        print(f"Worker pool bị hỏng, đã tạo lại {self.workers} worker", file=sys.stderr)
+        broken.shutdown(wait=False)
+        return self.executor
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+
+
+def _decode(line):
+    try:
+        request = json.loads(line)
+        if not isinstance(request, dict):
+            raise ValueError("Request phải là JSON object")
+        return request, None
+    except ValueError as e:
+        return None, {'id': None, 'error': f"Request không hợp lệ: {str(e)}"}
+
+
+def serve_stdio(service):
+    """JSON-RPC qua stdin/stdout, mỗi dòng một message"""
+    write_lock = threading.Lock()
+
+    def respond(response):
+        data = json.dumps(response, ensure_ascii=False)
+        with write_lock:
+            sys.stdout.write(data + '\n')
+            sys.stdout.flush()
+
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        request, error = _decode(line)
+        if error:
+            respond(error)
+            continue
+        service.submit(request, respond, respond)
+
+
+def serve_socket(service, socket_path):
+    """JSON-RPC qua Unix socket, mỗi connection có thể gửi nhiều request"""
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            write_lock = threading.Lock()
+            pending = threading.Semaphore(0)
+            sent = 0
+
+            def write(response):
+                data = (json.dumps(response, ensure_ascii=False) + '\n').encode('utf-8')
+                with write_lock:
+                    try:
+                        self.wfile.write(data)
+                        self.wfile.flush()
+                    except OSError:
+                        pass
+
+            def respond(response):
+                write(response)
+                pending.release()
+
+            for raw in self.rfile:
+                line = raw.decode('utf-8', errors='replace').strip()
+                if not line:
+                    continue
+                request, error = _decode(line)
+                sent += 1
+                if error:
+                    respond(error)
+                    continue
+                service.submit(request, respond, write)
+
+            # Chờ trả lời hết các request trước khi đóng connection
+            for _ in range(sent):
+                pending.acquire()
+
+    class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+
+    with Server(socket_path, Handler) as server:
+        print(f"Parser daemon đang lắng nghe tại {socket_path}", file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Parser daemon cho csv_parser và parser-tangtoc')
+    parser.add_argument('--socket', '-s', help='Đường dẫn Unix socket (mặc định: dùng stdin/stdout)')
+    parser.add_argument('--workers', '-w', type=int, default=DEFAULT_WORKERS,
+                       help=f'Số worker process (default: {DEFAULT_WORKERS})')
+
+    args = parser.parse_args()
+
+    service = ParserService(workers=max(1, args.workers))
+    try:
+        if args.socket:
+            serve_socket(service, args.socket)
+        else:
+            serve_stdio(service)
+    finally:
+        service.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,1610 @@
+#!/usr/bin/env python3
+"""
+Đọc file câu hỏi (CSV/TXT/XLSX) cho csv_parser.py và parser-tangtoc.py
+- CSV/TXT nhỏ: đọc bằng module csv (fast path, không cần import pandas)
+- Còn lại: pandas (chỉ import khi cần), đọc cả file hoặc theo chunk ở chế độ --stream
+- Input '-' (stdin) / nội dung gửi kèm request của daemon: MemoryInput, không ghi ra file tạm
+- File .gz / .bz2 / .xz và các file trong .zip: CompressedInput, giải nén dần khi đọc, không giải nén ra đĩa
+"""
+
+import io
+import os
+import re
+import csv
+import sys
+import glob
+import time
+import codecs
+import contextlib
+import functools
+import unicodedata
+from collections import Counter, namedtuple
+from pathlib import Path
+
+import parser_limits
+import parser_profile
+import parser_progress
+import parser_skipped
+
+DEFAULT_CHUNKSIZE = 5000
+
+# Extension các parser hỗ trợ (dùng khi nhập cả thư mục)
+SUPPORTED_SUFFIXES = ['.csv', '.txt', '.xlsx', '.xls']
+
+# Input '-': đọc từ stdin, --input-format thay cho extension (tsv: delimiter luôn là tab, zip: nhiều file)
+STDIN_PATH = '-'
+INPUT_FORMATS = {'csv': '.csv', 'tsv': '.csv', 'xlsx': '.xlsx', 'xls': '.xls', 'zip': '.zip'}
+
+# Extension file -> format của input
+SUFFIX_FORMATS = {'.csv': 'csv', '.txt': 'csv', '.xlsx': 'xlsx', '.xls': 'xls'}
+
+# File nén (vd. questions.csv.gz): extension -> --compression, giải nén dần bằng module cùng tên
+COMPRESSIONS = {'.gz': 'gzip', '.bz2': 'bz2', '.xz': 'xz'}
+
+# File .zip: các file được hỗ trợ bên trong được parse như nhiều file (batch)
+ARCHIVE_SUFFIX = '.zip'
+
+# Số process mặc định khi parse nhiều file
+DEFAULT_BATCH_WORKERS = os.cpu_count() or 1
+
+# File CSV/TXT nhỏ hơn ngưỡng này được đọc bằng module csv thay vì pandas
+FAST_PATH_MAX_BYTES = 8 * 1024 * 1024
+
+# Các giá trị pd.read_csv coi là NaN (pandas._libs.parsers.STR_NA_VALUES)
+NA_VALUES = frozenset([
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'
+])
+
+# Số pandas parse được, giới hạn ở dạng fast path mô phỏng chính xác
+INT_PATTERN = re.compile(r'[+-]?\d+[ \t]*\Z')
+FLOAT_PATTERN = re.compile(r'[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d{1,3})?[ \t]*\Z')
+SPECIAL_PATTERN = re.compile(r'[ \t]*[+-]?(?:true|false|inf|infinity|nan)[ \t]*\Z', re.IGNORECASE)
+MAX_EXACT_DIGITS = 15
+INT64_MAX = 2 ** 63 - 1
+
+# Dòng chỉ chứa "" (pandas coi là một dòng NaN, module csv không phân biệt được với dòng trống)
+QUOTED_EMPTY_LINE = re.compile(r'(?m)^[ \t]*""[ \t]*\r?$')
+
+# Số byte đầu file dùng để đoán encoding và dialect (chỉ đọc một lần)
+SNIFF_BYTES = 256 * 1024
+
+# Số record tối đa dùng để đoán delimiter
+SNIFF_RECORDS = 50
+
+# Thứ tự ưu tiên khi nhiều delimiter cho kết quả như nhau
+DELIMITER_CANDIDATES = ['\t', ';', ',']
+
+# Encoding thử tiếp khi phần sau prefix không decode được bằng encoding đã đoán
+FALLBACK_ENCODINGS = ['cp1252', 'latin-1']
+
+# Parse thủ công: số byte decode mỗi lần, số dòng tối đa của một ô trong dấu nháy
+MANUAL_READ_BYTES = 1024 * 1024
+MAX_QUOTED_LINES = 100
+# Parse thủ công: kiểm tra giới hạn số dòng / thời gian (parser_limits) sau mỗi LIMIT_CHECK_ROWS record
+LIMIT_CHECK_ROWS = 10000
+
+# Parse song song một file CSV/TXT (--workers N): chỉ đáng khi file đủ lớn để bù thời gian tạo process
+PARALLEL_MIN_BYTES = 32 * 1024 * 1024
+# Encoding cắt được ngay sau byte b'\n' mà không cắt ngang ký tự (không có utf-16)
+PARALLEL_ENCODINGS = ('utf-8-sig', 'cp1252', 'latin-1')
+# Chọn điểm cắt: parse thử tối đa SPLIT_PROBE_LINES dòng ứng viên, mỗi lần SPLIT_PROBE_BYTES byte
+SPLIT_PROBE_LINES = 32
+SPLIT_PROBE_BYTES = 64 * 1024
+
+# Tên sheet (đã bỏ dấu, viết thường, bỏ khoảng trắng) -> category trong bảng questions
+SHEET_CATEGORIES = {
+    'khoidong': 'khoidong',
+    'kd': 'khoidong',
+    'tangtoc': 'tangtoc',
+    'tt': 'tangtoc',
+    'vcnv': 'vuotchuongngaivat',
+    'vuotchuongngaivat': 'vuotchuongngaivat',
+    'vedich': 'vedich',
+    'vd': 'vedich'
+}
+
+
+class NoDataError(ValueError):
+    """File không có dòng dữ liệu hợp lệ nào"""
+
+
+class FastPathUnsupported(Exception):
+    """File có dữ liệu mà fast path không mô phỏng chính xác được pd.read_csv, cần dùng pandas"""
+
+
+class RangeBoundaryError(FastPathUnsupported):
+    """Text kết thúc giữa một record (vd. khoảng byte bị cắt trong một ô có dấu nháy)"""
+
+
+CsvDialect = namedtuple('CsvDialect', ['encoding', 'delimiter'])
+
+
+class _PrefixedStream(io.RawIOBase):
+    """Đọc lại phần đầu đã đọc (để sniff) rồi đọc tiếp stream (stdin không seek lại được)"""
+
+    def __init__(self, prefix, stream, on_read, owns_stream=False):
+        self.prefix = memoryview(prefix)
+        self.stream = stream
+        self.on_read = on_read
+        self.owns_stream = owns_stream
+
+    def readable(self):
+        return True
+
+    def close(self):
+        if self.owns_stream and not self.closed:
+            self.stream.close()
+        super().close()
+
+    def readinto(self, buffer):
+        if self.prefix:
+            size = min(len(buffer), len(self.prefix))
+            buffer[:size] = self.prefix[:size]
+            self.prefix = self.prefix[size:]
+            return size
+        size = self.stream.readinto(buffer)
+        self.on_read(size)
+        return size
+
+
+class MemoryInput:
+    """
+    Input không nằm trên đĩa: stdin (file_path '-') hoặc nội dung gửi kèm request của daemon.
+    Dùng được ở mọi chỗ nhận file_path (xem as_input / open_source): fmt (--input-format) thay cho
+    extension, encoding (--encoding) thay cho việc đoán encoding, tsv thì delimiter luôn là tab.
+    Nội dung chỉ bị đọc hết vào RAM khi cần (Excel, parse cả file); --stream với CSV đọc thẳng từ pipe
+    """
+
+    name = '<stdin>'
+
+    def __init__(self, fmt, data=None, stream=None, encoding=None, compression=None):
+        if fmt not in INPUT_FORMATS:
+            raise ValueError(f"Format input không hỗ trợ: {fmt}")
+        if compression:
+            # Nội dung nén: giải nén dần khi đọc (stdin đọc thẳng từ pipe như không nén)
+            stream = _decompress(io.BytesIO(data) if data is not None else stream, compression)
+            data = None
+        self.format = fmt
+        self.suffix = INPUT_FORMATS[fmt]
+        self.delimiter = '\t' if fmt == 'tsv' else None
+        self.encoding = encoding
+        self.stream = stream
+        self._data = data
+        self._prefix = b''
+        self._streamed = None
+
+    def __str__(self):
+        return self.name
+
+    def __getstate__(self):
+        # Gửi sang worker process (parse_sheets): gửi nội dung, không gửi stream
+        return dict(self.__dict__, _data=self.data, stream=None)
+
+    def exists(self):
+        return True
+
+    def stat(self):
+        """Chỉ có st_size: số byte đã đọc khi đang đọc thẳng từ pipe, còn lại là cả nội dung"""
+        size = len(self._data) if self._data is not None else len(self._prefix) + (self._streamed or 0)
+        return os.stat_result((0, 0, 0, 0, 0, 0, size, 0, 0, 0))
+
+    def prefix(self, size):
+        """size byte đầu (đọc từ pipe một lần và giữ lại)"""
+        if self._data is not None:
+            return self._data[:size]
+        if len(self._prefix) < size and self._streamed is None:
+            content = self.stream.read(size - len(self._prefix))
+            parser_progress.add_bytes(len(content))
+            self._prefix += content
+        return self._prefix[:size]
+
+    def size_at_most(self, limit):
+        """Nội dung có không quá limit byte không"""
+        return len(self.data) <= limit
+
+    def reader(self):
+        """File object cho pd.read_csv đọc cả input (có thể gọi nhiều lần)"""
+        return io.BytesIO(self.data)
+
+    @property
+    def data(self):
+        """Toàn bộ nội dung, lần đầu gọi thì đọc hết stdin vào RAM"""
+        if self._data is None:
+            if self._streamed is not None:
+                raise ValueError("stdin đã được đọc hết")
+            self._data = self._prefix + _read_limited(self.stream, len(self._prefix))
+            self._prefix = b''
+        return self._data
+
+    def open(self):
+        """File nhị phân đọc từ đầu; chưa có nội dung trong RAM thì đọc thẳng từ pipe (chỉ một lần)"""
+        if self._data is not None:
+            return io.BytesIO(self._data)
+        if self._streamed is not None:
+            raise ValueError("stdin đã được đọc hết")
+        self._streamed = 0
+        return io.BufferedReader(_PrefixedStream(self._prefix, self.stream, self._count_streamed))
+
+    def _count_streamed(self, size):
+        self._streamed += size or 0
+        parser_limits.check('bytes', len(self._prefix) + self._streamed)
+        parser_progress.add_bytes(size)
+
+
+class CompressedInput(MemoryInput):
+    """
+    File nén .gz / .bz2 / .xz hoặc một file trong file .zip, dùng như MemoryInput nhưng mỗi lần đọc
+    là giải nén lại từ đầu (đọc được nhiều lần, không giữ nội dung trong RAM, không giải nén ra đĩa).
+    archive: đường dẫn file, hoặc nội dung file .zip (bytes) khi .zip được gửi qua stdin / daemon.
+    member: tên file trong .zip
+    """
+
+    def __init__(self, archive, member=None, encoding=None):
+        name = member if member is not None else os.path.basename(archive)
+        compression = COMPRESSIONS.get(Path(name).suffix.lower()) if member is None else None
+        inner = Path(name).stem if compression else name
+        fmt = SUFFIX_FORMATS.get(Path(inner).suffix.lower())
+        if fmt is None:
+            raise ValueError(f"Định dạng file không hỗ trợ: {name}")
+        super().__init__(fmt, encoding=encoding)
+        self.archive = archive
+        self.member = member
+        self.compression = compression
+        self.name = os.path.basename(name)
+        if member is None:
+            self.label = str(archive)
+        else:
+            self.label = f"{archive}/{member}" if isinstance(archive, str) else member
+
+    def __str__(self):
+        return self.label
+
+    def __getstate__(self):
+        # Worker giải nén lại từ file, không gửi nội dung đã giải nén
+        return dict(self.__dict__, _data=None, _prefix=b'')
+
+    def _open(self):
+        if self.member is None:
+            return _decompress(self.archive, self.compression)
+
+        import zipfile
+
+        source = self.archive if isinstance(self.archive, str) else io.BytesIO(self.archive)
+        # File trong .zip vẫn đọc được sau khi đóng ZipFile (ZipFile chỉ đóng file khi member đóng)
+        with zipfile.ZipFile(source) as archive:
+            return archive.open(self.member)
+
+    def exists(self):
+        return not isinstance(self.archive, str) or os.path.isfile(self.archive)
+
+    def stat(self):
+        """st_size: dung lượng đã nén (file nén, hoặc dung lượng nén của file trong .zip)"""
+        if self.member is None:
+            return os.stat(self.archive)
+
+        import zipfile
+
+        source = self.archive if isinstance(self.archive, str) else io.BytesIO(self.archive)
+        with zipfile.ZipFile(source) as archive:
+            size = archive.getinfo(self.member).compress_size
+        return os.stat_result((0, 0, 0, 0, 0, 0, size, 0, 0, 0))
+
+    def prefix(self, size):
+        if self._data is not None:
+            return self._data[:size]
+        if len(self._prefix) < size:
+            with self._open() as f:
+                self._prefix = f.read(size)
+        return self._prefix[:size]
+
+    @property
+    def data(self):
+        if self._data is None:
+            with self._open() as f:
+                self._data = _read_limited(f)
+        return self._data
+
+    def size_at_most(self, limit):
+        # Không biết trước dung lượng sau giải nén: chỉ giải nén tối đa limit + 1 byte để kiểm tra
+        if self._data is not None:
+            return len(self._data) <= limit
+        with self._open() as f:
+            content = f.read(limit + 1)
+        parser_progress.add_bytes(len(content))
+        if len(content) > limit:
+            return False
+        parser_limits.check('bytes', len(content))
+        self._data = content
+        return True
+
+    def open(self):
+        return io.BytesIO(self._data) if self._data is not None else _counted(self._open())
+
+    def reader(self):
+        # pandas đọc thẳng từ stream giải nén, không giữ cả nội dung đã giải nén trong RAM
+        return self.open()
+
+
+def _read_limited(f, already=0):
+    """Đọc hết f, raise LimitExceeded nếu tổng (cả already byte đã đọc trước) vượt giới hạn bytes"""
+    limit = parser_limits.current()['bytes']
+    content = f.read(max(0, limit - already) + 1) if limit else f.read()
+    parser_progress.add_bytes(len(content))
+    if limit:
+        parser_limits.check('bytes', already + len(content))
+    return content
+
+
+def _counted(stream):
+    """Bọc stream (giải nén) để đếm byte đã đọc: vượt giới hạn bytes thì raise LimitExceeded giữa chừng"""
+    total = 0
+
+    def on_read(size):
+        nonlocal total
+        total += size or 0
+        parser_limits.check('bytes', total)
+        parser_progress.add_bytes(size)
+
+    return io.BufferedReader(_PrefixedStream(b'', stream, on_read, owns_stream=True))
+
+
+def _decompress(source, compression):
+    """File object giải nén dần source (đường dẫn hoặc file object nhị phân)"""
+    if compression == 'gzip':
+        import gzip
+        return gzip.open(source, 'rb')
+    if compression == 'bz2':
+        import bz2
+        return bz2.open(source, 'rb')
+    if compression == 'xz':
+        import lzma
+        return lzma.open(source, 'rb')
+    raise ValueError(f"Kiểu nén không hỗ trợ: {compression}")
+
+
+def stdin_input(fmt, encoding=None, compression=None):
+    """Input '-' của CLI"""
+    return MemoryInput(fmt, stream=sys.stdin.buffer, encoding=encoding, compression=compression)
+
+
+def cli_input(paths, input_format=None, encoding=None, compression=None):
+    """
+    Input '-' của CLI: trả về MemoryInput đọc từ stdin ('-' phải là input duy nhất và cần --input-format),
+    None nếu đọc file như bình thường. Raise ValueError nếu các tham số không hợp lệ
+    """
+    if STDIN_PATH not in paths:
+        if input_format or encoding or compression:
+            raise ValueError("--input-format / --encoding / --compression chỉ dùng với input '-' (stdin)")
+        return None
+    if len(paths) > 1:
+        raise ValueError("Input '-' (stdin) không dùng cùng các file khác")
+    if not input_format:
+        raise ValueError("Input '-' (stdin) cần --input-format (" + ', '.join(INPUT_FORMATS) + ")")
+    return stdin_input(input_format, input_encoding(input_format, encoding),
+                       input_compression(input_format, compression))
+
+
+def input_compression(input_format, compression):
+    """Kiểu nén của MemoryInput (None = không nén), raise ValueError nếu không hợp lệ"""
+    if not compression:
+        return None
+    if compression not in COMPRESSIONS.values():
+        raise ValueError(f"Kiểu nén không hỗ trợ: {compression} (hỗ trợ: {', '.join(COMPRESSIONS.values())})")
+    if input_format == 'zip':
+        raise ValueError("--compression không dùng với --input-format zip")
+    return compression
+
+
+def input_encoding(input_format, encoding):
+    """Tên chuẩn của encoding cho MemoryInput (None = tự đoán), raise ValueError nếu không hợp lệ"""
+    if not encoding:
+        return None
+    if INPUT_FORMATS.get(input_format) != '.csv':
+        raise ValueError("--encoding chỉ dùng với --input-format csv / tsv")
+    try:
+        return codecs.lookup(encoding).name
+    except LookupError:
+        raise ValueError(f"Encoding không hợp lệ: {encoding}")
+
+
+def as_input(file_path):
+    """Path của file, CompressedInput với file nén (.gz / .bz2 / .xz), MemoryInput giữ nguyên"""
+    if isinstance(file_path, MemoryInput):
+        return file_path
+    if Path(file_path).suffix.lower() in COMPRESSIONS:
+        return CompressedInput(str(file_path))
+    if is_archive(file_path) and os.path.isfile(file_path):
+        import zipfile
+
+        if not zipfile.is_zipfile(file_path):
+            raise ValueError(f"File .zip bị hỏng: {file_path}")
+        raise ValueError(f"File .zip chứa nhiều file, cần parse như batch (expand_inputs): {file_path}")
+    return Path(file_path)
+
+
+def is_archive(file_path):
+    """File .zip (đường dẫn hoặc MemoryInput --input-format zip): parse như nhiều file"""
+    if isinstance(file_path, MemoryInput):
+        return file_path.suffix == ARCHIVE_SUFFIX
+    return isinstance(file_path, (str, os.PathLike)) and Path(file_path).suffix.lower() == ARCHIVE_SUFFIX
+
+
+def is_supported_file(name):
+    """File parse được theo tên: extension được hỗ trợ, file nén của chúng, hoặc .zip"""
+    path = Path(name)
+    suffix = path.suffix.lower()
+    if suffix in COMPRESSIONS:
+        suffix = Path(path.stem).suffix.lower()
+    return suffix in SUPPORTED_SUFFIXES or path.suffix.lower() == ARCHIVE_SUFFIX
+
+
+def archive_members(archive):
+    """
+    Các file được hỗ trợ trong file .zip (đường dẫn hoặc MemoryInput) theo thứ tự tên, dạng CompressedInput
+    (giải nén từng file khi parse, không giải nén ra đĩa). Bỏ thư mục, file ẩn và __MACOSX/
+    """
+    import zipfile
+
+    content = archive.data if isinstance(archive, MemoryInput) else str(archive)
+    with zipfile.ZipFile(io.BytesIO(content) if isinstance(content, bytes) else content) as zf:
+        names = sorted(info.filename for info in zf.infolist()
+                       if not info.is_dir() and Path(info.filename).suffix.lower() in SUPPORTED_SUFFIXES
+                       and not info.filename.startswith('__MACOSX/')
+                       and not os.path.basename(info.filename).startswith('.'))
+    return [CompressedInput(content, name, getattr(archive, 'encoding', None)) for name in names]
+
+
+def open_source(file_path):
+    """Tham số file cho pandas / openpyxl (cần seek): đường dẫn, hoặc file object đọc từ RAM với MemoryInput"""
+    return io.BytesIO(file_path.data) if isinstance(file_path, MemoryInput) else file_path
+
+
+@contextlib.contextmanager
+def _mapped(file_path):
+    """Nội dung file dạng bytes không copy: mmap với file trên đĩa, memoryview với MemoryInput"""
+    if isinstance(file_path, MemoryInput):
+        with memoryview(file_path.data) as view:
+            yield view
+        return
+
+    import mmap
+
+    with open(file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b''
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield mm
+
+# Một khoảng byte [start, end) của file khi parse song song (xem scan_csv_ranges)
+CsvRangePlan = namedtuple('CsvRangePlan', ['file_path', 'dialect', 'start', 'end', 'ncols', 'first_row', 'records',
+                                           'column_kinds', 'row_kind'])
+
+
+def detect_delimiter(first_line):
+    """Đoán delimiter từ dòng đầu tiên (tab > chấm phẩy > phẩy)"""
+    if '\t' in first_line:
+        return '\t'
+    elif ';' in first_line:
+        return ';'
+    return ','
+
+
+def detect_encoding(prefix, complete):
+    """
+    Đoán encoding từ các byte đầu file: BOM -> UTF-8 hợp lệ -> cp1252 -> latin-1.
+    complete=True nếu prefix là toàn bộ file
+    """
+    if prefix.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    if prefix.startswith(codecs.BOM_UTF16_LE) or prefix.startswith(codecs.BOM_UTF16_BE):
+        return 'utf-16'
+    try:
+        # final=False: bỏ qua ký tự utf-8 bị cắt ngang ở cuối prefix
+        codecs.getincrementaldecoder('utf-8')().decode(prefix, final=complete)
+        return 'utf-8-sig'
+    except UnicodeDecodeError:
+        pass
+    try:
+        prefix.decode('cp1252')
+        return 'cp1252'
+    except UnicodeDecodeError:
+        return 'latin-1'
+
+
+def sniff_delimiter(sample, complete):
+    """
+    Đoán delimiter trên nhiều record (kiểu csv.Sniffer): tách sample bằng csv.reader cho từng
+    delimiter ứng viên (bỏ qua delimiter nằm trong dấu nháy), chọn delimiter có số cột ổn định
+    nhất (>= 2 cột). Không đoán được thì quay về cách cũ theo dòng đầu tiên
+    """
+    best = None
+    for preference, delimiter in enumerate(DELIMITER_CANDIDATES):
+        reader = csv.reader(io.StringIO(sample), delimiter=delimiter, quotechar='"', skipinitialspace=True)
+        try:
+            widths = [len(record) for record, _ in zip(reader, range(SNIFF_RECORDS + 1)) if record]
+        except csv.Error:
+            continue
+        if not complete and len(widths) > 1:
+            # Record cuối có thể bị cắt ngang ở cuối sample
+            widths = widths[:-1]
+        if not widths:
+            continue
+        width, frequency = Counter(widths).most_common(1)[0]
+        if width < 2:
+            continue
+        score = (frequency / len(widths), -preference)
+        if best is None or score > best[0]:
+            best = (score, delimiter)
+
+    if best is not None:
+        return best[1]
+    return detect_delimiter(sample.split('\n', 1)[0].strip())
+
+
+def sniff_csv(file_path):
+    """Đọc phần đầu file đúng một lần để đoán encoding và delimiter (MemoryInput: dùng encoding / tsv đã cho)"""
+    if isinstance(file_path, MemoryInput):
+        prefix = file_path.prefix(SNIFF_BYTES)
+        encoding, delimiter = file_path.encoding, file_path.delimiter
+    else:
+        with open(file_path, 'rb') as f:
+            prefix = f.read(SNIFF_BYTES)
+        encoding = delimiter = None
+    complete = len(prefix) < SNIFF_BYTES
+
+    encoding = encoding or detect_encoding(prefix, complete)
+    sample = prefix.decode(encoding, errors='ignore')
+    dialect = CsvDialect(encoding, delimiter or sniff_delimiter(sample, complete))
+    _check_sample(sample, dialect)
+    return dialect
+
+
+def _check_sample(sample, dialect):
+    """Kiểm tra sớm giới hạn số cột / độ dài ô trên các record ở phần đầu file, trước khi parse cả file"""
+    reader = csv.reader(io.StringIO(sample, newline=''), delimiter=dialect.delimiter, quotechar='"',
+                        skipinitialspace=True)
+    records = []
+    try:
+        for record in reader:
+            if record and (len(record) > 1 or record[0].strip()):
+                records.append(record)
+    except csv.Error:
+        # Record lỗi (vd. dấu nháy không đóng): bước đọc file xử lý như cũ, chỉ xét các record trước đó
+        pass
+    if records:
+        _check_records(records, len(records[0]), len(sample))
+
+
+def _check_records(records, ncols, max_chars):
+    """
+    Giới hạn số cột (ncols: số cột của record đầu, như pandas) và độ dài ô của các record tách bằng module csv.
+    Ô dài hơn csv.field_size_limit() đã bị module csv báo lỗi nên chỉ đo khi giới hạn nhỏ hơn
+    """
+    parser_limits.check('columns', ncols)
+    limit = parser_limits.current()['cell_chars']
+    if limit and min(max_chars, csv.field_size_limit()) > limit:
+        parser_limits.check('cell_chars', max((len(value) for record in records for value in record), default=0))
+
+
+def _max_chars(file_path):
+    """Độ dài tối đa có thể của một ô: dung lượng file trên đĩa (MemoryInput: chưa biết)"""
+    return None if isinstance(file_path, MemoryInput) else os.path.getsize(file_path)
+
+
+def _read_csv(file_path, encoding, delimiter, **kwargs):
+    import pandas as pd
+
+    return pd.read_csv(
+        file_path.reader() if isinstance(file_path, MemoryInput) else file_path,
+        header=None,
+        encoding=encoding,
+        delimiter=delimiter,
+        quotechar='"',
+        skipinitialspace=True,
+        on_bad_lines='skip',  # Skip bad lines instead of failing
+        **kwargs
+    )
+
+
+class _LineFeed:
+    """Input của một csv.reader dùng chung: mỗi lần next() trả về đúng một record rồi dừng"""
+
+    def __init__(self):
+        self.record = None
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        record, self.record = self.record, None
+        if record is None:
+            raise StopIteration
+        return record
+
+
+def _iter_text_lines(file_path, encoding):
+    """Các dòng (không kèm ký tự xuống dòng) của file, decode dần từ mmap thay vì đọc cả file vào RAM"""
+    with _mapped(file_path) as mm:
+        decoder = codecs.getincrementaldecoder(encoding)(errors='ignore')
+        rest = ''
+        for offset in range(0, len(mm), MANUAL_READ_BYTES):
+            text = rest + decoder.decode(mm[offset:offset + MANUAL_READ_BYTES])
+            parser_progress.add_bytes(min(MANUAL_READ_BYTES, len(mm) - offset))
+            # \r cuối chunk có thể là nửa đầu của \r\n ở chunk sau
+            if text.endswith('\r'):
+                text, rest = text[:-1], '\r'
+            else:
+                rest = ''
+            lines = text.replace('\r\n', '\n').replace('\r', '\n').split('\n')
+            rest = lines.pop() + rest
+            yield from lines
+        rest += decoder.decode(b'', final=True)
+        if rest:
+            yield from rest.replace('\r\n', '\n').replace('\r', '\n').split('\n')
+
+
+def _ends_in_quotes(line, delimiter, in_quotes):
+    """Sau dòng này record còn nằm trong dấu nháy không (cùng quy tắc với csv.reader mặc định)"""
+    position = 0
+    while True:
+        quote = line.find('"', position)
+        if quote < 0:
+            return in_quotes
+        if in_quotes:
+            if line.startswith('"', quote + 1):
+                # "" trong ô là dấu nháy thường
+                position = quote + 2
+                continue
+            in_quotes = False
+        elif quote == 0 or line[quote - 1] == delimiter:
+            # Dấu nháy chỉ mở ô ở đầu ô
+            in_quotes = True
+        position = quote + 1
+
+
+def iter_manual_rows(file_path, dialect, min_parts):
+    """
+    Parse thủ công khi pandas không đọc được file: đọc file qua mmap, trả về dần từng record
+    (list ô) có ít nhất min_parts cột. Ô trong dấu nháy được phép chứa xuống dòng; dấu nháy
+    không đóng sau MAX_QUOTED_LINES dòng (hoặc tới cuối file) thì các dòng đó được parse riêng từng dòng
+    """
+    feed = _LineFeed()
+    reader = csv.reader(feed, delimiter=dialect.delimiter)
+
+    def split(record):
+        feed.record = record
+        try:
+            return next(reader, [])
+        except csv.Error:
+            feed.record = None
+            return record.split(dialect.delimiter)
+
+    pending = []
+    for line in _iter_text_lines(file_path, dialect.encoding):
+        if pending:
+            pending.append(line)
+            if not _ends_in_quotes(line, dialect.delimiter, True):
+                parts = split('\n'.join(pending).strip())
+                pending = []
+                if len(parts) >= min_parts:
+                    yield parts
+            elif len(pending) > MAX_QUOTED_LINES:
+                for pending_line in pending:
+                    pending_line = pending_line.strip()
+                    parts = split(pending_line) if pending_line else []
+                    if len(parts) >= min_parts:
+                        yield parts
+                pending = []
+            continue
+
+        line = line.strip()
+        if not line:
+            continue
+        if '"' in line and _ends_in_quotes(line, dialect.delimiter, False):
+            pending.append(line)
+            continue
+        parts = split(line)
+        if len(parts) >= min_parts:
+            yield parts
+
+    # Dấu nháy không đóng tới cuối file: parse riêng từng dòng như các dòng bình thường
+    for pending_line in pending:
+        pending_line = pending_line.strip()
+        parts = split(pending_line) if pending_line else []
+        if len(parts) >= min_parts:
+            yield parts
+
+
+def manual_parse(file_path, dialect, min_parts):
+    """Last resort: parse thủ công (iter_manual_rows) khi pandas không đọc được file"""
+    import pandas as pd
+
+    questions_data = []
+    for parts in iter_manual_rows(file_path, dialect, min_parts):
+        questions_data.append(parts)
+        if len(questions_data) % LIMIT_CHECK_ROWS == 0:
+            parser_limits.check('rows', len(questions_data))
+            parser_limits.check_deadline()
+    if not questions_data:
+        raise NoDataError("Không tìm thấy dữ liệu hợp lệ trong file")
+
+    df = pd.DataFrame(questions_data)
+    parser_limits.check_frame(df, min_parts, _max_chars(file_path))
+    return df
+
+
+def read_csv_frame(file_path, min_parts):
+    """
+    Đọc CSV/TXT thành DataFrame: đoán encoding/delimiter một lần rồi parse một lần.
+    Chỉ parse lại khi phần sau prefix không decode được; pandas lỗi thì parse thủ công
+    (giữ các dòng có ít nhất min_parts cột).
+    Raise NoDataError nếu không có dữ liệu, ValueError nếu không đọc được file,
+    LimitExceeded nếu vượt giới hạn của parser_limits
+    """
+    with parser_profile.stage('sniff'):
+        dialect = sniff_csv(file_path)
+
+    encodings = [dialect.encoding] + [e for e in FALLBACK_ENCODINGS if e != dialect.encoding]
+    for attempt, encoding in enumerate(encodings):
+        stage = 'encoding_retry' if attempt else 'read'
+        try:
+            with parser_profile.stage(stage):
+                df = _read_csv(file_path, encoding, dialect.delimiter)
+        except UnicodeDecodeError:
+            continue
+        except parser_limits.LimitExceeded:
+            raise
+        except Exception:
+            break
+        parser_profile.add_rows(stage, df.shape[0])
+        if not isinstance(file_path, MemoryInput):
+            # pd.read_csv đọc file từ đường dẫn nhanh hơn từ file object: chỉ báo tiến độ khi đã đọc xong
+            parser_progress.add_bytes(os.path.getsize(file_path))
+        parser_limits.check_frame(df, min_parts, _max_chars(file_path))
+        return df
+
+    try:
+        with parser_profile.stage('manual_parse'):
+            return manual_parse(file_path, dialect, min_parts)
+    except (NoDataError, parser_limits.LimitExceeded):
+        raise
+    except Exception as e:
+        raise ValueError(f"Không thể đọc file: {str(e)}")
+
+
+def _classify(value):
+    """Phân loại một ô text giống cách pd.read_csv suy kiểu: None (NaN), 'int', 'float', 'text'"""
+    if value in NA_VALUES:
+        return None
+    if INT_PATTERN.match(value):
+        digits = value.strip().lstrip('+-')
+        if len(digits) > MAX_EXACT_DIGITS and int(value) > INT64_MAX:
+            raise FastPathUnsupported("Số nguyên vượt int64")
+        return 'int'
+    if FLOAT_PATTERN.match(value):
+        mantissa = re.split('[eE]', value.strip())[0]
+        if sum(c.isdigit() for c in mantissa) > MAX_EXACT_DIGITS:
+            raise FastPathUnsupported("Số thực quá nhiều chữ số")
+        return 'float'
+    stripped = value.strip()
+    if stripped != value and FLOAT_PATTERN.match(stripped):
+        # Số có khoảng trắng đầu dòng: pandas có thể vẫn parse thành số
+        raise FastPathUnsupported("Số có khoảng trắng")
+    return 'text'
+
+
+def _column_kind(kinds):
+    """Suy dtype của cột từ loại từng ô: 'int', 'float' hoặc 'object'"""
+    present = set(kinds)
+    if 'text' in present:
+        return 'object'
+    if 'float' in present or None in present:
+        # Cột toàn NaN hoặc số nguyên có NaN -> float64
+        return 'float'
+    return 'int'
+
+
+def _parse_records(text, dialect, ncols=None):
+    """
+    Tách text thành record như pd.read_csv: bỏ dòng trống, bỏ dòng nhiều cột hơn dòng đầu (on_bad_lines='skip').
+    ncols: số cột của dòng đầu file (None = lấy từ record đầu tiên). Trả về (records, ncols)
+    """
+    if '\x00' in text or QUOTED_EMPTY_LINE.search(text):
+        raise FastPathUnsupported("File có NUL hoặc dòng chỉ chứa \"\"")
+
+    stream = io.StringIO(text, newline='')
+    reader = csv.reader(stream, delimiter=dialect.delimiter, quotechar='"', skipinitialspace=True, strict=True)
+    records = []
+    try:
+        for record in reader:
+            # Dòng trống (hoặc chỉ có khoảng trắng) bị pandas bỏ qua
+            if not record or (len(record) == 1 and not record[0].strip()):
+                continue
+            if ncols is None:
+                ncols = len(record)
+            elif len(record) > ncols:
+                # on_bad_lines='skip'
+                continue
+            records.append(record)
+    except csv.Error as e:
+        # Vd. EOF trong dấu nháy: pandas sẽ báo lỗi và chuyển sang parse thủ công
+        if stream.tell() >= len(text):
+            raise RangeBoundaryError(str(e))
+        raise FastPathUnsupported(str(e))
+    return records, ncols
+
+
+def _split_columns(records, ncols):
+    columns = [[] for _ in range(ncols)]
+    for record in records:
+        for i in range(ncols):
+            columns[i].append(record[i] if i < len(record) else '')
+    return columns
+
+
+def _check_column_kind(column_kind, special_only):
+    # Cột chỉ có True/False, inf, ... : pandas suy ra bool/float, không giữ text
+    if column_kind == 'object' and special_only:
+        raise FastPathUnsupported("Cột có giá trị bool/inf")
+
+
+def _row_kind(column_kinds, row_columns=None):
+    """dtype chung của một dòng (giống df.iloc[idx]): có cột text -> object, có float -> float"""
+    if 'object' in column_kinds[:row_columns]:
+        return 'object'
+    elif 'float' in column_kinds[:row_columns]:
+        return 'float'
+    return 'int'
+
+
+def _convert_columns(columns, kinds, column_kinds, row_kind, float_columns):
+    """float_columns: cột nào có ít nhất một ô số thực (tính trên cả file)"""
+    converted = []
+    for column, column_cells, column_kind, has_float in zip(columns, kinds, column_kinds, float_columns):
+        if column_kind == 'object':
+            converted.append([None if kind is None else value for value, kind in zip(column, column_cells)])
+        elif has_float:
+            converted.append([None if kind is None else float(value) for value, kind in zip(column, column_cells)])
+        elif column_kind == 'float' or row_kind == 'float':
+            # Cột số nguyên được parse thành int trước khi ép sang float (-0 -> 0.0)
+            converted.append([None if kind is None else float(int(value)) for value, kind in zip(column, column_cells)])
+        else:
+            converted.append([int(value) for value in column])
+    return [list(row) for row in zip(*converted)]
+
+
+def read_csv_rows(file_path, row_columns=None, dialect=None):
+    """
+    Fast path cho CSV/TXT: đọc bằng module csv và ép kiểu từng ô giống pd.read_csv + df.iloc[idx]
+    (số nguyên -> int, số thực -> float, NaN -> None, còn lại giữ text).
+    row_columns: số cột đầu dùng để suy dtype chung của dòng (giống df.iloc[:, :row_columns]).
+    Trả về (rows, ncols). Raise FastPathUnsupported nếu file cần pandas để có kết quả giống hệt
+    """
+    dialect = dialect or sniff_csv(file_path)
+
+    try:
+        if isinstance(file_path, MemoryInput):
+            text = file_path.data.decode(dialect.encoding)
+        else:
+            with open(file_path, 'r', encoding=dialect.encoding, newline='') as f:
+                text = f.read()
+                parser_progress.add_bytes(os.fstat(f.fileno()).st_size)
+    except UnicodeDecodeError:
+        raise FastPathUnsupported("Encoding không khớp với phần đầu file")
+
+    records, ncols = _parse_records(text, dialect)
+    if not records:
+        # Để pandas + parse thủ công quyết định thông báo lỗi như cũ
+        raise FastPathUnsupported("Không có dòng dữ liệu")
+    parser_limits.check('rows', len(records))
+    parser_limits.check_deadline()
+    _check_records(records, ncols, len(text))
+
+    columns = _split_columns(records, ncols)
+    kinds = [[_classify(value) for value in column] for column in columns]
+    column_kinds = [_column_kind(column) for column in kinds]
+    for column, column_cells, column_kind in zip(columns, kinds, column_kinds):
+        _check_column_kind(column_kind, all(SPECIAL_PATTERN.match(value)
+                                            for value, kind in zip(column, column_cells) if kind == 'text'))
+
+    return _convert_columns(columns, kinds, column_kinds, _row_kind(column_kinds, row_columns),
+                            ['float' in column_cells for column_cells in kinds]), ncols
+
+
+def can_use_fast_path(file_path):
+    """CSV/TXT nhỏ thì đọc bằng module csv (MemoryInput: đọc hết stdin / giải nén để biết kích thước)"""
+    if isinstance(file_path, MemoryInput):
+        return file_path.suffix == '.csv' and file_path.size_at_most(FAST_PATH_MAX_BYTES)
+    file_path = Path(file_path)
+    return file_path.suffix.lower() in ['.csv', '.txt'] and file_path.stat().st_size <= FAST_PATH_MAX_BYTES
+
+
+def can_parse_parallel(file_path, workers):
+    """CSV/TXT lớn và có nhiều process: parse song song theo khoảng byte (scan_csv_ranges), chỉ với file trên đĩa"""
+    if isinstance(file_path, MemoryInput):
+        return False
+    file_path = Path(file_path)
+    return (workers > 1 and file_path.suffix.lower() in ['.csv', '.txt']
+            and file_path.stat().st_size >= PARALLEL_MIN_BYTES)
+
+
+def _range_encoding(encoding, start):
+    # BOM chỉ có ở đầu file: khoảng phía sau không được bỏ U+FEFF ở đầu khoảng
+    return 'utf-8' if encoding == 'utf-8-sig' and start > 0 else encoding
+
+
+def _read_range_frame(file_path, dialect, start, end, ncols, text_columns=()):
+    """
+    Đọc khoảng [start, end) bằng pd.read_csv (cùng tham số với _read_csv khi đọc cả file). Một dòng header giả
+    và một dòng giả "0" ncols cột được thêm vào đầu để số cột là số cột của dòng đầu file: dòng nhiều cột hơn
+    bị bỏ (on_bad_lines='skip'), dòng ít cột hơn được thêm NaN, như khi đọc cả file. "0" không đổi kiểu pandas
+    suy ra cho cột số / text; dòng giả được bỏ trước khi trả về. text_columns: cột đọc dạng text (dtype=str).
+    Raise RangeBoundaryError nếu khoảng kết thúc giữa một ô có dấu nháy, FastPathUnsupported nếu không đọc được
+    giống khi đọc cả file
+    """
+    import pandas as pd
+
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    encoding = _range_encoding(dialect.encoding, start)
+    if encoding == 'utf-8-sig':
+        # BOM phải nằm ở đầu input, không phải sau dòng header giả
+        data = data[len(codecs.BOM_UTF8):] if data.startswith(codecs.BOM_UTF8) else data
+        encoding = 'utf-8'
+    header = (dialect.delimiter.join(str(column) for column in range(ncols)) + '\n'
+              + dialect.delimiter.join('0' * ncols) + '\n')
+    try:
+        df = pd.read_csv(io.BytesIO(header.encode('ascii') + data), header=0, encoding=encoding,
+                         delimiter=dialect.delimiter, quotechar='"', skipinitialspace=True, on_bad_lines='skip',
+                         low_memory=False, dtype={str(column): str for column in text_columns} or None)
+    except UnicodeDecodeError:
+        raise FastPathUnsupported("Encoding không khớp với phần đầu file")
+    except pd.errors.ParserError as e:
+        if 'EOF inside string' in str(e):
+            raise RangeBoundaryError(str(e))
+        raise FastPathUnsupported(str(e))
+    df = df.iloc[1:]
+    parser_limits.check_columns(df, None, len(data))
+    return df
+
+
+def _first_record_width(file_path, dialect):
+    """Số cột của record đầu tiên trong file (số cột pandas dùng cho cả file)"""
+    try:
+        with open(file_path, 'r', encoding=dialect.encoding, newline='') as f:
+            reader = csv.reader(f, delimiter=dialect.delimiter, quotechar='"', skipinitialspace=True, strict=True)
+            for record in reader:
+                if record and (len(record) > 1 or record[0].strip()):
+                    return len(record)
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise FastPathUnsupported(str(e))
+    raise FastPathUnsupported("Không có dòng dữ liệu")
+
+
+def _is_record_start(sample, dialect, truncated):
+    """
+    Parse thử sample (text ngay sau một dấu xuống dòng, đến hết dòng cuối trọn vẹn) như thể nó bắt đầu
+    một record. Điểm cắt nằm giữa một ô có dấu nháy thì vai trò mở / đóng của các dấu nháy phía sau bị đảo:
+    csv.reader (strict) báo lỗi hoặc tới cuối sample vẫn còn trong dấu nháy.
+    truncated: sample bị cắt trước cuối file, dòng cuối có thể nằm giữa một ô nhiều dòng nên còn trong dấu nháy
+    ở cuối sample không chứng tỏ điểm cắt sai
+    """
+    stream = io.StringIO(sample, newline='')
+    reader = csv.reader(stream, delimiter=dialect.delimiter, quotechar='"', skipinitialspace=True, strict=True)
+    try:
+        for _ in reader:
+            pass
+    except csv.Error:
+        return truncated and stream.tell() >= len(sample)
+    return True
+
+
+def _record_boundary(mm, offset, dialect):
+    """Điểm cắt đầu tiên sau offset (ngay sau một dấu xuống dòng) có vẻ là đầu record, None nếu hết file"""
+    first = None
+    position = mm.find(b'\n', offset)
+    for _ in range(SPLIT_PROBE_LINES):
+        if position < 0 or position + 1 >= len(mm):
+            break
+        candidate = position + 1
+        if first is None:
+            first = candidate
+        sample = mm[candidate:candidate + SPLIT_PROBE_BYTES]
+        truncated = candidate + SPLIT_PROBE_BYTES < len(mm)
+        if truncated:
+            sample = sample[:sample.rfind(b'\n') + 1]
+        if _is_record_start(sample.decode(_range_encoding(dialect.encoding, candidate), errors='ignore'), dialect,
+                            truncated):
+            return candidate
+        position = mm.find(b'\n', candidate)
+    # Không chắc chắn: dùng dấu xuống dòng đầu tiên, sai thì CsvRanges gộp khoảng lại
+    return first
+
+
+def split_csv_ranges(file_path, dialect, parts):
+    """Chia file thành tối đa parts khoảng byte [start, end) có kích thước gần bằng nhau, cắt ở đầu record"""
+    import mmap
+
+    size = os.path.getsize(file_path)
+    bounds = [0]
+    with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for part in range(1, parts):
+            start = _record_boundary(mm, max(size * part // parts, bounds[-1]), dialect)
+            if start is None:
+                break
+            if start > bounds[-1]:
+                bounds.append(start)
+    bounds.append(size)
+    return list(zip(bounds, bounds[1:]))
+
+
+def _frame_kinds(df):
+    """
+    Kiểu pandas suy ra cho từng cột của một khoảng: 'int', 'float', 'object', hoặc None nếu cột chỉ có NaN,
+    để gộp thành kiểu cột của cả file (_range_column_kind)
+    """
+    from pandas.api.types import is_float_dtype, is_integer_dtype
+
+    kinds = []
+    for position in range(df.shape[1]):
+        column = df.iloc[:, position]
+        values = column.dropna()
+        if values.empty:
+            kinds.append(None)
+        elif is_integer_dtype(column.dtype):
+            kinds.append('int')
+        elif is_float_dtype(column.dtype):
+            kinds.append('float')
+        elif all(SPECIAL_PATTERN.match(str(value)) for value in values):
+            # Cột chỉ có true / false: khi đọc cả file là cột bool, không giống dòng giả "0" làm thành text
+            raise FastPathUnsupported("Cột chỉ có giá trị bool / inf / nan dạng text")
+        else:
+            kinds.append('object')
+    return kinds
+
+
+def _range_column_kind(kinds):
+    """
+    Kiểu cột của cả file từ kiểu của cột đó trong các khoảng có dữ liệu, giống pandas đọc cả file:
+    có text -> object (khoảng đọc thành số được đọc lại dạng text), int + float / NaN -> float
+    """
+    present = set(kinds) - {None}
+    if 'object' in present:
+        return 'object'
+    return 'int' if present == {'int'} and None not in kinds else 'float'
+
+
+def _frame_rows(df, column_kinds, row_kind):
+    """Các dòng của khoảng, ép kiểu theo kiểu cột của cả file như _convert_columns (NaN -> None)"""
+    converted = []
+    for position, column_kind in enumerate(column_kinds):
+        column = df.iloc[:, position]
+        if column_kind == 'int' and row_kind != 'float':
+            converted.append(column.tolist())
+            continue
+        values = column.astype(object) if column_kind == 'object' else column.astype('float64').astype(object)
+        converted.append(values.where(column.notna(), None).tolist())
+    return [list(row) for row in zip(*converted)]
+
+
+def _range_worker(conn, file_path, dialect, start, end, ncols):
+    """
+    Process của một khoảng [start, end): đọc khoảng bằng pd.read_csv một lần, gửi (số record, _frame_kinds)
+    về process chính rồi giữ DataFrame tới khi nhận plan (kiểu cột của cả file) để ép kiểu và gọi parse_range.
+    Khoảng kết thúc giữa một ô có dấu nháy (điểm cắt sai) thì gửi RangeBoundaryError, process chính có thể
+    gửi "extend" để parse lại khoảng gộp với khoảng sau
+    """
+    try:
+        while True:
+            df = kinds = None
+            try:
+                df = _read_range_frame(file_path, dialect, start, end, ncols)
+                kinds = _frame_kinds(df)
+                conn.send(('scan', (df.shape[0], kinds)))
+            except Exception as e:
+                # Khoảng bắt đầu sai (khoảng trước bị cắt giữa record) cũng có thể lỗi, process chính chỉ xét lỗi
+                # khi đã biết điểm đầu đúng
+                conn.send(('error', e))
+            # "stop": khoảng được gộp vào khoảng trước, hoặc parse lỗi ở khoảng khác
+            command, value = conn.recv()
+            if command == 'extend':
+                end = value
+                continue
+            if command == 'parse' and df is not None:
+                plan, parse_range = value
+                text_columns = [column for column, (kind, column_kind) in enumerate(zip(kinds, plan.column_kinds))
+                                if column_kind == 'object' and kind in ('int', 'float')]
+                if text_columns:
+                    # Cột là text ở khoảng khác: đọc lại để có đúng text gốc thay vì số đã đổi kiểu
+                    df = _read_range_frame(file_path, dialect, start, end, ncols, text_columns)
+                rows = _frame_rows(df, plan.column_kinds, plan.row_kind)
+                del df
+                conn.send(('result', parser_skipped.call(None, parse_range, rows, plan)))
+            return
+    except EOFError:
+        pass
+    except Exception as e:
+        try:
+            conn.send(('error', e))
+        except OSError:
+            pass
+    finally:
+        conn.close()
+
+
+def _send_stop(conn):
+    try:
+        conn.send(('stop', None))
+    except OSError:
+        pass
+    conn.close()
+
+
+class CsvRanges:
+    """
+    Parse song song một file CSV/TXT lớn theo khoảng byte (tạo bằng scan_csv_ranges). Mỗi khoảng có một process
+    riêng (_range_worker) giữ DataFrame của khoảng giữa hai bước, nên mỗi khoảng chỉ được đọc bằng pandas
+    một lần. Dùng với with để dừng các process khi parse lỗi giữa chừng
+    """
+
+    def __init__(self, file_path, dialect, ncols, ranges, row_columns=None):
+        import multiprocessing
+
+        self.ncols = ncols
+        self.plans = []
+        self.workers = []
+        try:
+            for start, end in ranges:
+                conn, child = multiprocessing.Pipe()
+                process = multiprocessing.Process(target=_range_worker,
+                                                  args=(child, str(file_path), dialect, start, end, ncols))
+                process.start()
+                child.close()
+                self.workers.append((process, conn))
+            self._plan(str(file_path), dialect, list(ranges), row_columns)
+        except BaseException:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _receive(self, index):
+        """Message tiếp theo của process khoảng index: nội dung, hoặc exception process đó gửi về"""
+        process, conn = self.workers[index]
+        try:
+            kind, value = conn.recv()
+        except EOFError:
+            process.join()
+            raise RuntimeError(f"Process parse khoảng {index + 1} bị dừng đột ngột (exit code {process.exitcode})")
+        return value
+
+    def _stop(self, index):
+        process, conn = self.workers.pop(index)
+        _send_stop(conn)
+        process.join()
+
+    def _plan(self, file_path, dialect, ranges, row_columns):
+        scans = [self._receive(index) for index in range(len(ranges))]
+
+        # Khoảng đầu bắt đầu ở đầu file; khoảng i bắt đầu đúng và kết thúc ngoài dấu nháy thì khoảng i + 1 cũng
+        # bắt đầu đúng. Khoảng kết thúc giữa record (điểm cắt sai) được gộp với khoảng sau rồi tách lại
+        index = 0
+        while index < len(ranges):
+            scan = scans[index]
+            if isinstance(scan, RangeBoundaryError) and index + 1 < len(ranges):
+                ranges[index:index + 2] = [(ranges[index][0], ranges[index + 1][1])]
+                self._stop(index + 1)
+                self.workers[index][1].send(('extend', ranges[index][1]))
+                scans[index:index + 2] = [self._receive(index)]
+                continue
+            if isinstance(scan, Exception):
+                raise scan
+            index += 1
+
+        # Khoảng không có dòng nào không ảnh hưởng kiểu cột
+        column_kinds = [_range_column_kind([kinds[column] for records, kinds in scans if records])
+                        for column in range(self.ncols)]
+        if not sum(records for records, _ in scans):
+            raise FastPathUnsupported("Không có dòng dữ liệu")
+        parser_limits.check('rows', sum(records for records, _ in scans))
+        parser_limits.check_deadline()
+
+        row_kind = _row_kind(column_kinds, row_columns)
+        first_row = 1
+        for (start, end), (records, _) in zip(ranges, scans):
+            self.plans.append(CsvRangePlan(file_path, dialect, start, end, self.ncols, first_row, records,
+                                           column_kinds, row_kind))
+            first_row += records
+
+    def parse(self, parse_range):
+        """
+        Bước 2: parse_range(rows, plan) trong process của từng khoảng (parse_range phải là hàm cấp module),
+        trả về list kết quả theo thứ tự trong file
+        """
+        for (_, conn), plan in zip(self.workers, self.plans):
+            conn.send(('parse', (plan, parse_range)))
+        results = []
+        for index, plan in enumerate(self.plans):
+            value = self._receive(index)
+            if isinstance(value, Exception):
+                raise value
+            result, part = value
+            parser_progress.add_bytes(plan.end - plan.start)
+            # --skipped-report: các dòng bị bỏ qua của khoảng được nối vào báo cáo theo thứ tự trong file
+            parser_skipped.merge(part)
+            results.append(result)
+        self.close()
+        return results
+
+    def close(self):
+        """Dừng các process còn chạy (process đã gửi kết quả thì tự thoát)"""
+        # Process fork sau giữ bản sao đầu pipe của các process trước nên đóng pipe không đủ để báo dừng
+        for _, conn in self.workers:
+            _send_stop(conn)
+        for process, _ in self.workers:
+            process.join(timeout=1)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        self.workers = []
+
+
+def scan_csv_ranges(file_path, workers, row_columns=None):
+    """
+    Chuẩn bị parse song song một file CSV/TXT lớn: chia file thành các khoảng byte bắt đầu ở đầu record
+    (split_csv_ranges), mỗi process đọc khoảng của mình bằng pd.read_csv, rồi gộp kiểu cột của các khoảng
+    thành kiểu cột của cả file giống khi đọc cả file. Trả về CsvRanges: plans là list CsvRangePlan (first_row: số dòng trong file,
+    tính từ 1, của record đầu khoảng), parse(parse_range) là bước 2.
+    Raise FastPathUnsupported khi không parse song song được (điểm cắt sai, encoding, file cần pandas ...)
+    """
+    dialect = sniff_csv(file_path)
+    if dialect.encoding not in PARALLEL_ENCODINGS:
+        raise FastPathUnsupported(f"Không chia được file {dialect.encoding} theo byte")
+    ncols = _first_record_width(file_path, dialect)
+    ranges = split_csv_ranges(file_path, dialect, workers)
+    if len(ranges) < 2:
+        raise FastPathUnsupported("Không tìm được điểm cắt")
+    # Import trước khi tạo process của các khoảng để không process nào phải import lại pandas
+    import pandas  # noqa: F401
+    return CsvRanges(file_path, dialect, ncols, ranges, row_columns)
+
+
+def iter_csv_chunks(file_path, chunksize=DEFAULT_CHUNKSIZE):
+    """Đọc CSV/TXT theo chunk, mọi ô giữ nguyên dạng text (MemoryInput: đọc thẳng từ pipe, không đọc hết vào RAM)"""
+    import pandas as pd
+
+    dialect = sniff_csv(file_path)
+    source = file_path.open() if isinstance(file_path, MemoryInput) else file_path
+
+    try:
+        reader = _read_csv(
+            source,
+            dialect.encoding,
+            dialect.delimiter,
+            encoding_errors='replace',
+            dtype=str,
+            chunksize=chunksize
+        )
+    except pd.errors.EmptyDataError:
+        return
+
+    # File trên đĩa: tiến độ theo vị trí trong file pandas tự mở (MemoryInput: đã đếm khi đọc từ pipe)
+    handle = None if source is not file_path else getattr(getattr(reader, 'handles', None), 'handle', None)
+    position = 0
+    with reader:
+        for chunk in reader:
+            if handle is not None:
+                position, previous = handle.tell(), position
+                parser_progress.add_bytes(position - previous)
+            yield chunk
+
+
+def fold_text(text):
+    """Bỏ dấu tiếng Việt, viết thường và chỉ giữ chữ/số (vd. "Khởi động" -> "khoidong")"""
+    text = unicodedata.normalize('NFD', str(text)).replace('đ', 'd').replace('Đ', 'D')
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return re.sub(r'[^0-9a-z]', '', text.lower())
+
+
+def sheet_category(sheet_name):
+    """Category ứng với tên sheet, None nếu tên sheet không khớp category nào"""
+    folded = fold_text(sheet_name)
+    if folded in SHEET_CATEGORIES:
+        return SHEET_CATEGORIES[folded]
+    # Tên dài hơn như "Tang toc - vong 1"
+    for key, category in SHEET_CATEGORIES.items():
+        if len(key) > 2 and folded.startswith(key):
+            return category
+    return None
+
+
+def list_excel_sheets(file_path):
+    """Danh sách tên sheet theo thứ tự trong workbook"""
+    if as_input(file_path).suffix.lower() == '.xls':
+        import pandas as pd
+
+        with pd.ExcelFile(open_source(file_path)) as workbook:
+            return list(workbook.sheet_names)
+
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(open_source(file_path), read_only=True, data_only=True)
+    try:
+        return list(workbook.sheetnames)
+    finally:
+        workbook.close()
+
+
+def iter_sheet_rows(sheet):
+    """Duyệt lazy các dòng của worksheet (openpyxl read-only), bỏ các dòng trống ở cuối sheet"""
+    empty_rows = []
+    for row in sheet.iter_rows(values_only=True):
+        if all(value is None or (isinstance(value, str) and value == '') for value in row):
+            # Giữ lại dòng trống ở giữa, bỏ các dòng trống ở cuối sheet (giống pd.read_excel)
+            empty_rows.append(row)
+            continue
+        yield from empty_rows
+        empty_rows = []
+        yield row
+
+
+def _check_sheet_dimensions(worksheet):
+    """Giới hạn số dòng / số cột theo kích thước sheet ghi trong file .xlsx (không phải đọc dữ liệu)"""
+    if worksheet.max_row:
+        parser_limits.check('rows', worksheet.max_row)
+    if worksheet.max_column:
+        parser_limits.check('columns', worksheet.max_column)
+
+
+def check_excel_dimensions(file_path, sheet=0):
+    """.xlsx: kiểm tra giới hạn kích thước sheet trước khi đọc (.xls và sheet không ghi kích thước thì bỏ qua)"""
+    if as_input(file_path).suffix.lower() != '.xlsx':
+        return
+
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(open_source(file_path), read_only=True, data_only=True)
+    try:
+        _check_sheet_dimensions(workbook.worksheets[sheet] if isinstance(sheet, int) else workbook[sheet])
+    finally:
+        workbook.close()
+
+
+def _excel_cell_value(cell):
+    """Giá trị ô openpyxl như pd.read_excel: ô trống -> '', ô lỗi (#N/A, ...) -> NaN, số thực nguyên -> int"""
+    from openpyxl.cell.cell import TYPE_ERROR, TYPE_NUMERIC
+
+    value = cell.value
+    if value is None:
+        return ''
+    if cell.data_type == TYPE_ERROR:
+        return float('nan')
+    if cell.data_type == TYPE_NUMERIC:
+        number = int(value)
+        return number if number == value else float(value)
+    return value
+
+
+def _read_sheet_data(worksheet):
+    """
+    Các dòng của sheet (openpyxl read-only) giống get_sheet_data của pd.read_excel: bỏ ô trống cuối dòng
+    và dòng trống cuối sheet, dòng ngắn được thêm '' cho đủ số cột. Kiểm tra giới hạn số dòng / thời gian
+    trong lúc đọc vì kích thước ghi trong file có thể sai
+    """
+    # Đọc hết các dòng như pandas, không dừng ở kích thước ghi trong file
+    worksheet.reset_dimensions()
+    data = []
+    last_row_with_data = -1
+    for row_number, row in enumerate(worksheet.iter_rows()):
+        values = [_excel_cell_value(cell) for cell in row]
+        while values and values[-1] == '':
+            values.pop()
+        if values:
+            last_row_with_data = row_number
+        data.append(values)
+        if len(data) % LIMIT_CHECK_ROWS == 0:
+            parser_limits.check('rows', len(data))
+            parser_limits.check_deadline()
+    data = data[:last_row_with_data + 1]
+
+    width = max((len(values) for values in data), default=0)
+    return [values + [''] * (width - len(values)) for values in data]
+
+
+def read_excel_frame(file_path, columns=None, sheet=0):
+    """
+    Đọc một sheet Excel thành DataFrame (header=None, cùng kết quả với pd.read_excel), kiểm tra giới hạn
+    của parser_limits trước (kích thước sheet), trong và sau khi đọc. columns: số cột đầu được parser dùng.
+    .xlsx: mở workbook một lần bằng openpyxl read-only rồi suy kiểu cột bằng TextParser như pd.read_excel;
+    .xls: pd.read_excel (xlrd)
+    """
+    import pandas as pd
+
+    if as_input(file_path).suffix.lower() == '.xls':
+        df = pd.read_excel(open_source(file_path), header=None, sheet_name=sheet)
+        parser_limits.check_frame(df, columns)
+        return df
+
+    import openpyxl
+    from pandas.io.parsers import TextParser
+
+    workbook = openpyxl.load_workbook(open_source(file_path), read_only=True, data_only=True, keep_links=False)
+    try:
+        worksheet = workbook.worksheets[sheet] if isinstance(sheet, int) else workbook[sheet]
+        _check_sheet_dimensions(worksheet)
+        data = _read_sheet_data(worksheet)
+    finally:
+        workbook.close()
+
+    if not data:
+        df = pd.DataFrame()
+    else:
+        # Cùng tham số pd.read_excel truyền cho TextParser: ô text dạng số thành số, cột số có ô trống thành float
+        with TextParser(data, header=None, skip_blank_lines=False) as parser:
+            df = parser.read()
+    parser_limits.check_frame(df, columns)
+    return df
+
+
+def iter_excel_chunks(file_path, chunksize=DEFAULT_CHUNKSIZE, sheet=0):
+    """Đọc một sheet (tên hoặc vị trí, mặc định sheet đầu) của file Excel theo chunk (openpyxl read-only cho .xlsx)"""
+    import pandas as pd
+
+    if as_input(file_path).suffix.lower() == '.xls':
+        # xlrd không hỗ trợ đọc lazy, đọc cả sheet rồi chia chunk
+        df = pd.read_excel(open_source(file_path), header=None, sheet_name=sheet)
+        for start in range(0, df.shape[0], chunksize):
+            yield df.iloc[start:start + chunksize].reset_index(drop=True)
+        return
+
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(open_source(file_path), read_only=True, data_only=True)
+    try:
+        worksheet = workbook.worksheets[sheet] if isinstance(sheet, int) else workbook[sheet]
+        _check_sheet_dimensions(worksheet)
+        rows = []
+        for row in iter_sheet_rows(worksheet):
+            rows.append(row)
+            if len(rows) >= chunksize:
+                yield pd.DataFrame(rows)
+                rows = []
+        if rows:
+            yield pd.DataFrame(rows)
+    finally:
+        workbook.close()
+
+
+def _parse_sheet(parse_sheet, file_path, name):
+    return parser_skipped.call({'sheet': name}, parse_sheet, file_path, name)
+
+
+def parse_sheets(file_path, parse_sheet, sheets=None, workers=1):
+    """
+    Parse nhiều sheet của một workbook: parse_sheet(file_path, sheet_name) được gọi cho từng sheet,
+    song song bằng process pool nếu workers > 1 (parse_sheet phải là hàm cấp module).
+    sheets: danh sách tên sheet, None = tất cả. Trả về list (sheet_name, category, kết quả parse_sheet)
+    """
+    names = list_excel_sheets(file_path)
+    if sheets is not None:
+        missing = [name for name in sheets if name not in names]
+        if missing:
+            raise ValueError(f"Không tìm thấy sheet: {', '.join(missing)}")
+        names = [name for name in names if name in sheets]
+
+    parse_one = functools.partial(_parse_sheet, parse_sheet, file_path)
+    if workers > 1 and len(names) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=min(workers, len(names))) as executor:
+            parts = list(executor.map(parse_one, names))
+    else:
+        parts = [parse_one(name) for name in names]
+    results = []
+    for result, part in parts:
+        parser_skipped.merge(part)
+        results.append(result)
+
+    return [(name, sheet_category(name), result) for name, result in zip(names, results)]
+
+
+def iter_file_chunks(file_path, chunksize=DEFAULT_CHUNKSIZE, sheet=0, columns=None):
+    """
+    Đọc file theo chunk dựa trên extension hoặc format của MemoryInput (sheet chỉ dùng cho Excel),
+    kiểm tra giới hạn của parser_limits trên từng chunk (columns: số cột đầu được parser dùng)
+    """
+    suffix = as_input(file_path).suffix.lower()
+    if suffix in ['.xlsx', '.xls']:
+        chunks = iter_excel_chunks(file_path, chunksize, sheet)
+        max_chars = None
+    elif suffix in ['.csv', '.txt']:
+        chunks = iter_csv_chunks(file_path, chunksize)
+        max_chars = _max_chars(file_path)
+    else:
+        raise ValueError(f"Định dạng file không hỗ trợ: {as_input(file_path).suffix}")
+    return parser_limits.checked_chunks(parser_profile.timed_chunks('read', chunks), columns, max_chars)
+
+
+def expand_inputs(paths):
+    """
+    Danh sách file cần parse từ các tham số dòng lệnh: file, thư mục (các file được hỗ trợ bên trong,
+    theo thứ tự tên), glob hoặc file .zip (các file bên trong, xem archive_members).
+    Bỏ trùng, giữ thứ tự. Path không tồn tại / .zip hỏng được giữ lại để báo lỗi
+    """
+    import zipfile
+
+    files = []
+    for path in paths:
+        if isinstance(path, MemoryInput):
+            matches = [path]
+        elif os.path.isdir(path):
+            matches = sorted(str(p) for p in Path(path).iterdir() if p.is_file() and is_supported_file(p.name))
+        elif glob.has_magic(path):
+            matches = sorted(p for p in glob.glob(path, recursive=True) if os.path.isfile(p))
+        else:
+            matches = [path]
+        for match in matches:
+            if is_archive(match) and (isinstance(match, MemoryInput) or os.path.isfile(match)):
+                try:
+                    files.extend(archive_members(match))
+                    continue
+                except zipfile.BadZipFile:
+                    pass
+            if match not in files:
+                files.append(match)
+    return files
+
+
+def input_size(paths):
+    """bytes_total của parser_progress: tổng dung lượng các file CSV/TXT trên đĩa, None nếu có input khác"""
+    total = 0
+    for path in paths:
+        if (isinstance(path, MemoryInput) or not os.path.isfile(path)
+                or SUFFIX_FORMATS.get(Path(path).suffix.lower()) != 'csv'):
+            return None
+        total += os.path.getsize(path)
+    return total
+
+
+def is_batch(paths):
+    """Có phải chế độ nhiều file (nhiều path, thư mục, glob hoặc .zip) không"""
+    return len(paths) > 1 or any(is_archive(path) or (not isinstance(path, MemoryInput)
+                                                      and (os.path.isdir(path) or glob.has_magic(path)))
+                                 for path in paths)
+
+
+def _timed(parse_one, file_path):
+    started = time.perf_counter()
+    # File trong .zip (CompressedInput): "<file .zip>/<tên file>"
+    result, part = parser_skipped.call({'file': str(file_path)}, parse_one, file_path)
+    return result, round((time.perf_counter() - started) * 1000, 3), part
+
+
+def run_batch(file_paths, parse_one, workers=DEFAULT_BATCH_WORKERS):
+    """
+    Parse nhiều file song song bằng process pool: parse_one(file_path) phải là hàm cấp module
+    (hoặc functools.partial của hàm cấp module) và không raise.
+    Trả về list (file_path, kết quả, thời gian ms) theo thứ tự file_paths
+    """
+    timed = functools.partial(_timed, parse_one)
+    results = []
+    with parser_progress.stage('batch'):
+        if workers > 1 and len(file_paths) > 1:
+            from concurrent.futures import ProcessPoolExecutor
+
+            with ProcessPoolExecutor(max_workers=min(workers, len(file_paths))) as executor:
+                for result, elapsed_ms, part in executor.map(timed, file_paths):
+                    # File parse ở worker: chỉ báo được là đã xong thêm một file
+                    parser_progress.update()
+                    parser_skipped.merge(part)
+                    results.append((result, elapsed_ms))
+        else:
+            results = [timed(file_path)[:2] for file_path in file_paths]
+    return [(file_path, result, elapsed_ms) for file_path, (result, elapsed_ms) in zip(file_paths, results)]
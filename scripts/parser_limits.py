@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Giới hạn input của parser: file quá lớn hoặc bất thường (vd. một dấu nháy không đóng làm pandas đọc
+cả file thành một ô) bị từ chối sớm với lỗi có cấu trúc thay vì chiếm CPU / RAM của server nhiều phút.
+
+    tên        biến môi trường          mặc định    kiểm tra
+    bytes      PARSER_MAX_BYTES         512 MB      dung lượng file (stat) trước khi đọc; stdin / file nén:
+                                                    số byte (sau giải nén) trong lúc đọc
+    rows       PARSER_MAX_ROWS          5000000     số dòng: sau khi đọc, hoặc theo từng chunk với --stream;
+                                                    Excel .xlsx kiểm tra trước theo kích thước sheet
+    columns    PARSER_MAX_COLUMNS       1000        số cột: trên phần đầu file (sniff) rồi sau khi đọc
+    cell_chars PARSER_MAX_CELL_CHARS    1000000     độ dài một ô: trên phần đầu file rồi các cột được dùng
+                                                    sau khi đọc (bỏ qua khi file nhỏ hơn giới hạn)
+    seconds    PARSER_MAX_SECONDS       600         thời gian parse, kiểm tra giữa các chunk / bước;
+                                                    CLI có thêm watchdog dừng process khi pandas đang chạy
+
+Giá trị 0 = không giới hạn. CLI: --limit rows=100000 --limit seconds=30 (ghi đè biến môi trường).
+Vượt giới hạn -> LimitExceeded, output có "limit": {"name", "limit", "actual"}.
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+
+# tên -> (biến môi trường, mặc định, mô tả)
+LIMITS = {
+    'bytes': ('PARSER_MAX_BYTES', 512 * 1024 * 1024, 'dung lượng file (byte)'),
+    'rows': ('PARSER_MAX_ROWS', 5_000_000, 'số dòng'),
+    'columns': ('PARSER_MAX_COLUMNS', 1000, 'số cột'),
+    'cell_chars': ('PARSER_MAX_CELL_CHARS', 1_000_000, 'độ dài một ô (ký tự)'),
+    'seconds': ('PARSER_MAX_SECONDS', 600, 'thời gian parse (giây)'),
+}
+
+# Watchdog của CLI chờ thêm một chút để kiểm tra giữa các bước kịp báo lỗi trước
+WATCHDOG_GRACE_SECONDS = 5
+
+_limits = None
+_started = None
+
+
+class LimitExceeded(Exception):
+    """Input vượt một giới hạn (name: một key của LIMITS)"""
+
+    def __init__(self, name, limit, actual):
+        self.name = name
+        self.limit = limit
+        self.actual = actual
+        env = LIMITS[name][0]
+        super().__init__(f"Vượt giới hạn {LIMITS[name][2]}: {actual} > {limit} "
+                         f"({env} hoặc --limit {name}=...)")
+
+    def __reduce__(self):
+        # Gửi được từ worker process (ProcessPoolExecutor) về process chính
+        return type(self), (self.name, self.limit, self.actual)
+
+    def to_dict(self):
+        return {'name': self.name, 'limit': self.limit, 'actual': self.actual}
+
+
+def _parse_value(name, value):
+    try:
+        number = float(value) if name == 'seconds' else int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Giới hạn {name} phải là số: {value}")
+    if number < 0:
+        raise ValueError(f"Giới hạn {name} không được âm: {value}")
+    return number
+
+
+def from_env():
+    limits = {}
+    for name, (env, default, _) in LIMITS.items():
+        value = os.environ.get(env, '').strip()
+        limits[name] = _parse_value(name, value) if value else default
+    return limits
+
+
+def parse_limit_args(values):
+    """
+    --limit NAME=VALUE (list, lặp lại được) hoặc "limits": {NAME: VALUE} của daemon -> dict;
+    raise ValueError nếu sai
+    """
+    if isinstance(values, dict):
+        items = [(str(name), '=', str(value)) for name, value in values.items()]
+    elif isinstance(values, (list, tuple)) or values is None:
+        items = [str(item).partition('=') for item in values or []]
+    else:
+        raise ValueError(f"limits phải là object {{NAME: VALUE}}: {values}")
+    overrides = {}
+    for name, sep, value in items:
+        key = name.strip().replace('-', '_')
+        if not sep or key not in LIMITS:
+            raise ValueError(f"Giới hạn không hợp lệ: {name}{sep}{value} (dạng NAME=VALUE, NAME: {', '.join(LIMITS)})")
+        overrides[key] = _parse_value(key, value.strip())
+    return overrides
+
+
+def start(overrides=None):
+    """
+    Bắt đầu một lần parse (CLI, một job của daemon): đọc giới hạn (biến môi trường + overrides)
+    và bắt đầu tính thời gian. Không gọi start thì chỉ có các giới hạn không phải seconds
+    """
+    global _limits, _started
+    _limits = {**from_env(), **(overrides or {})}
+    _started = time.monotonic()
+    return dict(_limits)
+
+
+def current():
+    """Giới hạn đang dùng (chưa start thì lấy theo biến môi trường)"""
+    global _limits
+    if _limits is None:
+        _limits = from_env()
+    return _limits
+
+
+def check(name, actual):
+    limit = current()[name]
+    if limit and actual > limit:
+        raise LimitExceeded(name, limit, actual)
+
+
+def check_deadline():
+    if _started is not None:
+        check('seconds', round(time.monotonic() - _started, 3))
+
+
+def check_frame(df, columns=None, max_chars=None):
+    """
+    Số dòng, số cột và độ dài ô của DataFrame đã đọc. columns: chỉ đo ô của số cột đầu được parser dùng;
+    max_chars: độ dài tối đa có thể của một ô (vd. dung lượng file), không vượt giới hạn thì không cần đo
+    """
+    check('rows', df.shape[0])
+    _check_columns_and_cells(df, columns, max_chars)
+
+
+def check_columns(df, columns=None, max_chars=None):
+    """Như check_frame nhưng không đo số dòng (một khoảng của file khi parse song song: số dòng tính trên cả file)"""
+    _check_columns_and_cells(df, columns, max_chars)
+
+
+def checked_chunks(chunks, columns=None, max_chars=None):
+    """Bọc iterator chunk (--stream): kiểm tra từng chunk, số dòng cộng dồn và thời gian"""
+    rows = 0
+    for chunk in chunks:
+        rows += chunk.shape[0]
+        check('rows', rows)
+        _check_columns_and_cells(chunk, columns, max_chars)
+        yield chunk
+
+
+def _check_columns_and_cells(df, columns, max_chars):
+    check('columns', df.shape[1])
+    check_deadline()
+    limit = current()['cell_chars']
+    if not limit or (max_chars is not None and max_chars <= limit):
+        return
+
+    from pandas.api.types import is_string_dtype
+
+    for position in range(min(df.shape[1], columns or df.shape[1])):
+        column = df.iloc[:, position]
+        if column.dtype != object and not is_string_dtype(column.dtype):
+            continue
+        try:
+            longest = column.str.len().max()
+        except AttributeError:
+            # Cột không có text (.str không dùng được)
+            continue
+        if longest == longest and longest > limit:
+            raise LimitExceeded('cell_chars', limit, int(longest))
+
+
+def start_watchdog(report):
+    """
+    CLI: nếu parse vẫn chạy quá deadline (vd. đang trong pd.read_csv, không kiểm tra được giữa chừng)
+    thì gọi report(error_dict) rồi dừng process với exit code 1. Trả về hàm hủy watchdog
+    """
+    seconds = current()['seconds']
+    if not seconds or _started is None:
+        return lambda: None
+
+    def _expire():
+        error = LimitExceeded('seconds', seconds, round(time.monotonic() - _started, 3))
+        try:
+            report({'success': False, 'error': str(error), 'limit': error.to_dict()})
+        finally:
+            os._exit(1)
+
+    timer = threading.Timer(max(0.0, _started + seconds - time.monotonic()) + WATCHDOG_GRACE_SECONDS, _expire)
+    timer.daemon = True
+    timer.start()
+    return timer.cancel
+
+
+def report_stderr(error):
+    """report mặc định của watchdog: một dòng JSON ra stderr"""
+    print(json.dumps({'type': 'error', **error}, ensure_ascii=False), file=sys.stderr, flush=True)
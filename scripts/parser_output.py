@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Ghi kết quả của csv_parser.py / parser-tangtoc.py ra stdout theo --output-format
+
+    json     JSON một dòng, không indent (mặc định: Node là bên đọc chính)
+    pretty   JSON indent=2 (format cũ, để người đọc)
+    ndjson   mỗi dòng một record: {"type": "question", ...} cho từng câu hỏi,
+             dòng cuối {"type": "stats", ...} hoặc {"type": "error", ...} (cùng format với --stream)
+    msgpack  các record như ndjson, mỗi record là một frame MessagePack,
+             trước mỗi frame là độ dài frame (4 byte big-endian). Cần thư viện msgpack
+"""
+
+import sys
+import json
+import struct
+
+OUTPUT_FORMATS = ['json', 'pretty', 'ndjson', 'msgpack']
+RECORD_FORMATS = ['ndjson', 'msgpack']
+DEFAULT_OUTPUT_FORMAT = 'json'
+
+# Số record gom lại cho mỗi lần write (ít lời gọi write hơn khi có hàng triệu câu hỏi)
+WRITE_BATCH = 1000
+
+
+def dumps(result, output_format=DEFAULT_OUTPUT_FORMAT):
+    """Cả kết quả thành một chuỗi JSON (json / pretty)"""
+    if output_format == 'pretty':
+        return json.dumps(result, ensure_ascii=False, indent=2)
+    return json.dumps(result, ensure_ascii=False, separators=(',', ':'))
+
+
+def split_records(result, questions_key='questions'):
+    """
+    Tách kết quả thành các record: mỗi câu hỏi một record "question", cuối cùng là record "stats"
+    chứa các key còn lại (hoặc record "error" nếu success = False)
+    """
+    if result.get('success') is False:
+        yield {'type': 'error', **result}
+        return
+    for question in result.get(questions_key) or []:
+        yield {'type': 'question', **question}
+    yield {'type': 'stats', **{key: value for key, value in result.items() if key != questions_key}}
+
+
+class RecordWriter:
+    """Ghi từng record theo ndjson hoặc msgpack (frame có tiền tố độ dài)"""
+
+    def __init__(self, output_format='ndjson', stream=None):
+        if output_format not in RECORD_FORMATS:
+            raise ValueError(f"Format không ghi được theo record: {output_format}")
+        self.output_format = output_format
+        self.pending = []
+        if output_format == 'msgpack':
+            try:
+                import msgpack
+            except ImportError:
+                raise RuntimeError("Thiếu thư viện msgpack (pip install msgpack)")
+            self.packer = msgpack.Packer(use_bin_type=True)
+            self.stream = stream or sys.stdout.buffer
+        else:
+            self.stream = stream or sys.stdout
+
+    def write(self, record):
+        if self.output_format == 'msgpack':
+            payload = self.packer.pack(record)
+            self.pending.append(struct.pack('>I', len(payload)) + payload)
+        else:
+            self.pending.append(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n')
+        if len(self.pending) >= WRITE_BATCH:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            joiner = b'' if self.output_format == 'msgpack' else ''
+            self.stream.write(joiner.join(self.pending))
+            self.pending = []
+        self.stream.flush()
+
+
+def write_records(records, output_format='ndjson', stream=None):
+    writer = RecordWriter(output_format, stream)
+    try:
+        for record in records:
+            writer.write(record)
+    finally:
+        writer.flush()
+
+
+def write_result(result, output_format=DEFAULT_OUTPUT_FORMAT, questions_key='questions'):
+    """In kết quả ra stdout theo output_format"""
+    if output_format in RECORD_FORMATS:
+        sys.stdout.flush()
+        write_records(split_records(result, questions_key), output_format)
+    else:
+        print(dumps(result, output_format))
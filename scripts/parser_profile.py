@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Đo thời gian và bộ nhớ theo từng bước của parse_file / parse_tangtoc_file (--profile hoặc PARSER_PROFILE)
+
+    PARSER_PROFILE=1     như --profile: thêm "profile" vào kết quả
+    PARSER_PROFILE=dump  như --profile-dump: ghi thêm file cProfile cạnh file input (<file>.<parser>.prof)
+
+Các bước (chỉ có mặt khi thực sự chạy): import (pandas), sniff (đoán encoding/delimiter),
+read (đọc file / chunk), encoding_retry (read_csv lại với encoding khác), manual_parse, infer_types (fast path),
+header, validate, dedup, load, serialize. Mỗi bước ghi ms, số lần gọi, số dòng và peak tracemalloc (KB).
+Tên bước cũng là "stage" trong sự kiện tiến độ của parser_progress (có cả khi không profile).
+"serialize" chạy sau khi kết quả đã được in nên chỉ có trong dòng {"type": "profile", ...} ghi ra stderr.
+
+tracemalloc làm parse chậm đi nhiều lần: số đo dùng để so các bước với nhau, không phải thời gian thật.
+Chỉ đo trong process hiện tại (sheet / file parse bằng worker khác không có trong profile).
+"""
+
+import os
+import sys
+import json
+import time
+import contextlib
+import tracemalloc
+
+import parser_progress
+
+PROFILE_ENV = 'PARSER_PROFILE'
+
+_active = None
+
+
+class Profiler:
+    def __init__(self, dump_path=None):
+        self.stages = {}
+        self.stack = []
+        self.peak = 0
+        self.accounted_ms = 0.0
+        self.dump_path = dump_path
+        self.cprofile = None
+        self.started = None
+        self.total_ms = None
+
+    def start(self):
+        tracemalloc.start()
+        if self.dump_path:
+            import cProfile
+            self.cprofile = cProfile.Profile()
+            self.cprofile.enable()
+        self.started = time.perf_counter()
+
+    def stop(self):
+        self.total_ms = (time.perf_counter() - self.started) * 1000
+        if self.cprofile:
+            self.cprofile.disable()
+        self.peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    def _entry(self, name):
+        return self.stages.setdefault(name, {'ms': 0.0, 'calls': 0, 'rows': None, 'peak_kb': 0})
+
+    def add_rows(self, name, rows):
+        entry = self._entry(name)
+        entry['rows'] = (entry['rows'] or 0) + rows
+
+    @contextlib.contextmanager
+    def stage(self, name, rows=None):
+        # reset_peak xóa peak của bước ngoài nên đẩy peak hiện tại lên bước ngoài trước
+        current_peak = tracemalloc.get_traced_memory()[1]
+        if self.stack:
+            self.stack[-1] = max(self.stack[-1], current_peak)
+        self.peak = max(self.peak, current_peak)
+        tracemalloc.reset_peak()
+        self.stack.append(0)
+        started = time.perf_counter()
+        try:
+            with parser_progress.stage(name):
+                yield
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            peak = max(self.stack.pop(), tracemalloc.get_traced_memory()[1])
+            if self.stack:
+                self.stack[-1] = max(self.stack[-1], peak)
+            else:
+                # Bước lồng trong bước khác (vd. sniff trong read) không cộng hai lần vào other_ms
+                self.accounted_ms += elapsed_ms
+            self.peak = max(self.peak, peak)
+            entry = self._entry(name)
+            entry['ms'] += elapsed_ms
+            entry['calls'] += 1
+            entry['peak_kb'] = max(entry['peak_kb'], peak // 1024)
+            if rows is not None:
+                self.add_rows(name, rows)
+
+    def summary(self):
+        """Profile đến thời điểm hiện tại (total_ms tính đến lúc gọi nếu chưa stop)"""
+        total_ms = self.total_ms if self.total_ms is not None else (time.perf_counter() - self.started) * 1000
+        stages = {name: {**entry, 'ms': round(entry['ms'], 3)} for name, entry in self.stages.items()}
+        peak = self.peak if self.total_ms is not None else max(self.peak, tracemalloc.get_traced_memory()[1])
+        summary = {
+            'stages': stages,
+            'total_ms': round(total_ms, 3),
+            'other_ms': round(max(0.0, total_ms - self.accounted_ms), 3),
+            'peak_kb': peak // 1024
+        }
+        if self.dump_path:
+            summary['cprofile'] = str(self.dump_path)
+        return summary
+
+
+def env_mode():
+    """None, 'profile' hoặc 'dump' theo PARSER_PROFILE"""
+    value = os.environ.get(PROFILE_ENV, '').strip().lower()
+    if value in ('', '0', 'false', 'off'):
+        return None
+    return 'dump' if value == 'dump' else 'profile'
+
+
+def dump_path_for(file_path, parser):
+    return f"{file_path}.{parser}.prof"
+
+
+def start(file_path=None, parser='parser', dump=False):
+    """Bắt đầu profile cho process hiện tại, trả về Profiler (dừng bằng finish)"""
+    global _active
+    profiler = Profiler(dump_path_for(file_path, parser) if dump and file_path else None)
+    profiler.start()
+    _active = profiler
+    return profiler
+
+
+def finish(profiler, report=True):
+    """Dừng profile, ghi file cProfile (nếu có) và in dòng {"type": "profile", ...} ra stderr (report=True)"""
+    global _active
+    if profiler is None:
+        return None
+    profiler.stop()
+    if _active is profiler:
+        _active = None
+    summary = profiler.summary()
+    if profiler.cprofile:
+        try:
+            profiler.cprofile.dump_stats(profiler.dump_path)
+        except OSError as e:
+            summary['cprofile_error'] = str(e)
+    if report:
+        print(json.dumps({'type': 'profile', **summary}, ensure_ascii=False), file=sys.stderr)
+    return summary
+
+
+def stage(name, rows=None):
+    """with stage('read'): ... -- không đo khi không profile (tên bước vẫn được báo cho parser_progress)"""
+    if _active is None:
+        return parser_progress.stage(name)
+    return _active.stage(name, rows)
+
+
+def add_rows(name, rows):
+    if _active is not None:
+        _active.add_rows(name, rows)
+
+
+def summary():
+    """Profile của lần parse đang chạy (None khi không profile)"""
+    return _active.summary() if _active is not None else None
+
+
+def timed_chunks(name, chunks):
+    """Bọc iterator chunk (DataFrame) để thời gian đọc mỗi chunk được tính vào bước name"""
+    if _active is None:
+        return chunks
+    return _timed_chunks(name, iter(chunks))
+
+
+def _timed_chunks(name, chunks):
+    while True:
+        with stage(name):
+            chunk = next(chunks, None)
+            if chunk is not None:
+                add_rows(name, len(chunk))
+        if chunk is None:
+            return
+        yield chunk
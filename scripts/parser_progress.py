@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Sự kiện tiến độ của parser khi import file lớn (--progress / --progress-fd hoặc PARSER_PROGRESS): caller (Node)
+đọc để hiển thị tiến độ và phân biệt parser đang chạy với parser bị treo (stall timeout).
+
+Mỗi sự kiện là một dòng NDJSON ghi ra stderr hoặc một fd riêng (tránh lẫn với log / lỗi trên stderr):
+    {"type": "progress", "stage": "read", "bytes_read": 1048576, "bytes_total": 52428800,
+     "rows_validated": 0, "rows_skipped": 0, "elapsed_ms": 1530.2}
+
+    stage           bước đang chạy (tên bước của parser_profile: sniff, read, manual_parse, validate, dedup,
+                    load, serialize ...; batch khi parse nhiều file), "done" ở sự kiện cuối khi parse xong
+    bytes_read      số byte CSV/TXT đã đọc từ input (đĩa, stdin hoặc sau giải nén), cộng dồn: đọc lại file
+                    (encoding khác, parse thủ công) cũng được tính. File Excel chỉ có số byte đọc từ stdin
+    bytes_total     dung lượng các file CSV/TXT trên đĩa (null với stdin, file nén, .zip và Excel)
+    rows_validated  số dòng hợp lệ (thành câu hỏi) đã validate xong
+    rows_skipped    số dòng bị bỏ qua khi validate
+
+Sự kiện được ghi khi parser có tiến triển (đọc thêm dữ liệu, xong một chunk, sang bước mới) và cách nhau
+ít nhất PARSER_PROGRESS_INTERVAL giây (mặc định 0.5): mỗi lần cập nhật chỉ tốn một lần gọi time.monotonic.
+Bước chạy lâu trong pandas (pd.read_csv cả file từ đĩa khi không --stream, pd.read_excel, validate cả file
+một lần) không gọi cập nhật ở giữa: khi đang trong một bước mà quá một interval không có sự kiện, thread
+heartbeat ghi lại sự kiện hiện tại (số đếm không đổi) để caller biết parser vẫn đang chạy bước đó.
+Heartbeat không chạy được khi code C giữ GIL (vd. giải phóng DataFrame lớn, vài giây với file 1 triệu dòng):
+stall timeout của caller vẫn cần dài hơn các khoảng đó.
+Chỉ tính tiến độ trong process hiện tại (sheet / file parse bằng worker khác chỉ có tên bước).
+
+    PARSER_PROGRESS=1 (hoặc stderr)   như --progress
+    PARSER_PROGRESS=3                 như --progress-fd 3
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+import contextlib
+
+PROGRESS_ENV = 'PARSER_PROGRESS'
+INTERVAL_ENV = 'PARSER_PROGRESS_INTERVAL'
+DEFAULT_INTERVAL = 0.5
+
+_active = None
+
+
+class Progress:
+    def __init__(self, stream, interval=DEFAULT_INTERVAL, bytes_total=None):
+        self.stream = stream
+        self.interval = interval
+        self.bytes_total = bytes_total
+        self.bytes_read = 0
+        self.rows_validated = 0
+        self.rows_skipped = 0
+        self.stages = []
+        # Bước vừa xong, dùng khi không còn bước nào đang chạy (vd. số dòng được cộng ngay sau validate)
+        self.last_stage = 'start'
+        self.started = time.monotonic()
+        # Worker (ProcessPoolExecutor fork) thừa hưởng _active nhưng không được ghi vào stream của process chính
+        self.pid = os.getpid()
+        # Sự kiện đầu tiên được ghi ngay
+        self.next_at = self.started
+        # Thread heartbeat và thread parse cùng ghi vào stream
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.heartbeat = threading.Thread(target=self._heartbeat, name='parser-progress', daemon=True)
+        self.heartbeat.start()
+
+    def _heartbeat(self):
+        """Ghi lại sự kiện khi đang trong một bước mà quá một interval không có cập nhật"""
+        period = self.interval or DEFAULT_INTERVAL
+        while not self.stopped.wait(period):
+            if self.stages and time.monotonic() >= self.next_at:
+                self.emit()
+
+    def stop(self):
+        self.stopped.set()
+
+    def update(self):
+        now = time.monotonic()
+        if now >= self.next_at and os.getpid() == self.pid:
+            self.emit(now=now)
+
+    def emit(self, stage=None, now=None):
+        with self.lock:
+            self._emit(stage, now)
+
+    def _emit(self, stage, now):
+        global _active
+        now = now if now is not None else time.monotonic()
+        self.next_at = now + self.interval
+        event = {
+            'type': 'progress',
+            'stage': stage or (self.stages[-1] if self.stages else self.last_stage),
+            'bytes_read': self.bytes_read,
+            'bytes_total': self.bytes_total,
+            'rows_validated': self.rows_validated,
+            'rows_skipped': self.rows_skipped,
+            'elapsed_ms': round((now - self.started) * 1000, 1)
+        }
+        try:
+            self.stream.write(json.dumps(event) + '\n')
+            self.stream.flush()
+        except (OSError, ValueError):
+            # Caller đã đóng fd / pipe: bỏ báo tiến độ, parse vẫn chạy tiếp
+            self.stopped.set()
+            if _active is self:
+                _active = None
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        self.stages.append(name)
+        self.update()
+        try:
+            yield
+        finally:
+            self.last_stage = self.stages.pop()
+
+
+def parse_target(value, fd=False):
+    """
+    Nơi ghi sự kiện theo PARSER_PROGRESS (fd=False) hoặc --progress-fd (fd=True, chỉ nhận số fd):
+    None (tắt), 'stderr' hoặc số fd (>= 3). Raise ValueError nếu sai (fd 0 / 1 là stdin / output của parser)
+    """
+    value = str(value if value is not None else '').strip().lower()
+    if not fd and value in ('', '0', 'false', 'off'):
+        return None
+    if value == '2' or (not fd and value in ('1', 'true', 'on', 'stderr')):
+        return 'stderr'
+    if value.isdigit() and int(value) >= 3:
+        return int(value)
+    if fd:
+        raise ValueError(f"--progress-fd không hợp lệ: {value} (2 = stderr, hoặc số fd >= 3)")
+    raise ValueError(f"{PROGRESS_ENV} không hợp lệ: {value} (1 / stderr, hoặc số fd >= 3)")
+
+
+def env_target():
+    return parse_target(os.environ.get(PROGRESS_ENV))
+
+
+def env_interval():
+    value = os.environ.get(INTERVAL_ENV, '').strip()
+    if not value:
+        return DEFAULT_INTERVAL
+    try:
+        interval = float(value)
+    except ValueError:
+        interval = -1
+    if interval < 0:
+        raise ValueError(f"{INTERVAL_ENV} phải là số giây không âm: {value}")
+    return interval
+
+
+def start(target, bytes_total=None):
+    """
+    Bắt đầu báo tiến độ cho process hiện tại (target: kết quả của parse_target), trả về Progress
+    (dừng bằng finish). Ghi ngay một sự kiện stage "start"
+    """
+    global _active
+    if target is None:
+        return None
+    if target == 'stderr':
+        stream = sys.stderr
+    else:
+        # Line buffered, không đóng fd của caller khi process thoát
+        stream = open(target, 'w', buffering=1, closefd=False)
+    progress = Progress(stream, env_interval(), bytes_total)
+    _active = progress
+    progress.update()
+    return progress
+
+
+def finish(progress):
+    """Ghi sự kiện cuối (stage "done") rồi dừng báo tiến độ"""
+    global _active
+    if progress is None:
+        return
+    progress.stop()
+    if _active is progress:
+        progress.emit('done')
+    _active = None
+
+
+def stage(name):
+    """with stage('read'): ... -- không làm gì khi không báo tiến độ"""
+    if _active is None:
+        return contextlib.nullcontext()
+    return _active.stage(name)
+
+
+def add_bytes(size):
+    if _active is not None and size:
+        _active.bytes_read += size
+        _active.update()
+
+
+def add_rows(validated, skipped=0):
+    if _active is not None:
+        _active.rows_validated += validated
+        _active.rows_skipped += skipped
+        _active.update()
+
+
+def update():
+    """Có tiến triển mà không đổi số đếm (vd. xong một file của batch)"""
+    if _active is not None:
+        _active.update()
+
+
+def enabled():
+    return _active is not None
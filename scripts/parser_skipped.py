@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Báo cáo đầy đủ các dòng bị bỏ qua khi validate (--skipped-report PATH, hoặc "skipped_report" của daemon).
+
+Kết quả parse chỉ giữ vài dòng đầu bị bỏ qua để xem trước (csv_parser: 5, parser-tangtoc: 10), các dòng còn lại
+chỉ được đếm chứ không giữ trong RAM hay trong cache. Có báo cáo: validate_frame / validate_rows ghi từng dòng
+bị bỏ qua vào PATH ngay khi validate (NDJSON, hoặc CSV khi PATH kết thúc bằng .csv). Worker process (các khoảng
+byte của một file lớn, sheet, file của batch) ghi vào part file tạm cạnh PATH, process chính nối các part file
+vào PATH theo thứ tự input rồi xóa. Kết quả có thêm
+    "skipped_report": {"path": "...", "count": 1234,
+                       "reasons": {"Thiếu dữ liệu bắt buộc": 1000, "Số câu phải là 1, 2, 3, hoặc 4": 234}}
+reasons đếm theo loại lỗi (bỏ phần chi tiết sau ":" hoặc "(tìm thấy: ...)" của reason).
+
+Mỗi dòng của báo cáo: row (số dòng trong file, tính từ 1), reason, các ô của dòng (csv_parser: question, answer;
+parser-tangtoc: question_number, text, answer), thêm sheet / file khi parse nhiều sheet / nhiều file.
+"""
+
+import os
+import re
+import csv
+import glob
+import json
+import shutil
+import tempfile
+from collections import Counter
+
+# "Số câu phải là 1, 2, 3, hoặc 4 (tìm thấy: 7)", "Số câu không hợp lệ: could not convert ..." -> loại lỗi
+REASON_DETAIL = re.compile(r'\s*(?:\(tìm thấy: .*\)|: .*)$')
+
+PART_SUFFIX = '.part'
+
+# Báo cáo của lần parse hiện tại (process gọi start)
+_active = None
+# Nơi ghi của process hiện tại: _active, hoặc part file khi đang trong worker (xem call)
+_target = None
+# sheet / file thêm vào mỗi dòng được ghi
+_fields = {}
+
+
+def reason_group(reason):
+    reason = str(reason)
+    return REASON_DETAIL.sub('', reason) or reason
+
+
+class SkippedReport:
+    """File báo cáo (hoặc part file của worker): ghi từng dòng, đếm số dòng theo reason"""
+
+    def __init__(self, path, columns, fmt=None, header=True):
+        self.path = str(path)
+        self.columns = columns
+        self.format = fmt or ('csv' if self.path.lower().endswith('.csv') else 'ndjson')
+        self.count = 0
+        self.reasons = Counter()
+        # Worker (ProcessPoolExecutor fork) thừa hưởng báo cáo nhưng không được ghi thẳng vào file của process chính
+        self.pid = os.getpid()
+        self.file = open(self.path, 'w', encoding='utf-8', newline='')
+        self.writer = None
+        if self.format == 'csv':
+            # Cột sheet / file để trống với file / sheet đơn
+            self.writer = csv.DictWriter(self.file, fieldnames=columns, restval='', extrasaction='ignore')
+            if header:
+                self.writer.writeheader()
+
+    def write_row(self, row, fields=None):
+        if fields:
+            row = {**row, **fields}
+        if self.writer is not None:
+            self.writer.writerow(row)
+        else:
+            self.file.write(json.dumps(row, ensure_ascii=False, default=str) + '\n')
+        self.reasons[row.get('reason')] += 1
+        self.count += 1
+
+    def part(self):
+        """Part file cạnh báo cáo cho một worker: cùng format, không có header"""
+        fd, path = tempfile.mkstemp(prefix=os.path.basename(self.path) + '.', suffix=PART_SUFFIX,
+                                    dir=os.path.dirname(os.path.abspath(self.path)))
+        os.close(fd)
+        return SkippedReport(path, self.columns, self.format, header=False)
+
+    def append(self, part):
+        """Nối part file (info() của part) vào cuối báo cáo rồi xóa part file"""
+        try:
+            with open(part['path'], encoding='utf-8', newline='') as f:
+                shutil.copyfileobj(f, self.file)
+        finally:
+            _remove(part['path'])
+        self.count += part['count']
+        self.reasons.update(part['reasons'])
+
+    def info(self):
+        """Thông tin part file gửi về process chính (pickle được)"""
+        return {'path': self.path, 'count': self.count, 'reasons': dict(self.reasons)}
+
+    def summary(self):
+        reasons = Counter()
+        for reason, count in self.reasons.items():
+            reasons[reason_group(reason)] += count
+        return {'path': self.path, 'count': self.count, 'reasons': dict(reasons.most_common())}
+
+    def close(self):
+        self.file.close()
+
+
+def _remove(path):
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+def start(path, columns):
+    """
+    Bắt đầu ghi báo cáo cho lần parse hiện tại (columns: cột của file CSV), trả về SkippedReport
+    (đóng bằng finish). Raise OSError nếu không tạo được file
+    """
+    global _active, _target, _fields
+    _active = _target = SkippedReport(path, columns)
+    _fields = {}
+    return _active
+
+
+def finish(report):
+    """Đóng file báo cáo (xóa part file còn sót khi parse lỗi giữa chừng), trả về summary"""
+    global _active, _target, _fields
+    if report is None:
+        return None
+    report.close()
+    pattern = glob.escape(os.path.abspath(report.path)) + '.*' + PART_SUFFIX
+    for path in glob.glob(pattern):
+        _remove(path)
+    if _active is report:
+        _active = _target = None
+        _fields = {}
+    return report.summary()
+
+
+def active():
+    """Có đang ghi báo cáo không (worker fork từ process đang ghi báo cáo cũng thấy True)"""
+    return _target is not None
+
+
+def writer():
+    """
+    Hàm ghi một dòng bị bỏ qua (dict) vào báo cáo, kèm sheet / file của phần input đang parse;
+    None khi không ghi báo cáo
+    """
+    if _target is None:
+        return None
+    if _target.pid != os.getpid():
+        raise RuntimeError("Worker process phải ghi báo cáo qua parser_skipped.call")
+    target, fields = _target, _fields
+    return lambda row: target.write_row(row, fields)
+
+
+def call(fields, func, *args):
+    """
+    Gọi func(*args) cho một phần của input (khoảng byte, sheet, file của batch), fields (sheet / file) được thêm
+    vào mỗi dòng ghi trong lúc gọi. Trong worker process, các dòng được ghi vào part file riêng.
+    Trả về (kết quả, part): process chính gọi merge(part) theo thứ tự input (part None khi đã ghi thẳng)
+    """
+    global _target, _fields
+    saved = (_target, _fields)
+    part = None
+    if _target is not None:
+        if _target.pid != os.getpid():
+            part = _target = _target.part()
+        _fields = {**_fields, **(fields or {})}
+    try:
+        result = func(*args)
+    except BaseException:
+        if part is not None:
+            part.close()
+            _remove(part.path)
+        raise
+    finally:
+        _target, _fields = saved
+    if part is None:
+        return result, None
+    part.close()
+    return result, part.info()
+
+
+def merge(part):
+    """Nối part file của một worker (kết quả của call) vào báo cáo của process hiện tại"""
+    if part is not None and _target is not None:
+        _target.append(part)
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Gom cụm các câu hỏi gần trùng (cùng câu hỏi nhưng viết lại) trong bảng questions bằng MinHash + LSH
+
+- Đọc bảng questions theo category bằng cursor không buffer (server-side), từng chunk
+- MinHash trên các shingle ký tự của text đã chuẩn hóa (bỏ dấu, viết thường, bỏ dấu câu),
+  tính theo cả chunk bằng numpy
+- LSH: chia chữ ký thành các band, hai câu cùng bucket ở một band là cặp ứng viên;
+  cặp ứng viên được kiểm tra lại bằng độ tương đồng ước lượng (--threshold) rồi gộp bằng union-find
+- Chỉ giữ id + chữ ký trong RAM (num_perm * 4 byte mỗi dòng), text/đáp án của các câu
+  thuộc cụm được đọc lại ở lượt thứ hai
+
+Output JSON: mỗi cụm gồm câu gợi ý giữ lại (canonical: câu giống các câu khác trong cụm nhất),
+các câu trong cụm và danh sách đáp án đã gộp (answer + bảng answers / tangtoc_answers, bỏ trùng).
+
+Ví dụ:
+    python3 question_clusters.py --category khoidong -o clusters.json
+"""
+
+import re
+import sys
+import json
+import time
+import zlib
+import argparse
+
+from question_dedup import normalize_question
+
+DEFAULT_NUM_PERM = 64
+DEFAULT_BANDS = 16
+DEFAULT_SHINGLE_SIZE = 4
+DEFAULT_THRESHOLD = 0.7
+DEFAULT_FETCH_SIZE = 5000
+MAX_MEDOID_SIZE = 200
+SEED = 20240601
+
+CATEGORIES = ['khoidong', 'vuotchuongngaivat', 'tangtoc', 'vedich']
+
+
+def shingle_text(text):
+    """Text dùng để tạo shingle: đã chuẩn hóa và bỏ dấu câu"""
+    return ' '.join(re.sub(r'[^\w\s]', ' ', normalize_question(text)).split())
+
+
+def shingle_hashes(text, size=DEFAULT_SHINGLE_SIZE):
+    """Hash (crc32) của các shingle ký tự, text ngắn hơn size là một shingle"""
+    text = shingle_text(text)
+    if len(text) <= size:
+        return {zlib.crc32(text.encode('utf-8'))}
+    return {zlib.crc32(text[i:i + size].encode('utf-8')) for i in range(len(text) - size + 1)}
+
+
+class MinHasher:
+    """Chữ ký MinHash num_perm giá trị uint32, hash dạng multiply-shift ((a * x + b) mod 2^64) >> 32"""
+
+    def __init__(self, num_perm=DEFAULT_NUM_PERM, shingle_size=DEFAULT_SHINGLE_SIZE, seed=SEED):
+        import numpy as np
+
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self.b = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+        self.shingle_size = shingle_size
+
+    def signatures(self, texts):
+        """Chữ ký của cả chunk: mảng (len(texts), num_perm) uint32"""
+        import numpy as np
+
+        hashes = [shingle_hashes(text, self.shingle_size) for text in texts]
+        counts = np.fromiter((len(h) for h in hashes), dtype=np.int64, count=len(hashes))
+        flat = np.fromiter((value for h in hashes for value in h), dtype=np.uint64, count=int(counts.sum()))
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+        # (số shingle, num_perm), numpy nhân uint64 tự tràn (mod 2^64) như mong muốn
+        with np.errstate(over='ignore'):
+            values = ((flat[:, None] * self.a[None, :] + self.b[None, :]) >> np.uint64(32)).astype(np.uint32)
+        return np.minimum.reduceat(values, starts, axis=0)
+
+
+def band_keys(signatures, band, rows_per_band):
+    """Key của một band cho mọi dòng (uint64), gộp các giá trị trong band bằng FNV"""
+    import numpy as np
+
+    keys = np.full(len(signatures), 14695981039346656037, dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        for column in range(band * rows_per_band, (band + 1) * rows_per_band):
+            keys = (keys ^ signatures[:, column].astype(np.uint64)) * np.uint64(1099511628211)
+    return keys
+
+
+class UnionFind:
+    def __init__(self, size):
+        self.parent = list(range(size))
+
+    def find(self, item):
+        root = item
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[item] != root:
+            self.parent[item], item = root, self.parent[item]
+        return root
+
+    def union(self, left, right):
+        left, right = self.find(left), self.find(right)
+        if left != right:
+            self.parent[max(left, right)] = min(left, right)
+
+
+def cluster_signatures(signatures, bands=DEFAULT_BANDS, threshold=DEFAULT_THRESHOLD):
+    """
+    LSH trên chữ ký: trong mỗi band, sắp xếp key và so các dòng liền kề cùng key (không so từng cặp).
+    Trả về (list cụm, mỗi cụm là list vị trí dòng; số cặp ứng viên)
+    """
+    import numpy as np
+
+    num_perm = signatures.shape[1]
+    if num_perm % bands:
+        raise ValueError(f"num_perm ({num_perm}) phải chia hết cho số band ({bands})")
+    rows_per_band = num_perm // bands
+
+    union_find = UnionFind(len(signatures))
+    candidates = 0
+    for band in range(bands):
+        keys = band_keys(signatures, band, rows_per_band)
+        order = np.argsort(keys, kind='stable')
+        same = np.flatnonzero(keys[order[1:]] == keys[order[:-1]])
+        if not len(same):
+            continue
+        left = order[same]
+        right = order[same + 1]
+        candidates += len(same)
+        similarity = (signatures[left] == signatures[right]).mean(axis=1)
+        for i, j in zip(left[similarity >= threshold].tolist(), right[similarity >= threshold].tolist()):
+            union_find.union(i, j)
+
+    # Vị trí tăng dần nên câu đầu mỗi cụm là câu có id nhỏ nhất
+    groups = {}
+    for position in range(len(signatures)):
+        groups.setdefault(union_find.find(position), []).append(position)
+    return [members for members in groups.values() if len(members) > 1], candidates
+
+
+def canonical_position(signatures, members):
+    """Câu giống các câu còn lại nhất (medoid theo chữ ký); cụm quá lớn thì lấy câu đầu (id nhỏ nhất)"""
+    import numpy as np
+
+    if len(members) > MAX_MEDOID_SIZE:
+        return members[0], None
+    block = signatures[members]
+    similarity = (block[:, None, :] == block[None, :, :]).mean(axis=2)
+    scores = (similarity.sum(axis=1) - 1) / (len(members) - 1)
+    best = int(np.argmax(scores))
+    return members[best], scores
+
+
+def iter_question_chunks(connection, category, fetch_size=DEFAULT_FETCH_SIZE):
+    """Đọc (id, text) của một category theo chunk bằng cursor không buffer (kết quả stream từ server)"""
+    cursor = connection.cursor(buffered=False)
+    try:
+        cursor.execute("SELECT id, text FROM questions WHERE category = %s ORDER BY id", (category,))
+        while True:
+            rows = cursor.fetchmany(fetch_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        cursor.close()
+
+
+def fetch_details(connection, ids, answers_table, chunk_size=1000):
+    """Lượt thứ hai: text, answer và đáp án bổ sung của các câu thuộc cụm. Trả về {id: {...}}"""
+    details = {}
+    cursor = connection.cursor()
+    try:
+        for start in range(0, len(ids), chunk_size):
+            chunk = ids[start:start + chunk_size]
+            placeholders = ', '.join(['%s'] * len(chunk))
+            cursor.execute(f"SELECT id, text, answer FROM questions WHERE id IN ({placeholders})", chunk)
+            for question_id, text, answer in cursor.fetchall():
+                details[question_id] = {'id': question_id, 'text': text, 'answer': answer, 'accepted_answers': []}
+            cursor.execute(f"SELECT question_id, answer FROM {answers_table} WHERE question_id IN ({placeholders}) "
+                           "ORDER BY id", chunk)
+            for question_id, answer in cursor.fetchall():
+                if question_id in details:
+                    details[question_id]['accepted_answers'].append(answer)
+    finally:
+        cursor.close()
+    return details
+
+
+def merge_answers(rows):
+    """Gộp answer + accepted_answers của các câu trong cụm, bỏ trùng theo text đã chuẩn hóa"""
+    merged = {}
+    for row in rows:
+        for answer in [row['answer'], *row['accepted_answers']]:
+            if answer is None or not str(answer).strip():
+                continue
+            merged.setdefault(normalize_question(answer), str(answer).strip())
+    return list(merged.values())
+
+
+def build_clusters(ids, signatures, groups, details):
+    """Dựng output cho từng cụm (cụm lớn trước)"""
+    clusters = []
+    for members in sorted(groups, key=lambda members: (-len(members), ids[members[0]])):
+        canonical, scores = canonical_position(signatures, members)
+        rows = []
+        for index, position in enumerate(members):
+            row = details.get(ids[position])
+            if row is None:
+                # Câu đã bị xóa giữa hai lượt đọc
+                continue
+            rows.append({**row, 'similarity': None if scores is None else round(float(scores[index]), 3)})
+        if len(rows) < 2:
+            continue
+        clusters.append({
+            'canonical_id': ids[canonical],
+            'size': len(rows),
+            'accepted_answers': merge_answers(rows),
+            'questions': rows
+        })
+    return clusters
+
+
+def cluster_questions(category='khoidong', num_perm=DEFAULT_NUM_PERM, bands=DEFAULT_BANDS,
+                      shingle_size=DEFAULT_SHINGLE_SIZE, threshold=DEFAULT_THRESHOLD, fetch_size=DEFAULT_FETCH_SIZE):
+    """Gom cụm câu hỏi gần trùng của một category trong database"""
+    import numpy as np
+    from question_loader import connect
+
+    started = time.perf_counter()
+    hasher = MinHasher(num_perm, shingle_size)
+    answers_table = 'tangtoc_answers' if category == 'tangtoc' else 'answers'
+
+    connection = connect()
+    try:
+        ids = []
+        chunks = []
+        for rows in iter_question_chunks(connection, category, fetch_size):
+            ids.extend(row[0] for row in rows)
+            chunks.append(hasher.signatures([row[1] or '' for row in rows]))
+        signature_ms = (time.perf_counter() - started) * 1000
+
+        if not ids:
+            groups, candidates, signatures = [], 0, np.empty((0, num_perm), dtype=np.uint32)
+        else:
+            signatures = np.concatenate(chunks)
+            del chunks
+            groups, candidates = cluster_signatures(signatures, bands, threshold)
+
+        clustered_ids = sorted(ids[position] for members in groups for position in members)
+        details = fetch_details(connection, clustered_ids, answers_table)
+    finally:
+        connection.close()
+
+    clusters = build_clusters(ids, signatures, groups, details)
+    return {
+        'success': True,
+        'category': category,
+        'clusters': clusters,
+        'stats': {
+            'rows': len(ids),
+            'clusters': len(clusters),
+            'clustered_rows': sum(cluster['size'] for cluster in clusters),
+            'candidate_pairs': candidates,
+            'num_perm': num_perm,
+            'bands': bands,
+            'shingle_size': shingle_size,
+            'threshold': threshold,
+            'signature_ms': round(signature_ms, 3),
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 3)
+        }
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Gom cụm câu hỏi gần trùng trong database (MinHash + LSH)')
+    parser.add_argument('--category', choices=CATEGORIES, default='khoidong', help='Category cần gom cụm (default: khoidong)')
+    parser.add_argument('--output', '-o', help='File output JSON (mặc định in ra stdout)')
+    parser.add_argument('--num-perm', type=int, default=DEFAULT_NUM_PERM,
+                       help=f'Số hàm hash MinHash (default: {DEFAULT_NUM_PERM})')
+    parser.add_argument('--bands', type=int, default=DEFAULT_BANDS,
+                       help=f'Số band LSH, num_perm phải chia hết cho bands (default: {DEFAULT_BANDS})')
+    parser.add_argument('--shingle-size', type=int, default=DEFAULT_SHINGLE_SIZE,
+                       help=f'Độ dài shingle ký tự (default: {DEFAULT_SHINGLE_SIZE})')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                       help=f'Độ tương đồng Jaccard ước lượng tối thiểu để gộp hai câu (default: {DEFAULT_THRESHOLD})')
+    parser.add_argument('--fetch-size', type=int, default=DEFAULT_FETCH_SIZE,
+                       help=f'Số dòng mỗi lần fetch từ database (default: {DEFAULT_FETCH_SIZE})')
+
+    args = parser.parse_args()
+    if args.num_perm % args.bands:
+        parser.error("--num-perm phải chia hết cho --bands")
+
+    try:
+        result = cluster_questions(args.category, args.num_perm, args.bands, max(1, args.shingle_size),
+                                   args.threshold, max(1, args.fetch_size))
+    except Exception as e:
+        result = {'success': False, 'error': f"Lỗi khi gom cụm câu hỏi: {str(e)}"}
+
+    if args.output and result['success']:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        stats = result['stats']
+        print(f"Đã lưu {stats['clusters']} cụm ({stats['clustered_rows']}/{stats['rows']} câu) vào {args.output}",
+              file=sys.stderr)
+    else:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+
+    if not result['success']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Phát hiện câu hỏi trùng khi import (--dedup của csv_parser.py và parser-tangtoc.py)
+
+Mỗi câu hỏi được chuẩn hóa (bỏ dấu tiếng Việt, viết thường, gộp khoảng trắng) rồi tra trong
+một hash index theo category: trùng với câu đã gặp trong file (hoặc batch) hay với câu đã có
+trong bảng questions. Index của database được tải một lần trước khi parse (--dedup-db),
+không query lại cho từng dòng.
+
+Chế độ:
+    off   không kiểm tra (mặc định)
+    flag  giữ câu trùng, thêm "duplicate": "file" | "database"
+    skip  bỏ câu trùng
+"""
+
+import unicodedata
+
+DEDUP_MODES = ['off', 'flag', 'skip']
+
+# Câu hỏi Khởi Động cũ lưu category NULL hoặc rỗng (giống getRandomQuestions trong db/questions.js)
+LEGACY_CATEGORY = 'khoidong'
+
+
+def normalize_question(text):
+    """Key so trùng: "  Thủ đô  của PHÁP? " -> "thu do cua phap?" """
+    text = unicodedata.normalize('NFD', str(text)).replace('đ', 'd').replace('Đ', 'D')
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return ' '.join(text.lower().split())
+
+
+class DuplicateIndex:
+    """Hash index các câu hỏi đã gặp; existing: {category: set(key)} tải sẵn từ database"""
+
+    def __init__(self, existing=None):
+        self.existing = existing or {}
+        self.seen = set()
+        self.counts = {'file': 0, 'database': 0}
+
+    def check(self, text, category):
+        """Trả về "database", "file" hoặc None (câu mới, được thêm vào index)"""
+        key = normalize_question(text)
+        if key in self.existing.get(category, ()):
+            self.counts['database'] += 1
+            return 'database'
+        if (category, key) in self.seen:
+            self.counts['file'] += 1
+            return 'file'
+        self.seen.add((category, key))
+        return None
+
+    def summary(self, mode):
+        return {'mode': mode, **self.counts}
+
+
+def load_db_index(categories):
+    """
+    Tải key của mọi câu hỏi thuộc các category trong bảng questions: {category: set(key)}.
+    Câu hỏi đã bị xóa mềm (--sync, xem question_sync.py) không tính là trùng; câu hỏi có category NULL / rỗng
+    thuộc LEGACY_CATEGORY
+    """
+    from question_loader import connect
+
+    existing = {category: set() for category in categories}
+    connection = connect()
+    try:
+        cursor = connection.cursor()
+        placeholders = ', '.join(['%s'] * len(categories))
+        condition = f"category IN ({placeholders})"
+        if LEGACY_CATEGORY in categories:
+            condition = f"({condition} OR category IS NULL OR category = '')"
+        cursor.execute(f"SELECT COALESCE(NULLIF(category, ''), %s), text FROM questions "
+                       f"WHERE {condition} AND deleted_at IS NULL", [LEGACY_CATEGORY, *categories])
+        for category, text in cursor:
+            existing[category].add(normalize_question(text))
+    finally:
+        connection.close()
+    return existing
+
+
+def build_index(db_categories=None):
+    """Index mới cho một lần import; db_categories: tải sẵn câu hỏi của các category này từ database"""
+    return DuplicateIndex(load_db_index(db_categories) if db_categories else None)
+
+
+def filter_duplicates(questions, index, mode, category=None):
+    """
+    Kiểm tra danh sách câu hỏi theo index. Trả về (questions giữ lại, các câu bị bỏ ở chế độ skip).
+    category: category mặc định cho các câu không có category
+    """
+    kept = []
+    dropped = []
+    for question in questions:
+        duplicate = index.check(question['text'], question.get('category') or category)
+        if duplicate is None:
+            kept.append(question)
+        elif mode == 'skip':
+            dropped.append(question)
+        else:
+            question['duplicate'] = duplicate
+            kept.append(question)
+    return kept, dropped
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Ghi câu hỏi đã parse thẳng vào MariaDB (chế độ --load của csv_parser.py và parser-tangtoc.py)
+thay vì trả JSON cho Node rồi INSERT từng dòng.
+
+Mỗi batch là một câu INSERT nhiều dòng trong một transaction riêng; đáp án bổ sung
+(accepted_answers của từng câu, nếu có) được ghi vào answers / tangtoc_answers trong cùng transaction.
+Trả về số dòng đã ghi và các khoảng ID đã cấp.
+
+Kết nối theo các biến môi trường giống config.js: DB_HOST, DB_PORT, DB_USER, DB_PASSWORD, DB_NAME.
+Cần mysql-connector-python (chỉ import khi dùng --load).
+"""
+
+import os
+import time
+
+from answer_keys import answer_key, fold_key
+
+DEFAULT_BATCH_SIZE = 1000
+
+QUESTION_COLUMNS = ['question_number', 'text', 'answer', 'answer_key', 'answer_key_folded', 'image_url', 'category',
+                    'difficulty', 'time_limit', 'created_by']
+
+ANSWER_COLUMNS = ['question_id', 'answer', 'answer_key', 'answer_key_folded']
+
+ANSWER_TABLES = ['answers', 'tangtoc_answers']
+
+
+class LoadError(Exception):
+    """Ghi database lỗi giữa chừng; partial: kết quả của các batch đã commit"""
+
+    def __init__(self, message, partial):
+        super().__init__(message)
+        self.partial = partial
+
+
+def db_config():
+    return {
+        'host': os.environ.get('DB_HOST', 'localhost'),
+        'port': int(os.environ.get('DB_PORT', 3306)),
+        'user': os.environ.get('DB_USER', 'nqd_user'),
+        'password': os.environ.get('DB_PASSWORD', 'nqd_password'),
+        'database': os.environ.get('DB_NAME', 'nqd_database'),
+        'charset': 'utf8mb4'
+    }
+
+
+def connect():
+    try:
+        import mysql.connector
+    except ImportError:
+        raise RuntimeError("Thiếu thư viện mysql-connector-python (pip install mysql-connector-python)")
+    return mysql.connector.connect(autocommit=False, **db_config())
+
+
+def id_ranges(ids):
+    """[1, 2, 3, 7, 8] -> [[1, 3], [7, 8]]"""
+    ranges = []
+    for row_id in ids:
+        if ranges and row_id == ranges[-1][1] + 1:
+            ranges[-1][1] = row_id
+        else:
+            ranges.append([row_id, row_id])
+    return ranges
+
+
+def insert_rows(cursor, table, columns, rows, consecutive_ids, increment):
+    """
+    INSERT nhiều dòng trong một câu lệnh, trả về ID của từng dòng.
+    Với innodb_autoinc_lock_mode < 2, ID của một câu INSERT nhiều dòng liên tiếp nhau
+    (bắt đầu từ LAST_INSERT_ID, bước auto_increment_increment); nếu không thì INSERT từng dòng
+    """
+    placeholders = '(' + ', '.join(['%s'] * len(columns)) + ')'
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES "
+
+    if not consecutive_ids:
+        ids = []
+        for row in rows:
+            cursor.execute(sql + placeholders, row)
+            ids.append(cursor.lastrowid)
+        return ids
+
+    cursor.execute(sql + ', '.join([placeholders] * len(rows)), [value for row in rows for value in row])
+    first_id = cursor.lastrowid
+    return [first_id + i * increment for i in range(len(rows))]
+
+
+def question_row(question, category, created_by):
+    # Parser đã tính sẵn key (answer_keys.py), chỉ tính lại khi input không có
+    key = question.get('answer_key') or answer_key(question['answer'])
+    return (
+        question.get('question_number'),
+        question['text'],
+        question['answer'],
+        key,
+        question.get('answer_key_folded') or fold_key(key),
+        question.get('image_url'),
+        question.get('category') or category,
+        'medium',
+        question.get('time_limit'),
+        created_by
+    )
+
+
+def load_questions(questions, answers_table='answers', category='khoidong', created_by=None,
+                   batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Ghi questions (list dict như output của parser) vào bảng questions, đáp án bổ sung vào answers_table.
+    Batch lỗi được rollback và lỗi được raise; các batch trước đó đã commit vẫn được giữ
+    """
+    if answers_table not in ANSWER_TABLES:
+        raise ValueError(f"Bảng đáp án không hợp lệ: {answers_table}")
+
+    started = time.perf_counter()
+    connection = connect()
+    question_ids = []
+    answer_ids = []
+    batches = 0
+
+    def summary():
+        return {
+            'questions': {'inserted': len(question_ids), 'id_ranges': id_ranges(question_ids)},
+            answers_table: {'inserted': len(answer_ids), 'id_ranges': id_ranges(answer_ids)},
+            'batches': batches,
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 3)
+        }
+
+    try:
+        cursor = connection.cursor()
+        cursor.execute("SELECT @@innodb_autoinc_lock_mode, @@auto_increment_increment")
+        lock_mode, increment = cursor.fetchone()
+        consecutive_ids = int(lock_mode) < 2
+
+        for start in range(0, len(questions), batch_size):
+            batch = questions[start:start + batch_size]
+            batch_answer_ids = []
+            try:
+                ids = insert_rows(cursor, 'questions', QUESTION_COLUMNS,
+                                  [question_row(question, category, created_by) for question in batch],
+                                  consecutive_ids, int(increment))
+
+                answer_rows = []
+                for question_id, question in zip(ids, batch):
+                    # Bỏ trùng (tangtoc_answers có unique index theo question_id + answer)
+                    for answer in dict.fromkeys(question.get('accepted_answers') or []):
+                        key = answer_key(answer)
+                        answer_rows.append((question_id, answer, key, fold_key(key)))
+                if answer_rows:
+                    batch_answer_ids = insert_rows(cursor, answers_table, ANSWER_COLUMNS, answer_rows,
+                                                   consecutive_ids, int(increment))
+
+                connection.commit()
+            except Exception as e:
+                connection.rollback()
+                raise LoadError(f"Lỗi khi ghi batch {batches + 1} vào database: {str(e)}", summary())
+
+            question_ids.extend(ids)
+            answer_ids.extend(batch_answer_ids)
+            batches += 1
+    finally:
+        connection.close()
+
+    return summary()
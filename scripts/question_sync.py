@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Import lại một ngân hàng câu hỏi (chế độ --sync BANK_ID của csv_parser.py và parser-tangtoc.py):
+chỉ ghi các dòng đã thay đổi so với lần import trước của cùng bank_id thay vì INSERT lại cả file.
+
+Bảng question_bank_rows (tạo trong db/index.js) lưu cho mỗi dòng của bank:
+    row_key       SHA-256 của category + text đã chuẩn hóa (question_dedup.normalize_question)
+                  + thứ tự xuất hiện (câu trùng text trong cùng file vẫn là các dòng khác nhau)
+    content_hash  SHA-256 của nội dung dòng (số câu, text, đáp án, đáp án phụ, ảnh, category, thời gian)
+    question_id   câu hỏi tương ứng trong bảng questions
+
+So file mới với các hash đó:
+    row_key mới                     -> INSERT câu hỏi
+    row_key đã có, hash khác        -> UPDATE câu hỏi (thay đáp án phụ), khôi phục nếu đã bị xóa mềm
+    row_key không còn trong file    -> xóa mềm (questions.deleted_at), câu hỏi không còn được chọn vào game
+    còn lại                         -> không đụng tới
+
+Toàn bộ thay đổi được ghi trong một transaction (các câu lệnh gộp theo batch), lỗi thì rollback hết.
+Các dòng của bank bị khóa (SELECT ... FOR UPDATE) nên hai lần sync cùng bank_id chạy lần lượt.
+"""
+
+import json
+import time
+import hashlib
+from collections import Counter
+
+from answer_keys import answer_key, fold_key
+from question_dedup import normalize_question
+from question_loader import (ANSWER_COLUMNS, ANSWER_TABLES, DEFAULT_BATCH_SIZE, QUESTION_COLUMNS, connect, id_ranges,
+                             insert_rows, question_row)
+
+BANK_TABLE = 'question_bank_rows'
+MAX_BANK_ID_LENGTH = 100
+
+# Cột được UPDATE khi nội dung dòng thay đổi (created_by / difficulty giữ như lần import đầu)
+UPDATE_COLUMNS = ['question_number', 'text', 'answer', 'answer_key', 'answer_key_folded', 'image_url', 'category',
+                  'time_limit']
+
+
+class SyncError(Exception):
+    """Sync lỗi, transaction đã rollback (database giữ nguyên như trước khi sync)"""
+
+
+def content_hash(question, category):
+    """Hash nội dung một dòng: đổi bất kỳ trường nào được ghi vào database là đổi hash"""
+    accepted = sorted(set(question.get('accepted_answers') or []))
+    content = [question.get('question_number'), question['text'], question['answer'], accepted,
+               question.get('image_url'), question.get('category') or category, question.get('time_limit')]
+    return hashlib.sha256(json.dumps(content, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def row_keys(questions, category):
+    """row_key của từng câu hỏi theo thứ tự (câu trùng text được đánh số theo lần xuất hiện)"""
+    occurrences = Counter()
+    keys = []
+    for question in questions:
+        base = f"{question.get('category') or category}\x1f{normalize_question(question['text'])}"
+        keys.append(hashlib.sha256(f"{base}\x1f{occurrences[base]}".encode('utf-8')).hexdigest())
+        occurrences[base] += 1
+    return keys
+
+
+def plan_sync(questions, previous, category='khoidong'):
+    """
+    So questions (output của parser) với previous: {row_key: (question_id, content_hash, deleted)}
+    của lần import trước. Trả về dict các thay đổi cần ghi:
+        insert: [(row_key, hash, question)]
+        update: [(question_id, row_key, hash, question, restored)]
+        delete: [(question_id, row_key)]
+        unchanged: số dòng giữ nguyên
+    """
+    plan = {'insert': [], 'update': [], 'delete': [], 'unchanged': 0}
+    seen = set()
+    for key, question in zip(row_keys(questions, category), questions):
+        seen.add(key)
+        digest = content_hash(question, category)
+        if key not in previous:
+            plan['insert'].append((key, digest, question))
+            continue
+        question_id, old_digest, deleted = previous[key]
+        if deleted or digest != old_digest:
+            plan['update'].append((question_id, key, digest, question, bool(deleted)))
+        else:
+            plan['unchanged'] += 1
+
+    for key, (question_id, _, deleted) in previous.items():
+        if key not in seen and not deleted:
+            plan['delete'].append((question_id, key))
+    return plan
+
+
+def load_previous(cursor, bank_id):
+    """Các dòng của lần import trước (khóa lại tới khi transaction kết thúc)"""
+    cursor.execute(f"SELECT row_key, question_id, content_hash, deleted_at IS NOT NULL FROM {BANK_TABLE} "
+                   "WHERE bank_id = %s FOR UPDATE", (bank_id,))
+    return {row_key: (question_id, digest, bool(deleted)) for row_key, question_id, digest, deleted in cursor.fetchall()}
+
+
+def answer_rows(question_id, question):
+    rows = []
+    # Bỏ trùng (tangtoc_answers có unique index theo question_id + answer)
+    for answer in dict.fromkeys(question.get('accepted_answers') or []):
+        key = answer_key(answer)
+        rows.append((question_id, answer, key, fold_key(key)))
+    return rows
+
+
+def apply_inserts(cursor, bank_id, items, answers_table, category, created_by, batch_size, consecutive_ids,
+                  increment):
+    question_ids = []
+    for start in range(0, len(items), batch_size):
+        batch = items[start:start + batch_size]
+        ids = insert_rows(cursor, 'questions', QUESTION_COLUMNS,
+                          [question_row(question, category, created_by) for _, _, question in batch],
+                          consecutive_ids, increment)
+        answers = [row for question_id, (_, _, question) in zip(ids, batch) for row in answer_rows(question_id, question)]
+        if answers:
+            insert_rows(cursor, answers_table, ANSWER_COLUMNS, answers, consecutive_ids, increment)
+        cursor.executemany(f"INSERT INTO {BANK_TABLE} (bank_id, row_key, question_id, content_hash) "
+                           "VALUES (%s, %s, %s, %s)",
+                           [(bank_id, key, question_id, digest) for question_id, (key, digest, _) in zip(ids, batch)])
+        question_ids.extend(ids)
+    return question_ids
+
+
+def apply_updates(cursor, bank_id, items, answers_table, category, created_by, batch_size, consecutive_ids,
+                  increment):
+    assignments = ', '.join(f"{column} = %s" for column in UPDATE_COLUMNS)
+    for start in range(0, len(items), batch_size):
+        batch = items[start:start + batch_size]
+        values = []
+        for question_id, _, _, question, _ in batch:
+            row = dict(zip(QUESTION_COLUMNS, question_row(question, category, created_by)))
+            values.append(tuple(row[column] for column in UPDATE_COLUMNS) + (question_id,))
+        cursor.executemany(f"UPDATE questions SET {assignments}, deleted_at = NULL WHERE id = %s", values)
+
+        ids = [question_id for question_id, *_ in batch]
+        cursor.execute(f"DELETE FROM {answers_table} WHERE question_id IN ({', '.join(['%s'] * len(ids))})", ids)
+        answers = [row for question_id, _, _, question, _ in batch for row in answer_rows(question_id, question)]
+        if answers:
+            insert_rows(cursor, answers_table, ANSWER_COLUMNS, answers, consecutive_ids, increment)
+
+        cursor.executemany(f"UPDATE {BANK_TABLE} SET content_hash = %s, deleted_at = NULL "
+                           "WHERE bank_id = %s AND row_key = %s",
+                           [(digest, bank_id, key) for _, key, digest, _, _ in batch])
+
+
+def apply_deletes(cursor, bank_id, items, batch_size):
+    for start in range(0, len(items), batch_size):
+        batch = items[start:start + batch_size]
+        placeholders = ', '.join(['%s'] * len(batch))
+        cursor.execute(f"UPDATE questions SET deleted_at = CURRENT_TIMESTAMP WHERE id IN ({placeholders})",
+                       [question_id for question_id, _ in batch])
+        cursor.execute(f"UPDATE {BANK_TABLE} SET deleted_at = CURRENT_TIMESTAMP "
+                       f"WHERE bank_id = %s AND row_key IN ({placeholders})",
+                       [bank_id] + [key for _, key in batch])
+
+
+def sync_questions(questions, bank_id, answers_table='answers', category='khoidong', created_by=None,
+                   batch_size=DEFAULT_BATCH_SIZE, dry_run=False):
+    """
+    Sync questions (list dict như output của parser) với lần import trước của bank_id.
+    dry_run: chỉ tính các thay đổi rồi rollback. Raise SyncError nếu ghi lỗi (không có thay đổi nào được giữ)
+    """
+    if answers_table not in ANSWER_TABLES:
+        raise ValueError(f"Bảng đáp án không hợp lệ: {answers_table}")
+    bank_id = str(bank_id or '').strip()
+    if not bank_id or len(bank_id) > MAX_BANK_ID_LENGTH:
+        raise ValueError(f"bank_id phải có từ 1 đến {MAX_BANK_ID_LENGTH} ký tự")
+
+    started = time.perf_counter()
+    connection = connect()
+    try:
+        cursor = connection.cursor()
+        try:
+            cursor.execute("SELECT @@innodb_autoinc_lock_mode, @@auto_increment_increment")
+            lock_mode, increment = cursor.fetchone()
+            consecutive_ids = int(lock_mode) < 2
+
+            plan = plan_sync(questions, load_previous(cursor, bank_id), category)
+            inserted_ids = []
+            if not dry_run:
+                inserted_ids = apply_inserts(cursor, bank_id, plan['insert'], answers_table, category, created_by,
+                                             batch_size, consecutive_ids, int(increment))
+                apply_updates(cursor, bank_id, plan['update'], answers_table, category, created_by, batch_size,
+                              consecutive_ids, int(increment))
+                apply_deletes(cursor, bank_id, plan['delete'], batch_size)
+                connection.commit()
+            else:
+                connection.rollback()
+        except Exception as e:
+            connection.rollback()
+            raise SyncError(f"Lỗi khi sync bank {bank_id}, không có thay đổi nào được ghi: {str(e)}")
+    finally:
+        connection.close()
+
+    return {
+        'bank_id': bank_id,
+        'dry_run': dry_run,
+        'inserted': len(plan['insert']),
+        'updated': len(plan['update']),
+        'restored': sum(1 for item in plan['update'] if item[4]),
+        'deleted': len(plan['delete']),
+        'unchanged': plan['unchanged'],
+        'question_ids': {
+            'inserted': id_ranges(inserted_ids),
+            'updated': [item[0] for item in plan['update']],
+            'deleted': [item[0] for item in plan['delete']]
+        },
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 3)
+    }
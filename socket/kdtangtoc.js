@@ -1,6 +1,7 @@
 import { getRandomTangTocQuestions } from '../views/tangTocKD/questions-parser.js';
 import { findUserById } from '../db/users.js';
 import { createGameSession, finishGameSession, saveUserAnswer } from '../db/game-sessions.js';
+import { isAcceptedAnswer } from '../utils/answer-keys.js';
 
 // In-memory storage for Tang Tốc rooms
 const tangTocRooms = new Map(); // roomId -> roomState
@@ -34,19 +35,9 @@ function buildResults(room) {
   return results;
 }
 
-function normalizeText(t){
-  return (t||'').toString().trim().toLowerCase();
-}
-
+// Tra câu trả lời trong Set key đáp án chính + phụ (key tính sẵn lúc import, xem utils/answer-keys.js)
 function isAnswerCorrect(userAnswer, question){
-  const u = normalizeText(userAnswer);
-  if (u === normalizeText(question.answer)) return true;
-  const acc = Array.isArray(question.acceptedAnswers) ? question.acceptedAnswers : [];
-  for (const a of acc){
-    const txt = typeof a === 'string' ? a : (a && a.answer ? a.answer : '');
-    if (u === normalizeText(txt)) return true;
-  }
-  return false;
+  return isAcceptedAnswer(userAnswer, question);
 }
 
 async function startQuestion(io, room, index) {
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import json
+import time
+import random
+import struct
+import shutil
+import tempfile
+import subprocess
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent / "scripts"
+
+# Số câu hỏi của ngân hàng câu hỏi giả lập (có thể đổi bằng biến môi trường)
+BENCH_ROWS = int(os.environ.get("PARSER_BENCH_ROWS", "200000"))
+
+WORDS = ["thủ", "đô", "của", "nước", "nào", "là", "sông", "dài", "nhất", "thế", "giới", "người", "đầu", "tiên",
+         "năm", "bao", "nhiêu", "ai", "viết", "truyện", "Kiều", "Việt", "Nam", "Hà", "Nội"]
+
+FORMATS = ["pretty", "json", "ndjson", "msgpack"]
+
+def make_bank(path, rows, tangtoc=False):
+    """Ngân hàng câu hỏi giả lập, cố định theo seed để các lần chạy so sánh được"""
+    rng = random.Random(2024)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("Số câu,Câu hỏi,Đáp án,Loại\n" if tangtoc else "Câu hỏi,Đáp án\n")
+        for i in range(rows):
+            question = " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 16))) + f" ({i})?"
+            answer = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 3)))
+            if tangtoc:
+                f.write(f"{rng.randint(1, 4)},{question},{answer},tangtoc\n")
+            else:
+                f.write(f"{question},{answer}\n")
+
+def decode(data, output_format):
+    """Thời gian (ms) để bên đọc dựng lại toàn bộ kết quả, và số câu hỏi đọc được"""
+    started = time.perf_counter()
+    if output_format in ("pretty", "json"):
+        result = json.loads(data)
+        count = len(result["questions"])
+    elif output_format == "ndjson":
+        count = sum(1 for line in data.splitlines() if line and json.loads(line)["type"] == "question")
+    else:
+        import msgpack
+        count = 0
+        offset = 0
+        while offset < len(data):
+            size = struct.unpack_from(">I", data, offset)[0]
+            record = msgpack.unpackb(data[offset + 4:offset + 4 + size], raw=False)
+            count += record["type"] == "question"
+            offset += 4 + size
+    return (time.perf_counter() - started) * 1000, count
+
+def node_parse_ms(data, output_format):
+    """Thời gian JSON.parse bên Node (chỉ json/pretty/ndjson, None nếu không có node)"""
+    if output_format == "msgpack" or not shutil.which("node"):
+        return None
+    code = ("const fs=require('fs');const d=fs.readFileSync(0,'utf8');const t=process.hrtime.bigint();"
+            + ("d.split('\\n').forEach(l=>{if(l)JSON.parse(l)});" if output_format == "ndjson" else "JSON.parse(d);")
+            + "console.log(Number(process.hrtime.bigint()-t)/1e6)")
+    process = subprocess.run(["node", "-e", code], input=data, capture_output=True)
+    return float(process.stdout) if process.returncode == 0 else None
+
+def bench_parser(script, csv_path):
+    """Chạy parser với từng --output-format, trả về True nếu mọi format đọc ra cùng số câu hỏi"""
+    env = dict(os.environ, PARSER_CACHE="0")
+    counts = set()
+    baseline = None
+    print(f"{'format':<8} {'bytes':>12} {'size':>7} {'parser ms':>10} {'decode ms':>10} {'node ms':>9}")
+    for output_format in FORMATS:
+        started = time.perf_counter()
+        process = subprocess.run([sys.executable, str(SCRIPTS_DIR / script), str(csv_path),
+                                  "--output-format", output_format], capture_output=True, env=env)
+        parser_ms = (time.perf_counter() - started) * 1000
+        if process.returncode != 0:
+            print(f"❌ {script} --output-format {output_format} lỗi: {process.stderr.decode('utf-8', 'replace')[-300:]}")
+            return False
+
+        data = process.stdout
+        decode_ms, count = decode(data, output_format)
+        counts.add(count)
+        node_ms = node_parse_ms(data, output_format)
+        baseline = baseline or len(data)
+        node_text = f"{node_ms:9.1f}" if node_ms is not None else f"{'-':>9}"
+        print(f"{output_format:<8} {len(data):>12,} {len(data) / baseline:>6.0%} {parser_ms:>10.1f} {decode_ms:>10.1f} {node_text}")
+
+    if len(counts) != 1:
+        print(f"❌ Các format đọc ra số câu hỏi khác nhau: {sorted(counts)}")
+        return False
+    print(f"✅ Mọi format đọc ra cùng {counts.pop()} câu hỏi")
+    return True
+
+def main():
+    print("===== BENCHMARK OUTPUT FORMAT CỦA PARSER =====")
+    print(f"Số câu hỏi giả lập: {BENCH_ROWS}")
+    try:
+        import msgpack  # noqa: F401
+    except ImportError:
+        print("⚠️ Chưa cài msgpack, bỏ qua format msgpack")
+        FORMATS.remove("msgpack")
+
+    success = True
+    with tempfile.TemporaryDirectory() as tmp:
+        for script, tangtoc in [("csv_parser.py", False), ("parser-tangtoc.py", True)]:
+            csv_path = Path(tmp) / ("tangtoc.csv" if tangtoc else "khoidong.csv")
+            make_bank(csv_path, BENCH_ROWS, tangtoc)
+            print(f"\n--- {script} ({csv_path.stat().st_size:,} bytes CSV) ---")
+            success = bench_parser(script, csv_path) and success
+
+    if success:
+        print("\n🎉 Benchmark output format hoàn tất!")
+    else:
+        print("\n⚠️ Benchmark output format thất bại!")
+
+    return success
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
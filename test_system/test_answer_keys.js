@@ -0,0 +1,38 @@
+#!/usr/bin/env node
+
+import fs from 'fs';
+import { answerKey, foldedAnswerKey } from '../utils/answer-keys.js';
+
+// Test vector dùng chung với test_answer_keys.py: key lúc chấm (Node) phải giống key lúc import (Python)
+const VECTORS_PATH = new URL('./answer_key_vectors.json', import.meta.url);
+
+function testAnswerKeys() {
+  const vectors = JSON.parse(fs.readFileSync(VECTORS_PATH, 'utf8'));
+  let success = true;
+  for (const vector of vectors) {
+    const actual = [answerKey(vector.input), foldedAnswerKey(vector.input)];
+    const expected = [vector.answer_key, vector.answer_key_folded];
+    if (actual[0] !== expected[0] || actual[1] !== expected[1]) {
+      console.log(`❌ ${JSON.stringify(vector.input)}: ${JSON.stringify(actual)} (mong đợi ${JSON.stringify(expected)})`);
+      success = false;
+    }
+  }
+  if (success) {
+    console.log(`✅ ${vectors.length} test vector giống nhau`);
+  }
+  return success;
+}
+
+function main() {
+  console.log("===== TEST ANSWER KEY (Node.js) =====");
+  const success = testAnswerKeys();
+
+  if (success) {
+    console.log("\n🎉 Test answer key thành công!");
+  } else {
+    console.log("\n⚠️ Test answer key thất bại!");
+  }
+  process.exit(success ? 0 : 1);
+}
+
+main();
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import sys
+import json
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from answer_keys import answer_key, answer_key_folded
+
+# Test vector dùng chung với test_answer_keys.js: key lúc import (Python) phải giống key lúc chấm (Node)
+VECTORS_PATH = Path(__file__).resolve().parent / "answer_key_vectors.json"
+
+def test_answer_keys():
+    """answer_key / answer_key_folded của từng input giống giá trị trong answer_key_vectors.json"""
+    success = True
+    vectors = json.loads(VECTORS_PATH.read_text(encoding="utf-8"))
+    for vector in vectors:
+        actual = (answer_key(vector["input"]), answer_key_folded(vector["input"]))
+        expected = (vector["answer_key"], vector["answer_key_folded"])
+        if actual != expected:
+            print(f"❌ {vector['input']!r}: {actual!r} (mong đợi {expected!r})")
+            success = False
+    if success:
+        print(f"✅ {len(vectors)} test vector giống nhau")
+    return success
+
+def main():
+    print("===== TEST ANSWER KEY (PYTHON) =====")
+    success = test_answer_keys()
+
+    if success:
+        print("\n🎉 Test answer key thành công!")
+    else:
+        print("\n⚠️ Test answer key thất bại!")
+
+    return success
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+import csv_parser
+from parser_cache import ParseCache, ENTRY_SUFFIX
+
+BANK = ("Câu hỏi,Đáp án\n"
+        "Thủ đô của Việt Nam?,Hà Nội\n"
+        "1 + 1 = ?,2\n")
+
+def check(label, actual, expected):
+    if actual == expected:
+        print(f"✅ {label}: {actual}")
+        return True
+    print(f"❌ {label}: {actual} (mong đợi {expected})")
+    return False
+
+def without_cache(result):
+    return {key: value for key, value in result.items() if key != "cache"}
+
+def test_cache_hit(directory):
+    """Parse lần hai (kể cả file khác tên cùng nội dung) lấy từ cache, sửa một ô thì parse lại"""
+    success = True
+    path = Path(directory) / "bank.csv"
+    path.write_text(BANK, encoding="utf-8")
+
+    first = csv_parser.parse_file_cached(path)
+    success &= check("lần đầu", first["cache"]["hit"], False)
+    second = csv_parser.parse_file_cached(path)
+    success &= check("lần hai", second["cache"]["hit"], True)
+    success &= check("kết quả từ cache giống kết quả parse", without_cache(second) == without_cache(first), True)
+    success &= check("bộ đếm", (second["cache"]["hits"], second["cache"]["misses"]), (1, 1))
+
+    copy = Path(directory) / "bank-copy.csv"
+    shutil.copyfile(path, copy)
+    renamed = csv_parser.parse_file_cached(copy)
+    success &= check("file khác tên cùng nội dung", renamed["cache"]["hit"], True)
+    success &= check("tên file trong kết quả", renamed["file_info"]["name"], "bank-copy.csv")
+
+    path.write_text(BANK.replace("Hà Nội", "Ha Noi"), encoding="utf-8")
+    changed = csv_parser.parse_file_cached(path)
+    success &= check("sửa một ô", changed["cache"]["hit"], False)
+    success &= check("đáp án sau khi sửa", changed["questions"][0]["answer"], "Ha Noi")
+
+    no_cache = csv_parser.parse_file_cached(path, use_cache=False)
+    success &= check("--no-cache", "cache" in no_cache, False)
+    return success
+
+def test_cache_eviction(directory):
+    """Vượt max_bytes thì entry lâu không dùng nhất (theo mtime, cập nhật khi hit) bị xóa trước"""
+    success = True
+    cache = ParseCache(Path(directory) / "evict")
+    keys = [f"entry-{i}" for i in range(4)]
+    for key in keys[:3]:
+        cache.put(key, {"key": key, "questions": ["Câu hỏi mẫu"] * 50})
+
+    # mtime cách nhau 10 giây: entry-0 cũ nhất
+    now = time.time()
+    for age, key in zip([30, 20, 10], keys[:3]):
+        os.utime(cache._entry_path(key), (now - age, now - age))
+    # Chỉ đủ chỗ cho 3 entry
+    cache.max_bytes = sum(cache._entry_path(key).stat().st_size for key in keys[:3])
+
+    # Hit entry-0: thành entry mới dùng nhất, entry-1 thành cũ nhất
+    success &= check("hit entry-0", cache.get(keys[0])["key"], keys[0])
+    cache.put(keys[3], {"key": keys[3], "questions": ["Câu hỏi mẫu"] * 50})
+
+    remaining = sorted(path.name[:-len(ENTRY_SUFFIX)] for path in cache.cache_dir.glob("*" + ENTRY_SUFFIX))
+    success &= check("entry còn lại sau khi evict", remaining, [keys[0], keys[2], keys[3]])
+    success &= check("entry bị evict", cache.get(keys[1]), None)
+
+    total = sum(path.stat().st_size for path in cache.cache_dir.glob("*" + ENTRY_SUFFIX))
+    success &= check("tổng dung lượng <= max_bytes", total <= cache.max_bytes, True)
+    return success
+
+def main():
+    print("===== TEST CACHE KẾT QUẢ PARSE =====")
+    directory = tempfile.mkdtemp()
+    saved = {name: os.environ.get(name) for name in ["PARSER_CACHE", "PARSER_CACHE_DIR"]}
+    # Thư mục cache riêng cho test, không đụng cache thật
+    os.environ["PARSER_CACHE"] = "1"
+    os.environ["PARSER_CACHE_DIR"] = str(Path(directory) / "cache")
+    try:
+        success = test_cache_hit(directory)
+        success = test_cache_eviction(directory) and success
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        shutil.rmtree(directory)
+
+    if success:
+        print("\n🎉 Test cache kết quả parse thành công!")
+    else:
+        print("\n⚠️ Test cache kết quả parse thất bại!")
+
+    return success
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
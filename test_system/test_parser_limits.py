@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import sys
+import json
+import shutil
+import tempfile
+import subprocess
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+import parser_limits
+
+KHOIDONG = ("Câu hỏi,Đáp án\n"
+            "Thủ đô của Pháp là thành phố nào?,Paris\n"
+            "1 + 1 = ?,2\n"
+            "Câu ba?,Ba\n")
+TANGTOC = ("Số câu,Câu hỏi,Đáp án,Loại\n"
+           "1,Thủ đô của Pháp là thành phố nào?,Paris,tangtoc\n"
+           "2,1 + 1 = ?,2,tangtoc\n"
+           "3,Câu ba?,Ba,tangtoc\n")
+
+# --limit vượt được với file mẫu (4 dòng, ô dài nhất 33 ký tự, parse mất hơn 1 micro giây)
+LIMITS = {
+    "bytes": "10",
+    "rows": "2",
+    "columns": "1",
+    "cell_chars": "5",
+    "seconds": "0.000001",
+}
+
+def run_parser(script, path, *args):
+    """Chạy CLI parser, trả về (exit code, JSON của dòng đầu stdout / stderr có "success")"""
+    process = subprocess.run([sys.executable, str(SCRIPTS_DIR / script), str(path), "--no-cache", *args],
+                             capture_output=True, text=True, timeout=120)
+    for line in (process.stdout + "\n" + process.stderr).splitlines():
+        if line.startswith("{"):
+            output = json.loads(line)
+            if "success" in output or "questions" in output:
+                return process.returncode, output
+    return process.returncode, None
+
+def check_limit(parser, script, path, name, value, failure_code):
+    returncode, output = run_parser(script, path, "--limit", f"{name}={value}")
+    limit = (output or {}).get("limit")
+    expected = {"name": name, "limit": parser_limits._parse_value(name, value)}
+    if (returncode == failure_code and output.get("success") is False and limit
+            and {key: limit[key] for key in expected} == expected and limit["actual"] > limit["limit"]):
+        print(f"✅ {parser} --limit {name}={value}: {output['error']}")
+        return True
+    print(f"❌ {parser} --limit {name}={value}: exit code {returncode}, output {output}")
+    return False
+
+def test_parser_limits(directory):
+    """Mỗi giới hạn bytes / rows / columns / cell_chars / seconds báo LimitExceeded, output có "limit" """
+    # csv_parser in kết quả lỗi ra stdout (exit code 0), parser-tangtoc in ra stderr với exit code 1
+    parsers = [
+        ("csv_parser", "csv_parser.py", KHOIDONG, 0),
+        ("parser-tangtoc", "parser-tangtoc.py", TANGTOC, 1),
+    ]
+    success = True
+    for parser, script, content, failure_code in parsers:
+        path = Path(directory) / f"{parser}.csv"
+        path.write_text(content, encoding="utf-8")
+
+        # 0 = không giới hạn
+        returncode, output = run_parser(script, path, *[arg for name in LIMITS for arg in ("--limit", f"{name}=0")])
+        if returncode == 0 and output and len(output.get("questions", [])) == 3:
+            print(f"✅ {parser}: giới hạn 0 = không giới hạn")
+        else:
+            print(f"❌ {parser}: giới hạn 0 vẫn lỗi: exit code {returncode}, output {output}")
+            success = False
+
+        for name, value in LIMITS.items():
+            success = check_limit(parser, script, path, name, value, failure_code) and success
+    return success
+
+def main():
+    print("===== TEST GIỚI HẠN INPUT CỦA PARSER =====")
+    directory = tempfile.mkdtemp()
+    try:
+        success = test_parser_limits(directory)
+    finally:
+        shutil.rmtree(directory)
+
+    if success:
+        print("\n🎉 Test giới hạn input thành công!")
+    else:
+        print("\n⚠️ Test giới hạn input thất bại!")
+
+    return success
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import tempfile
+import importlib.util
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+import csv_parser
+import parser_io
+
+# parser-tangtoc.py có dấu gạch ngang nên phải load bằng importlib
+_spec = importlib.util.spec_from_file_location("parser_tangtoc", SCRIPTS_DIR / "parser-tangtoc.py")
+parser_tangtoc = importlib.util.module_from_spec(_spec)
+sys.modules["parser_tangtoc"] = parser_tangtoc
+_spec.loader.exec_module(parser_tangtoc)
+
+WORKERS = 4
+RECORDS = 3000
+# Số dòng trong ô câu hỏi nhiều dòng: phần lớn dấu xuống dòng của file nằm trong dấu nháy
+CELL_LINES = 12
+
+def question_text(i):
+    # Dòng bắt đầu bằng trích dẫn: cắt ở đây thì dấu nháy bị đảo vai trò, parser_io nhận ra điểm cắt sai.
+    # Dòng chỉ có text và dấu phẩy thì cắt ở đâu cũng tách được, điểm cắt được kiểm tra lại khi scan
+    lines = [f"\"Trích dẫn {line}\" của câu hỏi {i}" if line % 2 else f"Câu hỏi {i}, dòng {line}"
+             for line in range(CELL_LINES)]
+    return "\n".join(lines)
+
+def quoted(text):
+    return '"' + text.replace('"', '""') + '"'
+
+def write_file(header, make_record):
+    """Ghi file CSV, trả về (đường dẫn, offset byte đầu mỗi record)"""
+    starts = []
+    data = (header + "\n").encode("utf-8")
+    for i in range(RECORDS):
+        starts.append(len(data))
+        data += (make_record(i) + "\n").encode("utf-8")
+    with tempfile.NamedTemporaryFile("wb", suffix=".csv", delete=False) as f:
+        f.write(data)
+    return f.name, set(starts)
+
+def khoidong_record(i):
+    # Mỗi 97 dòng có một dòng thiếu đáp án (bị bỏ qua) để kiểm tra số dòng báo lỗi
+    return f"{quoted(question_text(i))},{'' if i % 97 == 0 else f'Đáp án {i}'}"
+
+def tangtoc_record(i):
+    number = 5 if i % 89 == 0 else i % 4 + 1
+    return f"{number},{quoted(question_text(i))},Đáp án {i},tangtoc"
+
+def naive_cuts_inside_quotes(path, starts):
+    """Số điểm cắt "dấu xuống dòng đầu tiên sau size * k / WORKERS" rơi vào giữa một ô nhiều dòng"""
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        data = f.read()
+    inside = 0
+    for part in range(1, WORKERS):
+        cut = data.find(b"\n", size * part // WORKERS) + 1
+        if cut not in starts:
+            inside += 1
+    return inside
+
+def check_file(name, path, starts, parse, row_columns=None):
+    success = True
+
+    inside = naive_cuts_inside_quotes(path, starts)
+    if inside:
+        print(f"✅ {name}: {inside}/{WORKERS - 1} điểm cắt theo dấu xuống dòng rơi vào giữa ô nhiều dòng")
+    else:
+        print(f"❌ {name}: file mẫu không có điểm cắt nào rơi vào giữa ô nhiều dòng")
+        success = False
+
+    with parser_io.scan_csv_ranges(path, WORKERS, row_columns) as ranges:
+        plan_starts = [plan.start for plan in ranges.plans]
+    wrong = [start for start in plan_starts[1:] if start not in starts]
+    if len(plan_starts) > 1 and not wrong:
+        print(f"✅ {name}: {len(plan_starts)} khoảng, mọi khoảng bắt đầu ở đầu record")
+    else:
+        print(f"❌ {name}: khoảng {plan_starts} (bắt đầu giữa record: {wrong})")
+        success = False
+
+    serial = parse(path, workers=1)
+    parallel = parse(path, workers=WORKERS)
+    if serial == parallel:
+        print(f"✅ {name}: kết quả --workers {WORKERS} giống --workers 1")
+    else:
+        print(f"❌ {name}: kết quả --workers {WORKERS} khác --workers 1")
+        success = False
+
+    questions = parallel["questions"]
+    if len(questions) + parallel.get("skipped", parallel.get("skipped_count", 0)) != RECORDS:
+        print(f"❌ {name}: {len(questions)} câu hỏi hợp lệ, tổng số dòng không khớp {RECORDS}")
+        success = False
+    if not all(question["text"].count("\n") == CELL_LINES - 1 for question in questions):
+        print(f"❌ {name}: có câu hỏi bị cắt mất dòng")
+        success = False
+    return success
+
+def test_parser_parallel():
+    """File có ô nhiều dòng trong dấu nháy cắt qua ranh giới khoảng byte: parse song song giống parse tuần tự"""
+    # File mẫu nhỏ: hạ ngưỡng parse song song (mặc định chỉ dùng cho file >= 32MB)
+    parser_io.PARALLEL_MIN_BYTES = 0
+
+    checks = [
+        ("csv_parser", "Câu hỏi,Đáp án", khoidong_record, csv_parser.parse_file, None),
+        ("parser-tangtoc", "Số câu,Câu hỏi,Đáp án,Loại", tangtoc_record, parser_tangtoc.parse_tangtoc_file, 4),
+    ]
+
+    success = True
+    for name, header, make_record, parse, row_columns in checks:
+        path, starts = write_file(header, make_record)
+        try:
+            success = check_file(name, path, starts, parse, row_columns) and success
+        finally:
+            os.unlink(path)
+    return success
+
+def main():
+    print("===== TEST PARSE SONG SONG THEO KHOẢNG BYTE =====")
+    success = test_parser_parallel()
+
+    if success:
+        print("\n🎉 Test parse song song thành công!")
+    else:
+        print("\n⚠️ Test parse song song thất bại!")
+
+    return success
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import re
+import sys
+import time
+import tempfile
+import subprocess
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent / "scripts"
+
+# Thời gian tối đa (ms) để parse một file CSV nhỏ, tính cả khởi động python3
+STARTUP_BUDGET_MS = int(os.environ.get("PARSER_STARTUP_BUDGET_MS", "300"))
+
+SAMPLE_KD = "Câu hỏi,Đáp án\nThủ đô của Pháp?,Paris\n1 + 1 = ?,2\n"
+SAMPLE_TANGTOC = "Số câu,Câu hỏi,Đáp án,Loại\n1,Câu hỏi 1,Đáp án 1,tangtoc\n2,Câu hỏi 2,Đáp án 2,tangtoc\n"
+
+def import_time_ms(code):
+    """Tổng thời gian import (ms) theo python -X importtime, và danh sách module đã import"""
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=SCRIPTS_DIR, capture_output=True, text=True
+    )
+    if process.returncode != 0:
+        raise RuntimeError(process.stderr)
+
+    total_us = 0
+    modules = set()
+    for line in process.stderr.splitlines():
+        match = re.match(r"import time:\s+\d+\s+\|\s+(\d+)\s+\|(\s*)(\S+)", line)
+        if not match:
+            continue
+        modules.add(match.group(3))
+        # Chỉ cộng các module cấp ngoài cùng (cumulative đã bao gồm module con)
+        if len(match.group(2)) == 1:
+            total_us += int(match.group(1))
+    return total_us / 1000, modules
+
+def run_parser(script, csv_content):
+    """Chạy parser như Node gọi (spawn python3), trả về (thời gian ms, returncode)"""
+    with tempfile.NamedTemporaryFile("w", suffix=".csv", encoding="utf-8", delete=False) as f:
+        f.write(csv_content)
+        path = f.name
+    try:
+        started = time.perf_counter()
+        process = subprocess.run([sys.executable, str(SCRIPTS_DIR / script), path],
+                                 capture_output=True, text=True)
+        return (time.perf_counter() - started) * 1000, process.returncode
+    finally:
+        os.unlink(path)
+
+def test_parser_startup():
+    """Test parser CSV nhỏ không import pandas và khởi động trong giới hạn thời gian"""
+    success = True
+
+    pandas_ms, _ = import_time_ms("import pandas")
+    print(f"import pandas: {pandas_ms:.1f} ms")
+
+    checks = [
+        ("csv_parser", "import csv_parser; csv_parser.parse_file(r'{path}')", "csv_parser.py", SAMPLE_KD),
+        ("parser-tangtoc", "import importlib.util as u; s = u.spec_from_file_location('pt', 'parser-tangtoc.py'); "
+                           "m = u.module_from_spec(s); s.loader.exec_module(m); m.parse_tangtoc_file(r'{path}')",
+         "parser-tangtoc.py", SAMPLE_TANGTOC),
+    ]
+
+    for name, code, script, content in checks:
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", encoding="utf-8", delete=False) as f:
+            f.write(content)
+            path = f.name
+        try:
+            elapsed_ms, modules = import_time_ms(code.format(path=path))
+        finally:
+            os.unlink(path)
+
+        print(f"{name}: import + parse CSV nhỏ = {elapsed_ms:.1f} ms")
+        if "pandas" in modules or "numpy" in modules:
+            print(f"❌ {name} vẫn import pandas/numpy khi parse CSV nhỏ")
+            success = False
+        else:
+            print(f"✅ {name} không import pandas/numpy")
+
+        wall_ms, returncode = run_parser(script, content)
+        if returncode != 0:
+            print(f"❌ {script} lỗi (code={returncode})")
+            success = False
+        elif wall_ms > STARTUP_BUDGET_MS:
+            print(f"❌ {script}: {wall_ms:.1f} ms > {STARTUP_BUDGET_MS} ms")
+            success = False
+        else:
+            print(f"✅ {script}: {wall_ms:.1f} ms (giới hạn {STARTUP_BUDGET_MS} ms)")
+
+    return success
+
+def main():
+    print("===== TEST THỜI GIAN KHỞI ĐỘNG PARSER =====")
+    success = test_parser_startup()
+
+    if success:
+        print("\n🎉 Test khởi động parser thành công!")
+    else:
+        print("\n⚠️ Test khởi động parser thất bại!")
+
+    return success
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
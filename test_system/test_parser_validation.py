@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import sys
+import json
+import shutil
+import tempfile
+import importlib.util
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+import csv_parser
+import parser_io
+
+# parser-tangtoc.py có dấu gạch ngang nên phải load bằng importlib
+_spec = importlib.util.spec_from_file_location("parser_tangtoc", SCRIPTS_DIR / "parser-tangtoc.py")
+parser_tangtoc = importlib.util.module_from_spec(_spec)
+sys.modules["parser_tangtoc"] = parser_tangtoc
+_spec.loader.exec_module(parser_tangtoc)
+
+# Kết quả mong đợi của từng case (ghi lại bằng: python3 test_parser_validation.py --update)
+EXPECTED_PATH = Path(__file__).resolve().parent / "parser_validation_expected.json"
+
+KHOIDONG_HEADER = ["Câu hỏi", "Đáp án"]
+TANGTOC_HEADER = ["Số câu", "Câu hỏi", "Đáp án", "Loại"]
+
+# case -> (encoding, có dòng header không, các dòng khởi động, các dòng tăng tốc); mỗi dòng là text CSV nguyên dòng
+CASES = {
+    "quotes": ("utf-8", True, [
+        '"Thủ đô của ""Pháp"", nước nào?",Paris',
+        '"Câu có dấu phẩy, ở giữa","Đáp án ""trích dẫn"""',
+        '  "Khoảng trắng trước dấu nháy",x',
+        '"",Thiếu câu hỏi',
+    ], [
+        '1,"Câu ""trích dẫn"", có phẩy",Đáp án,tangtoc',
+        '2,"Câu có ảnh @https://cdn.example.com/a.png","x, y",tangtoc',
+        '3,"",Thiếu câu hỏi,tangtoc',
+    ]),
+    "bom": ("utf-8-sig", True, [
+        "Câu hỏi đầu file có BOM?,Có",
+        "Câu thứ hai?,Hai",
+    ], [
+        "1,Câu hỏi đầu file có BOM?,Có,tangtoc",
+        "4,Câu thứ hai?,Hai,tangtoc",
+    ]),
+    # Header tiếng Việt không mã hóa được bằng cp1252: file không có header
+    "cp1252": ("cp1252", False, [
+        "Café crème?,Crème brûlée",
+        "Giá €?,5 €",
+        "Naïve façade?,Oui",
+    ], [
+        "1,Café crème?,Crème brûlée,tangtoc",
+        "2,Naïve façade?,Oui,tangtoc",
+    ]),
+    "nan_inf": ("utf-8", True, [
+        "nan,Đáp án",
+        "Câu hỏi,NaN",
+        "inf,-inf",
+        "NA,N/A",
+        "null,None",
+        "Câu hỏi thường?,Infinity",
+    ], [
+        "nan,Câu hỏi,Đáp án,tangtoc",
+        "1,NaN,Đáp án,tangtoc",
+        "2,Câu hỏi,inf,tangtoc",
+        "inf,Câu hỏi,Đáp án,tangtoc",
+        "3,Câu hỏi,NA,tangtoc",
+    ]),
+    "numeric": ("utf-8", True, [
+        "1 + 1 = ?,2",
+        "Số pi?,3.14",
+        "007,7",
+        "1e5,100000",
+        "-0,0",
+    ], [
+        "1,Số pi?,3.14,tangtoc",
+        "2.0,Số nguyên dạng thực?,2,tangtoc",
+        "4,100,200,tangtoc",
+        "5,Số câu sai?,x,tangtoc",
+        "abc,Số câu không phải số?,x,tangtoc",
+    ]),
+    "multiline": ("utf-8", True, [
+        '"Câu hỏi\nnhiều dòng?","Đáp án\ncũng nhiều dòng"',
+        '"Dòng trống ở giữa\n\nvẫn là một ô",x',
+        "Câu thường?,y",
+    ], [
+        '1,"Câu hỏi\nnhiều dòng?",Đáp án,tangtoc',
+        '2,"Có ảnh\n@https://cdn.example.com/b.jpg",x,tangtoc',
+    ]),
+    "extra_columns": ("utf-8", True, [
+        "Câu có cột thừa?,Đáp án,ghi chú",
+        "Câu bình thường?,x",
+        "Câu thừa hai cột?,y,a,b",
+    ], [
+        "1,Câu có cột thừa?,Đáp án,tangtoc,ghi chú",
+        "2,Câu bình thường?,x,tangtoc",
+        "3,Câu thừa hai cột?,y,tangtoc,a,b",
+    ]),
+}
+
+# Sheet Excel: ô có kiểu (text, số nguyên, số thực, trống)
+XLSX_KHOIDONG = [
+    ["Thủ đô của Pháp?", "Paris"],
+    ["1 + 1 = ?", 2],
+    ["Số pi?", 3.14],
+    [None, "Thiếu câu hỏi"],
+    ["Câu hỏi\nnhiều dòng?", "x"],
+]
+XLSX_TANGTOC = [
+    [1, "Thủ đô của Pháp?", "Paris", "tangtoc"],
+    [2.0, "Số nguyên dạng thực?", 2, "tangtoc"],
+    [5, "Số câu sai?", "x", "tangtoc"],
+    [3, None, "Thiếu câu hỏi", "tangtoc"],
+]
+
+def write_csv(directory, name, encoding, header, lines):
+    path = Path(directory) / name
+    text = "\n".join(([",".join(header)] if header else []) + lines) + "\n"
+    path.write_bytes(text.encode(encoding))
+    return path
+
+def write_xlsx(directory, name, header, rows):
+    import openpyxl
+
+    path = Path(directory) / name
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(header)
+    for row in rows:
+        sheet.append(row)
+    workbook.save(path)
+    return path
+
+def parse_khoidong(path):
+    return csv_parser.parse_file(path)
+
+def parse_tangtoc(path):
+    try:
+        return parser_tangtoc.parse_tangtoc_file(path)
+    except ValueError as e:
+        return {"error": str(e)}
+
+def uses_fast_path(path, row_columns):
+    if path.suffix != ".csv":
+        return False
+    try:
+        parser_io.read_csv_rows(path, row_columns=row_columns)
+        return True
+    except parser_io.FastPathUnsupported:
+        return False
+
+def parse_both_paths(path, parse, row_columns):
+    """(kết quả, qua validate_rows hay không): parse bình thường và ép qua pandas + validate_frame phải giống nhau"""
+    fast = uses_fast_path(path, row_columns)
+    result = parse(path)
+    saved = parser_io.FAST_PATH_MAX_BYTES
+    parser_io.FAST_PATH_MAX_BYTES = -1
+    try:
+        frame_result = parse(path)
+    finally:
+        parser_io.FAST_PATH_MAX_BYTES = saved
+    return result, frame_result, fast
+
+def build_cases(directory):
+    """[(tên case, parser, đường dẫn file, parse, row_columns)]"""
+    cases = []
+    for case, (encoding, header, khoidong, tangtoc) in CASES.items():
+        cases.append((case, "csv_parser", write_csv(directory, f"{case}-khoidong.csv", encoding,
+                                                    header and KHOIDONG_HEADER, khoidong), parse_khoidong, None))
+        cases.append((case, "parser-tangtoc", write_csv(directory, f"{case}-tangtoc.csv", encoding,
+                                                        header and TANGTOC_HEADER, tangtoc), parse_tangtoc, 4))
+    cases.append(("xlsx", "csv_parser", write_xlsx(directory, "xlsx-khoidong.xlsx", KHOIDONG_HEADER, XLSX_KHOIDONG),
+                  parse_khoidong, None))
+    cases.append(("xlsx", "parser-tangtoc", write_xlsx(directory, "xlsx-tangtoc.xlsx", TANGTOC_HEADER, XLSX_TANGTOC),
+                  parse_tangtoc, 4))
+    return cases
+
+def normalize(result, path):
+    """Qua JSON như output của parser (tuple -> list, ...)"""
+    result = json.loads(json.dumps(result, ensure_ascii=False))
+    # Kích thước file xlsx đổi theo thời điểm openpyxl ghi file
+    if path.suffix == ".xlsx" and "file_info" in result:
+        del result["file_info"]["size"]
+    return result
+
+def test_parser_validation(update=False):
+    """validate_rows (fast path) và validate_frame (pandas) cho cùng kết quả, giống kết quả mong đợi"""
+    expected = {} if update else json.loads(EXPECTED_PATH.read_text(encoding="utf-8"))
+    actual = {}
+    success = True
+
+    directory = tempfile.mkdtemp()
+    try:
+        for case, parser, path, parse, row_columns in build_cases(directory):
+            key = f"{parser}/{case}"
+            result, frame_result, fast = parse_both_paths(path, parse, row_columns)
+            result, frame_result = normalize(result, path), normalize(frame_result, path)
+            actual[key] = frame_result
+            paths = "validate_rows + validate_frame" if fast else "validate_frame"
+
+            if result != frame_result:
+                print(f"❌ {key}: fast path và pandas cho kết quả khác nhau")
+                success = False
+            elif not update and expected.get(key) != frame_result:
+                print(f"❌ {key}: khác kết quả mong đợi ({paths})")
+                print(f"   mong đợi: {json.dumps(expected.get(key), ensure_ascii=False)[:500]}")
+                print(f"   nhận được: {json.dumps(frame_result, ensure_ascii=False)[:500]}")
+                success = False
+            else:
+                print(f"✅ {key}: {paths}")
+    finally:
+        shutil.rmtree(directory)
+
+    if update:
+        EXPECTED_PATH.write_text(json.dumps(actual, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"Đã ghi {EXPECTED_PATH}")
+    return success
+
+def main():
+    print("===== TEST VALIDATE CÂU HỎI (FAST PATH / PANDAS) =====")
+    success = test_parser_validation(update="--update" in sys.argv[1:])
+
+    if success:
+        print("\n🎉 Test validate câu hỏi thành công!")
+    else:
+        print("\n⚠️ Test validate câu hỏi thất bại!")
+
+    return success
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import time
+import tempfile
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+import csv_parser
+from answer_keys import answer_key, fold_key
+from question_sync import plan_sync, row_keys, sync_questions
+
+# Ngân hàng câu hỏi mẫu: lần import đầu, lần sửa (đổi đáp án, thêm 1 câu, bỏ 2 câu), rồi import lại bản đầu
+BANK_V1 = ("Câu hỏi,Đáp án\n"
+           "Thủ đô của Việt Nam?,Hà Nội\n"
+           "1 + 1 = ?,2\n"
+           "Sông dài nhất Việt Nam?,Sông Mê Kông\n"
+           "Câu hỏi sẽ bị xóa?,Xóa\n")
+BANK_V2 = ("Câu hỏi,Đáp án\n"
+           "Thủ đô của Việt Nam?,Hà Nội\n"
+           "1 + 1 = ?,Hai\n"
+           "Núi cao nhất Việt Nam?,Fansipan\n")
+
+COUNT_KEYS = ["inserted", "updated", "restored", "deleted", "unchanged"]
+
+# Số dòng mong đợi của từng lần sync
+EXPECTED = [
+    ("import lần đầu", BANK_V1, {"inserted": 4, "updated": 0, "restored": 0, "deleted": 0, "unchanged": 0}),
+    ("sửa bank", BANK_V2, {"inserted": 1, "updated": 1, "restored": 0, "deleted": 2, "unchanged": 1}),
+    ("import lại bản đầu", BANK_V1, {"inserted": 0, "updated": 3, "restored": 2, "deleted": 1, "unchanged": 1}),
+]
+
+def parse_bank(content):
+    """Parse nội dung CSV bằng csv_parser như khi upload, trả về list câu hỏi"""
+    with tempfile.NamedTemporaryFile("w", suffix=".csv", encoding="utf-8", delete=False) as f:
+        f.write(content)
+        path = f.name
+    try:
+        result = csv_parser.parse_file(path)
+    finally:
+        os.unlink(path)
+    if not result["success"]:
+        raise RuntimeError(result["error"])
+    return result["questions"]
+
+def check(label, actual, expected):
+    if actual == expected:
+        print(f"✅ {label}: {actual}")
+        return True
+    print(f"❌ {label}: {actual} (mong đợi {expected})")
+    return False
+
+def test_plan_sync():
+    """Phân loại insert / update / delete / unchanged theo row_key và hash (không cần database)"""
+    success = True
+    v1, v2 = parse_bank(BANK_V1), parse_bank(BANK_V2)
+
+    # Câu trùng text trong cùng file là các dòng khác nhau
+    keys = row_keys(v1 + v1[:1], "khoidong")
+    success &= check("row_key câu trùng text", len(set(keys)), len(keys))
+
+    first = plan_sync(v1, {}, "khoidong")
+    success &= check("plan lần đầu", (len(first["insert"]), len(first["update"]), len(first["delete"])), (4, 0, 0))
+
+    previous = {key: (question_id, digest, False)
+                for question_id, (key, digest, _) in enumerate(first["insert"], start=1)}
+    second = plan_sync(v2, previous, "khoidong")
+    success &= check("plan sửa bank", (len(second["insert"]), len(second["update"]), len(second["delete"]),
+                                       second["unchanged"]), (1, 1, 2, 1))
+
+    # Dòng đã xóa mềm xuất hiện lại trong file: update kèm restored dù nội dung không đổi
+    deleted = {key for _, key in second["delete"]}
+    previous = {key: (question_id, digest, key in deleted) for key, (question_id, digest, _) in previous.items()}
+    third = plan_sync(v1, previous, "khoidong")
+    restored = [item for item in third["update"] if item[4]]
+    success &= check("plan khôi phục dòng đã xóa", len(restored), 2)
+    return success
+
+def bank_rows(cursor, bank_id):
+    """text -> (question_id, answer_key_folded, câu hỏi bị xóa mềm, dòng bank bị xóa mềm)"""
+    cursor.execute(
+        "SELECT q.text, q.id, q.answer_key_folded, q.deleted_at IS NOT NULL, b.deleted_at IS NOT NULL "
+        "FROM question_bank_rows b JOIN questions q ON q.id = b.question_id WHERE b.bank_id = %s", (bank_id,))
+    return {text: (question_id, folded, bool(deleted), bool(row_deleted))
+            for text, question_id, folded, deleted, row_deleted in cursor.fetchall()}
+
+def cleanup(connection, bank_id):
+    cursor = connection.cursor()
+    cursor.execute("SELECT question_id FROM question_bank_rows WHERE bank_id = %s", (bank_id,))
+    ids = [row[0] for row in cursor.fetchall()]
+    cursor.execute("DELETE FROM question_bank_rows WHERE bank_id = %s", (bank_id,))
+    if ids:
+        placeholders = ", ".join(["%s"] * len(ids))
+        cursor.execute(f"DELETE FROM answers WHERE question_id IN ({placeholders})", ids)
+        cursor.execute(f"DELETE FROM questions WHERE id IN ({placeholders})", ids)
+    connection.commit()
+
+def test_sync_database():
+    """Sync bank mẫu ba lần vào database (DB_HOST, DB_USER, ...), kiểm tra số dòng và dữ liệu đã ghi"""
+    from question_loader import connect
+
+    try:
+        connection = connect()
+    except Exception as e:
+        print(f"⚠️ Bỏ qua test với database: {str(e)}")
+        return True
+
+    bank_id = f"test-sync-{os.getpid()}-{int(time.time())}"
+    success = True
+    try:
+        # dry_run tính số dòng nhưng không ghi gì
+        result = sync_questions(parse_bank(BANK_V1), bank_id, dry_run=True)
+        success &= check("dry run", {key: result[key] for key in COUNT_KEYS}, EXPECTED[0][2])
+        success &= check("dry run không ghi database", len(bank_rows(connection.cursor(), bank_id)), 0)
+        connection.commit()
+
+        first_ids = {}
+        for label, content, expected in EXPECTED:
+            result = sync_questions(parse_bank(content), bank_id)
+            success &= check(f"sync {label}", {key: result[key] for key in COUNT_KEYS}, expected)
+
+            rows = bank_rows(connection.cursor(), bank_id)
+            # Kết thúc transaction đọc để lần sync sau thấy dữ liệu mới
+            connection.commit()
+            if not first_ids:
+                first_ids = {text: row[0] for text, row in rows.items()}
+            active = {parsed["text"] for parsed in parse_bank(content)}
+            for text, (question_id, folded, deleted, row_deleted) in rows.items():
+                if text in active and (deleted or row_deleted):
+                    print(f"❌ {label}: '{text}' vẫn bị xóa mềm")
+                    success = False
+                if text not in active and not (deleted and row_deleted):
+                    print(f"❌ {label}: '{text}' không còn trong file nhưng chưa bị xóa mềm")
+                    success = False
+                if text in first_ids and question_id != first_ids[text]:
+                    print(f"❌ {label}: '{text}' đổi question_id {first_ids[text]} -> {question_id}")
+                    success = False
+
+            # Người chơi gõ đáp án không dấu vẫn khớp answer_key_folded của câu hỏi
+            typed = "ha noi"
+            success &= check(f"{label}: answer_key_folded của 'Thủ đô của Việt Nam?'",
+                             rows["Thủ đô của Việt Nam?"][1], fold_key(answer_key(typed)))
+            answer = "2" if content is BANK_V1 else "hai"
+            success &= check(f"{label}: answer_key_folded của '1 + 1 = ?'", rows["1 + 1 = ?"][1],
+                             fold_key(answer_key(answer)))
+    finally:
+        try:
+            cleanup(connection, bank_id)
+        finally:
+            connection.close()
+    return success
+
+def main():
+    print("===== TEST SYNC NGÂN HÀNG CÂU HỎI =====")
+    success = test_plan_sync()
+    success = test_sync_database() and success
+
+    if success:
+        print("\n🎉 Test sync ngân hàng câu hỏi thành công!")
+    else:
+        print("\n⚠️ Test sync ngân hàng câu hỏi thất bại!")
+
+    return success
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,64 @@
+/**
+ * Key chuẩn hóa của đáp án, cùng quy tắc với scripts/answer_keys.py:
+ *   answerKey        NFC, viết thường, gộp khoảng trắng        "Hà  Nội " -> "hà nội"
+ *   foldedAnswerKey  answerKey bỏ dấu thanh/dấu chữ, đ -> d   "Hà  Nội " -> "ha noi"
+ * Key của đáp án chính và đáp án phụ được tính sẵn lúc import (cột answer_key / answer_key_folded),
+ * lúc chấm chỉ chuẩn hóa câu trả lời của người chơi một lần rồi tra trong Set.
+ * Dòng cũ chưa backfill (answer_key NULL) thì key được tính lại khi dựng Set.
+ */
+
+// ANSWER_MATCH_TONELESS=1: chấp nhận câu trả lời gõ không dấu (so theo key đã bỏ dấu)
+const ANSWER_MATCH_TONELESS = process.env.ANSWER_MATCH_TONELESS === '1';
+
+// Khoảng trắng được gộp trong answerKey: cùng tập ký tự với WHITESPACE của scripts/answer_keys.py
+// (/\s+/ và str.split() của Python tách theo hai tập khác nhau, vd. \ufeff, \x1c-\x1f, \x85)
+const ANSWER_WHITESPACE = /[ \t\n\r\f\v\u00a0\u1680\u2000-\u200b\u2028\u2029\u202f\u205f\u3000]+/;
+
+function answerKey(text) {
+  return (text ?? '').toString().normalize('NFC').toLowerCase().split(ANSWER_WHITESPACE).filter(Boolean).join(' ');
+}
+
+function foldedAnswerKey(text) {
+  return answerKey(text).normalize('NFD').replace(/[\u0300-\u036f]/g, '').replace(/đ/g, 'd').normalize('NFC');
+}
+
+// Set key của mỗi câu hỏi chỉ dựng một lần (câu hỏi được chấm nhiều lần trong một ván)
+const keySets = new WeakMap();
+
+function answerKeySet(question) {
+  let sets = keySets.get(question);
+  if (sets) return sets;
+
+  sets = { keys: new Set(), folded: new Set() };
+  const add = (answer, key, folded) => {
+    if (answer == null || answer.toString().trim() === '') return;
+    sets.keys.add(key || answerKey(answer));
+    sets.folded.add(folded || foldedAnswerKey(answer));
+  };
+
+  add(question.answer, question.answerKey, question.answerKeyFolded);
+  for (const a of Array.isArray(question.acceptedAnswers) ? question.acceptedAnswers : []) {
+    // Xử lý cả trường hợp a là string và a là object {id, answer, answerKey, answerKeyFolded}
+    if (typeof a === 'string') {
+      add(a);
+    } else if (a && a.answer) {
+      add(a.answer, a.answerKey, a.answerKeyFolded);
+    }
+  }
+
+  keySets.set(question, sets);
+  return sets;
+}
+
+function isAcceptedAnswer(userAnswer, question) {
+  const sets = answerKeySet(question);
+  if (sets.keys.has(answerKey(userAnswer))) return true;
+  return ANSWER_MATCH_TONELESS && sets.folded.has(foldedAnswerKey(userAnswer));
+}
+
+export {
+  answerKey,
+  foldedAnswerKey,
+  answerKeySet,
+  isAcceptedAnswer
+};
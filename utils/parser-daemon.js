@@ -0,0 +1,175 @@
+/**
+ * Client cho scripts/parser_daemon.py
+ * Giữ một process Python chạy lâu dài (pandas đã được import sẵn) và gửi các job parse
+ * qua JSON-RPC trên stdin/stdout, để mỗi lần upload không phải khởi động lại python3.
+ *
+ * Tắt bằng biến môi trường PARSER_DAEMON=0 (khi đó các route sẽ spawn python3 như cũ).
+ * Lỗi có error.daemonUnavailable = true (daemon không chạy được / bị dừng, không ghi được request,
+ * request quá PARSER_DAEMON_TIMEOUT_MS mà daemon chưa nhận) thì caller chạy python3 trực tiếp thay cho daemon.
+ * Job daemon đã nhận ({"accepted": true}) thì không bao giờ fallback: job có thể vẫn chạy (hoặc đã ghi một phần
+ * với load / sync), chạy lại bằng python3 sẽ parse và ghi database hai lần.
+ */
+
+import { spawn } from 'child_process';
+import path from 'path';
+import readline from 'readline';
+import { fileURLToPath } from 'url';
+
+const __filename = fileURLToPath(import.meta.url);
+const __dirname = path.dirname(__filename);
+
+const DAEMON_SCRIPT = path.join(__dirname, '..', 'scripts', 'parser_daemon.py');
+const PYTHON_PATH = process.env.PYTHON_PATH || 'python3';
+const WORKERS = process.env.PARSER_DAEMON_WORKERS || '';
+
+// Thời gian chờ tối đa cho mỗi request (mặc định 5 phút, 0 = không giới hạn)
+const timeoutEnv = parseInt(process.env.PARSER_DAEMON_TIMEOUT_MS, 10);
+const PARSER_DAEMON_TIMEOUT_MS = Number.isNaN(timeoutEnv) ? 5 * 60 * 1000 : timeoutEnv;
+
+let daemon = null;
+let nextId = 1;
+const pending = new Map();
+
+function isParserDaemonEnabled() {
+  return process.env.PARSER_DAEMON !== '0';
+}
+
+// Lỗi ở mức process (daemon không chạy được / bị dừng): job chưa được nhận thì caller có thể
+// fallback sang spawn python3, job đã nhận thì báo lỗi
+// (chỉ các request gửi tới child này, daemon mới sau khi khởi động lại giữ request của nó)
+function rejectAllPending(child, error) {
+  for (const [id, { reject, timer, accepted, daemon: owner }] of pending) {
+    if (owner !== child) continue;
+    pending.delete(id);
+    clearTimeout(timer);
+    const jobError = new Error(accepted ? `${error.message} khi đang chạy job` : error.message);
+    jobError.daemonUnavailable = !accepted;
+    reject(jobError);
+  }
+}
+
+function startDaemon() {
+  const args = [DAEMON_SCRIPT];
+  if (WORKERS) {
+    args.push('--workers', WORKERS);
+  }
+
+  const child = spawn(PYTHON_PATH, args, { stdio: ['pipe', 'pipe', 'pipe'] });
+
+  const rl = readline.createInterface({ input: child.stdout });
+  rl.on('line', (line) => {
+    let response;
+    try {
+      response = JSON.parse(line);
+    } catch (error) {
+      console.error('Parser daemon trả về dòng không hợp lệ:', line);
+      return;
+    }
+
+    // Request đã hết thời gian chờ thì bỏ qua response đến muộn
+    const entry = pending.get(response.id);
+    if (!entry) return;
+    if (response.accepted) {
+      entry.accepted = true;
+      return;
+    }
+    pending.delete(response.id);
+    clearTimeout(entry.timer);
+
+    if (response.error) {
+      const error = new Error(response.error);
+      if (response.code) {
+        error.code = response.code;
+      }
+      entry.reject(error);
+    } else {
+      entry.resolve(response.result);
+    }
+  });
+
+  // Tránh EPIPE làm crash server khi daemon bị dừng giữa chừng
+  child.stdin.on('error', (error) => {
+    console.error('Lỗi khi ghi tới parser daemon:', error.message);
+  });
+
+  child.stderr.on('data', (data) => {
+    console.log('Parser daemon stderr:', data.toString());
+  });
+
+  child.on('error', (error) => {
+    console.error('Không thể khởi động parser daemon:', error);
+    if (daemon === child) daemon = null;
+    rejectAllPending(child, error);
+  });
+
+  child.on('exit', (code, signal) => {
+    console.log(`Parser daemon đã dừng (code=${code}, signal=${signal})`);
+    if (daemon === child) daemon = null;
+    rejectAllPending(child, new Error(`Parser daemon đã dừng (code=${code})`));
+  });
+
+  return child;
+}
+
+// Gửi một request tới daemon, tự khởi động daemon nếu chưa chạy
+// (options.timeoutMs: thời gian chờ của request này, mặc định PARSER_DAEMON_TIMEOUT_MS)
+function callParserDaemon(method, params = {}, { timeoutMs = PARSER_DAEMON_TIMEOUT_MS } = {}) {
+  return new Promise((resolve, reject) => {
+    if (!daemon) {
+      daemon = startDaemon();
+    }
+
+    const id = nextId++;
+    const timer = timeoutMs ? setTimeout(() => {
+      const entry = pending.get(id);
+      if (!entry) return;
+      pending.delete(id);
+      if (entry.accepted) {
+        // Job vẫn chạy trong daemon (response đến muộn bị bỏ qua), không fallback để tránh chạy hai lần
+        reject(new Error(`Parser daemon không trả lời trong ${timeoutMs / 1000} giây (job vẫn đang chạy)`));
+        return;
+      }
+      // Daemon chưa nhận job (bị treo): khởi động lại để request không bao giờ được đọc, rồi fallback
+      const error = new Error(`Parser daemon không nhận job trong ${timeoutMs / 1000} giây`);
+      error.daemonUnavailable = true;
+      reject(error);
+      restartParserDaemon(entry.daemon);
+    }, timeoutMs) : null;
+    pending.set(id, { resolve, reject, timer, accepted: false, daemon });
+
+    daemon.stdin.write(JSON.stringify({ id, method, params }) + '\n', (error) => {
+      if (error && pending.has(id)) {
+        pending.delete(id);
+        clearTimeout(timer);
+        error.daemonUnavailable = true;
+        reject(error);
+      }
+    });
+  });
+}
+
+function getParserDaemonHealth() {
+  return callParserDaemon('health');
+}
+
+function stopParserDaemon() {
+  if (daemon) {
+    daemon.stdin.end();
+    daemon = null;
+  }
+}
+
+// Dừng hẳn daemon đang treo, request sau sẽ khởi động daemon mới
+function restartParserDaemon(child) {
+  if (daemon === child) {
+    daemon = null;
+  }
+  child.kill('SIGKILL');
+}
+
+export {
+  isParserDaemonEnabled,
+  callParserDaemon,
+  getParserDaemonHealth,
+  stopParserDaemon
+};
@@ -0,0 +1,186 @@
+/**
+ * Chạy Python parser ở chế độ --stream và xử lý từng câu hỏi ngay khi parser validate xong.
+ * Parser in NDJSON: mỗi dòng một record {type: 'question' | 'stats' | 'error', ...}.
+ * Đọc stdout bằng async iterator nên có backpressure: khi onQuestion (vd. INSERT) chậm,
+ * Python sẽ bị chặn ở write thay vì Node phải buffer toàn bộ output.
+ * options.input: nội dung file (Buffer hoặc Readable, xem writeParserInput) ghi vào stdin của parser,
+ * dùng với filePath '-' (kèm --input-format).
+ * options.onProgress / options.stallTimeoutMs: xem watchParserProgress.
+ */
+
+import { spawn } from 'child_process';
+
+const PYTHON_PATH = process.env.PYTHON_PATH || 'python3';
+
+// File lớn hơn ngưỡng này sẽ được parse ở chế độ stream (mặc định 5MB)
+const PARSER_STREAM_THRESHOLD = parseInt(process.env.PARSER_STREAM_THRESHOLD, 10) || 5 * 1024 * 1024;
+
+// Sự kiện tiến độ NDJSON của parser (scripts/parser_progress.py) được ghi ra fd 3, không lẫn với stderr
+const PARSER_PROGRESS_FD = 3;
+const PARSER_PROGRESS_ARGS = ['--progress-fd', String(PARSER_PROGRESS_FD)];
+const PARSER_PROGRESS_STDIO = ['pipe', 'pipe', 'pipe', 'pipe'];
+
+// Parser không có sự kiện tiến độ / output nào trong khoảng này thì bị coi là treo và bị dừng (mặc định 2 phút, 0 = tắt).
+// Trong một bước chạy lâu (vd. đọc cả file Excel lớn) parser vẫn ghi sự kiện heartbeat mỗi PARSER_PROGRESS_INTERVAL
+const stallTimeoutEnv = parseInt(process.env.PARSER_STALL_TIMEOUT_MS, 10);
+const PARSER_STALL_TIMEOUT_MS = Number.isNaN(stallTimeoutEnv) ? 2 * 60 * 1000 : stallTimeoutEnv;
+
+/**
+ * Theo dõi tiến độ của process parser được spawn với PARSER_PROGRESS_ARGS + PARSER_PROGRESS_STDIO:
+ * gọi onProgress(event) cho mỗi sự kiện {type: 'progress', stage, bytes_read, bytes_total, rows_validated, ...}
+ * và dừng parser (SIGKILL) khi quá stallTimeoutMs không có sự kiện nào.
+ * Trả về watch: watch.touch() khi parser có hoạt động khác (vd. record trên stdout), watch.stop() khi parser thoát,
+ * watch.stalled: parser đã bị dừng vì treo, watch.last: sự kiện tiến độ cuối cùng
+ */
+function watchParserProgress(child, { onProgress, stallTimeoutMs = PARSER_STALL_TIMEOUT_MS } = {}) {
+  let timer = null;
+  const watch = {
+    stalled: false,
+    last: null,
+    touch() {
+      if (!stallTimeoutMs) return;
+      clearTimeout(timer);
+      timer = setTimeout(() => {
+        watch.stalled = true;
+        child.kill('SIGKILL');
+      }, stallTimeoutMs);
+    },
+    stop() {
+      clearTimeout(timer);
+    },
+    error() {
+      return `Parser không có tiến độ trong ${stallTimeoutMs / 1000} giây, đã dừng` +
+        (watch.last ? ` (bước ${watch.last.stage}, ${watch.last.rows_validated} dòng hợp lệ)` : '');
+    }
+  };
+
+  const progress = child.stdio[PARSER_PROGRESS_FD];
+  if (progress) {
+    progress.setEncoding('utf8');
+    let buffered = '';
+    progress.on('data', (chunk) => {
+      buffered += chunk;
+      const lines = buffered.split('\n');
+      buffered = lines.pop();
+      for (const line of lines) {
+        if (!line.trim()) continue;
+        let event;
+        try {
+          event = JSON.parse(line);
+        } catch {
+          continue;
+        }
+        watch.last = event;
+        watch.touch();
+        if (onProgress) onProgress(event);
+      }
+    });
+  }
+  child.on('close', () => watch.stop());
+  watch.touch();
+  return watch;
+}
+
+// onProgress ghi log mỗi khi parser sang bước mới (sự kiện trong cùng một bước không được log)
+function logParserStages(label) {
+  let stage = null;
+  return (event) => {
+    if (event.stage === stage) return;
+    stage = event.stage;
+    const rows = `${event.rows_validated} dòng hợp lệ, ${event.rows_skipped} dòng bỏ qua`;
+    console.log(`${label}: ${stage} (${event.bytes_read} byte, ${rows}, ${Math.round(event.elapsed_ms)} ms)`);
+  };
+}
+
+// Ghi input (Buffer, hoặc Readable như read stream của file upload lớn) vào stdin của parser
+function writeParserInput(child, input) {
+  // Parser thoát sớm (vd. tham số sai) thì ghi stdin lỗi EPIPE, lỗi thật được báo qua exit code + stderr
+  child.stdin.on('error', () => {});
+  if (Buffer.isBuffer(input)) {
+    child.stdin.end(input);
+    return;
+  }
+  input.on('error', (error) => {
+    console.error('Lỗi khi đọc input của parser:', error.message);
+    child.stdin.destroy(error);
+  });
+  input.pipe(child.stdin);
+}
+
+async function streamPythonParser(scriptPath, filePath, onQuestion, options = {}) {
+  const args = [scriptPath, filePath, '--stream', ...(options.args || []), ...PARSER_PROGRESS_ARGS];
+  const python = spawn(PYTHON_PATH, args, {
+    stdio: PARSER_PROGRESS_STDIO,
+    ...(options.cwd ? { cwd: options.cwd } : {})
+  });
+  const watch = watchParserProgress(python, options);
+  if (options.input) {
+    writeParserInput(python, options.input);
+  }
+
+  // Decode UTF-8 theo stream để ký tự nhiều byte không bị cắt giữa hai chunk
+  python.stdout.setEncoding('utf8');
+
+  let stderr = '';
+  python.stderr.on('data', (data) => {
+    stderr += data.toString();
+  });
+
+  const exited = new Promise((resolve, reject) => {
+    python.on('error', reject);
+    python.on('close', (code) => resolve(code));
+  });
+
+  let stats = null;
+  let errorRecord = null;
+  let buffered = '';
+
+  const handleLine = async (line) => {
+    if (!line.trim()) return;
+    const record = JSON.parse(line);
+    // Node đang xử lý output (vd. INSERT chậm) thì parser bị chặn ở write, không phải treo
+    watch.touch();
+    if (record.type === 'question') {
+      await onQuestion(record);
+    } else if (record.type === 'stats') {
+      stats = record;
+    } else if (record.type === 'error') {
+      errorRecord = record;
+    }
+  };
+
+  try {
+    for await (const chunk of python.stdout) {
+      buffered += chunk;
+      const lines = buffered.split('\n');
+      buffered = lines.pop();
+      for (const line of lines) {
+        await handleLine(line);
+      }
+    }
+    // Parser bị dừng vì treo thì dòng cuối có thể bị cắt giữa chừng
+    if (!watch.stalled) {
+      await handleLine(buffered);
+    }
+  } catch (error) {
+    python.kill();
+    watch.stop();
+    throw error;
+  }
+
+  const code = await exited;
+  if (watch.stalled) {
+    errorRecord = { type: 'error', error: watch.error() };
+  }
+  return { code, stats, error: errorRecord, stderr, progress: watch.last };
+}
+
+export {
+  PARSER_PROGRESS_ARGS,
+  PARSER_PROGRESS_STDIO,
+  PARSER_STREAM_THRESHOLD,
+  logParserStages,
+  streamPythonParser,
+  watchParserProgress,
+  writeParserInput
+};
@@ -0,0 +1,88 @@
+/**
+ * Storage engine của multer cho file upload đưa vào parser Python
+ * File nhỏ (<= PARSER_UPLOAD_MEMORY_BYTES, mặc định 1MB) giữ trong RAM (file.buffer) như memoryStorage.
+ * File lớn hơn được ghi dần ra file tạm (file.path) ngay trong lúc nhận upload, heap của Node
+ * không giữ cả file. Parser đọc cả hai qua stdin (input '-'): buffer được ghi một lần, file tạm được pipe
+ * bằng read stream; daemon nhận file_path của file tạm thay cho nội dung base64.
+ */
+
+import crypto from 'crypto';
+import fs from 'fs';
+import os from 'os';
+import path from 'path';
+import { Readable } from 'stream';
+import { pipeline } from 'stream/promises';
+
+const memoryEnv = parseInt(process.env.PARSER_UPLOAD_MEMORY_BYTES, 10);
+const PARSER_UPLOAD_MEMORY_BYTES = Number.isNaN(memoryEnv) ? 1024 * 1024 : memoryEnv;
+
+// Nhận stream của file upload: { buffer, size } nếu không quá memoryBytes, { path, size } nếu lớn hơn
+async function receiveUpload(stream, directory, memoryBytes) {
+  const iterator = stream[Symbol.asyncIterator]();
+  const head = [];
+  let size = 0;
+  while (size <= memoryBytes) {
+    const { value, done } = await iterator.next();
+    if (done) {
+      return { buffer: Buffer.concat(head, size), size };
+    }
+    head.push(value);
+    size += value.length;
+  }
+
+  // Vượt ngưỡng: ghi phần đã nhận rồi ghi tiếp phần còn lại của upload ra file tạm
+  const filePath = path.join(directory, `parser-upload-${crypto.randomUUID()}`);
+  async function* rest() {
+    yield* head;
+    for (let next = await iterator.next(); !next.done; next = await iterator.next()) {
+      size += next.value.length;
+      yield next.value;
+    }
+  }
+  try {
+    await pipeline(Readable.from(rest()), fs.createWriteStream(filePath));
+  } catch (error) {
+    await fs.promises.rm(filePath, { force: true });
+    throw error;
+  }
+  return { path: filePath, size };
+}
+
+// Xóa file tạm của file upload (file trong RAM thì không cần làm gì)
+async function removeParserUpload(file) {
+  if (file && file.path) {
+    await fs.promises.rm(file.path, { force: true });
+  }
+}
+
+function parserUploadStorage({ directory = os.tmpdir(), memoryBytes = PARSER_UPLOAD_MEMORY_BYTES } = {}) {
+  return {
+    _handleFile(req, file, cb) {
+      receiveUpload(file.stream, directory, memoryBytes).then((info) => cb(null, info), cb);
+    },
+    _removeFile(req, file, cb) {
+      removeParserUpload(file).then(() => cb(null), cb);
+    }
+  };
+}
+
+// Input cho stdin của parser (xem writeParserInput của utils/parser-stream.js): Buffer hoặc read stream của file tạm
+function parserUploadInput(file) {
+  return file.path ? fs.createReadStream(file.path) : file.buffer;
+}
+
+// Params input của daemon: file_path của file tạm, content (base64) với file nhỏ trong RAM
+function parserDaemonInput(file, inputFormat) {
+  if (file.path) {
+    return { file_path: file.path, input_format: inputFormat };
+  }
+  return { content: file.buffer.toString('base64'), input_format: inputFormat };
+}
+
+export {
+  PARSER_UPLOAD_MEMORY_BYTES,
+  parserUploadStorage,
+  parserUploadInput,
+  parserDaemonInput,
+  removeParserUpload
+};
@@ -1,6 +1,7 @@
 import { pool } from '../../db/index.js';
 import fs from 'fs';
 import { parse } from 'csv-parse/sync';
+import { answerKey, foldedAnswerKey } from '../../utils/answer-keys.js';
 
 // Hàm tách link ảnh từ câu hỏi
 function extractImageUrl(questionText) {
@@ -49,13 +50,15 @@ async function createTangTocQuestion(questionData) {
         const timeLimit = getTimeLimitByQuestionNumber(questionNumber);
 
         const query = `
-            INSERT INTO questions (text, answer, category, difficulty, question_number, image_url, time_limit, created_by, created_at) 
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, NOW())
+            INSERT INTO questions (text, answer, answer_key, answer_key_folded, category, difficulty, question_number, image_url, time_limit, created_by, created_at) 
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, NOW())
         `;
         
         const [result] = await pool.query(query, [
             cleanText, 
             answer, 
+            answerKey(answer),
+            foldedAnswerKey(answer),
             category, 
             difficulty, 
             questionNumber, 
@@ -106,7 +109,7 @@ async function getRandomTangTocQuestions() {
         for (let questionNumber = 1; questionNumber <= 4; questionNumber++) {
             const query = `
                 SELECT * FROM questions 
-                WHERE category = 'tangtoc' AND question_number = ? 
+                WHERE category = 'tangtoc' AND question_number = ? AND deleted_at IS NULL 
                 ORDER BY RAND() 
                 LIMIT 1
             `;
@@ -121,16 +124,23 @@ async function getRandomTangTocQuestions() {
                 // Lấy accepted answers từ bảng tangtoc_answers
                 console.log('🔍 [TangToc] fetching accepted answers for question id =', question.id);
                 const [answerRows] = await pool.query(
-                    'SELECT id, answer FROM tangtoc_answers WHERE question_id = ?', 
+                    'SELECT id, answer, answer_key, answer_key_folded FROM tangtoc_answers WHERE question_id = ?', 
                     [question.id]
                 );
                 console.log('🔍 [TangToc] accepted answers count =', answerRows.length);
-                const acceptedAnswers = answerRows.map(r => ({ id: r.id, answer: r.answer }));
+                const acceptedAnswers = answerRows.map(r => ({
+                    id: r.id,
+                    answer: r.answer,
+                    answerKey: r.answer_key,
+                    answerKeyFolded: r.answer_key_folded
+                }));
                 
                 questions.push({
                     id: question.id,
                     text: question.text,
                     answer: question.answer,
+                    answerKey: question.answer_key,
+                    answerKeyFolded: question.answer_key_folded,
                     acceptedAnswers,
                     category: question.category,
                     difficulty: question.difficulty,
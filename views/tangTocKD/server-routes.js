@@ -2,11 +2,22 @@
 import express from 'express';
 import { getRandomTangTocQuestions, importTangTocQuestionsFromCSV } from './questions-parser.js';
 import { pool } from '../../db/index.js';
+import { isParserDaemonEnabled, callParserDaemon } from '../../utils/parser-daemon.js';
+import {
+    PARSER_PROGRESS_ARGS,
+    PARSER_PROGRESS_STDIO,
+    PARSER_STREAM_THRESHOLD,
+    logParserStages,
+    streamPythonParser,
+    watchParserProgress,
+    writeParserInput
+} from '../../utils/parser-stream.js';
+import { parserUploadStorage, parserUploadInput, parserDaemonInput, removeParserUpload } from '../../utils/parser-upload.js';
+import { answerKey, foldedAnswerKey } from '../../utils/answer-keys.js';
 import multer from 'multer';
 import path from 'path';
 import { fileURLToPath } from 'url';
 import { spawn } from 'child_process';
-import fs from 'fs';
 import { pipeline } from 'stream';
 import { promisify } from 'util';
 const streamPipeline = promisify(pipeline);
@@ -23,43 +34,174 @@ function extractImageUrl(text) {
     return match ? match[1] : null;
 }
 
-// Configure multer for file uploads
+// Configure multer for file uploads: file nhỏ giữ trong RAM, file lớn được ghi dần ra file tạm
+// (utils/parser-upload.js), cả hai được đưa vào stdin của parser
 const upload = multer({
-    dest: path.join(__dirname, '../../../uploads/temp/'),
+    storage: parserUploadStorage(),
     limits: {
         fileSize: 10 * 1024 * 1024 // 10MB limit
     },
     fileFilter: (req, file, cb) => {
-        const allowedTypes = ['.csv', '.txt', '.xlsx', '.xls'];
-        const ext = path.extname(file.originalname).toLowerCase();
-        if (allowedTypes.includes(ext)) {
+        if (parserInput(file.originalname)) {
             cb(null, true);
         } else {
-            cb(new Error('Chỉ hỗ trợ file CSV, TXT và XLSX'), false);
+            cb(new Error('Chỉ hỗ trợ file CSV, TXT, XLSX, file nén .gz/.bz2/.xz của chúng và file .zip'), false);
         }
     }
 });
 
 const router = express.Router();
 
-// Function để gọi Python parser
-async function parseTangTocWithPython(filePath, originalName) {
+// Extension của file upload -> --input-format / --compression của parser (input '-' = stdin)
+const PARSER_INPUT_FORMATS = { '.csv': 'csv', '.txt': 'csv', '.xlsx': 'xlsx', '.xls': 'xls', '.zip': 'zip' };
+const PARSER_COMPRESSIONS = { '.gz': 'gzip', '.bz2': 'bz2', '.xz': 'xz' };
+const ENCODING_PATTERN = /^[A-Za-z0-9][A-Za-z0-9_.:-]{0,39}$/;
+
+// { format, compression } của file upload theo tên (vd. bank.csv.gz -> csv + gzip), null nếu không hỗ trợ
+function parserInput(originalName) {
+    let name = originalName.toLowerCase();
+    const compression = PARSER_COMPRESSIONS[path.extname(name)] || null;
+    if (compression) {
+        name = name.slice(0, -path.extname(name).length);
+    }
+    const format = PARSER_INPUT_FORMATS[path.extname(name)];
+    if (!format || (compression && format === 'zip')) {
+        return null;
+    }
+    return { format, compression };
+}
+
+// PARSER_DIRECT_LOAD=1: parser ghi thẳng vào database (--load, INSERT theo batch) thay vì trả về từng câu hỏi
+const PARSER_DIRECT_LOAD = process.env.PARSER_DIRECT_LOAD === '1';
+
+// PARSER_DEDUP=flag|skip: parser đánh dấu/bỏ câu hỏi trùng trong file, PARSER_DEDUP_DB=1: so cả với database
+const PARSER_DEDUP = ['flag', 'skip'].includes(process.env.PARSER_DEDUP) ? process.env.PARSER_DEDUP : null;
+const PARSER_DEDUP_DB = process.env.PARSER_DEDUP_DB === '1';
+const PARSER_DEDUP_ARGS = PARSER_DEDUP ? ['--dedup', PARSER_DEDUP, ...(PARSER_DEDUP_DB ? ['--dedup-db'] : [])] : [];
+
+// Xử lý output của Python parser: lưu câu hỏi vào database và trả kết quả
+async function handleTangTocParseResult(result) {
+    const questions = result.questions || [];
+    const stats = result.stats || {};
+    const skippedRows = result.skipped_rows || [];
+    
+    // Lưu câu hỏi vào database (chế độ --load / --sync: parser đã ghi xong, chỉ lấy số dòng đã ghi)
+    if (!result.load && !result.sync) {
+        await saveQuestionsToDatabase(questions);
+    }
+    
+    let count = questions.length;
+    if (result.load) {
+        count = result.load.questions.inserted;
+    } else if (result.sync) {
+        count = result.sync.inserted + result.sync.updated;
+    }
+    
+    return {
+        questions: questions,
+        count: count,
+        stats: stats,
+        skippedRows: skippedRows,
+        sheets: result.sheets,
+        load: result.load,
+        sync: result.sync
+    };
+}
+
+// Parse file lớn ở chế độ --stream: lưu từng câu hỏi ngay khi parser validate xong
+async function parseTangTocStream(file, inputArgs) {
+    const scriptPath = path.join(__dirname, '..', '..', 'scripts', 'parser-tangtoc.py');
+    console.log('Python script path (stream):', scriptPath);
+    
+    const { code, stats, error, stderr } = await streamPythonParser(scriptPath, '-', saveQuestionToDatabase, {
+        cwd: path.join(__dirname, '../../../'),
+        args: [...inputArgs, ...PARSER_DEDUP_ARGS],
+        input: parserUploadInput(file),
+        onProgress: logParserStages('Parser Tăng Tốc (stream)')
+    });
+    
+    if (code !== 0 || !stats) {
+        throw new Error(`Python parser failed: ${error ? error.error : stderr}`);
+    }
+    
+    return {
+        questions: [],
+        count: stats.stats.success_count,
+        stats: stats.stats,
+        skippedRows: stats.skipped_rows || []
+    };
+}
+
+// Function để gọi Python parser (bankId: import lại ngân hàng câu hỏi, chỉ ghi các dòng thay đổi, xem --sync)
+// file: file upload của parserUploadStorage, nội dung được đưa vào stdin của parser (input '-')
+// encoding: encoding của file CSV/TXT (vd. cp1252), không có thì parser tự đoán
+async function parseTangTocWithPython(file, bankId = null, encoding = null) {
+    // File nén được giải nén dần trong parser, file .zip được parse như nhiều file (batch)
+    const { format: inputFormat, compression } = parserInput(file.originalname);
+    
+    // File Excel (hoặc .zip có thể chứa Excel): parse mọi sheet Tăng Tốc trong workbook bằng reader read-only
+    const allSheets = ['xlsx', 'xls', 'zip'].includes(inputFormat);
+    if (inputFormat !== 'csv') {
+        encoding = null;
+    }
+    const inputArgs = ['--input-format', inputFormat, ...(encoding ? ['--encoding', encoding] : []),
+        ...(compression ? ['--compression', compression] : [])];
+    
+    if (!allSheets && !PARSER_DIRECT_LOAD && !bankId && file.size >= PARSER_STREAM_THRESHOLD) {
+        return parseTangTocStream(file, inputArgs);
+    }
+    
+    if (isParserDaemonEnabled()) {
+        try {
+            const params = parserDaemonInput(file, inputFormat);
+            if (encoding) {
+                params.encoding = encoding;
+            }
+            if (compression) {
+                params.compression = compression;
+            }
+            if (allSheets) {
+                params.sheets = 'all';
+            }
+            if (bankId) {
+                params.sync = bankId;
+            } else if (PARSER_DIRECT_LOAD) {
+                params.load = true;
+            }
+            if (PARSER_DEDUP) {
+                Object.assign(params, { dedup: PARSER_DEDUP, dedup_db: PARSER_DEDUP_DB });
+            }
+            const result = await callParserDaemon('parse_tangtoc_file', params);
+            return await handleTangTocParseResult(result);
+        } catch (error) {
+            if (!error.daemonUnavailable) {
+                throw new Error(`Python parser failed: ${error.message}`);
+            }
+            console.error('Parser daemon không khả dụng, chuyển sang chạy python3 trực tiếp:', error.message);
+        }
+    }
+    
     return new Promise((resolve, reject) => {
         const pythonPath = 'python3';
         const scriptPath = path.join(__dirname, '..', '..', 'scripts', 'parser-tangtoc.py');
         
-        // Tạo file path với extension
-        const fileExt = path.extname(originalName);
-        const newFilePath = filePath + fileExt;
-        fs.renameSync(filePath, newFilePath);
-        
         console.log('Python script path:', scriptPath);
-        console.log('File path:', newFilePath);
+        console.log('File:', file.originalname, `(${file.size} bytes qua stdin)`);
         console.log('Working directory:', path.join(__dirname, '../../../'));
         
-        const python = spawn(pythonPath, [scriptPath, newFilePath], {
-            cwd: path.join(__dirname, '../../../')
+        const args = [scriptPath, '-', ...inputArgs, ...(allSheets ? ['--sheets', 'all'] : [])];
+        if (bankId) {
+            args.push('--sync', bankId);
+        } else if (PARSER_DIRECT_LOAD) {
+            args.push('--load');
+        }
+        args.push(...PARSER_DEDUP_ARGS, ...PARSER_PROGRESS_ARGS);
+        const python = spawn(pythonPath, args, {
+            cwd: path.join(__dirname, '../../../'),
+            stdio: PARSER_PROGRESS_STDIO
         });
+        // Parser không có tiến độ quá PARSER_STALL_TIMEOUT_MS thì bị dừng
+        const watch = watchParserProgress(python, { onProgress: logParserStages('Parser Tăng Tốc') });
         
         let output = '';
         let error = '';
@@ -72,50 +214,63 @@ async function parseTangTocWithPython(filePath, originalName) {
             error += data.toString();
         });
         
+        writeParserInput(python, parserUploadInput(file));
+        
+        python.on('error', reject);
         python.on('close', (code) => {
+            if (watch.stalled) {
+                reject(new Error(`Python parser failed: ${watch.error()}`));
+                return;
+            }
             if (code !== 0) {
-                reject(new Error(`Python parser failed: ${error}`));
+                // --load lỗi giữa chừng: parser in kết quả {success: false, error, load} ra stdout
+                let failure = null;
+                try {
+                    failure = JSON.parse(output);
+                } catch (parseError) {
+                    // Lỗi khác chỉ có trên stderr
+                }
+                reject(new Error(`Python parser failed: ${failure && failure.error ? failure.error : error}`));
                 return;
             }
             
+            let result;
             try {
-                const result = JSON.parse(output);
-                const questions = result.questions || [];
-                const stats = result.stats || {};
-                const skippedRows = result.skipped_rows || [];
-                
-                // Lưu câu hỏi vào database
-                saveQuestionsToDatabase(questions).then(() => {
-                    resolve({
-                        questions: questions,
-                        stats: stats,
-                        skippedRows: skippedRows
-                    });
-                }).catch(reject);
-                
+                result = JSON.parse(output);
             } catch (parseError) {
                 reject(new Error(`Failed to parse Python output: ${parseError.message}`));
+                return;
             }
+            
+            handleTangTocParseResult(result).then(resolve).catch(reject);
         });
     });
 }
 
+// Function để lưu một câu hỏi vào database
+async function saveQuestionToDatabase(question) {
+    await pool.query(
+        `INSERT INTO questions (question_number, text, answer, answer_key, answer_key_folded, category, image_url, time_limit, difficulty) 
+         VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)`,
+        [
+            question.question_number,
+            question.text,
+            question.answer,
+            // Parser đã tính sẵn key (scripts/answer_keys.py)
+            question.answer_key || answerKey(question.answer),
+            question.answer_key_folded || foldedAnswerKey(question.answer),
+            question.category,
+            question.image_url,
+            question.time_limit,
+            'medium'
+        ]
+    );
+}
+
 // Function để lưu câu hỏi vào database
 async function saveQuestionsToDatabase(questions) {
     for (const question of questions) {
-        await pool.query(
-            `INSERT INTO questions (question_number, text, answer, category, image_url, time_limit, difficulty) 
-             VALUES (?, ?, ?, ?, ?, ?, ?)`,
-            [
-                question.question_number,
-                question.text,
-                question.answer,
-                question.category,
-                question.image_url,
-                question.time_limit,
-                'medium'
-            ]
-        );
+        await saveQuestionToDatabase(question);
     }
 }
 
@@ -228,7 +383,7 @@ router.get('/api/admin/tangtoc/questions', async (req, res) => {
         console.log('🔍 [ADMIN] /api/admin/tangtoc/questions called');
         const [rows] = await pool.query(`
             SELECT * FROM questions 
-            WHERE category = 'tangtoc' 
+            WHERE category = 'tangtoc' AND deleted_at IS NULL 
             ORDER BY question_number, created_at DESC
         `);
         console.log('✅ [ADMIN] tangtoc questions count =', rows.length);
@@ -245,32 +400,32 @@ router.get('/api/admin/tangtoc/questions', async (req, res) => {
 router.get('/api/admin/tangtoc/statistics', async (req, res) => {
     try {
         const [totalRows] = await pool.query(`
-            SELECT COUNT(*) as total FROM questions WHERE category = 'tangtoc'
+            SELECT COUNT(*) as total FROM questions WHERE category = 'tangtoc' AND deleted_at IS NULL
         `);
         
         const [imageRows] = await pool.query(`
             SELECT COUNT(*) as count FROM questions 
-            WHERE category = 'tangtoc' AND image_url IS NOT NULL AND image_url != ''
+            WHERE category = 'tangtoc' AND deleted_at IS NULL AND image_url IS NOT NULL AND image_url != ''
         `);
         
         const [question1Rows] = await pool.query(`
             SELECT COUNT(*) as count FROM questions 
-            WHERE category = 'tangtoc' AND question_number = 1
+            WHERE category = 'tangtoc' AND deleted_at IS NULL AND question_number = 1
         `);
         
         const [question2Rows] = await pool.query(`
             SELECT COUNT(*) as count FROM questions 
-            WHERE category = 'tangtoc' AND question_number = 2
+            WHERE category = 'tangtoc' AND deleted_at IS NULL AND question_number = 2
         `);
         
         const [question3Rows] = await pool.query(`
             SELECT COUNT(*) as count FROM questions 
-            WHERE category = 'tangtoc' AND question_number = 3
+            WHERE category = 'tangtoc' AND deleted_at IS NULL AND question_number = 3
         `);
         
         const [question4Rows] = await pool.query(`
             SELECT COUNT(*) as count FROM questions 
-            WHERE category = 'tangtoc' AND question_number = 4
+            WHERE category = 'tangtoc' AND deleted_at IS NULL AND question_number = 4
         `);
         
         res.json({
@@ -295,6 +450,14 @@ router.post('/api/admin/tangtoc/upload', upload.single('file'), async (req, res)
         }
         
         const { mode } = req.body;
+        const bankId = typeof req.body.bankId === 'string' && req.body.bankId.trim() ? req.body.bankId.trim() : null;
+        if (bankId && bankId.length > 100) {
+            return res.status(400).json({ error: 'bankId tối đa 100 ký tự' });
+        }
+        const encoding = typeof req.body.encoding === 'string' && req.body.encoding.trim() ? req.body.encoding.trim() : null;
+        if (encoding && !ENCODING_PATTERN.test(encoding)) {
+            return res.status(400).json({ error: 'encoding không hợp lệ' });
+        }
         
         // Xóa câu hỏi cũ nếu mode là replace
         if (mode === 'replace') {
@@ -302,26 +465,28 @@ router.post('/api/admin/tangtoc/upload', upload.single('file'), async (req, res)
         }
         
         // Sử dụng Python parser
-        const result = await parseTangTocWithPython(req.file.path, req.file.originalname);
-        const questions = result.questions;
+        const result = await parseTangTocWithPython(req.file, bankId, encoding);
+        const count = result.count;
         const stats = result.stats;
         const skippedRows = result.skippedRows;
         
-        // Xóa file tạm
-        const fileExt = path.extname(req.file.originalname);
-        const tempFilePath = req.file.path + fileExt;
-        fs.unlinkSync(tempFilePath);
-        
         res.json({
             success: true,
-            count: questions.length,
-            message: `Đã thêm ${questions.length} câu hỏi Tăng Tốc`,
+            count: count,
+            message: `Đã thêm ${count} câu hỏi Tăng Tốc`,
             stats: stats,
-            skippedRows: skippedRows.slice(0, 10) // Chỉ gửi 10 dòng đầu bị bỏ qua
+            skippedRows: skippedRows.slice(0, 10), // Chỉ gửi 10 dòng đầu bị bỏ qua
+            sheets: result.sheets,
+            sync: result.sync
         });
     } catch (error) {
         console.error('Lỗi khi upload câu hỏi Tăng Tốc:', error);
         res.status(500).json({ error: error.message || 'Internal Server Error' });
+    } finally {
+        // File upload lớn được ghi ra file tạm, xóa sau khi parse xong
+        removeParserUpload(req.file).catch((unlinkError) => {
+            console.error('Lỗi khi xóa file tạm của upload:', unlinkError);
+        });
     }
 });
 
@@ -349,8 +514,8 @@ router.put('/api/admin/tangtoc/questions/:id', async (req, res) => {
         
         // Update question
         const [result] = await pool.query(
-            'UPDATE questions SET question_number = ?, text = ?, answer = ?, image_url = ?, time_limit = ? WHERE id = ? AND category = ?',
-            [question_number, cleanText, answer, imageUrl, timeLimit, questionId, 'tangtoc']
+            'UPDATE questions SET question_number = ?, text = ?, answer = ?, answer_key = ?, answer_key_folded = ?, image_url = ?, time_limit = ? WHERE id = ? AND category = ?',
+            [question_number, cleanText, answer, answerKey(answer), foldedAnswerKey(answer), imageUrl, timeLimit, questionId, 'tangtoc']
         );
         
         if (result.affectedRows > 0) {